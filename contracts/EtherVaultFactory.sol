@@ -0,0 +1,112 @@
+pragma solidity ^0.8.16;
+// SPDX-License-Identifier:MIT
+/*
+  Ethervault clone factory: deploys EtherVault / EtherVaultL2 as EIP-1167 minimal
+  proxies (45 bytes of runtime code) of one initializable implementation each, with
+  CREATE2, and initializes them in the same transaction.
+
+  The CREATE2 salt is the hash of the caller's salt and the vault's whole
+  configuration, so a predicted address can only ever hold a vault with that
+  configuration: nobody can front-run the deployment with other signers.
+*/
+
+import "./Ethervault.sol";
+import "./EtherVaultL2.sol";
+
+contract EtherVaultFactory {
+    address public immutable vaultImplementation;
+    address public immutable vaultL2Implementation;
+
+    event VaultCreated(address indexed vault, uint8 indexed version, address indexed creator, bytes32 salt);
+
+    constructor(address _vaultImplementation, address _vaultL2Implementation) {
+        require(_vaultImplementation.code.length > 0 && _vaultL2Implementation.code.length > 0, "No implementation");
+        (vaultImplementation, vaultL2Implementation) = (_vaultImplementation, _vaultL2Implementation);
+    }
+
+    function vaultSalt(
+        address[] calldata _signers,
+        uint8 _threshold,
+        uint128 _dailyLimit,
+        bytes32 salt
+        ) public pure returns (bytes32) {
+        return keccak256(abi.encode(_signers, _threshold, _dailyLimit, salt));
+    }
+
+    function vaultL2Salt(
+        address[] calldata _signers,
+        uint8 _threshold,
+        uint128 _dailyDollarLimit,
+        address ethPriceAggregator,
+        bytes32 salt
+        ) public pure returns (bytes32) {
+        return keccak256(abi.encode(_signers, _threshold, _dailyDollarLimit, ethPriceAggregator, salt));
+    }
+
+    function vaultAddress(
+        address[] calldata _signers,
+        uint8 _threshold,
+        uint128 _dailyLimit,
+        bytes32 salt
+        ) external view returns (address) {
+        return predict(vaultImplementation, vaultSalt(_signers, _threshold, _dailyLimit, salt));
+    }
+
+    function vaultL2Address(
+        address[] calldata _signers,
+        uint8 _threshold,
+        uint128 _dailyDollarLimit,
+        address ethPriceAggregator,
+        bytes32 salt
+        ) external view returns (address) {
+        return predict(vaultL2Implementation,
+            vaultL2Salt(_signers, _threshold, _dailyDollarLimit, ethPriceAggregator, salt));
+    }
+
+    function createVault(
+        address[] calldata _signers,
+        uint8 _threshold,
+        uint128 _dailyLimit,
+        bytes32 salt
+        ) external returns (address vault) {
+        vault = clone(vaultImplementation, vaultSalt(_signers, _threshold, _dailyLimit, salt));
+        EtherVaultInitializable(payable(vault)).initialize(_signers, _threshold, _dailyLimit);
+        emit VaultCreated(vault, 1, msg.sender, salt);
+    }
+
+    function createVaultL2(
+        address[] calldata _signers,
+        uint8 _threshold,
+        uint128 _dailyDollarLimit,
+        address ethPriceAggregator,
+        bytes32 salt
+        ) external returns (address vault) {
+        vault = clone(vaultL2Implementation,
+            vaultL2Salt(_signers, _threshold, _dailyDollarLimit, ethPriceAggregator, salt));
+        EtherVaultL2Initializable(payable(vault)).initialize(_signers, _threshold, _dailyDollarLimit,
+            ethPriceAggregator);
+        emit VaultCreated(vault, 2, msg.sender, salt);
+    }
+
+    function clone(address implementation, bytes32 salt) private returns (address instance) {
+        /*
+          @dev: EIP-1167 creation code: 10 bytes of constructor returning the 45 byte
+          runtime, which copies calldata, DELEGATECALLs the implementation and
+          returns or reverts with its returndata.
+        */
+        assembly {
+            let ptr := mload(0x40)
+            mstore(ptr, 0x3d602d80600a3d3981f3363d3d373d3d3d363d73000000000000000000000000)
+            mstore(add(ptr, 0x14), shl(0x60, implementation))
+            mstore(add(ptr, 0x28), 0x5af43d82803e903d91602b57fd5bf30000000000000000000000000000000000)
+            instance := create2(0, ptr, 0x37, salt)
+        }
+        require(instance != address(0), "Vault exists");
+    }
+
+    function predict(address implementation, bytes32 salt) private view returns (address) {
+        bytes32 codeHash = keccak256(abi.encodePacked(hex"3d602d80600a3d3981f3363d3d373d3d3d363d73", implementation,
+            hex"5af43d82803e903d91602b57fd5bf3"));
+        return address(uint160(uint256(keccak256(abi.encodePacked(bytes1(0xff), address(this), salt, codeHash)))));
+    }
+}
@@ -21,7 +21,11 @@ value.  ~ Darkerego, Copyright 2023
 import "./interfaces/IERC20.sol";
 import "./interfaces/IAggregatorV3.sol";
 
-contract EtherVaultL2 {
+/*
+  @dev: Everything but construction. EtherVaultL2 is the contract deployed in full,
+  EtherVaultL2Initializable the implementation behind EtherVaultFactory's clones.
+*/
+abstract contract EtherVaultL2Core {
 
     /*
       @dev: gas optimized variable packing
@@ -35,29 +39,45 @@ contract EtherVaultL2 {
     uint32 public execNonce;
     uint32 public txCount;
     uint32 private lastDay;
+    uint8 private signerSlots;
     uint128 public dailyLimit;
     uint128 public spentToday;
     // address public immutable consumerAddress;
 
 
+    /*
+      @dev: Approvals are a bitmap of signer positions (see isSigner), the
+      approval count is its popcount, and proposers are stored as their position.
+      A proposal is 2 slots, a tx 2 slots plus its data and dataHash.
+    */
     struct Proposal{
-        address proposer;
         address modifiedSigner;
         bool paused;
         uint8 newThreshold;
-        uint8 numSigners;
+        uint8 proposer;
         uint32 initiated;
         uint128 newLimit;
-        mapping (address => uint8) approvals;
+        uint128 approvals;
     }
 
+    struct TokenInfo{
+        address feed;
+        uint8 decimals;
+    }
+
+    /*
+      @dev: A tx submitted with submitTxHash stores no data, only keccak256(data):
+      hashed (packed with dest) is set and the approval that executes it
+      supplies the calldata to approveTxWithData.
+    */
     struct Transaction{
-        address proposer;
         address dest;
+        uint8 proposer;
+        bool hashed;
         uint128 value;
+        uint128 approvals;
         bytes data;
-        uint8 numSigners;
-        mapping (address => uint8) approvals;
+        bytes32 dataHash;
     }
 
     /*
@@ -68,21 +88,83 @@ contract EtherVaultL2 {
     string constant TX_NOT_FOUND_ERR = "Transaction not found";
     string constant INS_FUNDS_ERR = "Insufficient funds";
     string constant AUTH_ERR = "!Auth/Nonce/Mutex";
+    string constant SIG_ERR = "Bad signature";
+    string constant THRESHOLD_ERR = "Not enough signatures";
+    string constant DATA_REQUIRED_ERR = "Calldata required";
+    string constant DATA_ERR = "Calldata does not match hash";
+    string constant UNTRACKED_ERR = "Token not tracked";
+    string constant SIGNERS_ERR = "Too many signers";
+    string constant DUP_SIGNER_ERR = "Duplicate signer";
+
+    /*
+      @dev: Events, one per state transition, same names and layout as version 1.
+      Withdrawal is an under limit withdraw() that went out right away, with the
+      dollar value counted against the daily limit. The approval that executes a
+      tx or proposal only emits Execution / ProposalExecution. SignedExecution is an
+      executeWithSignatures call, keyed by its nonce.
+    */
+    event Deposit(address indexed sender, uint256 value);
+    event Submission(uint32 indexed txid, address indexed proposer, address dest, uint128 value);
+    event Approval(uint32 indexed txid, address indexed signer);
+    event Execution(uint32 indexed txid, address dest, uint128 value);
+    event Deletion(uint32 indexed txid);
+    event Withdrawal(address indexed token, address indexed destination, uint128 amount, uint128 dollarValue);
+    event ProposalSubmission(uint16 indexed proposalId, address indexed proposer, address modifiedSigner,
+        uint128 newLimit, uint8 newThreshold, bool paused);
+    event ProposalApproval(uint16 indexed proposalId, address indexed signer);
+    event ProposalExecution(uint16 indexed proposalId);
+    event ProposalDeletion(uint16 indexed proposalId);
+    event TokenTracked(address indexed token, address indexed feed);
+    event Skipped(uint32 indexed txid, uint8 reason);
+    event SignedExecution(uint32 indexed nonce, address dest, uint128 value, uint8 approvals);
+
+    /*
+      @dev: Per item results of approveTxs. Anything but SIGNED / EXECUTED leaves the
+      tx as it was (not signed by the caller) and is also logged as Skipped.
+    */
+    uint8 constant SIGNED = 0;
+    uint8 constant EXECUTED = 1;
+    uint8 constant NOT_FOUND = 2;
+    uint8 constant ALREADY_SIGNED = 3;
+    uint8 constant CALL_FAILED = 4;
+    uint8 constant DATA_REQUIRED = 5;
+
+    /*
+      @dev: Signer positions, one bit each in a uint128 approval bitmap.
+    */
+    uint8 constant MAX_SIGNERS = 128;
+
+    /*
+      @dev: EIP-712 typed data for executeWithSignatures. Signers sign
+      Execute(dest, value, keccak256(data), nonce) offline, for the contract
+      nonce the submitter will use, so a bundle can only ever execute once.
+    */
+    bytes32 constant DOMAIN_TYPEHASH =
+        keccak256("EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)");
+    bytes32 constant EXECUTE_TYPEHASH = keccak256("Execute(address dest,uint128 value,bytes32 dataHash,uint32 nonce)");
 
     /*
       @dev: Mapping Indexes
-       Signer address => 1 (substituted for bool to save gas)
+       Signer address => position, 1 to 128, 0 if not a signer. A position is
+       the signer's approval bit (1 << (position - 1)) and is never handed out
+       again (signerSlots counts them), so a new signer can not inherit the
+       approvals of a revoked one.
        TXID > Transaction
        ProposalID => Proposal
     */
     mapping (address => uint8) isSigner;
-    mapping (uint32 => Transaction) public pendingTxs;
-    mapping (uint16 => Proposal) public pendingProposals;
+    mapping (uint32 => Transaction) transactions;
+    mapping (uint16 => Proposal) proposals;
+    /*
+      @dev: Tracked tokens: tokenAddress => price feed and the token's decimals,
+      read once by trackToken and packed into one slot, so a withdrawal never
+      calls decimals() on the token. Feeds are checked to have 8 decimals.
+    */
+    mapping (address => TokenInfo) public tokenInfo;
     /*
-      @dev: Tracked token mapping (1 == enabled):
-      tokenAddress => 1
+      @dev: Position => signer address, to report proposers.
     */
-    mapping (address => address) public trackedTokens;
+    mapping (uint8 => address) signerAt;
 
     function auth(
         address s,
@@ -93,7 +175,7 @@ contract EtherVaultL2 {
           and ensures system state is not locked.
         */
 
-        require(isSigner[s] == 1 && _nonce == execNonce +1 && mutex == 0, AUTH_ERR);
+        require(isSigner[s] != 0 && _nonce == execNonce +1 && mutex == 0, AUTH_ERR);
         execNonce += 1;
     }
 
@@ -128,9 +210,9 @@ contract EtherVaultL2 {
 
     }
 
-    constructor(
+    function setup(
         /*
-          Ethervault Layer 2 Version Constructor Parameters:
+          Ethervault Layer 2 Version Constructor (and initializer) Parameters:
 
           @param _signers: list of addresses
           @param _threshold: required number of signers to process a transaction that is over limit or a raw transaction
@@ -141,14 +223,16 @@ contract EtherVaultL2 {
         uint8 _threshold,
         uint128 _dailyDollarLimit,
         address ethPriceAggregator
-        ){
+        ) internal {
         /*
             @dev: Since we're not constrained by deployment size in this layer 2 version,
             we can afford to validate the constructor arguments.
         */
         require(ethPriceAggregator != address(0), "EthFeed is zero address");
+        require(AggregatorV3Interface(ethPriceAggregator).decimals() == 8, "Decimals!=8");
         require(_signers.length >= 3, "Need at least 3 signers");
         require(_threshold < _signers.length && _threshold >= 2, "Threshold >= 2 < len(signers)");
+        require(_signers.length <= MAX_SIGNERS, SIGNERS_ERR);
 
         /*
               @dev: When I wrote this, I never imagined having more than 128
@@ -156,18 +240,22 @@ contract EtherVaultL2 {
         */
         unchecked{ // save some gas
         uint8 slen = uint8(_signers.length);
-        signerCount = slen;
         for (uint8 i = 0; i < slen; i++) {
-            isSigner[_signers[i]] = 1;
+            // a repeated address would take a second position and count twice
+            require(isSigner[_signers[i]] == 0, DUP_SIGNER_ERR);
+            addSigner(_signers[i]);
         }
+        signerCount = slen;
       }
         (threshold, dailyLimit, spentToday, mutex) = (_threshold, _dailyDollarLimit, 0, 0);
-        trackedTokens[address(0)] = ethPriceAggregator;
+        tokenInfo[address(0)] = TokenInfo(ethPriceAggregator, 18);
     }
     /*
        @dev: Allow arbitrary deposits to contract.
     */
-    receive() external payable {}
+    receive() external payable {
+        emit Deposit(msg.sender, msg.value);
+    }
 
 
 
@@ -181,9 +269,17 @@ contract EtherVaultL2 {
         address feedAddress,
         uint32 _nonce
         ) external protected(_nonce) {
-            require(trackedTokens[tokenAddress] == address(0), "Already tracking.");
+            require(tokenInfo[tokenAddress].feed == address(0), "Already tracking.");
             require(AggregatorV3Interface(feedAddress).decimals() == 8, "Decimals!=8");
-            trackedTokens[tokenAddress] = feedAddress;
+            tokenInfo[tokenAddress] = TokenInfo(feedAddress, IERC20(tokenAddress).decimals());
+            emit TokenTracked(tokenAddress, feedAddress);
+    }
+
+    function trackedTokens(address tokenAddress) external view returns(address) {
+        /*
+          @dev: Price feed of a token, zero address if untracked.
+        */
+        return tokenInfo[tokenAddress].feed;
     }
 
 
@@ -209,6 +305,19 @@ contract EtherVaultL2 {
 
         }
 
+    function tryExecute(
+        /*
+          @dev: execute() for batches: reports a failed call instead of reverting.
+        */
+        address recipient,
+        uint256 _value,
+        bytes memory data
+        ) private returns (bool success) {
+       assembly {
+            success := call(gas(), recipient, _value, add(data, 0x20), mload(data), 0x0, 0x0)
+        }
+    }
+
     function newProposal(
         /*
           @dev: Create a new proposal to change the daily limits, the signer threshold, or to
@@ -221,14 +330,16 @@ contract EtherVaultL2 {
         bool _paused,
         uint32 _nonce
     ) external protected(_nonce) returns(uint16){
+        // positions are never reused, refuse an addition that could never execute
+        require(_signer == address(0) || isSigner[_signer] != 0 || signerSlots < MAX_SIGNERS, SIGNERS_ERR);
         proposalId += 1;
-        Proposal storage prop = pendingProposals[proposalId];
-        (prop.modifiedSigner, prop.newLimit, prop.initiated,
-        prop.newThreshold, prop.proposer) = (_signer, _limit,
-        uint32(block.timestamp),  _threshold, msg.sender);
+        Proposal storage prop = proposals[proposalId];
+        (prop.modifiedSigner, prop.paused, prop.newThreshold, prop.proposer,
+        prop.initiated) = (_signer, _paused, _threshold, isSigner[msg.sender],
+        uint32(block.timestamp));
         // stack too deep
-        prop.paused = _paused;
-        sign(0, proposalId, msg.sender);
+        (prop.newLimit, prop.approvals) = (_limit, signerBit(msg.sender));
+        emit ProposalSubmission(proposalId, msg.sender, _signer, _limit, _threshold, _paused);
         return proposalId;
     }
 
@@ -239,9 +350,10 @@ contract EtherVaultL2 {
         uint16 _proposalId,
         uint32 _nonce
         ) external protected(_nonce) {
-        Proposal storage proposalObj = pendingProposals[_proposalId];
-        if (proposalObj.proposer == msg.sender){
-            delete pendingProposals[_proposalId];
+        Proposal storage proposalObj = proposals[_proposalId];
+        if (proposalObj.proposer == isSigner[msg.sender]){
+            delete proposals[_proposalId];
+            emit ProposalDeletion(_proposalId);
         }
     }
 
@@ -253,10 +365,10 @@ contract EtherVaultL2 {
           @dev: Approve a pending proposal and execute it if all required
            signers are accounted for.
         */
-        require(pendingProposals[_proposalId].approvals[msg.sender] == 0, DUP_SIG_ERR);
-        Proposal storage proposalObj = pendingProposals[_proposalId];
+        Proposal storage proposalObj = proposals[_proposalId];
+        require(proposalObj.approvals & signerBit(msg.sender) == 0, DUP_SIG_ERR);
         // if all signers have signed
-        if(proposalObj.numSigners +1 == signerCount)  {
+        if(countApprovals(proposalObj.approvals) +1 == signerCount)  {
              // if limit/threshold are being updated
             if (proposalObj.newLimit > 0||proposalObj.newThreshold >0){
                 dailyLimit = proposalObj.newLimit;
@@ -264,7 +376,7 @@ contract EtherVaultL2 {
             } // set paused
             paused = proposalObj.paused;
             if (proposalObj.modifiedSigner != address(0)) {
-                if (isSigner[proposalObj.modifiedSigner] == 1) {
+                if (isSigner[proposalObj.modifiedSigner] != 0) {
                     /*
                     @dev: Signer exists, so this must be a revokation proposal.
                     revoke this signer and reset the approval count.
@@ -277,15 +389,17 @@ contract EtherVaultL2 {
                     @dev: Signer does not exist yet, so this must be signer addition.
                     Grant signer role, reset pending signer count.
                     */
-                    isSigner[proposalObj.modifiedSigner] = 1;
+                    addSigner(proposalObj.modifiedSigner);
                     signerCount+=1;
             }
             }
-            delete pendingProposals[_proposalId];
+            delete proposals[_proposalId];
+            emit ProposalExecution(_proposalId);
         } else {
             // More signatures needed, so just sign.
             //signProposal(msg.sender, _proposalId);
             sign(0, _proposalId, msg.sender);
+            emit ProposalApproval(_proposalId, msg.sender);
         }
     }
 
@@ -298,9 +412,10 @@ contract EtherVaultL2 {
         uint32 txid,
         uint32 _nonce
         ) external protected(_nonce) {
-        require(pendingTxs[txid].proposer == msg.sender, "!proposer");
-        require(pendingTxs[txid].dest != address(0), TX_NOT_FOUND_ERR);
-        delete pendingTxs[txid];
+        require(transactions[txid].proposer == isSigner[msg.sender], "!proposer");
+        require(transactions[txid].dest != address(0), TX_NOT_FOUND_ERR);
+        delete transactions[txid];
+        emit Deletion(txid);
     }
 
 
@@ -314,15 +429,172 @@ contract EtherVaultL2 {
         uint32 txid,
         uint32 _nonce
         ) external protected(_nonce) checkPaused {
-        Transaction storage _tx = pendingTxs[txid];
-        require(pendingTxs[txid].approvals[msg.sender] == 0, DUP_SIG_ERR);
+        Transaction storage _tx = transactions[txid];
+        uint128 approvals = _tx.approvals;
+        require(approvals & signerBit(msg.sender) == 0, DUP_SIG_ERR);
         require(_tx.dest != address(0), TX_NOT_FOUND_ERR);
-        if(_tx.numSigners + 1 >= threshold){
+        if(countApprovals(approvals) + 1 >= threshold){
+            require(!_tx.hashed, DATA_REQUIRED_ERR);
             execute(_tx.dest, _tx.value, _tx.data);
+            emit Execution(txid, _tx.dest, _tx.value);
             // should not have any re-entrency vulnerability because of mutex checks
-            delete pendingTxs[txid];
+            delete transactions[txid];
+        } else {
+            sign(txid, 0, msg.sender);
+            emit Approval(txid, msg.sender);
+        }
+    }
+
+    function approveTxs(
+        /*
+          @dev: Approve several pending txs for one nonce. Each one is signed, or executed
+          once the threshold is met, exactly as approveTx would. A tx that is not found,
+          is already signed by the caller, whose call fails, or that needs its calldata
+          (approveTxWithData) to execute is skipped and reported instead of reverting
+          the whole batch; a skipped tx is left pending.
+        */
+        uint32[] calldata txids,
+        uint32 _nonce
+        ) external protected(_nonce) checkPaused returns (uint8[] memory results) {
+        results = new uint8[](txids.length);
+        for (uint i = 0; i < txids.length; i++) {
+            results[i] = approveOne(txids[i]);
+        }
+    }
+
+    function approveOne(uint32 txid) private returns (uint8) {
+        Transaction storage _tx = transactions[txid];
+        if (_tx.dest == address(0)) {
+            emit Skipped(txid, NOT_FOUND);
+            return NOT_FOUND;
+        }
+        uint128 approvals = _tx.approvals;
+        if (approvals & signerBit(msg.sender) != 0) {
+            emit Skipped(txid, ALREADY_SIGNED);
+            return ALREADY_SIGNED;
+        }
+        if (countApprovals(approvals) + 1 >= threshold) {
+            if (_tx.hashed) {
+                emit Skipped(txid, DATA_REQUIRED);
+                return DATA_REQUIRED;
+            }
+            if (!tryExecute(_tx.dest, _tx.value, _tx.data)) {
+                emit Skipped(txid, CALL_FAILED);
+                return CALL_FAILED;
+            }
+            emit Execution(txid, _tx.dest, _tx.value);
+            delete transactions[txid];
+            return EXECUTED;
+        }
+        sign(txid, 0, msg.sender);
+        emit Approval(txid, msg.sender);
+        return SIGNED;
+    }
+
+    function approveTxWithData(
+        /*
+          @dev: approveTx for a tx submitted with submitTxHash: `data` must hash to
+          the committed dataHash, and is executed if this approval meets the threshold.
+        */
+        uint32 txid,
+        bytes calldata data,
+        uint32 _nonce
+        ) external protected(_nonce) checkPaused {
+        Transaction storage _tx = transactions[txid];
+        uint128 approvals = _tx.approvals;
+        require(approvals & signerBit(msg.sender) == 0, DUP_SIG_ERR);
+        require(_tx.dest != address(0), TX_NOT_FOUND_ERR);
+        require(_tx.hashed && keccak256(data) == _tx.dataHash, DATA_ERR);
+        if (countApprovals(approvals) + 1 >= threshold) {
+            execute(_tx.dest, _tx.value, data);
+            emit Execution(txid, _tx.dest, _tx.value);
+            delete transactions[txid];
         } else {
             sign(txid, 0, msg.sender);
+            emit Approval(txid, msg.sender);
+        }
+    }
+
+    function domainSeparator() public view returns (bytes32) {
+        return keccak256(abi.encode(DOMAIN_TYPEHASH, keccak256("EtherVaultL2"), keccak256("2"), block.chainid,
+            address(this)));
+    }
+
+    function executeDigest(
+        /*
+          @dev: The EIP-712 digest signers sign for executeWithSignatures.
+        */
+        address dest,
+        uint128 value,
+        bytes calldata data,
+        uint32 _nonce
+        ) public view returns (bytes32) {
+        return keccak256(abi.encodePacked("\x19\x01", domainSeparator(),
+            keccak256(abi.encode(EXECUTE_TYPEHASH, dest, value, keccak256(data), _nonce))));
+    }
+
+    function executeWithSignatures(
+        /*
+          @dev: Execute a transaction approved off-chain: `threshold` approvals, the
+          sender's plus EIP-712 signatures from other signers over (dest, value,
+          keccak256(data), _nonce), in one call and without touching pendingTxs.
+          Like an approved pending tx, it is not counted against the daily limit.
+        */
+        address dest,
+        uint128 value,
+        bytes calldata data,
+        uint32 _nonce,
+        bytes calldata signatures
+        ) external protected(_nonce) checkPaused {
+        uint8 approvals = checkSignatures(executeDigest(dest, value, data, _nonce), signatures) + 1;
+        require(approvals >= threshold, THRESHOLD_ERR);
+        execute(dest, value, data);
+        emit SignedExecution(_nonce, dest, value, approvals);
+    }
+
+    function checkSignatures(
+        /*
+          @dev: Concatenated 65 byte (r, s, v) signatures, ordered by signer address
+          so a duplicate is caught with one comparison. The submitter approves by
+          sending the transaction, a signature of its own is refused. ecrecover
+          returns address(0) for a bad signature, which never passes `signer > last`.
+        */
+        bytes32 digest,
+        bytes calldata signatures
+        ) private view returns (uint8 count) {
+        require(signatures.length % 65 == 0, SIG_ERR);
+        address last;
+        for (uint i = 0; i < signatures.length; i += 65) {
+            address signer = ecrecover(digest, uint8(signatures[i + 64]), bytes32(signatures[i:i + 32]),
+                bytes32(signatures[i + 32:i + 64]));
+            require(signer > last && signer != msg.sender && isSigner[signer] != 0, SIG_ERR);
+            last = signer;
+            count += 1;
+        }
+    }
+
+    function addSigner(address signer) private {
+        /*
+          @dev: Grant the signer role at the next unused position.
+        */
+        require(signerSlots < MAX_SIGNERS, SIGNERS_ERR);
+        signerSlots += 1;
+        (isSigner[signer], signerAt[signerSlots]) = (signerSlots, signer);
+    }
+
+    function signerBit(address signer) private view returns (uint128) {
+        return uint128(1) << (isSigner[signer] - 1);
+    }
+
+    function countApprovals(uint128 approvals) private pure returns (uint8 count) {
+        /*
+          @dev: Popcount, one round per set bit (clears the lowest one).
+        */
+        unchecked {
+            while (approvals != 0) {
+                approvals &= approvals - 1;
+                count += 1;
+            }
         }
     }
 
@@ -331,14 +603,26 @@ contract EtherVaultL2 {
           @dev: Sign a pending proposal or transaction.
         */
         if (txid > 0) {
-            pendingTxs[txid].approvals[signer] = 1;
-            pendingTxs[txid].numSigners += 1;
+            transactions[txid].approvals |= signerBit(signer);
         } else {
-            pendingProposals[_proposalId].approvals[signer] = 1;
-            pendingProposals[_proposalId].numSigners += 1;
+            proposals[_proposalId].approvals |= signerBit(signer);
         }
     }
 
+    function pendingTxs(uint32 txid) external view returns (address proposer, address dest, uint128 value,
+        bytes memory data, uint8 numSigners, bool hashed, bytes32 dataHash) {
+        Transaction storage _tx = transactions[txid];
+        return (signerAt[_tx.proposer], _tx.dest, _tx.value, _tx.data, countApprovals(_tx.approvals), _tx.hashed,
+            _tx.dataHash);
+    }
+
+    function pendingProposals(uint16 _proposalId) external view returns (address proposer, address modifiedSigner,
+        bool paused, uint8 newThreshold, uint8 numSigners, uint32 initiated, uint128 newLimit) {
+        Proposal storage prop = proposals[_proposalId];
+        return (signerAt[prop.proposer], prop.modifiedSigner, prop.paused, prop.newThreshold,
+            countApprovals(prop.approvals), prop.initiated, prop.newLimit);
+    }
+
     function checkBalance(
         /*
           @dev: Function that checks if the balance of a token or native Eth is sufficient
@@ -399,13 +683,19 @@ contract EtherVaultL2 {
         */
     ) external protected(_nonce) checkPaused returns (uint32){
         checkBalance(tokenAddress, amount);
-        if (underLimit(tokenAddress, amount)) {
-            spentToday += uint128(getDollarValue(tokenAddress, amount))  / (10**getTokenDecimals(tokenAddress));
+        TokenInfo memory info = tokenInfo[tokenAddress];
+        // untracked tokens can not be priced, they only leave through submitRawTx
+        require(info.feed != address(0), UNTRACKED_ERR);
+        // one price read serves both the limit check and spentToday
+        uint dollarValue = dollarValueOf(info, amount) / (10**info.decimals);
+        if (underLimit(dollarValue)) {
+            spentToday += uint128(dollarValue);
             if (tokenAddress == address(0)) {
                 execute(destination, amount, "");
             } else {
                 execute(tokenAddress, 0, encodeTransfer(destination, amount));
             }
+            emit Withdrawal(tokenAddress, destination, amount, uint128(dollarValue));
             return 0;
         } else {
             if (tokenAddress == address(0)) {
@@ -427,9 +717,11 @@ contract EtherVaultL2 {
         ) private returns(uint32) {
         txCount += 1;
         // requires approval from signatories -- not factored into daily allowance
-        Transaction storage txObject = pendingTxs[txCount];
-        (txObject.proposer, txObject.dest, txObject.value, txObject.data) = (proposer, recipient, value, data);
-        sign(txCount, 0, proposer);
+        Transaction storage txObject = transactions[txCount];
+        (txObject.dest, txObject.proposer, txObject.value, txObject.approvals) =
+            (recipient, isSigner[proposer], value, signerBit(proposer));
+        txObject.data = data;
+        emit Submission(txCount, proposer, recipient, value);
         return txCount;
     }
 
@@ -452,13 +744,24 @@ contract EtherVaultL2 {
 
     }
 
-    function getTokenDecimals(address tokenAddress) private view returns(uint8) {
-        //uint decimals;
-        if (tokenAddress == address(0)) {
-            return 18;
-        } else {
-            return IERC20(tokenAddress).decimals();
-        }
+    function submitTxHash(
+        /*
+          @dev: submitRawTx that commits to keccak256(data) instead of storing data,
+          one slot however large the payload. The approval that meets the threshold
+          supplies the calldata (approveTxWithData).
+        */
+        address recipient,
+        uint128 value,
+        bytes32 dataHash,
+        uint32 _nonce
+        ) external protected(_nonce) returns(uint32) {
+        checkBalance(address(0), value);
+        txCount += 1;
+        Transaction storage txObject = transactions[txCount];
+        (txObject.dest, txObject.proposer, txObject.hashed, txObject.value, txObject.approvals, txObject.dataHash) =
+            (recipient, isSigner[msg.sender], true, value, signerBit(msg.sender), dataHash);
+        emit Submission(txCount, msg.sender, recipient, value);
+        return txCount;
     }
 
     function getDollarValue(address tokenAddress, uint256 amount)
@@ -470,8 +773,12 @@ contract EtherVaultL2 {
         view
         returns (uint256)
     {
-        uint decimals = getTokenDecimals(tokenAddress);
-        (, int256 answer, , , ) = AggregatorV3Interface(trackedTokens[tokenAddress]).latestRoundData();
+        return dollarValueOf(tokenInfo[tokenAddress], amount);
+    }
+
+    function dollarValueOf(TokenInfo memory info, uint256 amount) private view returns (uint256) {
+        uint decimals = info.decimals;
+        (, int256 answer, , , ) = AggregatorV3Interface(info.feed).latestRoundData();
         uint price;
         if (decimals == 8) {
             price = uint(answer);
@@ -487,8 +794,7 @@ contract EtherVaultL2 {
     }
 
     function underLimit(
-        address tokenAddress,
-        uint128 _value
+        uint dollarValue
         ) private returns (bool) {
         /*
           @dev: Function to determine whether or not a requested
@@ -501,11 +807,6 @@ contract EtherVaultL2 {
         if (t > lastDay) {
             (spentToday, lastDay) = (0,t);
         }
-        if (trackedTokens[tokenAddress] == address(0)) {
-            // not tracking limits on this token, no limit
-            return true;
-        }
-        uint dollarValue = getDollarValue(tokenAddress, _value) / (10**getTokenDecimals(tokenAddress));
         if (spentToday + dollarValue <= dailyLimit) {
             return true;
         } else {
@@ -516,3 +817,34 @@ contract EtherVaultL2 {
 
 }
 
+
+contract EtherVaultL2 is EtherVaultL2Core {
+    constructor(
+        address[] memory _signers,
+        uint8 _threshold,
+        uint128 _dailyDollarLimit,
+        address ethPriceAggregator
+        ){
+        setup(_signers, _threshold, _dailyDollarLimit, ethPriceAggregator);
+    }
+}
+
+
+contract EtherVaultL2Initializable is EtherVaultL2Core {
+    /*
+      @dev: Implementation for EIP-1167 clones. A clone starts with empty storage,
+      so version is 0 until initialize() runs, and is the initialized flag. The
+      implementation itself got version = 2 from its constructor and can never be
+      initialized. Every call to a clone costs one extra DELEGATECALL.
+    */
+    function initialize(
+        address[] calldata _signers,
+        uint8 _threshold,
+        uint128 _dailyDollarLimit,
+        address ethPriceAggregator
+        ) external {
+        require(version == 0, "Initialized");
+        version = 2;
+        setup(_signers, _threshold, _dailyDollarLimit, ethPriceAggregator);
+    }
+}
@@ -14,7 +14,11 @@ a lightweight, gas effecient, multisignature wallet ~ Darkerego, Copyright 2023
 
 //import "@chainlink/contracts/src/v0.8/interfaces/AggregatorV3Interface.sol";
 
-contract EtherVault {
+/*
+  @dev: Everything but construction. EtherVault is the contract deployed in full,
+  EtherVaultInitializable the implementation behind EtherVaultFactory's clones.
+*/
+abstract contract EtherVaultCore {
 
     /*
       @dev: gas optimized variable packing
@@ -29,27 +33,38 @@ contract EtherVault {
     uint32 public execNonce;
     uint32 public txCount;
     uint32 private lastDay;
+    uint8 private signerSlots;
     uint128 public dailyLimit;
     uint128 public spentToday;
 
 
+    /*
+      @dev: Approvals are a bitmap of signer positions (see isSigner), the
+      approval count is its popcount, and the proposer is stored as its position.
+      A proposal is 2 slots, a tx 2 slots plus its data and dataHash.
+    */
     struct Proposal{
-        address proposer;
         address modifiedSigner;
         uint8 newThreshold;
-        uint8 numSigners;
+        uint8 proposer;
         uint32 initiated;
-        uint128 newLimit;
         bool paused;
-        mapping (address => uint8) approvals;
+        uint128 newLimit;
+        uint128 approvals;
     }
 
+    /*
+      @dev: A tx submitted with submitTxHash stores no data, only keccak256(data):
+      hashed (packed with dest) is set and the approval that executes it
+      supplies the calldata to approveTxWithData.
+    */
     struct Transaction{
         address dest;
+        bool hashed;
         uint128 value;
+        uint128 approvals;
         bytes data;
-        uint8 numSigners;
-        mapping (address => uint8) approvals;
+        bytes32 dataHash;
     }
 
     /*
@@ -67,17 +82,73 @@ contract EtherVault {
     error NonceError();
     error ExecutionPaused();
     error RefuseInvalidTransaction();
+    error InvalidSignature();
+    error NotEnoughSignatures();
+    error CalldataRequired();
+    error DataMismatch();
+    error TooManySigners();
+    error DuplicateSigner(address);
+
+    /*
+      @dev: Events, one per state transition. Only ids and actors are indexed
+      (topics cost 375 gas each), the rest goes in the data section. A txid of 0
+      in Execution means the transfer was under the daily limit and went out
+      right away. The approval that executes a tx or proposal only emits
+      Execution / ProposalExecution, the signer is that transaction's sender.
+      SignedExecution is an executeWithSignatures call, keyed by its nonce.
+    */
+    event Deposit(address indexed sender, uint256 value);
+    event Submission(uint32 indexed txid, address indexed proposer, address dest, uint128 value);
+    event Approval(uint32 indexed txid, address indexed signer);
+    event Execution(uint32 indexed txid, address dest, uint128 value);
+    event Deletion(uint32 indexed txid);
+    event ProposalSubmission(uint16 indexed proposalId, address indexed proposer, address modifiedSigner,
+        uint128 newLimit, uint8 newThreshold, bool paused);
+    event ProposalApproval(uint16 indexed proposalId, address indexed signer);
+    event ProposalExecution(uint16 indexed proposalId);
+    event ProposalDeletion(uint16 indexed proposalId);
+    event Skipped(uint32 indexed txid, uint8 reason);
+    event SignedExecution(uint32 indexed nonce, address dest, uint128 value, uint8 approvals);
+
+    /*
+      @dev: Per item results of approveTxs, anything above EXECUTED was skipped.
+    */
+    uint8 constant SIGNED = 0;
+    uint8 constant EXECUTED = 1;
+    uint8 constant NOT_FOUND = 2;
+    uint8 constant ALREADY_SIGNED = 3;
+    uint8 constant CALL_FAILED = 4;
+    uint8 constant DATA_REQUIRED = 5;
+
+    /*
+      @dev: Signer positions, one bit each in a uint128 approval bitmap.
+    */
+    uint8 constant MAX_SIGNERS = 128;
+
+    /*
+      @dev: EIP-712 typed data for executeWithSignatures. Signers sign
+      Execute(dest, value, keccak256(data), nonce) offline, for the contract
+      nonce the submitter will use, so a bundle can only ever execute once.
+    */
+    bytes32 constant DOMAIN_TYPEHASH =
+        keccak256("EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)");
+    bytes32 constant EXECUTE_TYPEHASH = keccak256("Execute(address dest,uint128 value,bytes32 dataHash,uint32 nonce)");
 
 
     /*
       @dev: Mapping Indexes
-       Signer address => 1 (substituted for bool to save gas)
+       Signer address => position, 1 to 128, 0 if not a signer. A position is
+       the signer's approval bit (1 << (position - 1)) and is never handed out
+       again (signerSlots counts them), so a new signer can not inherit the
+       approvals of a revoked one.
        TXID > Transaction
        ProposalID => Proposal
+       Position => signer address, to report proposers
     */
     mapping (address => uint8) isSigner;
-    mapping (uint32 => Transaction) public pendingTxs;
-    mapping (uint16 => Proposal) public pendingProposals;
+    mapping (uint32 => Transaction) transactions;
+    mapping (uint16 => Proposal) proposals;
+    mapping (uint8 => address) signerAt;
     //token address > chainlink price feed address
     //mapping (address => address) priceFeeds;
 
@@ -111,23 +182,30 @@ contract EtherVault {
 
     }
 
-    constructor(
+    function setup(
         address[] memory _signers,
         uint8 _threshold,
         uint128 _dailyLimit
         //address ethPriceFeedAddress
-        ){
+        ) internal {
             /*
               @dev: When I wrote this, I never imagined having more than 128
               signers. If for some reason you do, you may want to modify this code.
             */
 
+        if (_signers.length > MAX_SIGNERS) {
+            revert TooManySigners();
+        }
         unchecked{ // save some gas
         uint8 slen = uint8(_signers.length);
-        signerCount = slen;
         for (uint8 i = 0; i < slen; i++) {
-            isSigner[_signers[i]] = 1;
+            // a repeated address would take a second position and count twice
+            if (isSigner[_signers[i]] != 0) {
+                revert DuplicateSigner(_signers[i]);
+            }
+            addSigner(_signers[i]);
         }
+        signerCount = slen;
       }
         (threshold, dailyLimit, spentToday, mutex, paused) = (_threshold, _dailyLimit, 0, 0, false);
 
@@ -136,7 +214,10 @@ contract EtherVault {
        @dev: Allow arbitrary deposits to contract.
      */
 
-    receive() external payable {}
+    receive() external payable {
+        // ~1.4k gas, still fits the 2300 gas stipend of transfer() / send()
+        emit Deposit(msg.sender, msg.value);
+    }
 
     function execute(
         /*
@@ -159,19 +240,106 @@ contract EtherVault {
             }
         }
 
+    function tryExecute(address recipient, uint256 _value, bytes memory data) private returns (bool success) {
+        /*
+          @dev: execute() for batches: reports a failed call instead of reverting.
+        */
+        assembly {
+            success := call(gas(), recipient, _value, add(data, 0x20), mload(data), 0x0, 0x0)
+        }
+    }
+
+    function domainSeparator() public view returns (bytes32) {
+        return keccak256(abi.encode(DOMAIN_TYPEHASH, keccak256("EtherVault"), keccak256("1"), block.chainid,
+            address(this)));
+    }
+
+    function executeDigest(
+        /*
+          @dev: The EIP-712 digest signers sign for executeWithSignatures.
+        */
+        address dest,
+        uint128 value,
+        bytes calldata data,
+        uint32 _nonce
+        ) public view returns (bytes32) {
+        return keccak256(abi.encodePacked("\x19\x01", domainSeparator(),
+            keccak256(abi.encode(EXECUTE_TYPEHASH, dest, value, keccak256(data), _nonce))));
+    }
+
+    function checkSignatures(bytes32 digest, bytes calldata signatures) private view returns (uint8 count) {
+        /*
+          @dev: Concatenated 65 byte (r, s, v) signatures, ordered by signer address
+          so a duplicate is caught with one comparison. The submitter approves by
+          sending the transaction, a signature of its own is refused. ecrecover
+          returns address(0) for a bad signature, which never passes `signer > last`.
+        */
+        if (signatures.length % 65 != 0) {
+            revert InvalidSignature();
+        }
+        address last;
+        for (uint i = 0; i < signatures.length; i += 65) {
+            address signer = ecrecover(digest, uint8(signatures[i + 64]), bytes32(signatures[i:i + 32]),
+                bytes32(signatures[i + 32:i + 64]));
+            if (signer <= last || signer == msg.sender || isSigner[signer] == 0) {
+                revert InvalidSignature();
+            }
+            last = signer;
+            count += 1;
+        }
+    }
+
+    function addSigner(address signer) private {
+        /*
+          @dev: Grant the signer role at the next unused position.
+        */
+        if (signerSlots == MAX_SIGNERS) {
+            revert TooManySigners();
+        }
+        signerSlots += 1;
+        (isSigner[signer], signerAt[signerSlots]) = (signerSlots, signer);
+    }
+
+    function signerBit(address signer) private view returns (uint128) {
+        return uint128(1) << (isSigner[signer] - 1);
+    }
+
+    function countApprovals(uint128 approvals) private pure returns (uint8 count) {
+        /*
+          @dev: Popcount, one round per set bit (clears the lowest one).
+        */
+        unchecked {
+            while (approvals != 0) {
+                approvals &= approvals - 1;
+                count += 1;
+            }
+        }
+    }
+
     function sign(uint32 txid, uint16 _proposalId, address signer) private {
         /*
           @dev: Function to sign transactions and proposals.
         */
         if (txid == 0) {
-            pendingProposals[_proposalId].approvals[signer] = 1;
-            pendingProposals[_proposalId].numSigners += 1;
+            proposals[_proposalId].approvals |= signerBit(signer);
         } else {
-            pendingTxs[txid].approvals[signer] = 1;
-            pendingTxs[txid].numSigners += 1;
+            transactions[txid].approvals |= signerBit(signer);
         }
     }
 
+    function pendingTxs(uint32 txid) external view returns (address dest, uint128 value, bytes memory data,
+        uint8 numSigners, bool hashed, bytes32 dataHash) {
+        Transaction storage _tx = transactions[txid];
+        return (_tx.dest, _tx.value, _tx.data, countApprovals(_tx.approvals), _tx.hashed, _tx.dataHash);
+    }
+
+    function pendingProposals(uint16 _proposalId) external view returns (address proposer, address modifiedSigner,
+        uint8 newThreshold, uint8 numSigners, uint32 initiated, uint128 newLimit, bool paused) {
+        Proposal storage prop = proposals[_proposalId];
+        return (signerAt[prop.proposer], prop.modifiedSigner, prop.newThreshold, countApprovals(prop.approvals),
+            prop.initiated, prop.newLimit, prop.paused);
+    }
+
     function newProposal(
         /*
           @dev: Create a new proposal to change the daily limits, the signer threshold, or to
@@ -184,13 +352,17 @@ contract EtherVault {
         bool _paused,
         uint32 _nonce
     ) external protected(_nonce) returns(uint16){
+        // positions are never reused, refuse an addition that could never execute
+        if (_signer != address(0) && isSigner[_signer] == 0 && signerSlots == MAX_SIGNERS) {
+            revert TooManySigners();
+        }
         proposalId += 1;
-        Proposal storage prop = pendingProposals[proposalId];
-        (prop.modifiedSigner, prop.newLimit, prop.initiated,
-        prop.newThreshold, prop.proposer) = (_signer, _limit,
-        uint32(block.timestamp),  _threshold, msg.sender);
-        prop.paused = _paused;
-        sign(0, proposalId, msg.sender);
+        Proposal storage prop = proposals[proposalId];
+        (prop.modifiedSigner, prop.newThreshold, prop.proposer, prop.initiated,
+        prop.paused) = (_signer, _threshold, isSigner[msg.sender],
+        uint32(block.timestamp), _paused);
+        (prop.newLimit, prop.approvals) = (_limit, signerBit(msg.sender));
+        emit ProposalSubmission(proposalId, msg.sender, _signer, _limit, _threshold, _paused);
         return proposalId;
     }
 
@@ -198,9 +370,10 @@ contract EtherVault {
         /*
           @dev: Allow only the proposer to delete a pending proposal they created.
         */
-        Proposal storage proposalObj = pendingProposals[_proposalId];
-        if (proposalObj.proposer == msg.sender){
-            delete pendingProposals[_proposalId];
+        Proposal storage proposalObj = proposals[_proposalId];
+        if (proposalObj.proposer == isSigner[msg.sender]){
+            delete proposals[_proposalId];
+            emit ProposalDeletion(_proposalId);
         }
     }
 
@@ -208,13 +381,13 @@ contract EtherVault {
         /*
           @dev: Approve a pending proposal.
         */
-         if (pendingProposals[proposalId].approvals[msg.sender] == 1){
+        Proposal storage proposalObj = proposals[_proposalId];
+        if (proposalObj.approvals & signerBit(msg.sender) != 0){
             revert AlreadySigned(msg.sender);
         }
-        Proposal storage proposalObj = pendingProposals[_proposalId];
 
         // if all signers have signed
-        if(proposalObj.numSigners +1 == signerCount)  {
+        if(countApprovals(proposalObj.approvals) +1 == signerCount)  {
              // if limit/threshold are being updated
             if (proposalObj.newLimit > 0||proposalObj.newThreshold >0){
 
@@ -223,7 +396,7 @@ contract EtherVault {
             }
             // if updating signers
             if (proposalObj.modifiedSigner != address(0)) {
-                if (isSigner[proposalObj.modifiedSigner] == 1) {
+                if (isSigner[proposalObj.modifiedSigner] != 0) {
                     /*
                     @dev: Signer exists, so this must be a revokation proposal.
                     revoke this signer and reset the approval count.
@@ -237,15 +410,17 @@ contract EtherVault {
                     @dev: Signer does not exist yet, so this must be signer addition.
                     Grant signer role, reset pending signer count.
                     */
-                    isSigner[proposalObj.modifiedSigner] = 1;
+                    addSigner(proposalObj.modifiedSigner);
                     signerCount+=1;
             }
             }
-            delete pendingProposals[_proposalId];
+            delete proposals[_proposalId];
+            emit ProposalExecution(_proposalId);
         } else {
             // More signatures needed, so just sign.
             //signProposal(msg.sender, _proposalId);
             sign(0, _proposalId, msg.sender);
+            emit ProposalApproval(_proposalId, msg.sender);
         }
     }
 
@@ -257,10 +432,11 @@ contract EtherVault {
         uint32 _nonce
         ) external protected(_nonce) {
         revertWhenPaused();
-        if (pendingTxs[txid].dest == address(0)) {
+        if (transactions[txid].dest == address(0)) {
             revert RefuseInvalidTransaction();
         }
-        delete pendingTxs[txid];
+        delete transactions[txid];
+        emit Deletion(txid);
     }
 
 
@@ -275,16 +451,22 @@ contract EtherVault {
         uint32 _nonce
         ) external protected(_nonce) {
         revertWhenPaused();
-        Transaction storage _tx = pendingTxs[txid];
+        Transaction storage _tx = transactions[txid];
        if (_tx.dest == address(0)){
                 revert RefuseInvalidTransaction(); // tx does not exist
             }
-       if (pendingTxs[txid].approvals[msg.sender] == 0){
-            if(_tx.numSigners + 1 >= threshold){
+       uint128 approvals = _tx.approvals;
+       if (approvals & signerBit(msg.sender) == 0){
+            if(countApprovals(approvals) + 1 >= threshold){
+                if (_tx.hashed) {
+                    revert CalldataRequired();
+                }
                 execute(_tx.dest, _tx.value, _tx.data);
-                delete pendingTxs[txid];
+                emit Execution(txid, _tx.dest, _tx.value);
+                delete transactions[txid];
             } else {
                 sign(txid, 0, msg.sender);
+                emit Approval(txid, msg.sender);
             }
 
         } else {
@@ -292,6 +474,101 @@ contract EtherVault {
         }
     }
 
+    function approveTxs(
+        /*
+          @dev: approveTx for several txids with one nonce. Items that are not found,
+          already approved by the caller, whose call fails, or that need their calldata
+          (approveTxWithData) to execute are skipped (Skipped event, tx left as it was)
+          instead of reverting the batch.
+        */
+        uint32[] calldata txids,
+        uint32 _nonce
+        ) external protected(_nonce) returns (uint8[] memory results) {
+        revertWhenPaused();
+        results = new uint8[](txids.length);
+        uint128 bit = signerBit(msg.sender);
+        for (uint i = 0; i < txids.length; i++) {
+            uint32 txid = txids[i];
+            Transaction storage _tx = transactions[txid];
+            uint8 result;
+            if (_tx.dest == address(0)) {
+                result = NOT_FOUND;
+            } else if (_tx.approvals & bit != 0) {
+                result = ALREADY_SIGNED;
+            } else if (countApprovals(_tx.approvals) + 1 >= threshold) {
+                if (_tx.hashed) {
+                    result = DATA_REQUIRED;
+                } else if (tryExecute(_tx.dest, _tx.value, _tx.data)) {
+                    emit Execution(txid, _tx.dest, _tx.value);
+                    delete transactions[txid];
+                    result = EXECUTED;
+                } else {
+                    result = CALL_FAILED;
+                }
+            } else {
+                _tx.approvals |= bit;
+                emit Approval(txid, msg.sender);
+            }
+            if (result > EXECUTED) {
+                emit Skipped(txid, result);
+            }
+            results[i] = result;
+        }
+    }
+
+    function approveTxWithData(
+        /*
+          @dev: approveTx for a tx submitted with submitTxHash: `data` must hash to the
+          committed dataHash, and is executed if this approval meets the threshold.
+        */
+        uint32 txid,
+        bytes calldata data,
+        uint32 _nonce
+        ) external protected(_nonce) {
+        revertWhenPaused();
+        Transaction storage _tx = transactions[txid];
+        if (_tx.dest == address(0)) {
+            revert RefuseInvalidTransaction();
+        }
+        uint128 approvals = _tx.approvals;
+        if (approvals & signerBit(msg.sender) != 0) {
+            revert AlreadyApproved(msg.sender);
+        }
+        if (!_tx.hashed || keccak256(data) != _tx.dataHash) {
+            revert DataMismatch();
+        }
+        if (countApprovals(approvals) + 1 >= threshold) {
+            execute(_tx.dest, _tx.value, data);
+            emit Execution(txid, _tx.dest, _tx.value);
+            delete transactions[txid];
+        } else {
+            sign(txid, 0, msg.sender);
+            emit Approval(txid, msg.sender);
+        }
+    }
+
+    function executeWithSignatures(
+        /*
+          @dev: Execute a transaction approved off-chain: `threshold` approvals, the
+          sender's plus EIP-712 signatures from other signers over (dest, value,
+          keccak256(data), _nonce), in one call and without touching pendingTxs.
+          Like an approved pending tx, it is not counted against the daily limit.
+        */
+        address dest,
+        uint128 value,
+        bytes calldata data,
+        uint32 _nonce,
+        bytes calldata signatures
+        ) external protected(_nonce) {
+        revertWhenPaused();
+        uint8 approvals = checkSignatures(executeDigest(dest, value, data, _nonce), signatures) + 1;
+        if (approvals < threshold) {
+            revert NotEnoughSignatures();
+        }
+        execute(dest, value, data);
+        emit SignedExecution(_nonce, dest, value, approvals);
+    }
+
 
 
     function submitTx(
@@ -327,17 +604,42 @@ contract EtherVault {
             // limit not reached, no further authorization required.
             spentToday += value;
             execute(recipient, value, data);
+            emit Execution(0, recipient, value);
         } else {
             txCount += 1;
             // requires approval from signatories -- not factored into daily allowance
-            Transaction storage txObject = pendingTxs[txCount];
-            (txObject.dest, txObject.value, txObject.data) = (recipient, value, data);
-            sign(txCount, 0, msg.sender);
+            Transaction storage txObject = transactions[txCount];
+            (txObject.dest, txObject.value, txObject.approvals) = (recipient, value, signerBit(msg.sender));
+            txObject.data = data;
+            emit Submission(txCount, msg.sender, recipient, value);
         }
         return txCount;
 
     }
 
+    function submitTxHash(
+        /*
+          @dev: Queue a transaction that commits to keccak256(data) instead of storing
+          data, one slot however large the payload. It always needs `threshold`
+          approvals, and the last one supplies the calldata (approveTxWithData).
+        */
+        address recipient,
+        uint128 value,
+        bytes32 dataHash,
+        uint32 _nonce
+        ) external protected(_nonce) returns(uint32) {
+        revertWhenPaused();
+        if (address(this).balance < value) {
+            revert InsufficientBalance();
+        }
+        txCount += 1;
+        Transaction storage txObject = transactions[txCount];
+        (txObject.dest, txObject.hashed, txObject.value, txObject.approvals, txObject.dataHash) =
+            (recipient, true, value, signerBit(msg.sender), dataHash);
+        emit Submission(txCount, msg.sender, recipient, value);
+        return txCount;
+    }
+
     function underLimit(uint128 _value) private returns (bool) {
         /*
           @dev: Function to determine whether or not a requested
@@ -359,3 +661,35 @@ contract EtherVault {
 
 }
 
+
+contract EtherVault is EtherVaultCore {
+    constructor(
+        address[] memory _signers,
+        uint8 _threshold,
+        uint128 _dailyLimit
+        ){
+        setup(_signers, _threshold, _dailyLimit);
+    }
+}
+
+
+contract EtherVaultInitializable is EtherVaultCore {
+    /*
+      @dev: Implementation for EIP-1167 clones. A clone starts with empty storage,
+      so version is 0 until initialize() runs, and is the initialized flag. The
+      implementation itself got version = 1 from its constructor and can never be
+      initialized. Clones add a DELEGATECALL to every call, so unlike the full
+      contract a clone cannot receive ether with the 2300 gas of transfer() / send().
+    */
+    function initialize(
+        address[] calldata _signers,
+        uint8 _threshold,
+        uint128 _dailyLimit
+        ) external {
+        if (version != 0) {
+            revert AuthenticationError();
+        }
+        version = 1;
+        setup(_signers, _threshold, _dailyLimit);
+    }
+}
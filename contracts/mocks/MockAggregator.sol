@@ -0,0 +1,22 @@
+pragma solidity ^0.8.16;
+// SPDX-License-Identifier:MIT
+
+/*
+  @dev: Stand-in for a Chainlink price feed, for local testing only.
+*/
+contract MockAggregator {
+    uint8 public decimals = 8;
+    int256 public answer;
+
+    constructor(int256 _answer) {
+        answer = _answer;
+    }
+
+    function setAnswer(int256 _answer) external {
+        answer = _answer;
+    }
+
+    function latestRoundData() external view returns (uint80, int256, uint256, uint256, uint80) {
+        return (1, answer, block.timestamp, block.timestamp, 1);
+    }
+}
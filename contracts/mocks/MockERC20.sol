@@ -0,0 +1,31 @@
+pragma solidity ^0.8.16;
+// SPDX-License-Identifier:MIT
+
+/*
+  @dev: Minimal mintable ERC20, for local testing only.
+*/
+contract MockERC20 {
+    uint8 public decimals;
+    uint public totalSupply;
+    mapping (address => uint) public balanceOf;
+
+    event Transfer(address indexed from, address indexed to, uint value);
+
+    constructor(uint8 _decimals) {
+        decimals = _decimals;
+    }
+
+    function mint(address to, uint amount) external {
+        balanceOf[to] += amount;
+        totalSupply += amount;
+        emit Transfer(address(0), to, amount);
+    }
+
+    function transfer(address to, uint amount) external returns (bool) {
+        require(balanceOf[msg.sender] >= amount, "balance");
+        balanceOf[msg.sender] -= amount;
+        balanceOf[to] += amount;
+        emit Transfer(msg.sender, to, amount);
+        return true;
+    }
+}
@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+"""
+Gas per approval, approveTx one call per txid versus one approveTxs batch, on
+a local development chain:
+
+    brownie run scripts/approve_gas.py --network development
+    brownie run scripts/approve_gas.py main 20 --network development
+
+For both vault versions, `count` ether payouts over the daily limit are queued
+twice. The second signer approves the first set with single calls and the
+second set with one batch. With a threshold of 3 that only signs them, then
+the third signer does the same again, which executes them. Totals include the
+21000 base cost of every transaction.
+"""
+from brownie import accounts, EtherVault, EtherVaultL2, MockAggregator
+
+
+def queue(vault, signer, count: int, version: int) -> list:
+    txids = []
+    for _ in range(count):
+        nonce = vault.execNonce() + 1
+        if version == 2:
+            tx = vault.withdraw('0x' + '00' * 20, accounts[9], 10 ** 17, nonce, {'from': signer})
+        else:
+            tx = vault.submitTx(accounts[9], 10 ** 17, b'', nonce, {'from': signer})
+        txids.append(tx.return_value)
+    return txids
+
+
+def approve_single(vault, signer, txids: list) -> int:
+    return sum(vault.approveTx(txid, vault.execNonce() + 1, {'from': signer}).gas_used for txid in txids)
+
+
+def approve_batch(vault, signer, txids: list) -> int:
+    return vault.approveTxs(txids, vault.execNonce() + 1, {'from': signer}).gas_used
+
+
+def main(count: int = 10):
+    count = int(count)
+    signers = accounts[:4]
+    feed = MockAggregator.deploy(2000 * 10 ** 8, {'from': accounts[0]})
+    vaults = {
+        1: EtherVault.deploy(signers, 3, 10 ** 16, {'from': accounts[0]}),
+        2: EtherVaultL2.deploy(signers, 3, 10, feed, {'from': accounts[0]}),
+    }
+    print(f'{"vault":<14} {"path":<8} {"single/tx":>10} {"batch/tx":>10} {"saved":>7}')
+    for version, vault in vaults.items():
+        accounts[0].transfer(vault, f'{count} ether')
+        singles, batched = queue(vault, signers[0], count, version), queue(vault, signers[0], count, version)
+        for path, signer in (('sign', signers[1]), ('execute', signers[2])):
+            single = approve_single(vault, signer, singles) / count
+            batch = approve_batch(vault, signer, batched) / count
+            print(f'{vault._name:<14} {path:<8} '
+                  f'{single:>10.0f} {batch:>10.0f} {(1 - batch / single) * 100:>6.1f}%')
+        assert int(vault.pendingTxs(batched[-1])['dest'], 16) == 0, 'batched txs were not executed'
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""
+Gas of every gas_snapshot.py path with the contracts as they were at a git
+revision (before) and as they are in the working tree (after), on a local
+development chain:
+
+    brownie run scripts/bitmap_gas.py --network development
+    brownie run scripts/bitmap_gas.py main <ref> 1000 --network development
+
+The default revision is where HEAD branched off origin/main (BASE_BRANCH
+overrides it), so on the branch that introduced signer bitmaps and the
+repacked Transaction / Proposal structs the diff is what they save. Pass the
+last revision with per-signer approval mappings as <ref> to measure it from
+anywhere else. Both sets are compiled with the same
+optimizer runs and driven by the same signers, in the same order.
+"""
+import os
+import subprocess
+
+from brownie import accounts
+
+from scripts.gas_snapshot import SOURCES, compile_contracts, measure_v1, measure_v2
+
+BASE_BRANCH = os.environ.get('BASE_BRANCH', 'origin/main')
+
+
+def merge_base() -> str:
+    return subprocess.run(['git', 'merge-base', 'HEAD', BASE_BRANCH], check=True, capture_output=True,
+                          text=True).stdout.strip()
+
+
+def sources_at(ref: str) -> dict:
+    return {path: subprocess.run(['git', 'show', f'{ref}:{path}'], check=True, capture_output=True,
+                                 text=True).stdout for path in SOURCES}
+
+
+def measure(project, signers: list) -> dict:
+    return {'EtherVault': measure_v1(project, signers), 'EtherVaultL2': measure_v2(project, signers)}
+
+
+def main(ref: str = None, runs: int = 200):
+    runs = int(runs)
+    ref = ref or merge_base()[:10]
+    signers = [accounts.add() for _ in range(4)]
+    for signer in signers:
+        accounts[0].transfer(signer, '10 ether')
+    before = measure(compile_contracts(runs, sources_at(ref), 'BitmapGasBefore'), signers)
+    after = measure(compile_contracts(runs, name='BitmapGasAfter'), signers)
+
+    print(f'{"contract / path":<44}{ref:>11}{"now":>11}{"diff":>9}{"":>9}')
+    for contract, paths in after.items():
+        for path, gas in paths.items():
+            old = before[contract].get(path)
+            if gas is None or old is None:
+                diff, pct = '-', ''
+            else:
+                diff, pct = f'{gas - old:+d}', f'{(gas / old - 1) * 100:+.1f}%'
+            print(f'{contract + " " + path:<44}{old or "revert":>11}{gas or "revert":>11}{diff:>9}{pct:>9}')
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""
+Gas of a pending transaction with calldata, stored in full versus committed by
+hash (submitTxHash + approveTxWithData), per payload size, on a local
+development chain:
+
+    brownie run scripts/calldata_gas.py --network development
+    brownie run scripts/calldata_gas.py main 68,1024,8192 --network development
+
+For both vault versions and every size, one tx is queued each way, signed by
+the second signer and executed by the third (threshold 3). The payload goes to
+an EOA, so the numbers are the vault's cost alone. Totals include the 21000
+base cost and the calldata of every transaction. Each tx sends 1 wei.
+"""
+from brownie import accounts, EtherVault, EtherVaultL2, MockAggregator
+from web3 import Web3
+
+DEFAULT_SIZES = '68,1024,8192'
+
+
+def next_nonce(vault) -> int:
+    return vault.execNonce() + 1
+
+
+def stored(vault, version: int, signers: list, data: bytes) -> list:
+    submit = vault.submitRawTx if version == 2 else vault.submitTx
+    tx = submit(accounts[9], 1, data, next_nonce(vault), {'from': signers[0]})
+    txid = tx.return_value
+    sign = vault.approveTx(txid, next_nonce(vault), {'from': signers[1]})
+    execute = vault.approveTx(txid, next_nonce(vault), {'from': signers[2]})
+    return [tx.gas_used, sign.gas_used, execute.gas_used]
+
+
+def hashed(vault, signers: list, data: bytes) -> list:
+    tx = vault.submitTxHash(accounts[9], 1, Web3.keccak(data), next_nonce(vault), {'from': signers[0]})
+    txid = tx.return_value
+    sign = vault.approveTx(txid, next_nonce(vault), {'from': signers[1]})
+    execute = vault.approveTxWithData(txid, data, next_nonce(vault), {'from': signers[2]})
+    return [tx.gas_used, sign.gas_used, execute.gas_used]
+
+
+def main(sizes: str = DEFAULT_SIZES):
+    signers = accounts[:4]
+    feed = MockAggregator.deploy(2000 * 10 ** 8, {'from': accounts[0]})
+    vaults = {
+        # a zero limit queues every submitTx of 1 wei
+        1: EtherVault.deploy(signers, 3, 0, {'from': accounts[0]}),
+        2: EtherVaultL2.deploy(signers, 3, 10, feed, {'from': accounts[0]}),
+    }
+    print(f'{"vault":<14} {"bytes":>6} {"mode":<7} {"submit":>9} {"sign":>8} {"execute":>9} {"total":>9} {"saved":>7}')
+    for version, vault in vaults.items():
+        accounts[0].transfer(vault, '1 ether')
+        for size in (int(s) for s in str(sizes).split(',')):
+            data = bytes((i * 7 + 1) % 256 for i in range(size))
+            full, by_hash = stored(vault, version, signers, data), hashed(vault, signers, data)
+            for mode, gas in (('stored', full), ('hash', by_hash)):
+                saved = f'{(1 - sum(by_hash) / sum(full)) * 100:>6.1f}%' if mode == 'hash' else ''
+                print(f'{vault._name:<14} {size:>6} {mode:<7} {gas[0]:>9} {gas[1]:>8} {gas[2]:>9} {sum(gas):>9} '
+                      f'{saved:>7}')
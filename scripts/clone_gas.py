@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+"""
+Gas of a full vault deployment versus an EIP-1167 clone from EtherVaultFactory,
+and what the proxy adds to every call, on a local development chain:
+
+    brownie run scripts/clone_gas.py --network development
+
+Both versions are deployed twice with the same 4 signers and a threshold of 3,
+once in full and once through createVault / createVaultL2 (which includes the
+initialize call). Then the same calls go to both, in the same order, so the
+difference per call is the DELEGATECALL of the proxy. The implementations and
+the factory are deployed once per chain and are not counted.
+"""
+from brownie import accounts, chain, EtherVault, EtherVaultL2, EtherVaultFactory, EtherVaultInitializable, \
+    EtherVaultL2Initializable, MockAggregator
+
+ZERO = '0x0000000000000000000000000000000000000000'
+THRESHOLD = 3
+
+
+def next_nonce(vault) -> int:
+    return vault.execNonce() + 1
+
+
+def calls(vault, version: int, signers: list) -> list:
+    """
+    :return: (name, gas used) of the same sequence of calls on any vault of this version
+    """
+    def send(dest, value):
+        if version == 2:
+            return vault.withdraw(ZERO, dest, value, next_nonce(vault), {'from': signers[0]})
+        return vault.submitTx(dest, value, b'', next_nonce(vault), {'from': signers[0]})
+
+    results = [('receive (deposit)', accounts[0].transfer(vault, '10 ether').gas_used)]
+    chain.sleep(86400)
+    chain.mine()
+    results.append(('send (under limit)', send(accounts[9], 10 ** 15).gas_used))
+    queued = send(accounts[9], 10 ** 18)
+    results.append(('send (queued)', queued.gas_used))
+    txid = queued.return_value
+    results.append(('approveTx (sign)', vault.approveTx(txid, next_nonce(vault), {'from': signers[1]}).gas_used))
+    results.append(('approveTx (execute)', vault.approveTx(txid, next_nonce(vault), {'from': signers[2]}).gas_used))
+    results.append(('newProposal', vault.newProposal(ZERO, 0, 0, False, next_nonce(vault),
+                                                     {'from': signers[0]}).gas_used))
+    return results
+
+
+def main():
+    signers = accounts[:4]
+    feed = MockAggregator.deploy(2000 * 10 ** 8, {'from': accounts[0]})
+    factory = EtherVaultFactory.deploy(EtherVaultInitializable.deploy({'from': accounts[0]}),
+                                       EtherVaultL2Initializable.deploy({'from': accounts[0]}), {'from': accounts[0]})
+    deployments = {
+        1: (EtherVault.deploy(signers, THRESHOLD, 10 ** 16, {'from': accounts[0]}),
+            factory.createVault(signers, THRESHOLD, 10 ** 16, b'\x01' * 32, {'from': accounts[0]}),
+            EtherVaultInitializable),
+        2: (EtherVaultL2.deploy(signers, THRESHOLD, 10, feed, {'from': accounts[0]}),
+            factory.createVaultL2(signers, THRESHOLD, 10, feed, b'\x01' * 32, {'from': accounts[0]}),
+            EtherVaultL2Initializable),
+    }
+    print(f'{"vault":<14} {"path":<22} {"full":>10} {"clone":>10} {"diff":>9}')
+    for version, (full, create, container) in deployments.items():
+        clone = container.at(create.return_value)
+        assert clone.version() == version and clone.threshold() == THRESHOLD, 'clone was not initialized'
+        full_deploy = full.tx.gas_used
+        print(f'{full._name:<14} {"deploy":<22} {full_deploy:>10} {create.gas_used:>10} '
+              f'{(create.gas_used / full_deploy - 1) * 100:>8.1f}%')
+        for (name, full_gas), (_, clone_gas) in zip(calls(full, version, signers), calls(clone, version, signers)):
+            print(f'{full._name:<14} {name:<22} {full_gas:>10} {clone_gas:>10} {clone_gas - full_gas:>+9}')
@@ -24,18 +24,17 @@ def config_loader(conf_file: str):
 
 
 CONF_FILE = 'configs/ethervault_deploy.json'
-deploy_acct, signers, threshold, daily_eth_wei_limit = config_loader(CONF_FILE)
-dotenv.load_dotenv()
-ETHERSCAN_TOKEN = os.environ.get('ETHERSCAN_TOKEN')
-acct = accounts.load(deploy_acct)
 
 
 def deploy(signers: list, threshold: int, limit: int, acct=None):
     return EtherVault.deploy(signers, threshold, limit, {'from': acct.address}, publish_source=True)
 
 
-def main():
-    # args = argparse.ArgumentParser()
+def main(conf_file: str = CONF_FILE):
+    # loaded here, not at import, so importing this module has no side effects
+    deploy_acct, signers, threshold, daily_eth_wei_limit = config_loader(conf_file)
+    dotenv.load_dotenv()
+    acct = accounts.load(deploy_acct)
     return deploy(signers, threshold, daily_eth_wei_limit, acct=acct)
 
 
@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+"""
+Deploy many vaults in one run, as EIP-1167 clones from EtherVaultFactory:
+
+    brownie run scripts/deploy_fleet.py --network <network>
+    brownie run scripts/deploy_fleet.py main configs/ethervault_fleet.json --network <network>
+
+The config names the deploying account, the factory (deployed along with both
+implementations when empty, and written back to the config), and a list of
+vaults, each with its version, signers, threshold, daily limit (wei for
+version 1, dollars for version 2), eth_oracle (version 2) and a salt label.
+Addresses are predicted before anything is sent. A vault that already exists
+at its predicted address is skipped, so a run that stopped half way can be
+repeated. The result is written to <config>.deployed.json.
+"""
+import json
+
+from brownie import accounts, web3, EtherVaultFactory, EtherVaultInitializable, EtherVaultL2Initializable
+from eth_utils import keccak, to_checksum_address
+
+CONF_FILE = 'configs/ethervault_fleet.json'
+CLONE_PREFIX = bytes.fromhex('3d602d80600a3d3981f3363d3d373d3d3d363d73')
+CLONE_SUFFIX = bytes.fromhex('5af43d82803e903d91602b57fd5bf3')
+
+
+def salt_bytes(label: str) -> bytes:
+    """
+    :param label: 0x prefixed 32 bytes, or any text (hashed)
+    """
+    if label.startswith('0x') and len(label) == 66:
+        return bytes.fromhex(label[2:])
+    return keccak(text=label)
+
+
+def predict_address(factory: str, implementation: str, salt: bytes) -> str:
+    """
+    CREATE2 address of a clone, salt being the factory's vaultSalt / vaultL2Salt.
+    """
+    code_hash = keccak(CLONE_PREFIX + bytes.fromhex(implementation[2:]) + CLONE_SUFFIX)
+    return to_checksum_address(keccak(b'\xff' + bytes.fromhex(factory[2:]) + salt + code_hash)[12:])
+
+
+def load_factory(conf: dict, acct, publish: bool):
+    if conf.get('factory'):
+        return EtherVaultFactory.at(conf['factory'])
+    v1 = EtherVaultInitializable.deploy({'from': acct}, publish_source=publish)
+    v2 = EtherVaultL2Initializable.deploy({'from': acct}, publish_source=publish)
+    return EtherVaultFactory.deploy(v1, v2, {'from': acct}, publish_source=publish)
+
+
+def vault_args(vault: dict) -> list:
+    args = [vault['signers'], vault['threshold'], vault['daily_limit']]
+    if vault['version'] == 2:
+        args.append(vault['eth_oracle'])
+    return args + [salt_bytes(vault['salt'])]
+
+
+def deploy_vault(factory, vault: dict, acct) -> dict:
+    args = vault_args(vault)
+    if vault['version'] == 2:
+        salt, implementation = factory.vaultL2Salt(*args), factory.vaultL2Implementation()
+        create = factory.createVaultL2
+    else:
+        salt, implementation = factory.vaultSalt(*args), factory.vaultImplementation()
+        create = factory.createVault
+    address = predict_address(factory.address, implementation, bytes(salt))
+    row = {'salt': vault['salt'], 'version': vault['version'], 'address': address}
+    if len(web3.eth.get_code(address)):
+        print(f'[~] {vault["salt"]}: v{vault["version"]} vault already at {address}, skipped')
+        return dict(row, gas_used=0)
+    tx = create(*args, {'from': acct})
+    if tx.return_value != address:
+        raise RuntimeError(f'{vault["salt"]}: created {tx.return_value}, predicted {address}')
+    print(f'[+] {vault["salt"]}: v{vault["version"]} vault at {address} ({tx.gas_used} gas)')
+    return dict(row, gas_used=tx.gas_used, tx_hash=tx.txid)
+
+
+def main(conf_file: str = CONF_FILE):
+    with open(conf_file, 'r') as f:
+        conf = json.load(f)
+    acct = accounts.load(conf['account'])
+    factory = load_factory(conf, acct, bool(conf.get('publish_source')))
+    if not conf.get('factory'):
+        conf['factory'] = factory.address
+        with open(conf_file, 'w') as f:
+            json.dump(conf, f, indent=2)
+        print(f'[+] Factory deployed at {factory.address}, saved to {conf_file}')
+
+    labels = [vault['salt'] for vault in conf['vaults']]
+    if len(set(labels)) != len(labels):
+        raise ValueError('Salt labels must be unique.')
+    for vault in conf['vaults']:
+        vault['signers'] = [to_checksum_address(s) for s in vault['signers']]
+    deployed = [deploy_vault(factory, vault, acct) for vault in conf['vaults']]
+
+    out_file = conf_file.rsplit('.json', 1)[0] + '.deployed.json'
+    with open(out_file, 'w') as f:
+        json.dump({'factory': factory.address, 'vaults': deployed}, f, indent=2)
+    print(f'[+] {sum(1 for row in deployed if row["gas_used"])} vault(s) created, '
+          f'{sum(row["gas_used"] for row in deployed)} gas, saved to {out_file}')
+    return deployed
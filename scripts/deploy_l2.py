@@ -26,10 +26,6 @@ def config_loader(conf_file: str):
 
 
 CONF_FILE = 'configs/ethervaultl2_deploy.json'
-deploy_acct, signers, threshold, daily_dollar_limit, eth_oracle = config_loader(CONF_FILE)
-dotenv.load_dotenv()
-ETHERSCAN_TOKEN = os.environ.get('ETHERSCAN_TOKEN')
-acct = accounts.load(deploy_acct)
 
 
 def deploy(signers: list, threshold: int, limit: int, eth_feed, acct = None):
@@ -41,8 +37,11 @@ def verify(contract_addr):
     EtherVaultL2.publish_source(EtherVaultL2.at(to_checksum_address(contract_addr)))
 
 
-def main():
-    # args = argparse.ArgumentParser()
+def main(conf_file: str = CONF_FILE):
+    # loaded here, not at import, so importing this module has no side effects
+    deploy_acct, signers, threshold, daily_dollar_limit, eth_oracle = config_loader(conf_file)
+    dotenv.load_dotenv()
+    acct = accounts.load(deploy_acct)
     return deploy(signers, threshold, daily_dollar_limit, eth_oracle, acct=acct)
 
 
@@ -0,0 +1,210 @@
+#!/usr/bin/python3
+"""
+Sharded Echidna campaign for the EtherVaultL2 property harness.
+
+    python3 scripts/echidna_campaign.py [-j 8] [-r 4] [-t 50000] [--seed 1] [--fresh]
+
+Each round runs one echidna-test process per shard (all cores by default),
+every one with its own seed and corpus directory. Between rounds the shards'
+corpora are merged into one union corpus (files are named by the hash of their
+call sequence, so the union is a set of file names), and every shard starts
+the next round from it. Covered source lines are read from the covered.<seed>.txt
+reports and unioned the same way. After each round the runner prints calls per
+second over all shards and how many lines are covered in total, plus how many
+were new in that round, and finally every property that failed with its call
+sequence. Exits non-zero if a property failed.
+
+The union corpus stays in the work directory, so the next campaign picks up
+where this one stopped (--fresh starts over).
+"""
+import argparse
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HARNESS = os.path.join('tests', 'echidna', 'EtherVaultL2Properties.sol')
+CONTRACT = 'EtherVaultL2Properties'
+BASE_CONFIG = os.path.join('tests', 'echidna', 'ethervault_l2.yaml')
+WORK_DIR = os.path.join(ROOT, '.cache', 'echidna')
+""" Config keys the runner sets per shard """
+SHARD_KEYS = ('seed', 'testLimit', 'corpusDir', 'format')
+""" ` 123 | *r  | code` in covered.<seed>.txt """
+COVERED_LINE = re.compile(r'^\s*(\d+) \| ([*roe ]{4})\| ')
+TEST_LINE = re.compile(r'^(echidna_\w+): (.*)$')
+
+
+def shard_config(base: str, overrides: dict) -> str:
+    """
+    The base config (flat `key: value` lines) with the runner's keys replaced.
+    """
+    lines = [line for line in base.splitlines() if line.split(':', 1)[0].strip() not in SHARD_KEYS]
+    lines += [f'{key}: {value}' for key, value in overrides.items()]
+    return '\n'.join(lines) + '\n'
+
+
+def corpus_files(corpus_dir: str) -> set:
+    coverage = os.path.join(corpus_dir, 'coverage')
+    return set(os.listdir(coverage)) if os.path.isdir(coverage) else set()
+
+
+def sync_corpus(source: str, target: str) -> int:
+    """
+    Copy the call sequences of one corpus dir that another does not have yet.
+    :return: files copied
+    """
+    missing = corpus_files(source) - corpus_files(target)
+    os.makedirs(os.path.join(target, 'coverage'), exist_ok=True)
+    for name in missing:
+        shutil.copyfile(os.path.join(source, 'coverage', name), os.path.join(target, 'coverage', name))
+    return len(missing)
+
+
+def covered_lines(report_file: str) -> set:
+    """
+    :return: (source file, line number) for every line executed without reverting
+    """
+    covered, current = set(), None
+    with open(report_file, 'r', errors='replace') as f:
+        for line in f:
+            match = COVERED_LINE.match(line)
+            if match is None:
+                if line.strip():
+                    current = line.strip()
+                continue
+            if '*' in match.group(2):
+                covered.add((current, int(match.group(1))))
+    return covered
+
+
+def parse_results(output: str) -> dict:
+    """
+    :return: property name -> (status line, call sequence lines) from a text format report
+    """
+    results, current = {}, None
+    for line in output.splitlines():
+        match = TEST_LINE.match(line)
+        if match:
+            current = match.group(1)
+            results[current] = (match.group(2).strip(), [])
+        elif current and line.startswith('    '):
+            results[current][1].append(line.strip())
+        elif not line.strip() or not line.startswith(' '):
+            current = None
+    return results
+
+
+class Campaign:
+    def __init__(self, shards: int, test_limit: int, seed: int, work_dir: str = WORK_DIR,
+                 echidna: str = 'echidna-test'):
+        """
+        :param test_limit: calls per shard per round
+        :param seed: base seed, shard i of round r runs with seed + r * shards + i
+        """
+        self.shards = shards
+        self.test_limit = test_limit
+        self.seed = seed
+        self.work_dir = work_dir
+        self.echidna = echidna
+        self.union = os.path.join(work_dir, 'corpus')
+        self.covered = set()
+        self.failures = {}
+        with open(os.path.join(ROOT, BASE_CONFIG), 'r') as f:
+            self.base_config = f.read()
+
+    def shard_dir(self, shard: int) -> str:
+        return os.path.join(self.work_dir, f'shard-{shard}')
+
+    def start_shard(self, shard: int, seed: int) -> (subprocess.Popen, str):
+        corpus_dir = self.shard_dir(shard)
+        os.makedirs(corpus_dir, exist_ok=True)
+        sync_corpus(self.union, corpus_dir)
+        config_file = os.path.join(self.work_dir, f'shard-{shard}.yaml')
+        with open(config_file, 'w') as f:
+            f.write(shard_config(self.base_config, {'seed': seed, 'testLimit': self.test_limit,
+                                                    'corpusDir': f'"{corpus_dir}"', 'format': 'text'}))
+        output_file = os.path.join(self.work_dir, f'shard-{shard}.out')
+        with open(output_file, 'w') as out:
+            proc = subprocess.Popen([self.echidna, HARNESS, '--contract', CONTRACT, '--config', config_file],
+                                    cwd=ROOT, stdout=out, stderr=subprocess.STDOUT)
+        return proc, output_file
+
+    def run_round(self, round_no: int) -> dict:
+        started = time.perf_counter()
+        running = []
+        for shard in range(self.shards):
+            seed = self.seed + round_no * self.shards + shard
+            running.append((shard, seed) + self.start_shard(shard, seed))
+        errors = 0
+        for shard, seed, proc, output_file in running:
+            proc.wait()
+            with open(output_file, 'r', errors='replace') as f:
+                results = parse_results(f.read())
+            if proc.returncode and not results:
+                errors += 1
+                print(f'[!] shard {shard} (seed {seed}) exited with {proc.returncode}, see {output_file}')
+            for name, (status, sequence) in results.items():
+                if status.startswith('failed') and name not in self.failures:
+                    self.failures[name] = (seed, sequence)
+        seconds = time.perf_counter() - started
+
+        # merge: every shard's new call sequences and covered lines into the union
+        new_sequences = sum(sync_corpus(self.shard_dir(shard), self.union) for shard in range(self.shards))
+        before = len(self.covered)
+        for shard, seed, _, _ in running:
+            report = os.path.join(self.shard_dir(shard), f'covered.{seed}.txt')
+            if os.path.exists(report):
+                self.covered |= covered_lines(report)
+        return {'round': round_no, 'seconds': seconds, 'calls_per_second': self.shards * self.test_limit / seconds,
+                'corpus': len(corpus_files(self.union)), 'new_sequences': new_sequences,
+                'covered': len(self.covered), 'new_lines': len(self.covered) - before, 'errors': errors}
+
+    def run(self, rounds: int) -> bool:
+        os.makedirs(self.union, exist_ok=True)
+        print(f'[+] {self.shards} shard(s) x {rounds} round(s) x {self.test_limit} calls, base seed {self.seed}, '
+              f'starting from {len(corpus_files(self.union))} sequences')
+        print(f'{"round":>5} {"seconds":>9} {"calls/s":>10} {"corpus":>8} {"new seq":>8} {"lines":>7} {"new":>6}')
+        for round_no in range(rounds):
+            stats = self.run_round(round_no)
+            print(f'{stats["round"]:>5} {stats["seconds"]:>9.1f} {stats["calls_per_second"]:>10.0f} '
+                  f'{stats["corpus"]:>8} {stats["new_sequences"]:>8} {stats["covered"]:>7} {stats["new_lines"]:>6}')
+            if stats['errors'] == self.shards:
+                print('[!] Every shard failed to run, stopping.')
+                return False
+        for name, (seed, sequence) in self.failures.items():
+            print(f'[!] {name} failed (seed {seed}):')
+            for call in sequence:
+                print(f'      {call}')
+        if not self.failures:
+            print('[+] All properties held.')
+        return not self.failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-j', '--shards', type=int, default=os.cpu_count() or 1, help='Parallel echidna processes.')
+    parser.add_argument('-r', '--rounds', type=int, default=4, help='Rounds, corpora are merged between them.')
+    parser.add_argument('-t', '--test-limit', dest='test_limit', type=int, default=50000,
+                        help='Calls per shard per round.')
+    parser.add_argument('--seed', type=int, default=None, help='Base seed (default: random).')
+    parser.add_argument('--work-dir', dest='work_dir', type=str, default=WORK_DIR,
+                        help='Shard corpora, configs and reports, and the union corpus.')
+    parser.add_argument('--echidna', type=str, default='echidna-test', help='Echidna executable.')
+    parser.add_argument('--fresh', action='store_true', help='Discard the union corpus of earlier campaigns.')
+    args = parser.parse_args()
+    if shutil.which(args.echidna) is None:
+        print(f'[!] {args.echidna} not found, see tests/echidna-2.0.5/README.md')
+        sys.exit(2)
+    if args.fresh and os.path.isdir(args.work_dir):
+        shutil.rmtree(args.work_dir)
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 31)
+    campaign = Campaign(max(args.shards, 1), args.test_limit, seed, os.path.abspath(args.work_dir), args.echidna)
+    sys.exit(0 if campaign.run(args.rounds) else 1)
+
+
+if __name__ == '__main__':
+    main()
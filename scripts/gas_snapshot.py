@@ -0,0 +1,251 @@
+#!/usr/bin/python3
+"""
+Gas snapshot of every external path of EtherVault and EtherVaultL2, checked
+against a saved snapshot, on a local development chain:
+
+    brownie run scripts/gas_snapshot.py --network development
+    brownie run scripts/gas_snapshot.py main configs/gas_snapshot.json update --network development
+    brownie run scripts/gas_snapshot.py main configs/gas_snapshot.json check 1 200,1000 --network development
+
+The contracts and mocks are compiled once per optimizer runs setting (default
+200, 1000 and 10000) and each set is deployed fresh with 4 signers and a
+threshold of 3. Then every path is driven once, in a fixed order so warm/cold
+storage is the same from run to run: under limit and queued withdrawals, sign
+and executing approvals (single and batched), proposals, deletions, token
+tracking, calldata committed by hash and executeWithSignatures.
+
+In `check` mode (the default) the numbers are compared with the snapshot file
+and the script exits non-zero if any path costs more than `tolerance` percent
+over it, reverts, or has no number in it, and when the file does not exist.
+Only `update` writes the file.
+"""
+import json
+import os
+import sys
+
+from brownie import accounts, chain
+from brownie.exceptions import VirtualMachineError
+from brownie.project.main import TempProject
+from eth_account import Account
+from web3 import Web3
+
+from vault_lib import signatures
+
+ZERO = '0x0000000000000000000000000000000000000000'
+SOURCES = ('contracts/Ethervault.sol', 'contracts/EtherVaultL2.sol', 'contracts/interfaces/IERC20.sol',
+           'contracts/interfaces/IAggregatorV3.sol', 'contracts/mocks/MockAggregator.sol',
+           'contracts/mocks/MockERC20.sol')
+DEFAULT_RUNS = '200,1000,10000'
+# same compiler as brownie-config.yaml
+SOLC_VERSION = '0.8.16'
+THRESHOLD = 3
+BATCH = 3
+DAILY_LIMIT_WEI = 10 ** 17
+DAILY_LIMIT_USD = 1000
+
+
+def compile_contracts(runs: int, sources: dict = None, name: str = 'GasSnapshot') -> TempProject:
+    """
+    :param sources: path -> source of every SOURCES path, read from the working tree if None
+    """
+    if sources is None:
+        sources = {}
+        for path in SOURCES:
+            with open(path, 'r') as f:
+                sources[path] = f.read()
+    config = {'evm_version': None, 'solc': {'version': SOLC_VERSION, 'optimize': True, 'runs': runs, 'remappings': []},
+              'vyper': {}}
+    return TempProject(f'{name}{runs}', sources, config)
+
+
+class Recorder:
+    def __init__(self):
+        self.results = {}
+
+    def run(self, name: str, call):
+        """
+        :param call: sends one transaction and returns it
+        :return: the transaction, None if it reverted (recorded as None)
+        """
+        try:
+            tx = call()
+        except VirtualMachineError:
+            self.results[name] = None
+            return None
+        self.results[name] = tx.gas_used
+        return tx
+
+
+def next_nonce(vault) -> int:
+    return vault.execNonce() + 1
+
+
+def new_day():
+    # every limited withdrawal starts from the same spentToday reset
+    chain.sleep(86400)
+    chain.mine()
+
+
+def queue(vault, version: int, signer, count: int = 1) -> list:
+    """
+    Queue over limit ether payouts, untimed.
+    """
+    txids = []
+    for _ in range(count):
+        if version == 2:
+            tx = vault.withdraw(ZERO, accounts[9], 10 ** 18, next_nonce(vault), {'from': signer})
+        else:
+            tx = vault.submitTx(accounts[9], 10 ** 18, b'', next_nonce(vault), {'from': signer})
+        txids.append(tx.return_value)
+    return txids
+
+
+def common_paths(rec: Recorder, vault, version: int, signers: list):
+    """
+    Paths both versions share: approvals, deletions, proposals and executeWithSignatures.
+    """
+    txid, = queue(vault, version, signers[0])
+    rec.run('approveTx (sign)', lambda: vault.approveTx(txid, next_nonce(vault), {'from': signers[1]}))
+    rec.run('approveTx (execute)', lambda: vault.approveTx(txid, next_nonce(vault), {'from': signers[2]}))
+    txids = queue(vault, version, signers[0], BATCH)
+    rec.run(f'approveTxs x{BATCH} (sign)', lambda: vault.approveTxs(txids, next_nonce(vault), {'from': signers[1]}))
+    rec.run(f'approveTxs x{BATCH} (execute)',
+            lambda: vault.approveTxs(txids, next_nonce(vault), {'from': signers[2]}))
+    txid, = queue(vault, version, signers[0])
+    rec.run('deleteTx', lambda: vault.deleteTx(txid, next_nonce(vault), {'from': signers[0]}))
+
+    # a 1 KiB payload committed by hash, supplied by the executing approval
+    data = bytes(range(256)) * 4
+    tx = rec.run('submitTxHash (1 KiB)', lambda: vault.submitTxHash(accounts[9], 0, Web3.keccak(data),
+                                                                    next_nonce(vault), {'from': signers[0]}))
+    txid = tx.return_value if tx is not None else vault.txCount()
+    vault.approveTx(txid, next_nonce(vault), {'from': signers[1]})
+    rec.run('approveTxWithData (execute, 1 KiB)',
+            lambda: vault.approveTxWithData(txid, data, next_nonce(vault), {'from': signers[2]}))
+
+    # a proposal that changes nothing, executed once every signer approved it
+    tx = rec.run('newProposal', lambda: vault.newProposal(ZERO, 0, 0, False, next_nonce(vault), {'from': signers[0]}))
+    pid = tx.return_value if tx is not None else vault.proposalId()
+    rec.run('approveProposal (sign)', lambda: vault.approveProposal(pid, next_nonce(vault), {'from': signers[1]}))
+    vault.approveProposal(pid, next_nonce(vault), {'from': signers[2]})
+    rec.run('approveProposal (execute)', lambda: vault.approveProposal(pid, next_nonce(vault), {'from': signers[3]}))
+    vault.newProposal(ZERO, 0, 0, False, next_nonce(vault), {'from': signers[0]})
+    pid = vault.proposalId()
+    rec.run('deleteProposal', lambda: vault.deleteProposal(pid, next_nonce(vault), {'from': signers[0]}))
+
+    bundle = signatures.new_bundle(vault.address, chain.id, version, accounts[9].address, 10 ** 18, b'',
+                                   next_nonce(vault))
+    for signer in signers[1:THRESHOLD]:
+        bundle = signatures.sign(bundle, Account.from_key(signer.private_key))
+    packed, _ = signatures.pack(bundle, signers[0].address)
+    rec.run(f'executeWithSignatures ({THRESHOLD - 1} sigs)',
+            lambda: vault.executeWithSignatures(accounts[9], 10 ** 18, b'', bundle['nonce'], packed,
+                                                {'from': signers[0]}))
+
+
+def measure_v1(project: TempProject, signers: list) -> dict:
+    rec = Recorder()
+    rec.run('deploy', lambda: project.EtherVault.deploy(signers, THRESHOLD, DAILY_LIMIT_WEI, {'from': accounts[0]}).tx)
+    vault = project.EtherVault[-1]
+    rec.run('receive (deposit)', lambda: accounts[0].transfer(vault, '20 ether'))
+    new_day()
+    rec.run('submitTx (under limit)', lambda: vault.submitTx(accounts[9], 10 ** 16, b'', next_nonce(vault),
+                                                             {'from': signers[0]}))
+    rec.run('submitTx (queued)', lambda: vault.submitTx(accounts[9], 10 ** 18, b'', next_nonce(vault),
+                                                        {'from': signers[0]}))
+    common_paths(rec, vault, 1, signers)
+    return rec.results
+
+
+def measure_v2(project: TempProject, signers: list) -> dict:
+    rec = Recorder()
+    eth_feed = project.MockAggregator.deploy(2000 * 10 ** 8, {'from': accounts[0]})
+    usdc_feed = project.MockAggregator.deploy(10 ** 8, {'from': accounts[0]})
+    usdc = project.MockERC20.deploy(6, {'from': accounts[0]})
+    rec.run('deploy', lambda: project.EtherVaultL2.deploy(signers, THRESHOLD, DAILY_LIMIT_USD, eth_feed,
+                                                           {'from': accounts[0]}).tx)
+    vault = project.EtherVaultL2[-1]
+    rec.run('receive (deposit)', lambda: accounts[0].transfer(vault, '20 ether'))
+    usdc.mint(vault, 10 ** 6 * 10 ** usdc.decimals(), {'from': accounts[0]})
+    rec.run('trackToken', lambda: vault.trackToken(usdc, usdc_feed, next_nonce(vault), {'from': signers[0]}))
+
+    withdrawals = [
+        ('withdraw eth (under limit)', ZERO, 10 ** 16),
+        ('withdraw erc20 (under limit)', usdc.address, 20 * 10 ** 6),
+        ('withdraw eth (queued)', ZERO, 10 ** 18),
+        ('withdraw erc20 (queued)', usdc.address, 5000 * 10 ** 6),
+    ]
+    for name, token, amount in withdrawals:
+        new_day()
+        rec.run(name, lambda: vault.withdraw(token, accounts[9], amount, next_nonce(vault), {'from': signers[0]}))
+    rec.run('submitRawTx', lambda: vault.submitRawTx(accounts[9], 10 ** 16, b'', next_nonce(vault),
+                                                     {'from': signers[0]}))
+    common_paths(rec, vault, 2, signers)
+    return rec.results
+
+
+def measure(runs: int, signers: list) -> dict:
+    project = compile_contracts(runs)
+    return {'EtherVault': measure_v1(project, signers), 'EtherVaultL2': measure_v2(project, signers)}
+
+
+def compare(results: dict, snapshot: dict, tolerance: float) -> list:
+    """
+    :return: (runs, contract, path, before, after) for every path over tolerance, reverting or
+        missing from the snapshot (before is None)
+    """
+    failures = []
+    for runs, contracts in results.items():
+        for contract, paths in contracts.items():
+            before_paths = snapshot.get(runs, {}).get(contract, {})
+            for path, gas in paths.items():
+                before = before_paths.get(path)
+                if gas is None or before is None or gas > before * (1 + tolerance / 100):
+                    failures.append((runs, contract, path, before, gas))
+    return failures
+
+
+def print_report(results: dict, snapshot: dict):
+    settings = list(results)
+    print(f'{"contract / path":<44}' + ''.join(f'{"runs " + r:>13}' for r in settings)
+          + f'{"snapshot":>11}{"diff":>9}')
+    first = settings[0]
+    for contract in results[first]:
+        for path, gas in results[first][contract].items():
+            cells = ''.join(f'{results[r][contract].get(path) or "revert":>13}' for r in settings)
+            before = snapshot.get(first, {}).get(contract, {}).get(path)
+            diff = f'{gas - before:+d}' if gas is not None and before is not None else '-'
+            print(f'{contract + " " + path:<44}{cells}{before if before is not None else "-":>11}{diff:>9}')
+
+
+def main(snapshot_file: str = 'configs/gas_snapshot.json', mode: str = 'check', tolerance: float = 2,
+         runs: str = DEFAULT_RUNS):
+    tolerance = float(tolerance)
+    signers = [accounts.add() for _ in range(4)]
+    for signer in signers:
+        accounts[0].transfer(signer, '10 ether')
+    results = {str(r): measure(int(r), signers) for r in str(runs).split(',')}
+
+    snapshot = {}
+    if os.path.exists(snapshot_file):
+        with open(snapshot_file, 'r') as f:
+            snapshot = json.load(f)
+    print_report(results, snapshot)
+
+    if mode == 'update':
+        with open(snapshot_file, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'[+] Snapshot saved to {snapshot_file}')
+        return
+    if not os.path.exists(snapshot_file):
+        print(f'[!] No snapshot at {snapshot_file}, record one with `main {snapshot_file} update`.')
+        sys.exit(1)
+    failures = compare(results, snapshot, tolerance)
+    for setting, contract, path, before, gas in failures:
+        print(f'[!] runs {setting} {contract} {path}: {before if before is not None else "not in snapshot"} -> '
+              f'{gas if gas is not None else "revert"}')
+    if failures:
+        print(f'[!] {len(failures)} path(s) regressed past {tolerance}%, reverted or are missing from the '
+              f'snapshot, rerun with `update` if that is intended.')
+        sys.exit(1)
+    print(f'[+] No path regressed past {tolerance}% of {snapshot_file}')
@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+"""
+Differential check of vault_lib.preflight against a real EtherVaultL2 on a local
+development chain:
+
+    brownie run scripts/preflight_diff.py --network development
+
+Every scenario is first predicted off-chain from a storage snapshot, then sent
+for real; the script exits non-zero if any prediction differs from the outcome
+(execute / queue / revert, queued txid and resulting spentToday).
+"""
+import sys
+
+from brownie import accounts, chain, web3, EtherVaultL2, MockAggregator, MockERC20
+from brownie.exceptions import VirtualMachineError
+
+sys.path.insert(0, '.')
+from vault_lib import preflight  # noqa: E402
+from vault_lib.vault_state import VaultState  # noqa: E402
+
+ZERO = preflight.ZERO_ADDRESS
+DAILY_LIMIT = 100  # dollars
+ETH_PRICE = 2000 * 10 ** 8
+USDC_PRICE = 1 * 10 ** 8
+DAI_PRICE = 1 * 10 ** 8
+
+
+def predict(vault, signers, sender, nonce, token, amount, decimals):
+    state = VaultState.fetch(web3, vault.address)
+    balance = vault.balance() if token == ZERO else MockERC20.at(token).balanceOf(vault.address)
+    feed = vault.trackedTokens(token)
+    answer = MockAggregator.at(feed).answer() if int(feed, 16) else None
+    # the tx lands in the next block
+    timestamp = chain.time()
+    is_signer = sender in signers
+    return preflight.evaluate_withdraw(state, timestamp, is_signer, nonce, token, amount, balance, feed,
+                                       decimals, answer)
+
+
+def observe(vault, sender, nonce, token, amount):
+    try:
+        tx = vault.withdraw(token, accounts[9], amount, nonce, {'from': sender})
+    except VirtualMachineError as err:
+        return preflight.REVERT, None, str(err.revert_msg)
+    txid = tx.return_value
+    return (preflight.EXECUTE if txid == 0 else preflight.QUEUE), txid, None
+
+
+def main():
+    signers = accounts[:4]
+    eth_feed = MockAggregator.deploy(ETH_PRICE, {'from': accounts[0]})
+    usdc_feed = MockAggregator.deploy(USDC_PRICE, {'from': accounts[0]})
+    dai_feed = MockAggregator.deploy(DAI_PRICE, {'from': accounts[0]})
+    usdc = MockERC20.deploy(6, {'from': accounts[0]})
+    dai = MockERC20.deploy(18, {'from': accounts[0]})
+    untracked = MockERC20.deploy(18, {'from': accounts[0]})
+    vault = EtherVaultL2.deploy(signers, 2, DAILY_LIMIT, eth_feed, {'from': accounts[0]})
+    accounts[0].transfer(vault, '1 ether')
+    for token in (usdc, dai, untracked):
+        token.mint(vault, 1000 * 10 ** token.decimals(), {'from': accounts[0]})
+    vault.trackToken(usdc, usdc_feed, 1, {'from': signers[0]})
+    vault.trackToken(dai, dai_feed, 2, {'from': signers[0]})
+
+    scenarios = [
+        ('eth under limit', signers[0], ZERO, 10 ** 16, 18),
+        ('usdc under limit', signers[1], usdc.address, 30 * 10 ** 6, 6),
+        ('dai under limit', signers[2], dai.address, 20 * 10 ** 18, 18),
+        ('eth over remaining limit', signers[0], ZERO, 2 * 10 ** 16, 18),
+        ('usdc over limit', signers[1], usdc.address, 500 * 10 ** 6, 6),
+        ('untracked token', signers[0], untracked.address, 10 ** 18, 18),
+        ('insufficient funds', signers[0], ZERO, 2 * 10 ** 18, 18),
+        ('not a signer', accounts[5], ZERO, 10 ** 15, 18),
+        ('wrong nonce', signers[0], ZERO, 10 ** 15, 18, 99),
+        ('next day rollover', signers[0], ZERO, 10 ** 16, 18, None, 86400),
+    ]
+    failures = 0
+    for scenario in scenarios:
+        name, sender, token, amount, decimals = scenario[:5]
+        bad_nonce = scenario[5] if len(scenario) > 5 else None
+        if len(scenario) > 6:
+            chain.sleep(scenario[6])
+            chain.mine()
+        nonce = bad_nonce or vault.execNonce() + 1
+        predicted = predict(vault, signers, sender, nonce, token, amount, decimals)
+        outcome, txid, reason = observe(vault, sender, nonce, token, amount)
+        spent = vault.spentToday()
+        match = (predicted.outcome == outcome and
+                 (outcome != preflight.QUEUE or predicted.txid == txid) and
+                 (outcome == preflight.REVERT or predicted.spent_today == spent))
+        failures += not match
+        print(f'[{"+" if match else "!"}] {name}: predicted {predicted.outcome} '
+              f'(txid {predicted.txid}, spent {predicted.spent_today}), '
+              f'observed {outcome} (txid {txid}, spent {spent}, reason {reason})')
+    if failures:
+        print(f'[!] {failures} prediction(s) did not match the contract.')
+        sys.exit(1)
+    print(f'[+] All {len(scenarios)} predictions match the contract.')
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""
+Record fee history from a node and replay it through FeeOracle.
+
+    python3 scripts/replay_fees.py record https://rpc.example -n 200 -o fees.json
+    python3 scripts/replay_fees.py replay fees.json [-s 1] [-w 5]
+
+Replay steps the simulated chain head one (or -s) block(s) at a time, prints the
+suggestion for every preset and the number of fee history requests the oracle
+made, which should stay at one per step however many presets are read.
+tests/test_fee_oracle.py replays tests/fixtures/fee_history.json (a raw
+eth_feeHistory response) the same way.
+"""
+import argparse
+import json
+import sys
+
+from web3 import Web3
+
+sys.path.insert(0, '.')
+from vault_lib.fee_oracle import FeeOracle, ReplayFeeSource, PERCENTILES, record_rows  # noqa: E402
+
+""" eth_feeHistory returns at most 1024 blocks per request, most nodes cap it lower """
+RECORD_CHUNK = 128
+
+
+def record(rpc: str, blocks: int, output: str):
+    w3 = Web3(Web3.HTTPProvider(rpc))
+    newest = w3.eth.block_number
+    rows = []
+    while blocks > 0:
+        count = min(blocks, RECORD_CHUNK)
+        rows = record_rows(w3.eth.fee_history(count, newest, list(PERCENTILES))) + rows
+        newest -= count
+        blocks -= count
+    with open(output, 'w') as f:
+        json.dump(rows, f)
+    print(f'[+] Recorded {len(rows)} blocks ({rows[0]["number"]} - {rows[-1]["number"]}) to {output}')
+
+
+def replay(recording: str, step: int, window: int):
+    source = ReplayFeeSource(recording)
+    source.step(window - 1)
+    # max_age=0: every step is a new block, never trust the previous refresh
+    oracle = FeeOracle(source, window=window, max_age=0)
+    steps = 0
+    while True:
+        suggestions = oracle.suggest_all()
+        print(f'{oracle.cursor}: ' + ', '.join(f'{name} {s.max_priority_fee_gwei}/{s.max_fee_gwei}'
+                                                for name, s in suggestions.items()))
+        steps += 1
+        if not source.step(step):
+            break
+    print(f'[+] {steps} steps, {source.requests} fee history requests, {oracle.fetched_blocks} blocks fetched.')
+
+
+def main():
+    args = argparse.ArgumentParser()
+    subparsers = args.add_subparsers(dest='command')
+    rec = subparsers.add_parser('record')
+    rec.add_argument('rpc', type=str, help='Node http endpoint')
+    rec.add_argument('-n', '--blocks', type=int, default=200)
+    rec.add_argument('-o', '--output', type=str, default='fee_history.json')
+    rep = subparsers.add_parser('replay')
+    rep.add_argument('recording', type=str)
+    rep.add_argument('-s', '--step', type=int, default=1, help='Blocks per step')
+    rep.add_argument('-w', '--window', type=int, default=5)
+    args = args.parse_args()
+    if args.command == 'record':
+        record(args.rpc, args.blocks, args.output)
+    elif args.command == 'replay':
+        replay(args.recording, args.step, args.window)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/python3
+"""
+Startup time budget for vault.py.
+
+    python3 scripts/startup_bench.py [-r 9] [--live] [-b configs/startup_budgets.json]
+
+Every scenario in the budget file runs `python -X importtime vault.py <argv>`
+a few times, each right after a run of the bare interpreter. The median of
+the paired differences in import and wall time and the set of imported
+modules are checked against the scenario's budget: `import_ms`, `wall_ms`, and
+`forbid` (modules that must not be imported on that path). The script exits
+non-zero if any budget is exceeded. Scenarios marked `live` need a configured
+wallet and a reachable node and only run with --live.
+
+The time budgets are a median over repeated runs plus headroom (`--help`:
+about 24 ms of imports, 47 ms wall, worst median of 33 / 64 ms over six runs
+of this script), the `forbid` lists are what catches a heavy import.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGETS = os.path.join(ROOT, 'configs', 'startup_budgets.json')
+# interpreter start up (site, encodings, sitecustomize) is not vault.py's to budget
+BARE = ['-c', 'pass']
+
+
+def parse_importtime(stderr: str) -> (float, set):
+    """
+    :return: total import time in ms (sum of the top level cumulative times), imported module names
+    """
+    total_us = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            total_us += int(cumulative)
+        modules.add(name.strip())
+    return total_us / 1000, modules
+
+
+def run_once(argv: list) -> (float, float, set, int):
+    """
+    :return: import ms, wall ms, imported modules, exit code
+    """
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime'] + argv, cwd=ROOT,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall_ms = (time.perf_counter() - started) * 1000
+    import_ms, modules = parse_importtime(proc.stderr)
+    return import_ms, wall_ms, modules, proc.returncode
+
+
+def run_scenario(argv: list, runs: int) -> dict:
+    """
+    Each run is paired with a run of the bare interpreter right before it, and the
+    median of the per pair differences is kept, so only vault.py's own cost is
+    checked and drift in machine load cancels out. A first, unpaired run warms the
+    file cache.
+    """
+    run_once(argv)
+    imports, walls, modules = [], [], set()
+    for _ in range(runs):
+        bare_import, bare_wall, bare_modules, _ = run_once(BARE)
+        import_ms, wall_ms, imported, returncode = run_once(argv)
+        imports.append(import_ms - bare_import)
+        walls.append(wall_ms - bare_wall)
+        modules |= imported - bare_modules
+    return {'import_ms': round(max(statistics.median(imports), 0), 1),
+            'wall_ms': round(max(statistics.median(walls), 0), 1), 'modules': modules, 'returncode': returncode}
+
+
+def check(name: str, budget: dict, result: dict) -> list:
+    failures = []
+    for key in ('import_ms', 'wall_ms'):
+        if key in budget and result[key] > budget[key]:
+            failures.append(f'{name}: {key} {result[key]} > budget {budget[key]}')
+    for module in budget.get('forbid', []):
+        if any(m == module or m.startswith(f'{module}.') for m in result['modules']):
+            failures.append(f'{name}: imports {module}')
+    return failures
+
+
+def main():
+    args = argparse.ArgumentParser()
+    args.add_argument('-b', '--budgets', type=str, default=DEFAULT_BUDGETS)
+    args.add_argument('-r', '--runs', type=int, default=9, help='Runs per scenario, the median is checked.')
+    args.add_argument('--live', action='store_true', help='Also run scenarios that need a wallet and a node.')
+    args = args.parse_args()
+    with open(args.budgets, 'r') as f:
+        scenarios = json.load(f)['scenarios']
+
+    failures = []
+    print(f'{"scenario":<24} {"import ms":>10} {"wall ms":>10} {"modules":>8}')
+    for name, budget in scenarios.items():
+        if budget.get('live') and not args.live:
+            continue
+        result = run_scenario(['vault.py'] + budget['argv'], args.runs)
+        print(f'{name:<24} {result["import_ms"]:>10} {result["wall_ms"]:>10} {len(result["modules"]):>8}')
+        failures += check(name, budget, result)
+    for failure in failures:
+        print(f'[!] {failure}')
+    if failures:
+        sys.exit(1)
+    print('[+] All startup budgets met.')
+
+
+if __name__ == '__main__':
+    main()
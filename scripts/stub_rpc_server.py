@@ -0,0 +1,216 @@
+#!/usr/bin/python3
+"""
+Local stand-in JSON-RPC servers for exercising the rpc pool.
+
+    python3 scripts/stub_rpc_server.py serve -e 8545:0.02 -e 8546:0.3:0.2 -e 8547:0:1
+    python3 scripts/stub_rpc_server.py check [-n 200]
+
+Each `-e port:delay[:fail_rate]` starts a server that answers after `delay`
+seconds (plus up to 50% jitter) and fails `fail_rate` of the requests, half of
+them with HTTP 503 and half with a JSON-RPC rate limit error. The answers are
+canned: a block number that moves every 12 seconds, chain id 1337, zero
+balances, the packed state of a 2 of 3 EtherVaultL2 for every address, and
+the keccak of every raw tx it receives. Every address has code from block
+DEPLOY_BLOCK on and emits a Deposit every 500 blocks; eth_getLogs refuses
+ranges wider than MAX_LOG_RANGE blocks, like hosted nodes do.
+
+`check` starts a fast, a slow and a flaky server in process, runs the same
+reads through one plain endpoint and through the pool, then checks hedging,
+failover and broadcast.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web3 import Web3  # noqa: E402
+
+from vault_lib.rpc_pool import RpcPool  # noqa: E402
+
+STARTED = time.time()
+DEPLOY_BLOCK = 100
+MAX_LOG_RANGE = 2000
+DEPOSIT_TOPIC = Web3.keccak(text='Deposit(address,uint256)').hex()
+
+
+def deposit_logs(address: str, first: int, last: int) -> list:
+    logs = []
+    first = max(first, DEPLOY_BLOCK)
+    for block in range(first + -first % 500, last + 1, 500):
+        logs.append({'address': address, 'blockNumber': hex(block), 'logIndex': '0x0', 'removed': False,
+                     'transactionHash': f'0x{block:064x}', 'topics': [DEPOSIT_TOPIC, '0x' + '00' * 12 + '11' * 20],
+                     'data': f'0x{10 ** 18:064x}'})
+    return logs
+
+
+def answer(request: dict, server) -> dict:
+    method, params = request.get('method'), request.get('params') or []
+    if method == 'eth_chainId':
+        result = hex(1337)
+    elif method == 'eth_blockNumber':
+        result = hex(1000 + int((time.time() - STARTED) / 12))
+    elif method in ('eth_getBalance', 'eth_getTransactionCount', 'eth_estimateGas', 'eth_gasPrice'):
+        result = '0x0'
+    elif method == 'eth_call':
+        result = '0x' + '00' * 32
+    elif method == 'eth_getBlockByNumber':
+        result = {'number': hex(1000 + int((time.time() - STARTED) / 12)), 'timestamp': hex(int(time.time()))}
+    elif method == 'eth_getStorageAt':
+        # an EtherVaultL2 (version 2) with 2 of 3 signers
+        result = hex(2 | 3 << 24 | 2 << 32) if int(params[1], 16) == 0 else '0x0'
+    elif method == 'eth_getCode':
+        block = params[1]
+        deployed = block in ('latest', 'pending') or int(block, 16) >= DEPLOY_BLOCK
+        result = '0x6080' if deployed else '0x'
+    elif method == 'eth_getLogs':
+        first, last = int(params[0]['fromBlock'], 16), int(params[0]['toBlock'], 16)
+        if last - first + 1 > MAX_LOG_RANGE:
+            return {'jsonrpc': '2.0', 'id': request.get('id'),
+                    'error': {'code': -32602, 'message': f'block range is too wide (max {MAX_LOG_RANGE})'}}
+        result = deposit_logs(params[0]['address'], first, last)
+    elif method == 'eth_feeHistory':
+        count = int(params[0], 16)
+        result = {'oldestBlock': hex(1000), 'baseFeePerGas': [hex(10 ** 10)] * (count + 1),
+                  'reward': [[hex(10 ** 9)] * len(params[2])] * count}
+    elif method == 'web3_clientVersion':
+        result = f'stub/{server.server_port}'
+    elif method == 'eth_sendRawTransaction':
+        server.received.append(params[0])
+        result = Web3.keccak(hexstr=params[0]).hex()
+    else:
+        return {'jsonrpc': '2.0', 'id': request.get('id'), 'error': {'code': -32601, 'message': 'method not found'}}
+    return {'jsonrpc': '2.0', 'id': request.get('id'), 'result': result}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        server = self.server
+        time.sleep(server.delay * (1 + random.random() * .5))
+        server.requests += 1
+        if random.random() < server.fail_rate:
+            if random.random() < .5:
+                self.send_response(503)
+                self.end_headers()
+                return
+            error = {'code': -32005, 'message': 'rate limit exceeded'}
+            out = [{'jsonrpc': '2.0', 'id': r.get('id'), 'error': error} for r in body] \
+                if isinstance(body, list) else {'jsonrpc': '2.0', 'id': body.get('id'), 'error': error}
+        else:
+            out = [answer(r, server) for r in body] if isinstance(body, list) else answer(body, server)
+        data = json.dumps(out).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start(port: int, delay: float, fail_rate: float = 0.0) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.daemon_threads = True
+    server.delay, server.fail_rate, server.requests, server.received = delay, fail_rate, 0, []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_endpoint(spec: str) -> (int, float, float):
+    parts = spec.split(':')
+    return int(parts[0]), float(parts[1]) if len(parts) > 1 else 0.0, float(parts[2]) if len(parts) > 2 else 0.0
+
+
+def timed_reads(w3: Web3, count: int) -> list:
+    times = []
+    for _ in range(count):
+        started = time.perf_counter()
+        try:
+            w3.eth.block_number
+        except Exception:
+            times.append(float('inf'))
+            continue
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def percentile(times: list, p: float) -> float:
+    times = sorted(times)
+    return times[min(int(len(times) * p), len(times) - 1)]
+
+
+def check(count: int) -> bool:
+    # the wallet's endpoint is slow and jittery, the pool adds a fast one and a flaky one
+    slow, fast, flaky = start(0, .15), start(0, .01), start(0, .005, .5)
+    urls = [f'http://127.0.0.1:{s.server_port}' for s in (slow, fast, flaky)]
+    ok = True
+
+    single = timed_reads(Web3(Web3.HTTPProvider(urls[0])), count)
+    pool = RpcPool(urls)
+    pooled = timed_reads(Web3(pool), count)
+    print(f'{"":<8} {"p50 ms":>8} {"p95 ms":>8} {"max ms":>8} {"failed":>7}')
+    for name, times in (('single', single), ('pool', pooled)):
+        ok_times = [t for t in times if t != float('inf')]
+        print(f'{name:<8} {statistics.median(ok_times) * 1000:>8.1f} {percentile(ok_times, .95) * 1000:>8.1f} '
+              f'{max(ok_times) * 1000:>8.1f} {len(times) - len(ok_times):>7}')
+    pool.print_status()
+    if statistics.median(pooled) >= statistics.median(single):
+        print('[!] The pool is not faster than the slow endpoint alone.')
+        ok = False
+    if pool.ranked()[0].url != urls[1]:
+        print('[!] The fast endpoint is not ranked first.')
+        ok = False
+
+    # failover: the fastest endpoint goes away
+    fast.shutdown()
+    fast.server_close()
+    failed = sum(t == float('inf') for t in timed_reads(Web3(pool), 20))
+    print(f'[+] Fastest endpoint down: {failed}/20 reads failed.')
+    ok &= failed == 0
+
+    raw = '0x' + os.urandom(64).hex()
+    Web3(pool).eth.send_raw_transaction(raw)
+    time.sleep(.5)
+    reached = [s.server_port for s in (slow, flaky) if raw in s.received]
+    print(f'[+] Raw tx reached {len(reached)} of the 2 live endpoints.')
+    ok &= len(reached) >= 1
+    print('[+] RPC pool check passed.' if ok else '[!] RPC pool check failed.')
+    return ok
+
+
+def main():
+    args = argparse.ArgumentParser()
+    subparsers = args.add_subparsers(dest='command')
+    serve = subparsers.add_parser('serve', help='Run stand-in endpoints until interrupted.')
+    serve.add_argument('-e', '--endpoint', action='append', required=True,
+                       help='port:delay[:fail_rate], may be repeated')
+    check_parser = subparsers.add_parser('check', help='Compare the pool with a single endpoint.')
+    check_parser.add_argument('-n', '--count', type=int, default=200, help='Reads per run.')
+    args = args.parse_args()
+
+    if args.command == 'serve':
+        servers = [start(*parse_endpoint(spec)) for spec in args.endpoint]
+        for server in servers:
+            print(f'[+] http://127.0.0.1:{server.server_port} delay {server.delay}s fail rate {server.fail_rate}')
+        try:
+            while True:
+                time.sleep(60)
+                print(f'[+] Requests served: {[s.requests for s in servers]}')
+        except KeyboardInterrupt:
+            pass
+    elif args.command == 'check':
+        sys.exit(0 if check(args.count) else 1)
+    else:
+        args.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+"""
+Regenerate the vault ABIs in vault_lib/vault_abi.py from brownie's compiled
+artifacts, so they are never edited by hand:
+
+    brownie compile && python3 scripts/update_abis.py
+    brownie compile && python3 scripts/update_abis.py --check
+
+--check only compares (entries in any order) and exits non-zero when an ABI
+is out of date. The legacy ABIs describe bytecode that is already deployed
+and are left alone.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ABI_MODULE = os.path.join(ROOT, 'vault_lib', 'vault_abi.py')
+BUILD_DIR = os.path.join(ROOT, 'build', 'contracts')
+""" vault_abi source name -> compiled contract """
+CONTRACTS = {
+    '_ethervault_1_abi': 'EtherVault',
+    '_ethervault_2_abi': 'EtherVaultL2',
+}
+
+
+def _pattern(name: str) -> re.Pattern:
+    return re.compile(rf'^{name} = """(.*?)"""$', re.M | re.S)
+
+
+def compiled_abi(contract: str) -> list:
+    with open(os.path.join(BUILD_DIR, f'{contract}.json'), 'r') as f:
+        return json.load(f)['abi']
+
+
+def _canonical(abi: list) -> list:
+    return sorted(json.dumps(entry, sort_keys=True) for entry in abi)
+
+
+def main():
+    args = argparse.ArgumentParser()
+    args.add_argument('--check', action='store_true', help='Only report ABIs that differ from the artifacts.')
+    args = args.parse_args()
+    with open(ABI_MODULE, 'r') as f:
+        src = f.read()
+
+    stale = []
+    for name, contract in CONTRACTS.items():
+        match = _pattern(name).search(src)
+        abi = compiled_abi(contract)
+        if _canonical(json.loads(match.group(1))) == _canonical(abi):
+            continue
+        stale.append(name)
+        src = src[:match.start(1)] + json.dumps(abi) + src[match.end(1):]
+
+    if not stale:
+        print('[+] ABIs match the compiled contracts.')
+        return
+    if args.check:
+        print(f'[!] Out of date: {", ".join(stale)}, run scripts/update_abis.py after brownie compile.')
+        sys.exit(1)
+    with open(ABI_MODULE, 'w') as f:
+        f.write(src)
+    print(f'[+] Updated {", ".join(stale)} in {ABI_MODULE}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""
+Gas used by EtherVaultL2.withdraw() on a local development chain, per path:
+
+    brownie run scripts/withdraw_gas.py main before.json --network development
+    brownie run scripts/withdraw_gas.py main after.json before.json --network development
+
+The first argument is where the numbers are saved. The second, optional one is
+a baseline saved the same way (ie: from a checkout before a contract change),
+which adds the per-path difference to the report.
+"""
+import json
+
+from brownie import accounts, chain, EtherVaultL2, MockAggregator, MockERC20
+from brownie.exceptions import VirtualMachineError
+
+ZERO = '0x0000000000000000000000000000000000000000'
+DAILY_LIMIT = 1000  # dollars
+
+
+def measure() -> dict:
+    signers = accounts[:4]
+    eth_feed = MockAggregator.deploy(2000 * 10 ** 8, {'from': accounts[0]})
+    usdc_feed = MockAggregator.deploy(10 ** 8, {'from': accounts[0]})
+    usdc = MockERC20.deploy(6, {'from': accounts[0]})
+    vault = EtherVaultL2.deploy(signers, 2, DAILY_LIMIT, eth_feed, {'from': accounts[0]})
+    accounts[0].transfer(vault, '10 ether')
+    usdc.mint(vault, 10 ** 6 * 10 ** usdc.decimals(), {'from': accounts[0]})
+    vault.trackToken(usdc, usdc_feed, 1, {'from': signers[0]})
+
+    paths = [
+        ('eth under limit', ZERO, 10 ** 16),
+        ('erc20 under limit', usdc.address, 20 * 10 ** 6),
+        ('eth over limit (queued)', ZERO, 10 ** 18),
+        ('erc20 over limit (queued)', usdc.address, 5000 * 10 ** 6),
+    ]
+    results = {}
+    for name, token, amount in paths:
+        # same day, same warm/cold storage pattern for every path
+        chain.sleep(86400)
+        chain.mine()
+        try:
+            tx = vault.withdraw(token, accounts[9], amount, vault.execNonce() + 1, {'from': signers[0]})
+        except VirtualMachineError:
+            results[name] = None
+            continue
+        results[name] = tx.gas_used
+    return results
+
+
+def main(out_file: str = 'withdraw_gas.json', baseline_file: str = None):
+    results = measure()
+    baseline = {}
+    if baseline_file:
+        with open(baseline_file, 'r') as f:
+            baseline = json.load(f)
+    print(f'{"path":<28} {"gas":>9} {"baseline":>9} {"diff":>8}')
+    for name, gas in results.items():
+        before = baseline.get(name)
+        diff = f'{gas - before:+d}' if gas is not None and before is not None else '-'
+        print(f'{name:<28} {gas if gas is not None else "revert":>9} '
+              f'{before if before is not None else "-":>9} {diff:>8}')
+    with open(out_file, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'[+] Saved to {out_file}')
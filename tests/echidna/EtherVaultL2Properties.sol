@@ -0,0 +1,270 @@
+pragma solidity ^0.8.16;
+// SPDX-License-Identifier:MIT
+/*
+  @dev: Echidna property harness for the current EtherVaultL2.
+
+  The harness deploys the vault with four Actor contracts as signers (threshold
+  3), a mock ETH/USD feed, a tracked 6 decimal token with its own feed and an
+  untracked 18 decimal token. Fuzzed entry points make an actor call the vault
+  (withdrawals, approvals, deletions, pause proposals), move the oracle prices,
+  or replay stale nonces. Every payout goes to SINK, and ghost variables record
+  what the vault was allowed to send and what it counted against the limit.
+
+  Run through scripts/echidna_campaign.py, or on its own:
+      echidna-test tests/echidna/EtherVaultL2Properties.sol --contract EtherVaultL2Properties \
+          --config tests/echidna/ethervault_l2.yaml
+*/
+
+import "../../contracts/EtherVaultL2.sol";
+import "../../contracts/mocks/MockAggregator.sol";
+import "../../contracts/mocks/MockERC20.sol";
+
+contract Actor {
+    /*
+      @dev: A vault signer driven by the harness.
+    */
+    address immutable owner;
+
+    constructor() {
+        owner = msg.sender;
+    }
+
+    function exec(address target, bytes calldata data) external returns (bool ok, bytes memory ret) {
+        require(msg.sender == owner, "!owner");
+        (ok, ret) = target.call(data);
+    }
+
+    receive() external payable {}
+}
+
+contract EtherVaultL2Properties {
+    address constant SINK = address(0x5151);
+    uint8 constant ACTORS = 4;
+    uint8 constant THRESHOLD = 3;
+    uint128 constant DAILY_LIMIT = 1000; // dollars
+    uint constant TOKEN_DECIMALS = 6;
+
+    EtherVaultL2 vault;
+    MockAggregator ethFeed;
+    MockAggregator tokenFeed;
+    MockERC20 token;
+    MockERC20 untracked;
+    Actor[ACTORS] actors;
+
+    /*
+      @dev: Ghost state. successes counts protected calls that went through, payouts
+      are split into limited (executed right away) and approved (executed by the
+      threshold-reaching approval). dayTotal is the dollar value of limited payouts
+      per day, ether priced independently of the contract.
+    */
+    uint32 successes;
+    uint immediateEth;
+    uint approvedEth;
+    uint immediateToken;
+    uint approvedToken;
+    mapping (uint => uint) dayTotal;
+    uint maxDayTotal;
+    bool staleNonceAccepted;
+    bool withdrawnWhilePaused;
+    bool untrackedWithdrawn;
+
+    constructor() payable {
+        ethFeed = new MockAggregator(2000 * 10**8);
+        tokenFeed = new MockAggregator(10**8);
+        token = new MockERC20(uint8(TOKEN_DECIMALS));
+        untracked = new MockERC20(18);
+        address[] memory signers = new address[](ACTORS);
+        for (uint8 i = 0; i < ACTORS; i++) {
+            actors[i] = new Actor();
+            signers[i] = address(actors[i]);
+        }
+        vault = new EtherVaultL2(signers, THRESHOLD, DAILY_LIMIT, address(ethFeed));
+        payable(address(vault)).transfer(address(this).balance);
+        token.mint(address(vault), 10**6 * 10**TOKEN_DECIMALS);
+        untracked.mint(address(vault), 10**24);
+        (bool ok, ) = act(0, abi.encodeWithSelector(vault.trackToken.selector, address(token), address(tokenFeed),
+            vault.execNonce() + 1));
+        require(ok, "trackToken");
+    }
+
+    function act(uint8 who, bytes memory data) internal returns (bool ok, bytes memory ret) {
+        (ok, ret) = actors[who % ACTORS].exec(address(vault), data);
+        if (ok) {
+            successes += 1;
+        }
+    }
+
+    function nextNonce() internal view returns (uint32) {
+        return vault.execNonce() + 1;
+    }
+
+    function countLimited(uint dollars) internal {
+        uint day = block.timestamp / 1 days;
+        dayTotal[day] += dollars;
+        if (dayTotal[day] > maxDayTotal) {
+            maxDayTotal = dayTotal[day];
+        }
+    }
+
+    function withdrawEth(uint8 who, uint128 amount) external {
+        amount = amount % (2 ether) + 1;
+        bool paused = vault.paused();
+        (, int256 answer, , , ) = ethFeed.latestRoundData();
+        (bool ok, bytes memory ret) = act(who, abi.encodeWithSelector(vault.withdraw.selector, address(0), SINK,
+            amount, nextNonce()));
+        if (!ok) {
+            return;
+        }
+        withdrawnWhilePaused = withdrawnWhilePaused || paused;
+        if (abi.decode(ret, (uint32)) == 0) {
+            immediateEth += amount;
+            // 18 decimals: the contract's dollar value is exactly answer * amount / 1e26
+            countLimited(uint(answer) * amount / 10**26);
+        }
+    }
+
+    function withdrawToken(uint8 who, uint128 amount) external {
+        amount = amount % uint128(10**5 * 10**TOKEN_DECIMALS) + 1;
+        bool paused = vault.paused();
+        uint dollars = vault.getDollarValue(address(token), amount) / 10**TOKEN_DECIMALS;
+        (bool ok, bytes memory ret) = act(who, abi.encodeWithSelector(vault.withdraw.selector, address(token), SINK,
+            amount, nextNonce()));
+        if (!ok) {
+            return;
+        }
+        withdrawnWhilePaused = withdrawnWhilePaused || paused;
+        if (abi.decode(ret, (uint32)) == 0) {
+            immediateToken += amount;
+            countLimited(dollars);
+        }
+    }
+
+    function withdrawUntracked(uint8 who, uint128 amount) external {
+        (bool ok, ) = act(who, abi.encodeWithSelector(vault.withdraw.selector, address(untracked), SINK,
+            amount % 10**20 + 1, nextNonce()));
+        if (ok) {
+            untrackedWithdrawn = true;
+        }
+    }
+
+    function withdrawStaleNonce(uint8 who, uint32 nonce) external {
+        if (nonce == nextNonce()) {
+            nonce += 1;
+        }
+        (bool ok, ) = act(who, abi.encodeWithSelector(vault.withdraw.selector, address(0), SINK, 1, nonce));
+        staleNonceAccepted = staleNonceAccepted || ok;
+    }
+
+    function pendingPayout(uint32 txid) internal view returns (address dest, uint128 value, bytes memory data) {
+        (, dest, value, data, , , ) = vault.pendingTxs(txid);
+    }
+
+    function settle(address dest, uint128 value, bytes memory data, uint32 txid) internal {
+        /*
+          @dev: Book the payout of a tx the last call executed, a deleted tx pays nothing.
+        */
+        (address after_, , ) = pendingPayout(txid);
+        if (dest == address(0) || after_ != address(0)) {
+            return;
+        }
+        if (data.length == 0) {
+            approvedEth += value;
+        } else {
+            // encodeTransfer(SINK, amount): 4 byte selector, then the abi encoded arguments
+            bytes memory args = new bytes(data.length - 4);
+            for (uint i = 0; i < args.length; i++) {
+                args[i] = data[i + 4];
+            }
+            (, uint amount) = abi.decode(args, (address, uint));
+            approvedToken += amount;
+        }
+    }
+
+    function approve(uint8 who, uint32 txid) external {
+        txid = txid % (vault.txCount() + 1);
+        (address dest, uint128 value, bytes memory data) = pendingPayout(txid);
+        (bool ok, ) = act(who, abi.encodeWithSelector(vault.approveTx.selector, txid, nextNonce()));
+        if (ok) {
+            settle(dest, value, data, txid);
+        }
+    }
+
+    function approveMany(uint8 who, uint32 first, uint32 second) external {
+        uint32[] memory txids = new uint32[](2);
+        (txids[0], txids[1]) = (first % (vault.txCount() + 1), second % (vault.txCount() + 1));
+        address[2] memory dests;
+        uint128[2] memory values;
+        bytes[2] memory datas;
+        for (uint i = 0; i < 2; i++) {
+            (dests[i], values[i], datas[i]) = pendingPayout(txids[i]);
+        }
+        (bool ok, ) = act(who, abi.encodeWithSelector(vault.approveTxs.selector, txids, nextNonce()));
+        if (!ok) {
+            return;
+        }
+        settle(dests[0], values[0], datas[0], txids[0]);
+        if (txids[1] != txids[0]) {
+            settle(dests[1], values[1], datas[1], txids[1]);
+        }
+    }
+
+    function deleteTx(uint8 who, uint32 txid) external {
+        act(who, abi.encodeWithSelector(vault.deleteTx.selector, txid % (vault.txCount() + 1), nextNonce()));
+    }
+
+    function proposePause(uint8 who, bool pause) external {
+        act(who, abi.encodeWithSelector(vault.newProposal.selector, address(0), uint128(0), uint8(0), pause,
+            nextNonce()));
+    }
+
+    function approveProposal(uint8 who, uint16 id) external {
+        act(who, abi.encodeWithSelector(vault.approveProposal.selector, id % (vault.proposalId() + 1), nextNonce()));
+    }
+
+    function setEthPrice(uint64 answer) external {
+        // $0.00000001 to $10M
+        ethFeed.setAnswer(int256(uint256(answer % (10**15)) + 1));
+    }
+
+    function setTokenPrice(uint64 answer) external {
+        tokenFeed.setAnswer(int256(uint256(answer % (10**11)) + 1));
+    }
+
+    /*
+      @dev: Properties
+    */
+    function echidna_spent_within_limit() external view returns (bool) {
+        return vault.spentToday() <= vault.dailyLimit();
+    }
+
+    function echidna_day_total_within_limit() external view returns (bool) {
+        // limited payouts of any one day, at the prices they went out at
+        return maxDayTotal <= DAILY_LIMIT;
+    }
+
+    function echidna_eth_outflows_accounted() external view returns (bool) {
+        // nothing leaves the vault that was not under the limit or approved by the threshold
+        return SINK.balance == immediateEth + approvedEth;
+    }
+
+    function echidna_token_outflows_accounted() external view returns (bool) {
+        return token.balanceOf(SINK) == immediateToken + approvedToken;
+    }
+
+    function echidna_nonce_counts_successes() external view returns (bool) {
+        // execNonce moves once per protected call that went through, never for one that reverted
+        return vault.execNonce() == successes;
+    }
+
+    function echidna_stale_nonce_rejected() external view returns (bool) {
+        return !staleNonceAccepted;
+    }
+
+    function echidna_paused_blocks_withdrawals() external view returns (bool) {
+        return !withdrawnWhilePaused;
+    }
+
+    function echidna_untracked_not_withdrawn() external view returns (bool) {
+        return !untrackedWithdrawn;
+    }
+}
@@ -0,0 +1,72 @@
+"""
+Replays the eth_feeHistory fixture through FeeOracle the way scripts/replay_fees.py does:
+
+    python -m pytest tests/test_fee_oracle.py
+"""
+import json
+import os
+
+from vault_lib.fee_oracle import FeeOracle, ReplayFeeSource, record_rows
+from vault_lib.tx_builder import decode_fee_history
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'fee_history.json')
+WINDOW = 5
+
+
+def load_rows() -> list:
+    with open(FIXTURE, 'r') as f:
+        return record_rows(decode_fee_history(json.load(f)['result']))
+
+
+def replay(step: int = 1) -> (ReplayFeeSource, FeeOracle, list):
+    source = ReplayFeeSource(load_rows())
+    source.step(WINDOW - 1)
+    oracle = FeeOracle(source, window=WINDOW, max_age=0)
+    suggestions = []
+    while True:
+        # every preset read per step must share one refresh
+        suggestions.append(oracle.suggest_all())
+        for priority in ('low', 'medium', 'high', 'polygon'):
+            oracle.suggest(priority, refresh=False)
+        if not source.step(step):
+            break
+    return source, oracle, suggestions
+
+
+def test_fixture_rows():
+    rows = load_rows()
+    assert [row['number'] for row in rows] == list(range(17000000, 17000016))
+    assert rows[-1]['nextBaseFeePerGas'] == 25972035406
+
+
+def test_one_request_per_step():
+    source, oracle, suggestions = replay()
+    assert len(suggestions) == 12
+    assert source.requests == 12
+    # the first request fills the window, every later one fetches only the new block
+    assert oracle.fetched_blocks == WINDOW + 11
+    assert sorted(oracle.rows) == list(range(17000011, 17000016))
+
+
+def test_catch_up_is_capped_at_window():
+    source, oracle, suggestions = replay(step=7)
+    # heads 17000004, 17000011 and 17000015 (end of the recording): 7 new blocks are capped at the window
+    assert source.requests == len(suggestions) == 3
+    assert oracle.fetched_blocks == WINDOW + WINDOW + 4
+
+
+def test_suggested_fees():
+    _, oracle, suggestions = replay()
+    first, last = suggestions[0], suggestions[-1]
+    assert first['high'].block == 17000004
+    assert first['high'].max_priority_fee == 980000000
+    assert first['high'].max_fee == 34967766443
+
+    assert {s.block for s in last.values()} == {17000015}
+    # medians over blocks 17000011-17000015: 77M, 100M and 1G wei, under the minimums for low and medium
+    assert {name: (s.max_priority_fee, s.max_fee) for name, s in last.items()} == {
+        'low': (100000000, 28669238946),
+        'medium': (150000000, 31316442487),
+        'high': (980000000, 33445044257),
+        'polygon': (4900000000, 100335132771),
+    }
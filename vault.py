@@ -1,244 +1,60 @@
 #!/usr/bin/env python3
 # Super Beta
 import argparse
-import os.path
+import os
+import sys
+from typing import TYPE_CHECKING
 
-import dotenv
-from eth_typing import ChecksumAddress
-from eth_utils import to_checksum_address, to_wei, to_hex, from_wei
-from secure_web3 import sw3_wallet, sw3
-from web3.contract import Contract
-
-import vault_lib.gas_estimator
-from vault_lib import eip1559_gas
+from vault_lib import daemon
 from vault_lib import exceptions
-from vault_lib import helpers
-from vault_lib import vault_abi
-
-
-class VaultCli:
-    def __init__(self, wallet_file: str, network: str = 'ethereum', contract_address: str = None, init: bool = False,
-                 require_unlock: bool = True):
-        """
-        Command Line Ethervault controller tool
-        (note: see docs)
-
-        Tool for deploying, depositing, administering the contract.
-        :param wallet_file: json wallet file
-        :param network: ie "ethereum"
-        :param init: import private key and setup wallet
-        """
-        dotenv.load_dotenv('.env')
-        self.contract_address = contract_address
-        self.wallet_file = wallet_file
-        self.network = network
-        self.contract_nonce = 0
-        self.sw3 = sw3.SecureWeb3(wallet_file, network, )
-
-        if require_unlock:
-            if not init:
-                self.sw3.load_wallet(self.wallet_file)
-            else:
-                if not self.check_wallet(init):
-                    return
-
-        self.contract_address = contract_address
-        self.sw3.setup_w3()
-        self.sw3_wallet = sw3_wallet.EtherShellWallet(self.sw3)
-
-    def check_wallet(self, init: (bool, str, ChecksumAddress) = False) -> bool:
-        """
-
-        :param init: if specified, store in wallet this contract address
-        :return: bool
-        """
-        if init:
-            return self.configure_wallet()
-        if not os.path.exists(self.wallet_file):
-            print(f'[!] Wallet does not exist: {self.wallet_file}')
-            return False
-        return True
-
-    def configure_wallet(self) -> bool:
-        """
-
-        :return:
-        """
-        print('[+] Configuring .. ')
-        custom_params = []
-        if self.sw3.configure_wallet(custom_params):
-            return True
-        return False
-
-    def check_w3_chain_id(self) -> int:
-        """
-        Return the chain ID
-        :return: int
-        """
-        if self.sw3.w3.isConnected():
-            cid = self.sw3.w3.eth.chain_id
-            return cid
-        return False
-
-    @property
-    def w3(self):
-        return self.sw3._w3
-
-    @property
-    def contract(self) -> Contract:
-        if hasattr(self, 'contract_address'):
-            return self.w3.eth.contract(self.contract_address, abi=vault_abi.ethervault_2_abi)
-        raise exceptions.ContractNotConfigured('Please specify your contract address on '
-                                               'this network in your wallet file.')
-
-    def build_contract_interaction_tx(self, function: str, *args) -> dict:
-        """
-        Builds contract interaction transaction.
-        :param function: The function to call
-        :param args: The arguments to that function
-        :return: dict tx object
-        """
-
-        # max_pri_fee, max_fee = self.sw3_wallet.query_gas_api()
-        encoded_data = self.contract.encodeABI(function, args=args)
-        max_pri_fee, max_fee, gas_est = vault_lib.gas_estimator.gas_estimator(self.w3, self.sw3.account.address, self.contract.address,
-                                                                              0.0, 'medium',self.contract, function, *args)
-        print(f'[+] Priority Fee: {max_pri_fee}, Max: {max_fee}, Gas: {gas_est}')
-        raw_txn = {
-            "from": self.sw3.account.address,
-            "gas": gas_est,  # 200000
-            'maxPriorityFeePerGas': to_wei(max_pri_fee, 'gwei'),
-            'maxFeePerGas': to_wei(max_fee, 'gwei'),
-            "to": self.contract_address,
-            "value": to_hex(0),
-            "data": encoded_data,
-            "nonce": self.w3.eth.get_transaction_count(self.sw3.account.address),
-            "chainId": self.w3.eth.chain_id
-        }
-        return raw_txn
-
-    def get_contract_nonce(self) -> int:
-        return self.get_property('execNonce') +1
-
-    def get_contract_balance(self) -> int:
-        return self.sw3.w3.eth.get_balance(self.contract_address)
-
-    def get_eth_account_balance(self, address):
-        return self.w3.eth.get_balance(to_checksum_address(address))
-
-    def deposit_ether(self, qty: float) -> (hex, bool):
-        """
-        Deposit in contract
-        :param qty:
-        :return: hex(txid)
-        """
-        # TODO: test this function
-        raw_qty = to_wei(qty, 'ether')
-        txid = self.sw3_wallet.send_eth(raw_qty, self.contract_address, False, False)
-        if txid:
-            print(f'[+] TXID: {txid}')
-
-    def add_tracked_token(self, token_address: (str, ChecksumAddress), price_feed_address: (str, ChecksumAddress)):
-        tx = self.build_contract_interaction_tx('trackToken', to_checksum_address(token_address),
-                                                to_checksum_address(price_feed_address), self.get_contract_nonce())
-        return self.sw3_wallet.broadcast_raw_tx(tx=tx, private=False)
-
-    def propose_withdrawal_raw(self, destination: ChecksumAddress, quantity: float, data: bytes = bytes('0x'.encode())):
-        raw_qty = int(self.sw3.w3.toWei(quantity, 'ether'))
-
-        assert (
-                    self.get_contract_balance() >= raw_qty)
-        #tx = self.build_contract_interaction_tx('submitTx', args={'recipient': to_checksum_address(destination),
-        #                                                          'value': int(raw_qty), 'data': data,
-        #                                                          '_nonce': int(self.get_contract_nonce())})
-        tx = self.build_contract_interaction_tx('submitRawTx', to_checksum_address(destination), int(raw_qty), data, int(self.get_contract_nonce()))
-        return self.sw3_wallet.broadcast_raw_tx(tx=tx, private=False)
-
-    def propose_token_withdrawal_via_raw(self, destination: ChecksumAddress, token_address: ChecksumAddress, quantity: float):
-        token = self.w3.eth.contract(token_address, abi=vault_lib.vault_abi.EIP20_ABI)
-        decimals = token.functions.decimals().call()
-        raw_qty = int(quantity * (10**decimals))
-        #data = token.functions.transfer(to_checksum_address(destination), raw_qty).encodeABI()
-        data = token.encodeABI('transfer', (to_checksum_address(destination), raw_qty))
-        #tx = self.build_contract_interaction_tx('submitTx', args={'recipient': to_checksum_address(token_address),
-        #                                                          'value': 0, 'data': data,
-        #                                                          '_nonce': int(self.get_contract_nonce())})
-        tx = self.build_contract_interaction_tx('submitRawTx', to_checksum_address(token_address), 0, data, int(self.get_contract_nonce()))
-        return self.sw3_wallet.broadcast_raw_tx(tx=tx, private=False)
-
-    def assert_version(self, _version: int = 2) -> bool:
-        try:
-            assert (self.get_property('version') == _version)
-        except AssertionError:
-            print('[!] Wrong version for function call.')
-            return False
-        return True
-
-    def withdraw_via_withdraw(self, token_address: (ChecksumAddress, None), destination: ChecksumAddress, amount: float):
-        self.assert_version(2)
-        if token_address is None:
-            raw_qty = int(amount * (10 ** 18))
-            token_address = '0x0000000000000000000000000000000000000000'
-        else:
-            token = self.w3.eth.contract(token_address, abi=vault_lib.vault_abi.EIP20_ABI)
-            decimals = token.functions.decimals().call()
-            raw_qty = int(amount * (10 ** decimals))
-        tx = self.build_contract_interaction_tx('withdraw', to_checksum_address(token_address), to_checksum_address(destination),
-                                                raw_qty, int(self.get_contract_nonce()))
-        return self.sw3_wallet.broadcast_raw_tx(tx=tx, private=False)
-
-
-
-
-    def cancel_withdrawal(self, transaction_id: int) -> (hex, bool):
-        nonce = self.get_contract_nonce()
-        #tx = self.build_contract_interaction_tx('deleteTx', {'txid': transaction_id, '_nonce': nonce})
-        tx = self.build_contract_interaction_tx('deleteTx', transaction_id, nonce)
-        return self.sw3_wallet.broadcast_raw_tx(tx=tx, private=False)
-
-    def confirm_withdrawal(self, transaction_id) -> (hex, bool):
-        nonce = self.get_contract_nonce()
-        # tx = self.build_contract_interaction_tx('approveTx', {'txid': transaction_id, '_nonce': nonce})
-        tx = self.build_contract_interaction_tx('approveTx', transaction_id, nonce)
-        return self.sw3_wallet.broadcast_raw_tx(tx=tx, private=False)
-
-    def initiate_proposal(self, signer_address: ChecksumAddress, limit: float, threshold: int, paused: bool = False) -> (hex, bool):
-        #tx = self.build_contract_interaction_tx('newProposal', {'_signer': signer_address, '_limit': limit,
-        #                                                        '_threshold': threshold,
-        #                                                        '_nonce': self.get_contract_nonce()})
-        tx = self.build_contract_interaction_tx('newProposal', signer_address, limit, threshold, paused, self.get_contract_nonce())
-        return self.sw3_wallet.broadcast_raw_tx(tx=tx, private=False)
-
-    def approve_proposal(self, proposal_id) -> (hex, bool):
-        #tx = self.build_contract_interaction_tx('approveProposal', {'_proposalId': proposal_id,
-        #                                                            '_nonce': self.get_contract_nonce()})
-        tx = self.build_contract_interaction_tx('approveProposal', proposal_id, self.get_contract_nonce())
-        return self.sw3_wallet.broadcast_raw_tx(tx=tx, private=False)
-
-    def revoke_proposal(self, proposal_id) -> (hex, bool):
-        #tx = self.build_contract_interaction_tx('deleteProposal', {'_proposalId': proposal_id,
-        #                                                           '_nonce': self.get_contract_nonce()})
-        tx = self.build_contract_interaction_tx('deleteProposal', proposal_id, self.get_contract_nonce())
-        return self.sw3_wallet.broadcast_raw_tx(tx=tx, private=False)
-
-    def get_ethervault_version(self):
-        return self.get_property('version')
-
-    def get_property(self, name, _id=None):
-        contract = self.contract
-        method = getattr(contract.functions, name)
-        if _id is None:
-            return method().call()
-        return method(_id).call()
-
-
-def vault_cli():
-    unlock = False
+
+if TYPE_CHECKING:
+    from vault_lib.vault_cli import VaultCli
+
+
+def __getattr__(name: str):
+    """
+    `from vault import VaultCli` keeps working, the session module (and web3
+    with it) is only imported when something actually asks for it.
+    """
+    if name in ('VaultCli', 'preflight_ok'):
+        from vault_lib import vault_cli as session
+        return getattr(session, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+""" Commands that sign and need the wallet unlocked """
+UNLOCK_COMMANDS = ('deposit', 'withdraw', 'cancel', 'confirm', 'proposal', 'revoke', 'approve', 'withdraw_token',
+                   'track_token', 'batch', 'nonces', 'track', 'serve', 'sign_bundle', 'submit_bundle')
+""" Commands never forwarded to a daemon: it serves one connection at a time, so nothing long running goes there """
+LOCAL_COMMANDS = (None, 'serve', 'watch', 'track', 'batch')
+""" Kept in sync with vault_lib.fleet.OPERATIONS, which is too heavy to import for argument parsing """
+FLEET_OPERATIONS = ('balance', 'state', 'pending', 'approve')
+""" Seconds --wait follows sent txs """
+WAIT_TIMEOUT = 600
+
+
+def build_parser() -> argparse.ArgumentParser:
     args = argparse.ArgumentParser()
     args.add_argument('-w', '--wallet', type=str, default='keys/default_wallet.json')
     args.add_argument('-i', '--init', action='store_true', help='Import private key and initialize the wallet.')
     args.add_argument('-n', '--network', type=str, default='goerli', choices=['goerli', 'ethereum', 'arbitrum'],
                       help='The EVM chain to operate on.')
+    args.add_argument('--no-daemon', dest='no_daemon', action='store_true',
+                      help='Run the command in this process even if a daemon is serving.')
+    args.add_argument('--socket', type=str, default=None,
+                      help='Daemon socket to serve on / send commands to (default: .cache/vault-<network>.sock)')
+    args.add_argument('--profile', action='store_true', help='Print JSON-RPC calls, latency and bytes per phase.')
+    args.add_argument('--profile-json', dest='profile_json', type=str, default=None,
+                      help='Write the RPC profile to this json file.')
+    args.add_argument('--profile-prom', dest='profile_prom', type=str, default=None,
+                      help='Write the RPC profile in prometheus text format (node exporter textfile).')
+    args.add_argument('--wait', action='store_true',
+                      help='Follow sent txs until they are included, replacing stuck ones with higher fees.')
+    args.add_argument('--bump-after', dest='bump_after', type=int, default=3,
+                      help='Blocks a tx may stay pending before it is replaced (0: never replace).')
+    args.add_argument('--max-fee', dest='max_fee', type=float, default=None,
+                      help='Max fee per gas (gwei) a replacement may pay.')
     subparsers = args.add_subparsers(dest='command')
     deposit = subparsers.add_parser('deposit', help='Deposit ether')
     deposit.add_argument('-q', '--quantity', type=float, help='Ether amount')
@@ -251,16 +67,45 @@ def vault_cli():
     withdraw.add_argument('-r', '--recipient', type=str, help='Ether address of recipient.')
     withdraw.add_argument('-q', '--quantity', type=float, help='Ether amount.')
     withdraw.add_argument('-f', '--file', type=str, help='A file with data for transaction.')
+    withdraw.add_argument('-d', '--dry-run', dest='dry_run', action='store_true',
+                          help='Only run the preflight check, do not sign anything.')
+    withdraw.add_argument('--force', action='store_true', help='Broadcast even if the preflight predicts a revert.')
+    withdraw.add_argument('--hash-data', dest='hash_data', action='store_true',
+                          help='Queue only keccak256 of the hex calldata in --file (submitTxHash), the calldata is '
+                               'kept locally and supplied by confirm.')
     withdraw_token = subparsers.add_parser('withdraw_token', help='Withdraw ERC20 token')
     withdraw_token.add_argument('-r', '--recipient', type=str, default=None,
                                 help='Address to send tokens.')
     withdraw_token.add_argument('-t', '--token-address', dest='token_address', type=str,
                                 help='The ERC20 token address.')
     withdraw_token.add_argument('-q', '--quantity', type=float, default=0.0, help='The amount to withdraw.')
+    withdraw_token.add_argument('-d', '--dry-run', dest='dry_run', action='store_true',
+                                help='Only run the preflight check, do not sign anything.')
+    withdraw_token.add_argument('--force', action='store_true',
+                                help='Broadcast even if the preflight predicts a revert.')
     cancel = subparsers.add_parser('cancel', help='Cancel a pending transaction.')
     cancel.add_argument('-t', '--txid', help='The transaction ID.')
     confirm = subparsers.add_parser('confirm', help='Confirm a transaction.')
-    confirm.add_argument('-t', '--txid', help='The transaction ID.')
+    confirm.add_argument('-t', '--txid', nargs='+', required=True,
+                         help='Transaction IDs: 3, or several (3 5 8-12), approved in one approveTxs call.')
+    calldata = subparsers.add_parser('calldata', help='Import the calldata of a hash-only pending transaction, '
+                                                      'for confirm to supply.')
+    calldata.add_argument('-f', '--file', type=str, required=True, help='File with the hex calldata.')
+    sign_bundle = subparsers.add_parser('sign_bundle', help='Sign a transaction offline (EIP-712) into a bundle file '
+                                                            'for executeWithSignatures.')
+    sign_bundle.add_argument('-f', '--file', type=str, required=True,
+                             help='Bundle file, created from the options below if it does not exist yet.')
+    sign_bundle.add_argument('-r', '--recipient', type=str, default=None, help='Destination of a new bundle.')
+    sign_bundle.add_argument('-q', '--quantity', type=float, default=0, help='Ether value of a new bundle.')
+    sign_bundle.add_argument('-d', '--data', type=str, default=None, help='File with hex calldata for a new bundle.')
+    sign_bundle.add_argument('--nonce', type=int, default=None,
+                             help='Contract nonce of a new bundle (default: the next one).')
+    merge_bundles = subparsers.add_parser('merge_bundles', help='Combine the signatures of bundle files.')
+    merge_bundles.add_argument('files', type=str, nargs='+', help='Bundles for the same transaction.')
+    merge_bundles.add_argument('-o', '--out', type=str, required=True, help='Merged bundle file.')
+    submit_bundle = subparsers.add_parser('submit_bundle', help='Execute a signed bundle in one transaction, your '
+                                                                'own approval is the transaction.')
+    submit_bundle.add_argument('-f', '--file', type=str, required=True, help='Bundle file.')
     init_proposal = subparsers.add_parser('proposal', help='Create a new proposal.')
     init_proposal.add_argument('-s', '--signer', type=str, default=None, help='Signer address to add or revoke.')
     init_proposal.add_argument('-t', '--threshold', type=int, default=0, help='Proposed new threshold.')
@@ -273,25 +118,92 @@ def vault_cli():
     getprop = subparsers.add_parser('getprop', help='Get public property value from contract.')
     getprop.add_argument('-n', '--name', type=str,
                          choices=['dailyLimit', 'execNonce', 'pendingProposals', 'pendingTxs', 'proposalId',
-                                  'signerCount',
+                                  'signerCount', 'paused', 'txCount', 'version',
                                   'spentToday', 'threshold'], help='Name of property to get value.')
     getprop.add_argument('-i', '--id', help='ID parameter for pending tx/proposal methods.')
+    getprop.add_argument('-a', '--all', action='store_true', help='Print the whole decoded vault state.')
     balances = subparsers.add_parser('balance', help='Get balance of the contract or another address.')
     balances.add_argument('-a', '--address', type=str, default=None, help='Balance of this account.')
+    balances.add_argument('--all', dest='all_tokens', action='store_true',
+                          help='Ether and every known token with USD values and the remaining daily allowance.')
+    balances.add_argument('--tokens', type=str, default=None,
+                          help='Token list file (token[,feed] per line, or json) for tokens the vault does not track.')
+    batch = subparsers.add_parser('batch', help='Sign and broadcast a CSV/JSONL file of withdrawals.')
+    batch.add_argument('-f', '--file', type=str, required=True, help='token,recipient,amount rows.')
+    batch.add_argument('-r', '--resume', type=str, default=None,
+                       help='Progress file (default: <file>.resume.json). Rerun with it to continue safely.')
+    batch.add_argument('-d', '--dry-run', dest='dry_run', action='store_true',
+                       help='Only run the preflight over the whole batch, do not sign anything.')
+    batch.add_argument('--force', action='store_true', help='Sign even if a row is predicted to revert.')
+    batch.add_argument('--no-wait', dest='no_wait', action='store_true', help='Do not wait for receipts.')
+    batch.add_argument('-t', '--timeout', type=int, default=600, help='Seconds to wait for receipts.')
+    subparsers.add_parser('nonces', help='Reconcile and list local nonce reservations.')
+    list_pending = subparsers.add_parser('list_pending', help='List pending transactions and proposals.')
+    list_pending.add_argument('-o', '--offline', action='store_true',
+                              help='Answer from the local index without syncing it first.')
+    history = subparsers.add_parser('history', help='Vault event history from an eth_getLogs index.')
+    history.add_argument('-f', '--from-block', dest='from_block', type=int, default=None,
+                         help='First block (default: the deployment block).')
+    history.add_argument('-e', '--events', nargs='+', default=None, help='Only these events, ie: Submission.')
+    history.add_argument('--follow', action='store_true', help='Keep printing new events.')
+    history.add_argument('-o', '--offline', action='store_true', help='Answer from the local index only.')
+    history.add_argument('--json', action='store_true', help='One json object per event.')
+    watch = subparsers.add_parser('watch', help='Follow new blocks and print vault events as json lines.')
+    watch.add_argument('--hook', action='append', default=None,
+                       help='EVENT=command or command (every event), may be repeated. The event is on stdin.')
+    watch.add_argument('--limit-alert', dest='limit_alert', type=float, nargs='+', default=[0.8],
+                       help='Daily limit utilisation ratios to report when crossed, ie: 0.8 0.95')
+    watch.add_argument('-i', '--interval', type=float, default=None, help='Seconds between polls.')
+    watch.add_argument('--out', type=str, default=None, help='Also append events to this file.')
+    track = subparsers.add_parser('track', help='Follow txs until included, replacing stuck ones (see --bump-after).')
+    track.add_argument('txids', type=str, nargs='+', help='Transaction hashes.')
+    track.add_argument('-t', '--timeout', type=int, default=600, help='Seconds to follow them.')
+    fleet = subparsers.add_parser('fleet', help='Run operations over many vaults and networks concurrently.')
+    fleet.add_argument('-f', '--file', type=str, required=True,
+                       help='Inventory: CSV/JSON/JSONL with network,address[,name][,approve] per vault.')
+    fleet.add_argument('-o', '--ops', nargs='+', choices=FLEET_OPERATIONS, default=['balance', 'state', 'pending'],
+                       help='Operations per vault, approve sends approveTx for the txids listed in the inventory.')
+    fleet.add_argument('-c', '--per-endpoint', dest='per_endpoint', type=int, default=4,
+                       help='Max concurrent requests per rpc endpoint.')
+    fleet.add_argument('--out', type=str, default=None, help='Append each result as a json line to this file.')
+    fleet.add_argument('-d', '--dry-run', dest='dry_run', action='store_true', help='Only estimate the approvals.')
+    subparsers.add_parser('serve', help='Keep an unlocked, connected session and serve commands over a local '
+                                        'socket (see --socket).')
+    return args
+
+
+def runs_locally(args: argparse.Namespace) -> bool:
+    """
+    Commands that run for minutes (following blocks or txs) would hold the daemon and outlive the client's
+    timeout, they always run in the client.
+    """
+    return (args.command in LOCAL_COMMANDS or args.init or args.wait
+            or (args.command == 'history' and args.follow))
+
+
+def socket_path(args: argparse.Namespace) -> str:
+    return args.socket or daemon.socket_path(args.network)
+
+
+def vault_cli(args: argparse.Namespace = None):
+    parser = build_parser()
+    if args is None:
+        args = parser.parse_args()
+    import dotenv
+    from vault_lib.rpc_profiler import RpcProfiler
+    from vault_lib.vault_cli import VaultCli
 
-
-    args = args.parse_args()
     # print(args)
     dotenv.load_dotenv()
     contract_address = os.environ.get(f'ethervault_{args.network}')
     print(f'[+] Contract is:  {contract_address}')
     print(f'[+] Loading wallet "{args.wallet}"')
-    if args.command in ['deposit', 'withdraw', 'cancel', 'confirm', 'proposal', 'revoke', 'approve', 'withdraw_token',
-                        'track_token']:
-        unlock = True
+    unlock = args.command in UNLOCK_COMMANDS or (args.command == 'fleet' and 'approve' in args.ops)
 
-    vault = VaultCli(args.wallet, args.network, contract_address, args.init, unlock)
-    cid = vault.check_w3_chain_id()
+    profiler = RpcProfiler(enabled=profiling(args))
+    with profiler.phase('setup'):
+        vault = VaultCli(args.wallet, args.network, contract_address, args.init, unlock, profiler=profiler)
+        cid = vault.check_w3_chain_id()
     if cid:
         print(f'[+] Web3 is connected to {cid}.')
     else:
@@ -299,8 +211,63 @@ def vault_cli():
 
     print('[!] Warning: this is really alpha software and not everything is implemented yet!')
 
+    if args.command == 'serve':
+        serve(vault, parser, args)
+    else:
+        try:
+            with profiler.phase(args.command or 'none'):
+                run_command(vault, args)
+        finally:
+            finish_profile(profiler, args)
+
+
+def profiling(args: argparse.Namespace) -> bool:
+    return bool(args.profile or args.profile_json or args.profile_prom)
+
+
+def finish_profile(profiler, args: argparse.Namespace):
+    if not profiler.enabled:
+        return
+    if args.profile:
+        profiler.print_report()
+    if args.profile_json:
+        profiler.export(args.profile_json, 'json')
+        print(f'[+] RPC profile written to {args.profile_json}')
+    if args.profile_prom:
+        profiler.export(args.profile_prom, 'prometheus')
+        print(f'[+] RPC profile written to {args.profile_prom}')
+
+
+def serve(vault: 'VaultCli', parser: argparse.ArgumentParser, args: argparse.Namespace):
+    """
+    Run commands sent by thin clients against this warm, unlocked session.
+    """
+    def handler(argv: list):
+        cmd_args = parser.parse_args(argv)
+        if runs_locally(cmd_args):
+            raise daemon.Fallback(f'{cmd_args.command} runs locally')
+        if cmd_args.wallet != args.wallet or cmd_args.network != args.network:
+            raise daemon.Fallback('daemon serves another wallet or network')
+        vault.reset()
+        vault.profiler.reset()
+        vault.profiler.enabled = profiling(cmd_args)
+        try:
+            with vault.profiler.phase(cmd_args.command):
+                run_command(vault, cmd_args)
+        finally:
+            vault.cache.save()
+            finish_profile(vault.profiler, cmd_args)
+
+    daemon.VaultDaemon(socket_path(args), handler).serve_forever()
+
+
+def run_command(vault: 'VaultCli', args: argparse.Namespace):
+    from eth_utils import to_checksum_address, to_wei, from_wei
+    from vault_lib import helpers
+    from vault_lib.vault_cli import preflight_ok
+
     if args.command == 'deposit':
-        print(f'[+] Will deposit {args.quantity} to {contract_address}')
+        print(f'[+] Will deposit {args.quantity} to {vault.contract_address}')
         vault.deposit_ether(qty=args.quantity)
 
     if args.command == 'track_token':
@@ -310,7 +277,18 @@ def vault_cli():
         print('[+] Oracle Address: ', args.feed_address)
         helpers.parse_tx_ret_val(vault.add_tracked_token(args.token_address, args.feed_address))
 
-    if args.command == 'withdraw':
+    if args.command == 'withdraw' and args.hash_data:
+        from eth_utils import to_bytes
+        if not args.file:
+            print('[!] --hash-data needs the calldata in --file.')
+            return
+        data = to_bytes(hexstr=helpers.read_data(args.file).strip())
+        print(f'[+] Will propose new withdrawal with {len(data)} bytes of calldata, committed by hash:')
+        print(f'[+] Recipient: {args.recipient}')
+        print(f'[+] Ether value: {args.quantity}')
+        helpers.parse_tx_ret_val(vault.propose_withdrawal_hashed(to_checksum_address(args.recipient), args.quantity,
+                                                                 data))
+    elif args.command == 'withdraw':
         ev_version = vault.get_ethervault_version()
         if ev_version == 1:
             print(f'[+] Will propose new withdrawal with parameters:')
@@ -327,8 +305,10 @@ def vault_cli():
             print(f'[+] Will propose new ETH withdrawal with parameters:')
             print(f'[+] Recipient: {args.recipient}')
             print(f'[+] Ether value: {args.quantity}')
-            ret = vault.withdraw_via_withdraw('0x0000000000000000000000000000000000000000', args.recipient, args.quantity)
-            helpers.parse_tx_ret_val(ret)
+            if preflight_ok(vault.preflight_withdraw(None, args.quantity), args):
+                ret = vault.withdraw_via_withdraw('0x0000000000000000000000000000000000000000', args.recipient,
+                                                  args.quantity)
+                helpers.parse_tx_ret_val(ret)
 
     if args.command == 'withdraw_token':
         ev_version = vault.get_ethervault_version()
@@ -338,16 +318,53 @@ def vault_cli():
         print(f'[+] Quantity: {args.quantity}')
         if ev_version == 1:
             helpers.parse_tx_ret_val(vault.propose_token_withdrawal_via_raw(args.recipient, args.token_address, args.quantity))
-        else:
+        elif preflight_ok(vault.preflight_withdraw(args.token_address, args.quantity), args):
             helpers.parse_tx_ret_val(vault.withdraw_via_withdraw(args.token_address, args.recipient, args.quantity))
 
+    if args.command == 'batch':
+        print(f'[+] Will process withdrawals from {args.file}')
+        vault.batch_withdraw(args.file, args.resume, args.dry_run, args.force, not args.no_wait, args.timeout)
+
+    if args.command == 'nonces':
+        vault.reconcile_nonces()
+
     if args.command == 'cancel':
         print(f'[+] Canceling pending transaction with txid: {args.txid}')
         helpers.parse_tx_ret_val(ret = vault.cancel_withdrawal(args.txid))
 
     if args.command == 'confirm':
-        print(f'[+] Confirming transaction with txid {args.txid} using the key: {args.wallet}')
-        helpers.parse_tx_ret_val(ret = vault.confirm_withdrawal(int(args.txid)))
+        txids = helpers.parse_id_list(args.txid)
+        print(f'[+] Confirming transaction(s) with txid {", ".join(map(str, txids))} using the key: {args.wallet}')
+        if len(txids) == 1:
+            helpers.parse_tx_ret_val(ret = vault.confirm_withdrawal(txids[0]))
+        else:
+            helpers.parse_tx_ret_val(ret = vault.confirm_withdrawals(txids))
+
+    if args.command == 'calldata':
+        from eth_utils import to_bytes
+        from vault_lib.calldata_store import CalldataStore
+        store = CalldataStore()
+        data = to_bytes(hexstr=helpers.read_data(args.file).strip())
+        print(f'[+] Stored {len(data)} bytes as {store.path(store.put(data))}')
+
+    if args.command == 'sign_bundle':
+        from eth_utils import to_bytes
+        from vault_lib import signatures
+        data = to_bytes(hexstr=helpers.read_data(args.data).strip()) if args.data else b''
+        bundle = vault.sign_bundle(args.file, to_checksum_address(args.recipient) if args.recipient else None,
+                                   args.quantity, data, args.nonce)
+        if bundle:
+            print(f'[+] Signed {signatures.describe(bundle)}, saved to {args.file}')
+
+    if args.command == 'merge_bundles':
+        from vault_lib import signatures
+        bundle = signatures.merge([signatures.load(filename) for filename in args.files])
+        signatures.save(bundle, args.out)
+        print(f'[+] Merged {signatures.describe(bundle)}, saved to {args.out}')
+
+    if args.command == 'submit_bundle':
+        print(f'[+] Submitting bundle {args.file}')
+        helpers.parse_tx_ret_val(vault.submit_bundle(args.file))
 
     if args.command == 'proposal':
         if args.signer is None:
@@ -370,17 +387,52 @@ def vault_cli():
         helpers.parse_tx_ret_val(vault.revoke_proposal(args.id))
 
     if args.command == 'getprop':
-        print(f'[+] Calling contract to get the value of property {args.name}')
-        ret = vault.get_property(args.name, int(args.id))
-        print(f'[+] Result:\n{ret}')
+        if args.all:
+            state = vault.state()
+            print(f'[+] Vault state at block {state.block}:')
+            for name, value in state.as_dict().items():
+                print(f'[+] {name}: {value}')
+        else:
+            print(f'[+] Calling contract to get the value of property {args.name}')
+            ret = vault.get_property(args.name, int(args.id) if args.id is not None else None)
+            print(f'[+] Result:\n{ret}')
 
     if args.command == 'balance':
-        if args.address:
+        if args.all_tokens or args.tokens:
+            from vault_lib import portfolio
+            portfolio.print_report(vault.portfolio(args.tokens))
+        elif args.address:
             print(f'[+] Balance of {args.address}: {vault.get_eth_account_balance(args.address)}')
         else:
             balance = from_wei(vault.get_contract_balance(), 'ether')
             print(f'[+] Balance: {balance}')
 
+    if args.command == 'list_pending':
+        vault.list_pending(sync=not args.offline)
+
+    if args.command == 'watch':
+        vault.watch(args.hook, args.limit_alert, args.interval, args.out)
+
+    if args.command == 'history':
+        vault.history(args.from_block, args.events, args.follow, offline=args.offline, as_json=args.json)
+
+    if args.command == 'fleet':
+        vault.fleet(args.file, args.ops, args.per_endpoint, args.out, args.dry_run)
+
+    if args.command == 'track':
+        vault.track_txs(args.txids, args.timeout, args.bump_after, args.max_fee)
+    elif args.wait and vault.sent:
+        vault.track_txs(None, WAIT_TIMEOUT, args.bump_after, args.max_fee)
+
 
 if __name__ == '__main__':
-    vault_cli()
+    cli_args = build_parser().parse_args()
+    if not (cli_args.no_daemon or runs_locally(cli_args)):
+        response = daemon.send_command(socket_path(cli_args), sys.argv[1:])
+        if response is not None:
+            sys.stdout.write(response['output'])
+            sys.exit(response['status'])
+    try:
+        vault_cli(cli_args)
+    except (exceptions.GasEstimationError, exceptions.SignatureBundleError) as err:
+        print(f'[!] {err}')
@@ -0,0 +1,308 @@
+"""
+Bulk withdrawals: sign and broadcast a file of payouts in one pipelined run.
+
+Every row gets its contract nonce (execNonce + 1 .. n) and account nonce up
+front, gas is estimated once per function shape (in the state its first row
+will run in, through a state override of the packed slots), all transactions
+are signed and written to a resume file before the first one is broadcast,
+then they go out in a single batch and their receipts are polled together.
+
+The resume file makes a rerun safe: signed transactions are re-sent byte for
+byte (same hash, same nonces), so a crash at any point can not turn into a
+second payout.
+"""
+import csv
+import json
+import os
+import time
+from decimal import Decimal
+
+from eth_utils import to_checksum_address
+from web3 import Web3
+from web3.contract import Contract
+
+from vault_lib import exceptions
+from vault_lib.fee_oracle import FeeOracle, PERCENTILES
+from vault_lib.nonce_manager import NonceManager
+from vault_lib.rpc_batch import RpcBatch, Constant, hex_to_int
+from vault_lib.tx_builder import decode_fee_history
+from vault_lib.vault_state import encode_slots
+
+ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
+""" Head room on top of the shape estimate, rows of one shape may take the other withdraw() branch """
+GAS_MARGIN = 1.3
+""" Max signed txs per eth_sendRawTransaction batch """
+BROADCAST_CHUNK = 50
+
+""" Broadcast errors meaning the node already has this exact tx """
+ALREADY_SENT_ERRORS = ('already known', 'known transaction', 'nonce too low')
+
+SIGNED = 'signed'
+SENT = 'sent'
+MINED = 'mined'
+REVERTED = 'reverted'
+FAILED = 'failed'
+DONE = (MINED, REVERTED)
+
+
+def _row(index: int, token: str, recipient: str, amount) -> dict:
+    token = (token or '').strip()
+    if token.lower() in ('', 'eth', 'ether') or int(token, 16) == 0:
+        token = ZERO_ADDRESS
+    return {'index': index, 'token': to_checksum_address(token), 'recipient': to_checksum_address(recipient.strip()),
+            'amount': str(amount).strip()}
+
+
+def read_rows(filename: str) -> list:
+    """
+    Read withdrawals from a CSV file with a `token,recipient,amount` header, or a
+    JSONL file with one {"token", "recipient", "amount"} object per line. An
+    empty token, "eth" or the zero address means ether; amounts are in token units.
+    """
+    rows = []
+    with open(filename, 'r') as f:
+        if filename.endswith(('.jsonl', '.json')):
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    rows.append(_row(len(rows), item.get('token'), item['recipient'], item['amount']))
+        else:
+            for item in csv.DictReader(f):
+                rows.append(_row(len(rows), item.get('token'), item['recipient'], item['amount']))
+    return rows
+
+
+def to_raw_amount(amount: str, decimals: int) -> int:
+    return int(Decimal(amount) * (10 ** decimals))
+
+
+def fingerprint(rows: list) -> str:
+    """
+    Identifies the input a resume file was made for.
+    """
+    return Web3.keccak(text=json.dumps([[r['token'], r['recipient'], r['amount']] for r in rows])).hex()
+
+
+class ResumeFile:
+    def __init__(self, filename: str):
+        """
+        Progress of one batch: the signed txs and what became of them.
+        :param filename: json file, written atomically on every change
+        """
+        self.filename = filename
+        self.data = {}
+        if os.path.exists(filename):
+            with open(filename, 'r') as f:
+                self.data = json.load(f)
+
+    @property
+    def entries(self) -> list:
+        return self.data.get('entries', [])
+
+    def start(self, rows_fingerprint: str, entries: list):
+        self.data = {'fingerprint': rows_fingerprint, 'created': int(time.time()), 'entries': entries}
+        self.save()
+
+    def matches(self, rows_fingerprint: str) -> bool:
+        return self.data.get('fingerprint') == rows_fingerprint
+
+    def save(self):
+        tmp = f'{self.filename}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.data, f, indent=1)
+        os.replace(tmp, self.filename)
+
+
+class BulkWithdrawal:
+    def __init__(self, w3: Web3, contract: Contract, account, fee_oracle: FeeOracle, priority: str = 'medium',
+                 chain_id: int = None, nonce_manager: NonceManager = None):
+        """
+        :param w3: connected web3 instance
+        :param contract: the EtherVaultL2 contract
+        :param account: signing account (eth_account LocalAccount)
+        :param fee_oracle: shared fee oracle
+        :param priority: fee preset
+        :param chain_id: known chain id, fetched when None
+        :param nonce_manager: reserve the whole nonce range across processes
+        """
+        self.w3 = w3
+        self.contract = contract
+        self.account = account
+        self.fee_oracle = fee_oracle
+        self.priority = priority
+        self.chain_id = chain_id
+        self.nonce_manager = nonce_manager
+        self.round_trips = 0
+
+    def _scopes(self) -> (str, str):
+        return self.nonce_manager.contract_scope(self.contract.address), \
+            self.nonce_manager.account_scope(self.account.address)
+
+    def _execute(self, batch: RpcBatch):
+        batch.execute()
+        self.round_trips += 1
+
+    def sign(self, rows: list, shapes: list, states: list) -> list:
+        """
+        Assign nonces, estimate gas once per shape and sign every row.
+        :param rows: rows with a `raw_amount`
+        :param shapes: shape key per row, rows sharing a key share one gas estimate
+        :param states: vault state (every packed field) each row runs in, as the preflight predicts it.
+            A shape is estimated in the state of its first row, ie: a row queued because earlier
+            rows used up the allowance is estimated on the queue branch.
+        :return: resume entries, in nonce order
+        """
+        batch = RpcBatch(self.w3)
+        exec_nonce = batch.call(self.contract, 'execNonce')
+        account_nonce = batch.request('eth_getTransactionCount', [self.account.address, 'pending'], hex_to_int)
+        chain_id = Constant(self.chain_id) if self.chain_id else batch.request('eth_chainId', [], hex_to_int)
+        fee_history = None
+        if not self.fee_oracle.fresh:
+            fee_history = batch.request('eth_feeHistory', [hex(self.fee_oracle.pending_count()), 'latest',
+                                                           list(PERCENTILES)], decode_fee_history)
+        self._execute(batch)
+        self.chain_id = chain_id.value
+        if fee_history is not None:
+            self.fee_oracle.ingest(fee_history.value)
+
+        chain_nonce = exec_nonce.value + 1
+        first_nonce, first_account_nonce = chain_nonce, account_nonce.value
+        if self.nonce_manager is not None:
+            exec_scope, account_scope = self._scopes()
+            first_nonce = self.nonce_manager.reserve(exec_scope, chain_nonce, len(rows))[0]
+            first_account_nonce = self.nonce_manager.reserve(account_scope, first_account_nonce, len(rows))[0]
+        try:
+            return self._sign(rows, shapes, states, batch, chain_nonce, first_nonce, first_account_nonce)
+        except Exception:
+            if self.nonce_manager is not None:
+                self.nonce_manager.release(exec_scope, range(first_nonce, first_nonce + len(rows)))
+                self.nonce_manager.release(account_scope, range(first_account_nonce, first_account_nonce + len(rows)))
+            raise
+
+    def _estimate_params(self, row: dict, state: dict, current: dict, chain_nonce: int) -> list:
+        """
+        eth_estimateGas params for `row` in `state`. Unless that is the current state, the
+        packed slots are overridden with it (execNonce included, so auth passes for its nonce).
+        """
+        slots = encode_slots(state, state['version'])
+        override = slots != encode_slots(current, current['version'])
+        nonce = state['execNonce'] + 1 if override else chain_nonce
+        data = self.contract.encodeABI('withdraw', args=[row['token'], row['recipient'], row['raw_amount'], nonce])
+        params = [{'from': self.account.address, 'to': self.contract.address, 'data': data}, 'latest']
+        if override:
+            params.append({self.contract.address: {
+                'stateDiff': {'0x' + slot.to_bytes(32, 'big').hex(): '0x' + value.to_bytes(32, 'big').hex()
+                              for slot, value in slots.items()}}})
+        return params
+
+    def _sign(self, rows: list, shapes: list, states: list, batch: RpcBatch, chain_nonce: int, first_nonce: int,
+              first_account_nonce: int) -> list:
+        estimates = {}
+        for row, shape, state in zip(rows, shapes, states):
+            if shape not in estimates:
+                estimates[shape] = batch.request('eth_estimateGas',
+                                                 self._estimate_params(row, state, states[0], chain_nonce),
+                                                 hex_to_int)
+        self._execute(batch)
+        gas = {}
+        for shape, estimate in estimates.items():
+            try:
+                gas[shape] = int(estimate.value * GAS_MARGIN)
+            except exceptions.RpcBatchError as err:
+                raise exceptions.GasEstimationError(f'Gas estimation failed for {shape}: {err}')
+        fees = self.fee_oracle.suggest(self.priority, refresh=False)
+        print(f'[+] Priority Fee: {fees.max_priority_fee_gwei}, Max: {fees.max_fee_gwei}, '
+              f'{len(gas)} gas estimate(s) for {len(rows)} rows')
+
+        entries = []
+        for i, (row, shape) in enumerate(zip(rows, shapes)):
+            data = self.contract.encodeABI('withdraw', args=[row['token'], row['recipient'], row['raw_amount'],
+                                                             first_nonce + i])
+            tx = {'from': self.account.address, 'to': self.contract.address, 'value': 0, 'data': data,
+                  'gas': gas[shape], 'nonce': first_account_nonce + i, 'chainId': self.chain_id}
+            tx.update(fees.tx_params())
+            signed = self.account.sign_transaction(tx)
+            entries.append({'index': row['index'], 'exec_nonce': first_nonce + i, 'nonce': tx['nonce'],
+                            'tx_hash': signed.hash.hex(), 'raw': signed.rawTransaction.hex(), 'status': SIGNED})
+        return entries
+
+    def reconcile(self, resume: ResumeFile):
+        """
+        Pick up a previous run: look up receipts of everything not known to be
+        mined, anything still missing is re-sent as is.
+        """
+        open_entries = [e for e in resume.entries if e['status'] not in DONE]
+        self._update_receipts(open_entries)
+        resume.save()
+
+    def broadcast(self, resume: ResumeFile):
+        """
+        Send every signed, not yet mined tx. Already known txs count as sent.
+        """
+        pending = [e for e in resume.entries if e['status'] in (SIGNED, SENT, FAILED)]
+        for i in range(0, len(pending), BROADCAST_CHUNK):
+            chunk = pending[i:i + BROADCAST_CHUNK]
+            batch = RpcBatch(self.w3)
+            results = [batch.request('eth_sendRawTransaction', [entry['raw']]) for entry in chunk]
+            self._execute(batch)
+            for entry, result in zip(chunk, results):
+                try:
+                    result.value
+                except exceptions.RpcBatchError as err:
+                    # a previous run got it into the mempool (or mined, the receipt poll will tell)
+                    if not any(known in str(err).lower() for known in ALREADY_SENT_ERRORS):
+                        entry['status'], entry['error'] = FAILED, str(err)
+                        continue
+                entry['status'] = SENT
+                entry.pop('error', None)
+                if self.nonce_manager is not None:
+                    exec_scope, account_scope = self._scopes()
+                    self.nonce_manager.mark_sent(exec_scope, entry['exec_nonce'], entry['tx_hash'])
+                    self.nonce_manager.mark_sent(account_scope, entry['nonce'], entry['tx_hash'])
+            resume.save()
+        failed = [e for e in pending if e['status'] == FAILED]
+        for entry in failed:
+            print(f'[!] Row {entry["index"]} (nonce {entry["nonce"]}) failed to broadcast: {entry["error"]}')
+        return len(pending) - len(failed), len(failed)
+
+    def _update_receipts(self, entries: list):
+        batch = RpcBatch(self.w3)
+        receipts = [batch.request('eth_getTransactionReceipt', [entry['tx_hash']]) for entry in entries]
+        if receipts:
+            self._execute(batch)
+        for entry, receipt in zip(entries, receipts):
+            try:
+                receipt = receipt.value
+            except exceptions.RpcBatchError:
+                continue
+            if receipt:
+                entry['status'] = MINED if hex_to_int(receipt['status']) == 1 else REVERTED
+                entry['block'] = hex_to_int(receipt['blockNumber'])
+                entry['gas_used'] = hex_to_int(receipt['gasUsed'])
+
+    def track(self, resume: ResumeFile, timeout: int = 600, interval: float = 4.0) -> bool:
+        """
+        Poll the receipts of all sent txs together until they are mined or timeout.
+        :return: True if every tx was mined successfully
+        """
+        deadline = time.time() + timeout
+        while True:
+            waiting = [e for e in resume.entries if e['status'] == SENT]
+            self._update_receipts(waiting)
+            resume.save()
+            done = sum(e['status'] in DONE for e in resume.entries)
+            print(f'[+] {done}/{len(resume.entries)} confirmed.')
+            if not [e for e in resume.entries if e['status'] == SENT] or time.time() > deadline:
+                break
+            time.sleep(interval)
+        reverted = [e for e in resume.entries if e['status'] == REVERTED]
+        for entry in reverted:
+            print(f'[!] Row {entry["index"]} reverted in block {entry["block"]} (contract nonce {entry["exec_nonce"]}),'
+                  f' later rows of this batch can not pass auth.')
+        return all(e['status'] == MINED for e in resume.entries)
+
+    def summary(self, resume: ResumeFile) -> dict:
+        counts = {}
+        for entry in resume.entries:
+            counts[entry['status']] = counts.get(entry['status'], 0) + 1
+        return counts
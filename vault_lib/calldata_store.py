@@ -0,0 +1,51 @@
+"""
+Local store of the calldata behind pending transactions that only commit to
+keccak256(data) on chain (submitTxHash / submitRawTxHash).
+
+Each payload is one hex file named by its hash, so whoever confirms last can be
+handed the file (or a copy of the directory) and importing the same payload
+twice changes nothing. Reads are checked against the name, a corrupted file
+is never supplied to approveTxWithData.
+"""
+import os
+
+from web3 import Web3
+
+DEFAULT_CALLDATA_DIR = os.environ.get('ETHERVAULT_CALLDATA', '.cache/calldata')
+
+
+def data_hash(data: bytes) -> bytes:
+    return bytes(Web3.keccak(data))
+
+
+class CalldataStore:
+    def __init__(self, directory: str = DEFAULT_CALLDATA_DIR):
+        self.directory = directory
+
+    def path(self, digest: bytes) -> str:
+        return os.path.join(self.directory, f'0x{bytes(digest).hex()}.hex')
+
+    def put(self, data: bytes) -> bytes:
+        """
+        :return: keccak256(data), the dataHash to submit
+        """
+        digest = data_hash(data)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(digest)
+        if not os.path.exists(path):
+            with open(path + '.tmp', 'w') as f:
+                f.write('0x' + bytes(data).hex())
+            os.replace(path + '.tmp', path)
+        return digest
+
+    def get(self, digest: bytes) -> (bytes, None):
+        """
+        :return: the calldata hashing to `digest`, None if it is not stored here
+        """
+        path = self.path(digest)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            text = f.read().strip()
+        data = bytes.fromhex(text[2:] if text.startswith('0x') else text)
+        return data if data_hash(data) == bytes(digest) else None
@@ -0,0 +1,205 @@
+"""
+On-disk cache for chain metadata that (almost) never changes: chain id, vault
+version, token decimals, tracked token oracles.
+
+Entries are keyed by network, contract address and the contract's code hash,
+so a vault redeployed at the same address can never serve stale values. The code
+hash itself is re-verified with a single eth_getProof (no bytecode download)
+once CODE_HASH_TTL expires.
+"""
+import json
+import os
+import time
+
+from eth_typing import ChecksumAddress
+from web3 import Web3
+
+from vault_lib.rpc_batch import Deferred, Constant
+
+DEFAULT_CACHE_FILE = os.environ.get('ETHERVAULT_CACHE', '.cache/chain_cache.json')
+DEFAULT_MAX_ENTRIES = 1024
+CODE_HASH_TTL = 15 * 60
+
+""" TTLs in seconds, None == never expires """
+TTL = {
+    'chain_id': None,
+    'version': None,
+    # signerSlots == 0, a property of the bytecode (entries are keyed by code hash)
+    'legacy': None,
+    'decimals': 7 * 24 * 3600,
+    # trackToken can only ever set a feed once, so a known feed never changes
+    'trackedTokens': lambda feed: None if int(feed, 16) else 10 * 60,
+    'latestRoundData': 60,
+    # endpoint latency / error averages of the rpc pool, stale after an hour
+    'rpc_scores': 3600,
+}
+
+
+def fetch_code_hash(w3: Web3, address: ChecksumAddress) -> str:
+    """
+    Return the keccak hash of the code at `address`. Prefers eth_getProof which
+    returns just the hash, falls back to hashing eth_getCode.
+    """
+    try:
+        resp = w3.provider.make_request('eth_getProof', [address, [], 'latest'])
+        if 'result' in resp and resp['result'].get('codeHash'):
+            return resp['result']['codeHash'].lower()
+    except Exception:
+        pass
+    return Web3.keccak(w3.eth.get_code(address)).hex().lower()
+
+
+class ChainCache:
+    def __init__(self, network: str, cache_file: str = DEFAULT_CACHE_FILE, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Persistent key/value store for slow changing chain reads.
+        :param network: ie "ethereum"
+        :param cache_file: json file to persist entries to
+        :param max_entries: least recently used entries are evicted above this
+        """
+        self.network = network
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.dirty = False
+        self.entries = self._load()
+        # key -> last hit, only written into the entries when the file is written anyway
+        self.touched = {}
+
+    def _load(self) -> dict:
+        try:
+            with open(self.cache_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _key(self, address: str, key: str, code_hash: str = '') -> str:
+        return f'{self.network}:{(address or "").lower()}:{code_hash or ""}:{key}'
+
+    def get(self, address: (str, None), key: str, code_hash: str = '') -> (bool, object):
+        """
+        :return: (hit, value)
+        """
+        full_key = self._key(address, key, code_hash)
+        entry = self.entries.get(full_key)
+        now = time.time()
+        if entry is None:
+            return False, None
+        if entry['expires'] is not None and entry['expires'] < now:
+            del self.entries[full_key]
+            self.dirty = True
+            return False, None
+        self.touched[full_key] = now
+        return True, entry['value']
+
+    def put(self, address: (str, None), key: str, value, ttl=None, code_hash: str = ''):
+        """
+        :param ttl: seconds, None for no expiry, or a callable taking the value and returning either
+        """
+        if callable(ttl):
+            ttl = ttl(value)
+        now = time.time()
+        self.entries[self._key(address, key, code_hash)] = {
+            'value': value,
+            'expires': None if ttl is None else now + ttl,
+            'atime': now
+        }
+        self.dirty = True
+        self.evict()
+
+    def items(self, address: (str, None), prefix: str, code_hash: str = '') -> dict:
+        """
+        Unexpired entries whose key starts with `prefix`, ie: every cached "trackedTokens:" feed of a vault.
+        :return: key suffix after the prefix -> value
+        """
+        start = self._key(address, prefix, code_hash)
+        out = {}
+        for full_key in [k for k in self.entries if k.startswith(start)]:
+            hit, value = self.get(address, full_key[len(start) - len(prefix):], code_hash)
+            if hit:
+                out[full_key[len(start):]] = value
+        return out
+
+    def invalidate(self, address: str):
+        """
+        Drop everything cached for a contract address.
+        """
+        prefix = f'{self.network}:{(address or "").lower()}:'
+        for k in [k for k in self.entries if k.startswith(prefix)]:
+            del self.entries[k]
+        self.dirty = True
+
+    def _apply_touched(self):
+        for k, atime in self.touched.items():
+            if k in self.entries:
+                self.entries[k]['atime'] = atime
+        self.touched = {}
+
+    def evict(self):
+        now = time.time()
+        for k in [k for k, e in self.entries.items() if e['expires'] is not None and e['expires'] < now]:
+            del self.entries[k]
+            self.dirty = True
+        overflow = len(self.entries) - self.max_entries
+        if overflow > 0:
+            self._apply_touched()
+            for k in sorted(self.entries, key=lambda k: self.entries[k]['atime'])[:overflow]:
+                del self.entries[k]
+            self.dirty = True
+
+    def save(self):
+        """
+        Write the file when entries were added, expired or evicted. Hits alone only move
+        the LRU order in memory and are persisted with the next write.
+        """
+        if not self.dirty:
+            return
+        self._apply_touched()
+        directory = os.path.dirname(self.cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f'{self.cache_file}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.cache_file)
+        self.dirty = False
+
+    def code_hash(self, w3: Web3, address: ChecksumAddress) -> str:
+        """
+        Verified code hash of a contract. Re-checked on chain every CODE_HASH_TTL seconds;
+        if the code changed, everything cached for the address is dropped.
+        """
+        hit, known = self.get(address, 'codeHash')
+        if hit and time.time() - known['verified'] < CODE_HASH_TTL:
+            return known['hash']
+        value = fetch_code_hash(w3, address)
+        if hit and known['hash'] != value:
+            self.invalidate(address)
+        self.put(address, 'codeHash', {'hash': value, 'verified': time.time()})
+        return value
+
+    def fetch(self, address: (str, None), key: str, fetch_fn, ttl=None, code_hash: str = ''):
+        """
+        Return a cached value, calling fetch_fn() to fill it on a miss.
+        """
+        hit, value = self.get(address, key, code_hash)
+        if hit:
+            return value
+        value = fetch_fn()
+        self.put(address, key, value, ttl, code_hash)
+        return value
+
+    def deferred(self, pipeline, contract, fn: str, *args, ttl=None, code_hash: str = '') -> Deferred:
+        """
+        Like pipeline.call(), but answered from the cache when possible so the read
+        is dropped from the batch entirely.
+        """
+        key = ':'.join([fn] + [str(a).lower() for a in args])
+        hit, value = self.get(contract.address, key, code_hash)
+        if hit:
+            return Constant(value)
+
+        def store(v):
+            self.put(contract.address, key, v, ttl, code_hash)
+            return v
+
+        return pipeline.call(contract, fn, *args).then(store)
@@ -0,0 +1,187 @@
+"""
+Warm daemon for vault.py and the thin client that talks to it.
+
+`vault.py serve` unlocks the wallet and connects once, then answers CLI
+invocations over a Unix socket. It keeps the provider, contract objects,
+caches, fee oracle and nonce manager warm between commands. A normal
+`vault.py <command>` first tries the socket. If a daemon for the same wallet
+and network answers, the command runs there and only its output comes back.
+Otherwise it runs locally as before. Once a request is sent it is never run
+locally as well: a daemon that does not answer in time may still be sending.
+
+Protocol: one json line per connection, {"argv": [...], "cwd": ...} in,
+{"status": int, "output": str} or {"fallback": reason} out.
+Only stdlib imports here, the client side has to stay cheap to load.
+"""
+import contextlib
+import io
+import json
+import os
+import socket
+import traceback
+
+DEFAULT_SOCKET_DIR = os.environ.get('ETHERVAULT_SOCKET_DIR', '.cache')
+""" Seconds the client waits for the daemon to connect / to finish a command """
+CONNECT_TIMEOUT = 0.5
+COMMAND_TIMEOUT = 600
+""" Seconds the daemon waits for a connected client to send its request """
+REQUEST_TIMEOUT = 5
+
+
+def socket_path(network: str) -> str:
+    return os.path.join(DEFAULT_SOCKET_DIR, f'vault-{network}.sock')
+
+
+class Fallback(Exception):
+    """
+    The daemon can not serve this command, the client should run it locally.
+    """
+    pass
+
+
+def _recv_line(conn: socket.socket) -> bytes:
+    data = b''
+    while not data.endswith(b'\n'):
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def _alive(path: str) -> bool:
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(CONNECT_TIMEOUT)
+    try:
+        conn.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        conn.close()
+
+
+def send_command(path: str, argv: list) -> (dict, None):
+    """
+    Run a command on the daemon listening at `path`.
+    :return: the response, None if no daemon accepted the connection or it asked for a local run.
+        Any failure after the request was sent is an error response, the command may have run.
+    """
+    if not os.path.exists(path):
+        return None
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(CONNECT_TIMEOUT)
+    try:
+        conn.connect(path)
+    except OSError:
+        # stale socket file or a daemon that went away
+        conn.close()
+        return None
+    try:
+        conn.settimeout(COMMAND_TIMEOUT)
+        conn.sendall(json.dumps({'argv': argv, 'cwd': os.getcwd()}).encode() + b'\n')
+        response = json.loads(_recv_line(conn) or b'null')
+    except socket.timeout:
+        return {'status': 1, 'output': f'[!] The daemon at {path} did not answer within {COMMAND_TIMEOUT}s. '
+                                       f'The command may still be running there, it was not run here.\n'}
+    except (OSError, ValueError) as err:
+        return {'status': 1, 'output': f'[!] Lost the daemon at {path} ({err or type(err).__name__}). '
+                                       f'The command may have run there, it was not run here.\n'}
+    finally:
+        conn.close()
+    if response is None:
+        return {'status': 1, 'output': f'[!] The daemon at {path} closed the connection without an answer. '
+                                       f'The command may have run there, it was not run here.\n'}
+    if 'fallback' in response:
+        # refused before running anything
+        return None
+    return response
+
+
+class VaultDaemon:
+    def __init__(self, path: str, handler):
+        """
+        :param path: unix socket path, created with owner only permissions
+        :param handler: callable(argv) running one command, prints its output,
+            raises Fallback if the command has to run in the client instead
+        """
+        self.path = path
+        self.handler = handler
+        self.served = 0
+
+    def _bind(self) -> socket.socket:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.path):
+            if _alive(self.path):
+                raise OSError(f'A daemon is already listening on {self.path}')
+            os.unlink(self.path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)
+        try:
+            server.bind(self.path)
+        finally:
+            os.umask(umask)
+        server.listen(8)
+        return server
+
+    def _allowed(self, conn: socket.socket) -> bool:
+        """
+        Only the user running the daemon may drive the unlocked wallet.
+        """
+        if not hasattr(socket, 'SO_PEERCRED'):
+            return True
+        creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, 12)
+        uid = int.from_bytes(creds[4:8], 'little')
+        return uid == os.getuid()
+
+    def handle(self, request: dict) -> dict:
+        if request.get('cwd') != os.getcwd():
+            # relative paths (wallets, input files, .env) would resolve differently
+            return {'fallback': 'client runs in another directory'}
+        output = io.StringIO()
+        status = 0
+        try:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                self.handler(request['argv'])
+        except Fallback as err:
+            return {'fallback': str(err)}
+        except SystemExit as err:
+            status = err.code if isinstance(err.code, int) else 1
+        except Exception as err:
+            output.write(f'[!] {err}\n')
+            traceback.print_exc()
+            status = 1
+        return {'status': status, 'output': output.getvalue()}
+
+    def serve_forever(self):
+        """
+        Answer commands one at a time (commands share nonces and state, they
+        must not interleave) until interrupted.
+        """
+        server = self._bind()
+        print(f'[+] Serving on {self.path}')
+        try:
+            while True:
+                conn, _ = server.accept()
+                with conn:
+                    if not self._allowed(conn):
+                        continue
+                    conn.settimeout(REQUEST_TIMEOUT)
+                    try:
+                        request = json.loads(_recv_line(conn))
+                    except (OSError, ValueError):
+                        continue
+                    response = self.handle(request)
+                    self.served += 1
+                    try:
+                        conn.sendall(json.dumps(response).encode() + b'\n')
+                    except OSError:
+                        pass
+        except KeyboardInterrupt:
+            print(f'[+] Stopped after {self.served} command(s).')
+        finally:
+            server.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
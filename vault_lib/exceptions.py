@@ -14,3 +14,15 @@ class ContractNotConfigured(Exception):
 class WalletFileNotFound(Exception):
     pass
 
+
+
+class RpcBatchError(Exception):
+    pass
+
+
+class GasEstimationError(Exception):
+    pass
+
+
+class SignatureBundleError(Exception):
+    pass
@@ -0,0 +1,222 @@
+"""
+EIP-1559 fee suggestions from a rolling window of eth_feeHistory.
+
+One FeeOracle per provider is shared by everything in the process. It keeps the
+reward percentiles of the last `window` blocks and only asks the node for blocks
+newer than its cursor, so repeated suggestions (batch runs, the daemon, fee
+bumps) cost a block number lookup at most. All presets (low / medium / high /
+polygon) come out of the same window in a single column-wise pass.
+"""
+import json
+import statistics
+import time
+
+from eth_utils import from_wei
+from web3 import Web3
+
+""" Reward percentiles requested per block, one column per preset """
+PERCENTILES = (10, 20, 30)
+
+""" Preset -> (percentile column, base fee multiplier, priority fee multiplier, minimum priority fee) """
+PRESETS = {
+    'low': (0, 1.10, .94, 100000000),
+    'medium': (1, 1.20, .97, 150000000),
+    'high': (2, 1.25, .98, 200000000),
+}
+""" polygon: the high preset with the priority fee x5 and max fee x3 """
+POLYGON_MULTIPLIERS = (5, 3)
+
+""" Rough block times in seconds, used to size the fee history request folded into a tx build batch """
+BLOCK_TIMES = {
+    'ethereum': 12,
+    'goerli': 12,
+    'arbitrum': 0.25,
+}
+
+
+class FeeSuggestion:
+    def __init__(self, priority: str, max_priority_fee: int, max_fee: int, block: int):
+        """
+        :param priority: preset name
+        :param max_priority_fee: wei
+        :param max_fee: wei
+        :param block: newest block the suggestion is based on
+        """
+        self.priority = priority
+        self.max_priority_fee = max_priority_fee
+        self.max_fee = max_fee
+        self.block = block
+
+    @property
+    def max_priority_fee_gwei(self):
+        return round(from_wei(self.max_priority_fee, 'gwei'), 5)
+
+    @property
+    def max_fee_gwei(self):
+        return round(from_wei(self.max_fee, 'gwei'), 9)
+
+    def tx_params(self) -> dict:
+        return {'maxPriorityFeePerGas': self.max_priority_fee, 'maxFeePerGas': self.max_fee}
+
+    def __repr__(self):
+        return (f'FeeSuggestion({self.priority}: priority {self.max_priority_fee_gwei} gwei, '
+                f'max {self.max_fee_gwei} gwei @ {self.block})')
+
+
+class Web3FeeSource:
+    def __init__(self, w3: Web3):
+        self.w3 = w3
+
+    def block_number(self) -> int:
+        return self.w3.eth.block_number
+
+    def fee_history(self, count: int, newest: int, percentiles: list) -> dict:
+        return self.w3.eth.fee_history(count, newest, percentiles)
+
+
+class ReplayFeeSource:
+    def __init__(self, recording: (str, list)):
+        """
+        Serves fee history from a recording instead of a node, one block per step().
+        :param recording: path to, or contents of, a json list of
+            {"number", "baseFeePerGas", "nextBaseFeePerGas", "reward"} block rows
+        """
+        if isinstance(recording, str):
+            with open(recording, 'r') as f:
+                recording = json.load(f)
+        self.rows = sorted(recording, key=lambda row: row['number'])
+        self.head = 0
+        self.requests = 0
+
+    def step(self, blocks: int = 1) -> bool:
+        """
+        Advance the simulated chain head. Returns False once the recording is exhausted.
+        """
+        head = min(self.head + blocks, len(self.rows) - 1)
+        moved, self.head = head != self.head, head
+        return moved
+
+    def block_number(self) -> int:
+        return self.rows[self.head]['number']
+
+    def fee_history(self, count: int, newest: int, percentiles: list) -> dict:
+        self.requests += 1
+        if newest == 'latest':
+            newest = self.block_number()
+        rows = [row for row in self.rows if newest - count < row['number'] <= newest]
+        return {
+            'oldestBlock': rows[0]['number'],
+            'baseFeePerGas': [row['baseFeePerGas'] for row in rows] + [rows[-1]['nextBaseFeePerGas']],
+            'reward': [row['reward'] for row in rows],
+        }
+
+
+def record_rows(fee_history: dict) -> list:
+    """
+    Convert an eth_feeHistory result into replayable block rows.
+    """
+    oldest = fee_history['oldestBlock']
+    base_fees = fee_history['baseFeePerGas']
+    return [{'number': oldest + i, 'baseFeePerGas': base_fees[i], 'nextBaseFeePerGas': base_fees[i + 1],
+             'reward': list(reward)} for i, reward in enumerate(fee_history['reward'])]
+
+
+class FeeOracle:
+    def __init__(self, source, window: int = 5, max_age: float = 2.0, network: str = None):
+        """
+        :param source: Web3FeeSource or ReplayFeeSource
+        :param window: number of blocks the percentiles are taken over
+        :param max_age: seconds a refresh is trusted before asking for the block number again
+        :param network: used to guess how many blocks passed between refreshes
+        """
+        self.source = source
+        self.window = window
+        self.max_age = max_age
+        self.block_time = BLOCK_TIMES.get(network, 12)
+        self.rows = {}
+        self.cursor = None
+        self.next_base_fee = None
+        self.refreshed_at = 0
+        self.fetched_blocks = 0
+
+    @property
+    def fresh(self) -> bool:
+        return self.cursor is not None and time.time() - self.refreshed_at < self.max_age
+
+    def pending_count(self) -> int:
+        """
+        How many blocks a fee history request needs to cover to catch up from the cursor.
+        """
+        if self.cursor is None:
+            return self.window
+        elapsed = time.time() - self.refreshed_at
+        return max(1, min(self.window, int(elapsed / self.block_time) + 1))
+
+    def ingest(self, fee_history: dict):
+        """
+        Merge an eth_feeHistory result (decoded ints) into the window.
+        """
+        oldest = fee_history['oldestBlock']
+        rewards = fee_history.get('reward') or []
+        newest = oldest + len(rewards) - 1
+        for i, reward in enumerate(rewards):
+            self.rows[oldest + i] = reward
+        self.fetched_blocks += len(rewards)
+        if self.cursor is None or newest >= self.cursor:
+            self.cursor = newest
+            self.next_base_fee = fee_history['baseFeePerGas'][-1]
+        for block in sorted(self.rows)[:-self.window]:
+            del self.rows[block]
+        self.refreshed_at = time.time()
+
+    def refresh(self, force: bool = False):
+        """
+        Fetch only the blocks newer than the cursor.
+        """
+        if self.fresh and not force:
+            return
+        latest = self.source.block_number()
+        if self.cursor is not None and latest <= self.cursor:
+            self.refreshed_at = time.time()
+            return
+        count = self.window if self.cursor is None else min(self.window, latest - self.cursor)
+        self.ingest(self.source.fee_history(count, latest, list(PERCENTILES)))
+
+    def medians(self) -> list:
+        """
+        Median reward of every percentile column over the window.
+        """
+        columns = zip(*(self.rows[block] for block in sorted(self.rows)))
+        return [statistics.median(column) for column in columns]
+
+    def suggest_all(self, refresh: bool = True) -> dict:
+        if refresh:
+            self.refresh()
+        medians = self.medians()
+        suggestions = {}
+        for priority, (column, base_mult, priority_mult, min_fee) in PRESETS.items():
+            priority_fee = max(int(medians[column] * priority_mult), min_fee)
+            max_fee = int(self.next_base_fee * base_mult) + priority_fee
+            suggestions[priority] = FeeSuggestion(priority, priority_fee, max_fee, self.cursor)
+        priority_fee = suggestions['high'].max_priority_fee * POLYGON_MULTIPLIERS[0]
+        max_fee = suggestions['high'].max_fee * POLYGON_MULTIPLIERS[1]
+        suggestions['polygon'] = FeeSuggestion('polygon', priority_fee, max_fee, self.cursor)
+        return suggestions
+
+    def suggest(self, priority: str = 'medium', refresh: bool = True) -> FeeSuggestion:
+        if priority not in PRESETS and priority != 'polygon':
+            raise ValueError(f'Invalid priority: {priority}')
+        return self.suggest_all(refresh)[priority]
+
+
+_oracles = {}
+
+
+def get_fee_oracle(w3: Web3, network: str = None) -> FeeOracle:
+    """
+    The process wide FeeOracle for a web3 instance.
+    """
+    key = id(w3)
+    if key not in _oracles:
+        _oracles[key] = FeeOracle(Web3FeeSource(w3), network=network)
+    return _oracles[key]
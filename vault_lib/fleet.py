@@ -0,0 +1,347 @@
+"""
+Fleet operations: the same read (and approve) operations over many vaults on
+several networks at once.
+
+An inventory lists (network, address) pairs. Every vault runs as its own
+asyncio task against an AsyncVaultCli that speaks raw JSON-RPC over aiohttp,
+batching whatever one step needs into a single request. Vaults on the same
+endpoint share a semaphore, so a sweep never has more than `per_endpoint`
+requests in flight per node. Results are handed out in completion order, so a
+sweep takes about as long as its slowest vault.
+
+Contract objects here are only used to encode calldata and decode results, they
+are bound to an offline Web3 instance.
+"""
+import asyncio
+import csv
+import json
+import time
+
+import aiohttp
+from eth_utils import to_checksum_address
+from web3 import Web3
+from web3._utils.abi import get_abi_output_types
+
+from vault_lib import exceptions
+from vault_lib import vault_abi
+from vault_lib.fee_oracle import FeeOracle, PERCENTILES
+from vault_lib.nonce_manager import NonceManager
+from vault_lib.pending_index import PendingIndex, remember_version
+from vault_lib.rpc_batch import RpcBatch, hex_to_int
+from vault_lib.tx_builder import decode_fee_history
+from vault_lib.vault_state import VaultState, SLOTS, decode_slots
+
+OPERATIONS = ('balance', 'state', 'pending', 'approve')
+DEFAULT_PER_ENDPOINT = 4
+REQUEST_TIMEOUT = 30
+GAS_MARGIN = 1.2
+
+_codec_w3 = Web3()
+
+
+def read_inventory(filename: str) -> list:
+    """
+    Read vaults from a CSV file with a `network,address[,name][,approve]` header,
+    or from JSON / JSONL objects with the same keys. `approve` lists txids to
+    approve (space separated in CSV), `rpc` overrides the network's endpoint.
+    """
+    with open(filename, 'r') as f:
+        if filename.endswith('.jsonl'):
+            items = [json.loads(line) for line in f if line.strip()]
+        elif filename.endswith('.json'):
+            items = json.load(f)
+        else:
+            items = list(csv.DictReader(f))
+    vaults = []
+    for item in items:
+        approve = item.get('approve') or []
+        if isinstance(approve, str):
+            approve = approve.split()
+        vaults.append({'network': item['network'].strip(), 'address': to_checksum_address(item['address'].strip()),
+                       'name': (item.get('name') or '').strip(), 'rpc': item.get('rpc'),
+                       'approve': [int(txid) for txid in approve]})
+    return vaults
+
+
+def _row(row) -> dict:
+    return {key: '0x' + row[key].hex() if isinstance(row[key], bytes) else row[key] for key in row.keys()}
+
+
+class AsyncRpc:
+    def __init__(self, session: aiohttp.ClientSession, url: str, limit: int = DEFAULT_PER_ENDPOINT):
+        """
+        JSON-RPC client for one endpoint, shared by every vault using it.
+        :param limit: max requests in flight against this endpoint
+        """
+        self.session = session
+        self.url = url
+        self.semaphore = asyncio.Semaphore(limit)
+        self.round_trips = 0
+
+    async def batch(self, requests: list) -> list:
+        """
+        :param requests: (method, params) pairs, sent as one JSON-RPC batch
+        :return: results in request order, RpcBatchError in place of failed ones
+        """
+        payload = [{'jsonrpc': '2.0', 'id': i, 'method': method, 'params': params}
+                   for i, (method, params) in enumerate(requests)]
+        async with self.semaphore:
+            async with self.session.post(self.url, json=payload) as resp:
+                resp.raise_for_status()
+                body = await resp.json(content_type=None)
+        self.round_trips += 1
+        if not isinstance(body, list):
+            raise exceptions.RpcBatchError(f'{self.url} did not answer the batch: {body}')
+        by_id = {item.get('id'): item for item in body}
+        return [RpcBatch._unwrap(method, by_id.get(i)) for i, (method, _) in enumerate(requests)]
+
+    async def call(self, method: str, params: list):
+        result, = await self.batch([(method, params)])
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class NetworkContext:
+    def __init__(self, network: str, account=None, nonce_manager: NonceManager = None):
+        """
+        What the vaults of one network share: chain id, fee oracle, the signer's account nonces.
+        """
+        self.network = network
+        self.account = account
+        self.nonce_manager = nonce_manager
+        self.fee_oracle = FeeOracle(None, network=network)
+        self.chain_id = None
+        self._lock = asyncio.Lock()
+
+    async def prepare(self, rpc: AsyncRpc):
+        """
+        Fetch the chain id and fee history once for every approving vault on this network.
+        """
+        async with self._lock:
+            if self.chain_id is not None and self.fee_oracle.fresh:
+                return
+            chain_id, fee_history = await rpc.batch([
+                ('eth_chainId', []),
+                ('eth_feeHistory', [hex(self.fee_oracle.pending_count()), 'latest', list(PERCENTILES)])])
+            for result in (chain_id, fee_history):
+                if isinstance(result, Exception):
+                    raise result
+            self.chain_id = hex_to_int(chain_id)
+            self.fee_oracle.ingest(decode_fee_history(fee_history))
+
+
+class AsyncVaultCli:
+    def __init__(self, rpc: AsyncRpc, network: str, address: str, context: NetworkContext = None):
+        """
+        Async counterpart of VaultCli's read and approve operations for one vault.
+        :param rpc: endpoint of the vault's network
+        :param context: shared per network state, needed for approve()
+        """
+        self.rpc = rpc
+        self.network = network
+        self.address = to_checksum_address(address)
+        self.context = context
+        self.contract = _codec_w3.eth.contract(self.address, abi=vault_abi.ethervault_2_abi)
+
+    def _call(self, fn: str, *args, block: str = 'latest') -> (str, list):
+        return 'eth_call', [{'to': self.address, 'data': self.contract.encodeABI(fn, args=args)}, block]
+
+    def _decode(self, fn: str, raw: str):
+        output_types = get_abi_output_types(self.contract.get_function_by_name(fn).abi)
+        decoded = _codec_w3.codec.decode_abi(output_types, Web3.toBytes(hexstr=raw))
+        return decoded[0] if len(decoded) == 1 else decoded
+
+    async def balance(self) -> int:
+        return hex_to_int(await self.rpc.call('eth_getBalance', [self.address, 'latest']))
+
+    async def state(self) -> (VaultState, int):
+        """
+        Packed state and ether balance, both read at one pinned block.
+        """
+        header = await self.rpc.call('eth_getBlockByNumber', ['latest', False])
+        block = header['number']
+        results = await self.rpc.batch([('eth_getStorageAt', [self.address, hex(slot), block]) for slot in SLOTS] +
+                                       [('eth_getBalance', [self.address, block])])
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        slots = {slot: hex_to_int(value) for slot, value in zip(SLOTS, results)}
+        state = VaultState(decode_slots(slots), hex_to_int(block), hex_to_int(header['timestamp']))
+        if state['version'] != 2 or state.legacy:
+            self.contract = _codec_w3.eth.contract(self.address,
+                                                   abi=vault_abi.abi_for_version(state['version'], state.legacy))
+        return state, hex_to_int(results[-1])
+
+    async def pending(self, state: VaultState) -> (list, list):
+        """
+        Sync the vault's entry in the local pending index (same cursors as list_pending) at the state's block.
+        :return: open txs, open proposals
+        """
+        index = PendingIndex(_codec_w3, self.contract, self.network)
+        remember_version(self.network, self.address, state['version'], state.legacy)
+        tx_ids, proposal_ids = index.plan(state['txCount'], state['proposalId'])
+        calls = [self._call('pendingTxs', txid, block=hex(state.block)) for txid in tx_ids] + \
+                [self._call('pendingProposals', pid, block=hex(state.block)) for pid in proposal_ids]
+        raw = await self.rpc.batch(calls) if calls else []
+        fns = ['pendingTxs'] * len(tx_ids) + ['pendingProposals'] * len(proposal_ids)
+        results = [None if isinstance(value, Exception) else self._decode(fn, value) for fn, value in zip(fns, raw)]
+        index.apply(state.block, state['txCount'], state['proposalId'], tx_ids, proposal_ids, results)
+        return [_row(row) for row in index.pending_txs()], [_row(row) for row in index.pending_proposals()]
+
+    async def approve(self, state: VaultState, txids: list, dry_run: bool = False) -> list:
+        """
+        approveTx every txid with consecutive contract nonces. Gas is estimated
+        for all of them against the current state in one batch. Sending stops at
+        the first failure and every nonce from there on is released.
+        :return: per txid {"txid", "tx_hash"} or {"txid", "error"}
+        """
+        context = self.context
+        account = context.account
+        await context.prepare(self.rpc)
+        chain_nonce = state['execNonce'] + 1
+        estimates = await self.rpc.batch([('eth_estimateGas', [{
+            'from': account.address, 'to': self.address,
+            'data': self.contract.encodeABI('approveTx', args=[txid, chain_nonce])}]) for txid in txids])
+        out, signable = [], []
+        for txid, estimate in zip(txids, estimates):
+            if isinstance(estimate, Exception):
+                out.append({'txid': txid, 'error': str(estimate)})
+            else:
+                signable.append((txid, int(hex_to_int(estimate) * GAS_MARGIN)))
+        if dry_run or not signable:
+            return out + [{'txid': txid, 'gas': gas} for txid, gas in signable]
+
+        account_next = hex_to_int(await self.rpc.call('eth_getTransactionCount', [account.address, 'pending']))
+        manager = context.nonce_manager
+        exec_scope = manager.contract_scope(self.address)
+        account_scope = manager.account_scope(account.address)
+        first_nonce = manager.reserve(exec_scope, chain_nonce, len(signable))[0]
+        first_account_nonce = manager.reserve(account_scope, account_next, len(signable))[0]
+        fees = context.fee_oracle.suggest('medium', refresh=False)
+        raws = []
+        for i, (txid, gas) in enumerate(signable):
+            tx = {'to': self.address, 'value': 0, 'gas': gas, 'nonce': first_account_nonce + i,
+                  'chainId': context.chain_id,
+                  'data': self.contract.encodeABI('approveTx', args=[txid, first_nonce + i])}
+            tx.update(fees.tx_params())
+            raws.append(account.sign_transaction(tx))
+        # each tx needs the ones before it, sent in nonce order up to the first failure
+        for i, ((txid, _), signed) in enumerate(zip(signable, raws)):
+            try:
+                await self.rpc.call('eth_sendRawTransaction', [signed.rawTransaction.hex()])
+            except (aiohttp.ClientError, asyncio.TimeoutError, exceptions.RpcBatchError, ValueError) as err:
+                manager.release(exec_scope, range(first_nonce + i, first_nonce + len(signable)))
+                manager.release(account_scope, range(first_account_nonce + i, first_account_nonce + len(signable)))
+                out.append({'txid': txid, 'error': str(err)})
+                out += [{'txid': later, 'error': f'Not sent, txid {txid} failed first'} for later, _ in signable[i + 1:]]
+                break
+            manager.mark_sent(exec_scope, first_nonce + i, signed.hash.hex())
+            manager.mark_sent(account_scope, first_account_nonce + i, signed.hash.hex())
+            out.append({'txid': txid, 'tx_hash': signed.hash.hex(), 'exec_nonce': first_nonce + i})
+        return out
+
+    async def run(self, operations: list, approve: list = None, dry_run: bool = False) -> dict:
+        """
+        Run the requested operations and collect their results, errors included.
+        """
+        started = time.perf_counter()
+        result = {'network': self.network, 'address': self.address}
+        try:
+            if operations == ['balance']:
+                result['balance'] = await self.balance()
+            else:
+                state, balance = await self.state()
+                result['balance'] = balance
+                if 'state' in operations:
+                    result['state'] = state.as_dict()
+                if 'pending' in operations:
+                    result['pending_txs'], result['pending_proposals'] = await self.pending(state)
+                if 'approve' in operations and approve:
+                    result['approved'] = await self.approve(state, approve, dry_run)
+        except (aiohttp.ClientError, asyncio.TimeoutError, exceptions.RpcBatchError, ValueError) as err:
+            result['error'] = f'{type(err).__name__}: {err}'
+        result['seconds'] = round(time.perf_counter() - started, 3)
+        return result
+
+
+class Fleet:
+    def __init__(self, vaults: list, endpoints: dict, account=None, per_endpoint: int = DEFAULT_PER_ENDPOINT,
+                 nonce_file: str = None):
+        """
+        :param vaults: read_inventory() rows
+        :param endpoints: network -> rpc url, for rows without their own `rpc`
+        :param account: signing account (eth_account LocalAccount), only needed for approve
+        :param per_endpoint: concurrent requests allowed per endpoint url
+        :param nonce_file: nonce reservation database, NonceManager's default when None
+        """
+        self.vaults = vaults
+        self.endpoints = endpoints
+        self.account = account
+        self.per_endpoint = per_endpoint
+        self.nonce_file = nonce_file
+
+    def _context(self, contexts: dict, network: str) -> NetworkContext:
+        if network not in contexts:
+            manager = None
+            if self.account is not None:
+                kwargs = {'nonce_file': self.nonce_file} if self.nonce_file else {}
+                # no web3 instance: reservations here never need the dropped tx lookup
+                manager = NonceManager(None, network, **kwargs)
+            contexts[network] = NetworkContext(network, self.account, manager)
+        return contexts[network]
+
+    async def run(self, operations: list, dry_run: bool = False, on_result=None) -> list:
+        """
+        Run every vault concurrently.
+        :param on_result: called with each vault's result as soon as it completes
+        :return: results in completion order
+        """
+        if 'approve' in operations and self.account is None:
+            raise exceptions.WalletFileNotFound('approve needs an unlocked wallet.')
+        results, rpcs, contexts = [], {}, {}
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            tasks = []
+            for vault in self.vaults:
+                url = vault.get('rpc') or self.endpoints.get(vault['network'])
+                if not url:
+                    results.append(dict(network=vault['network'], address=vault['address'], name=vault['name'],
+                                        seconds=0, error=f'No rpc endpoint configured for {vault["network"]}'))
+                    if on_result is not None:
+                        on_result(results[-1])
+                    continue
+                if url not in rpcs:
+                    rpcs[url] = AsyncRpc(session, url, self.per_endpoint)
+                cli = AsyncVaultCli(rpcs[url], vault['network'], vault['address'],
+                                    self._context(contexts, vault['network']))
+                tasks.append(asyncio.ensure_future(cli.run(operations, vault.get('approve'), dry_run)))
+            names = {(v['network'], v['address']): v['name'] for v in self.vaults}
+            for task in asyncio.as_completed(tasks):
+                result = await task
+                result['name'] = names.get((result['network'], result['address']), '')
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+        return results
+
+
+def format_result(result: dict) -> str:
+    label = f'{result["network"]} {result["address"]}' + (f' ({result["name"]})' if result.get('name') else '')
+    if 'error' in result:
+        return f'[!] {label} {result["seconds"]}s: {result["error"]}'
+    parts = [f'balance {Web3.fromWei(result["balance"], "ether")} ETH']
+    if 'state' in result:
+        state = result['state']
+        parts.append(f'v{state["version"]} execNonce {state["execNonce"]} threshold {state["threshold"]}/'
+                     f'{state["signerCount"]}{" paused" if state["paused"] else ""}')
+    if 'pending_txs' in result:
+        parts.append(f'pending {len(result["pending_txs"])} tx(s) {len(result["pending_proposals"])} proposal(s)')
+    for item in result.get('approved', []):
+        if 'error' in item:
+            parts.append(f'approve {item["txid"]} failed: {item["error"]}')
+        elif 'tx_hash' in item:
+            parts.append(f'approve {item["txid"]}: {item["tx_hash"]}')
+        else:
+            parts.append(f'approve {item["txid"]}: would use {item["gas"]} gas')
+    return f'[+] {label} {result["seconds"]}s: ' + ', '.join(parts)
@@ -20,3 +20,20 @@ def parse_tx_ret_val(ret):
         print(f'[+] TXID: {ret}')
     else:
         print('[!] Transaction failed to broadcast.')
+
+
+def parse_id_list(specs: list) -> list:
+    """
+    Ids from command line values like ["3", "5,6", "8-12"], in order, without duplicates.
+    """
+    ids = []
+    for spec in specs:
+        for part in str(spec).split(','):
+            part = part.strip()
+            if not part:
+                continue
+            first, sep, last = part.partition('-')
+            for i in range(int(first), int(last) + 1) if sep else [int(first)]:
+                if i not in ids:
+                    ids.append(i)
+    return ids
@@ -0,0 +1,260 @@
+"""
+Vault history from contract events, indexed into local SQLite.
+
+A backfill walks from the vault's deployment block to the head in eth_getLogs
+ranges, several ranges per JSON-RPC batch. A range the node refuses (too many
+results, range too wide, timeout) is split in half and retried, ranges that
+succeed make the next ones wider. After that, follow() only asks for the
+blocks since the last run. Logs are stored `confirmations` blocks behind the
+head, so a reorg never leaves a dropped event in the index.
+
+The table lives in the same database as the pending index.
+"""
+import json
+import os
+import sqlite3
+import time
+
+from eth_utils import event_abi_to_log_topic, to_checksum_address
+from web3 import Web3
+from web3.contract import Contract
+
+from vault_lib import exceptions
+from vault_lib.pending_index import DEFAULT_INDEX_FILE
+from vault_lib.rpc_batch import RpcBatch, hex_to_int
+
+""" Initial blocks per eth_getLogs range, adapted while syncing """
+DEFAULT_CHUNK = 5000
+MAX_CHUNK = 500000
+""" Ranges sent per JSON-RPC batch """
+RANGES_PER_BATCH = 4
+""" Blocks behind the head that are not indexed yet """
+DEFAULT_CONFIRMATIONS = 3
+""" eth_getCode probes per round trip when searching the deployment block """
+DEPLOY_SEARCH_PROBES = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS log_cursor (
+    network TEXT NOT NULL,
+    vault TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    chunk INTEGER NOT NULL,
+    synced_at REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (network, vault)
+);
+CREATE TABLE IF NOT EXISTS vault_events (
+    network TEXT NOT NULL,
+    vault TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    event TEXT NOT NULL,
+    args TEXT NOT NULL,
+    PRIMARY KEY (network, vault, block, log_index)
+);
+CREATE INDEX IF NOT EXISTS vault_events_by_name ON vault_events (network, vault, event);
+"""
+
+
+def event_decoders(abi: list) -> dict:
+    """
+    :return: topic0 hex -> (event name, indexed inputs, data inputs) for every event in abi
+    """
+    decoders = {}
+    for item in abi:
+        if item.get('type') != 'event' or item.get('anonymous'):
+            continue
+        topic = Web3.toHex(event_abi_to_log_topic(item))
+        indexed = [i for i in item['inputs'] if i['indexed']]
+        data = [i for i in item['inputs'] if not i['indexed']]
+        decoders[topic] = (item['name'], indexed, data)
+    return decoders
+
+
+def _normalize(abi_type: str, value):
+    if abi_type == 'address':
+        return to_checksum_address(value)
+    if isinstance(value, bytes):
+        return Web3.toHex(value)
+    return value
+
+
+def decode_log(w3: Web3, decoders: dict, log: dict) -> (dict, None):
+    """
+    Decode a raw eth_getLogs entry.
+    :return: {'event', 'block', 'log_index', 'tx_hash', 'args'}, None for a log that is not a known event
+    """
+    topics = log.get('topics') or []
+    if not topics or topics[0] not in decoders:
+        return None
+    name, indexed, data = decoders[topics[0]]
+    args = {}
+    for item, topic in zip(indexed, topics[1:]):
+        value = w3.codec.decode_single(item['type'], Web3.toBytes(hexstr=topic))
+        args[item['name']] = _normalize(item['type'], value)
+    values = w3.codec.decode_abi([i['type'] for i in data], Web3.toBytes(hexstr=log['data']))
+    for item, value in zip(data, values):
+        args[item['name']] = _normalize(item['type'], value)
+    return {'event': name, 'block': hex_to_int(log['blockNumber']), 'log_index': hex_to_int(log['logIndex']),
+            'tx_hash': log['transactionHash'], 'args': args}
+
+
+def find_deploy_block(w3: Web3, address: str, head: int) -> (int, None):
+    """
+    First block with code at `address`, searched with batches of eth_getCode
+    probes (a handful of round trips). Needs the node to serve old state.
+    :return: block number, None if the node can't tell (ie: not an archive node)
+    """
+    low, high = 0, head
+    while high - low > 1:
+        step = max((high - low) // (DEPLOY_SEARCH_PROBES + 1), 1)
+        probes = list(range(low + step, high, step))[:DEPLOY_SEARCH_PROBES]
+        batch = RpcBatch(w3)
+        codes = [batch.request('eth_getCode', [address, hex(block)]) for block in probes]
+        batch.execute()
+        try:
+            has_code = [code.value not in (None, '0x', '0x0') for code in codes]
+        except exceptions.RpcBatchError:
+            return None
+        for block, deployed in zip(probes, has_code):
+            if deployed:
+                high = block
+                break
+            low = block
+    return high
+
+
+class LogIndexer:
+    def __init__(self, w3: Web3, contract: Contract, network: str, index_file: str = DEFAULT_INDEX_FILE,
+                 confirmations: int = DEFAULT_CONFIRMATIONS):
+        """
+        :param w3: connected web3 instance
+        :param contract: the vault, with the abi matching its version (for the event definitions)
+        :param network: ie "ethereum"
+        :param index_file: sqlite database path
+        :param confirmations: blocks behind the head to stay
+        """
+        self.w3 = w3
+        self.contract = contract
+        self.network = network
+        self.vault = contract.address.lower()
+        self.confirmations = confirmations
+        self.decoders = event_decoders(contract.abi)
+        directory = os.path.dirname(index_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(index_file)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def cursor(self) -> (sqlite3.Row, None):
+        """
+        :return: last indexed block and the range width in use, None before the first sync
+        """
+        return self.db.execute('SELECT * FROM log_cursor WHERE network = ? AND vault = ?',
+                               (self.network, self.vault)).fetchone()
+
+    def _ranges(self, start: int, end: int, chunk: int) -> list:
+        ranges = []
+        while start <= end and len(ranges) < RANGES_PER_BATCH:
+            ranges.append((start, min(start + chunk - 1, end)))
+            start += chunk
+        return ranges
+
+    def sync(self, from_block: int = None, on_event=None) -> dict:
+        """
+        Index every event up to the head minus confirmations.
+        :param from_block: where to start the first sync (default: the deployment block, or 0 if unknown)
+        :param on_event: called with each decoded event, in chain order
+        :return: sync statistics
+        """
+        started = time.time()
+        head = self.w3.eth.block_number - self.confirmations
+        state = self.cursor()
+        if state is not None:
+            start, chunk = state['block'] + 1, state['chunk']
+        else:
+            if from_block is None:
+                from_block = find_deploy_block(self.w3, self.contract.address, head) or 0
+            start, chunk = from_block, DEFAULT_CHUNK
+        stats = {'from_block': start, 'to_block': head, 'events': 0, 'ranges': 0, 'splits': 0, 'round_trips': 0}
+        # once a range was refused, the width that worked is as wide as this sync gets
+        ceiling = MAX_CHUNK
+        while start <= head:
+            ranges = self._ranges(start, head, chunk)
+            batch = RpcBatch(self.w3)
+            results = [batch.request('eth_getLogs', [{'address': self.contract.address, 'fromBlock': hex(first),
+                                                      'toBlock': hex(last)}]) for first, last in ranges]
+            batch.execute()
+            stats['round_trips'] += 1
+            for (first, last), result in zip(ranges, results):
+                try:
+                    logs = result.value
+                except exceptions.RpcBatchError:
+                    if first == last:
+                        raise
+                    # too many results or too wide for this node: halve and retry from here
+                    chunk = ceiling = max((last - first + 1) // 2, 1)
+                    stats['splits'] += 1
+                    break
+                stats['events'] += self._store(logs, on_event)
+                stats['ranges'] += 1
+                self._advance(last, chunk)
+                start = last + 1
+            else:
+                chunk = min(chunk * 2, ceiling)
+        self._advance(max(start - 1, 0), chunk)
+        stats['seconds'] = round(time.time() - started, 3)
+        stats['chunk'] = chunk
+        return stats
+
+    def _store(self, logs: list, on_event=None) -> int:
+        count = 0
+        for log in sorted(logs or [], key=lambda l: (hex_to_int(l['blockNumber']), hex_to_int(l['logIndex']))):
+            if log.get('removed'):
+                continue
+            event = decode_log(self.w3, self.decoders, log)
+            if event is None:
+                continue
+            self.db.execute('INSERT OR REPLACE INTO vault_events VALUES (?, ?, ?, ?, ?, ?, ?)',
+                            (self.network, self.vault, event['block'], event['log_index'], event['tx_hash'],
+                             event['event'], json.dumps(event['args'])))
+            count += 1
+            if on_event is not None:
+                on_event(event)
+        return count
+
+    def _advance(self, block: int, chunk: int):
+        self.db.execute('INSERT OR REPLACE INTO log_cursor VALUES (?, ?, ?, ?, ?)',
+                        (self.network, self.vault, block, chunk, time.time()))
+        self.db.commit()
+
+    def follow(self, interval: float, on_event, from_block: int = None, on_sync=None):
+        """
+        Backfill, then keep indexing new blocks every `interval` seconds until interrupted.
+        :param on_sync: called with the statistics of every sync
+        """
+        while True:
+            stats = self.sync(from_block, on_event)
+            if on_sync is not None:
+                on_sync(stats)
+            time.sleep(interval)
+
+    def events(self, names: list = None, from_block: int = 0) -> list:
+        """
+        Indexed events in chain order, as decode_log() returns them.
+        :param names: only these events
+        """
+        query = 'SELECT * FROM vault_events WHERE network = ? AND vault = ? AND block >= ?'
+        params = [self.network, self.vault, from_block]
+        if names:
+            query += f' AND event IN ({",".join("?" * len(names))})'
+            params += list(names)
+        rows = self.db.execute(query + ' ORDER BY block, log_index', params).fetchall()
+        return [{'event': row['event'], 'block': row['block'], 'log_index': row['log_index'],
+                 'tx_hash': row['tx_hash'], 'args': json.loads(row['args'])} for row in rows]
+
+
+def format_event(event: dict) -> str:
+    args = ' '.join(f'{k} {v}' for k, v in event['args'].items())
+    return f'[+] block {event["block"]} {event["event"]}: {args}'
@@ -0,0 +1,99 @@
+"""
+Aggregated contract reads through Multicall3 (deployed at the same address on
+ethereum, goerli, arbitrum and most other EVM chains).
+
+Calls are packed into aggregate3() chunks and all chunks go out as a single
+json-rpc batch. If Multicall3 is missing on the chain the same calls are sent
+as plain eth_calls in one batch instead.
+"""
+from web3 import Web3
+from web3._utils.abi import get_abi_output_types
+from web3.contract import Contract
+
+from vault_lib import vault_abi
+from vault_lib.rpc_batch import RpcBatch
+
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
+
+
+class Multicall:
+    def __init__(self, w3: Web3, address: str = MULTICALL3_ADDRESS, chunk_size: int = 200):
+        """
+        :param w3: connected web3 instance
+        :param address: Multicall3 deployment
+        :param chunk_size: max calls per aggregate3() eth_call
+        """
+        self.w3 = w3
+        self.multicall = w3.eth.contract(Web3.toChecksumAddress(address), abi=vault_abi.multicall3_abi)
+        self.chunk_size = chunk_size
+        self.calls = []
+        self.round_trips = 0
+
+    def add(self, contract: Contract, fn: str, *args) -> int:
+        """
+        Queue a view call.
+        :return: index of the result in execute()'s return value
+        """
+        fn_abi = contract.get_function_by_name(fn).abi
+        self.calls.append((contract.address, contract.encodeABI(fn, args=args), get_abi_output_types(fn_abi)))
+        return len(self.calls) - 1
+
+    def _decode(self, output_types: list, data: bytes):
+        decoded = self.w3.codec.decode_abi(output_types, data)
+        return decoded[0] if len(decoded) == 1 else decoded
+
+    def execute(self, block='latest', batch: RpcBatch = None) -> list:
+        """
+        Run all queued calls at `block`. Failed calls come back as None.
+        :param batch: batch to send the calls with, so other requests queued on it share the round trip
+        """
+        calls, self.calls = self.calls, []
+        if not calls:
+            if batch is not None:
+                # nothing to aggregate, the caller's requests still go out
+                self.round_trips += bool(batch.execute())
+            return []
+        if isinstance(block, int):
+            block = hex(block)
+        batch = batch or RpcBatch(self.w3)
+        chunks = []
+        for i in range(0, len(calls), self.chunk_size):
+            chunk = calls[i:i + self.chunk_size]
+            data = self.multicall.encodeABI('aggregate3', args=[[(target, True, call_data)
+                                                                  for target, call_data, _ in chunk]])
+            chunks.append((chunk, batch.request('eth_call', [{'to': self.multicall.address, 'data': data}, block])))
+        batch.execute()
+        self.round_trips += batch.round_trips
+        results = []
+        try:
+            for chunk, deferred in chunks:
+                returned, = self.w3.codec.decode_abi(['(bool,bytes)[]'], Web3.toBytes(hexstr=deferred.value))
+                if len(returned) != len(chunk):
+                    raise ValueError('aggregate3 result count mismatch')
+                for (_, _, output_types), (success, data) in zip(chunk, returned):
+                    results.append(self._try_decode(output_types, data) if success and data else None)
+        except Exception:
+            # no Multicall3 on this chain (empty return data) or the node refused the call
+            return self._execute_plain(calls, block)
+        return results
+
+    def _try_decode(self, output_types: list, data: bytes):
+        try:
+            return self._decode(output_types, data)
+        except Exception:
+            # ie: a bytes32 symbol() where the abi says string
+            return None
+
+    def _execute_plain(self, calls: list, block) -> list:
+        batch = RpcBatch(self.w3)
+        deferreds = [batch.request('eth_call', [{'to': target, 'data': call_data}, block])
+                     for target, call_data, _ in calls]
+        batch.execute()
+        self.round_trips += batch.round_trips
+        results = []
+        for (_, _, output_types), deferred in zip(calls, deferreds):
+            try:
+                results.append(self._decode(output_types, Web3.toBytes(hexstr=deferred.value)))
+            except Exception:
+                results.append(None)
+        return results
@@ -0,0 +1,195 @@
+"""
+Cross-process nonce reservations for the vault's execNonce and signer accounts.
+
+auth() only accepts `_nonce == execNonce + 1`, so two operators (or scripts)
+acting at the same moment would both pick the same nonce and one of them burns
+gas on a revert. Every tx build instead reserves its contract and account
+nonces in a shared SQLite database. Each reservation runs inside a
+`BEGIN IMMEDIATE` transaction, and SQLite's write lock serializes them across
+processes.
+
+Reservations start as `reserved`, become `sent` once broadcast, and are deleted
+when the chain nonce moves past them. A reservation is released when its
+broadcast fails, when it is never sent within RESERVATION_TTL, or, once sent for
+DROP_AFTER, when its tx disappears from the node (dropped) or was mined but
+reverted. A reverted vault call does not advance execNonce, so without that its
+reservation would hold every later contract nonce back. reserve() checks for
+those itself, `nonces` (reconcile) also reports them.
+"""
+import os
+import sqlite3
+import time
+
+from web3 import Web3
+
+from vault_lib import exceptions
+from vault_lib.rpc_batch import RpcBatch, hex_to_int
+
+DEFAULT_NONCE_FILE = os.environ.get('ETHERVAULT_NONCES', '.cache/nonces.sqlite')
+""" Seconds a reservation may stay unsent before another process may take its nonce """
+RESERVATION_TTL = 120
+""" Seconds after broadcast before a tx the node does not know anymore, or that reverted, is released """
+DROP_AFTER = 300
+
+RESERVED = 'reserved'
+SENT = 'sent'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reservations (
+    scope TEXT NOT NULL,
+    nonce INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    owner TEXT,
+    tx_hash TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (scope, nonce)
+);
+"""
+
+
+class NonceManager:
+    def __init__(self, w3: Web3, network: str, nonce_file: str = DEFAULT_NONCE_FILE, owner: str = None):
+        """
+        :param w3: connected web3 instance, used to look for dropped txs
+        :param network: ie "ethereum"
+        :param nonce_file: sqlite database shared by every process on the host
+        :param owner: label stored with reservations (defaults to the pid)
+        """
+        self.w3 = w3
+        self.network = network
+        self.owner = owner or str(os.getpid())
+        directory = os.path.dirname(nonce_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # autocommit mode, transactions are opened explicitly with BEGIN IMMEDIATE
+        self.db = sqlite3.connect(nonce_file, timeout=30, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def contract_scope(self, vault: str) -> str:
+        return f'{self.network}:{vault.lower()}:exec'
+
+    def account_scope(self, account: str) -> str:
+        return f'{self.network}:{account.lower()}:account'
+
+    def _locked(self):
+        self.db.execute('BEGIN IMMEDIATE')
+
+    def _expire(self, scope: str, chain_next: int) -> (int, int):
+        """
+        :return: number of confirmed and of expired reservations removed
+        """
+        confirmed = self.db.execute('DELETE FROM reservations WHERE scope = ? AND nonce < ?',
+                                    (scope, chain_next)).rowcount
+        expired = self.db.execute('DELETE FROM reservations WHERE scope = ? AND status = ? AND updated < ?',
+                                  (scope, RESERVED, time.time() - RESERVATION_TTL)).rowcount
+        return confirmed, expired
+
+    def _stale(self, scope: str) -> list:
+        return self.db.execute('SELECT * FROM reservations WHERE scope = ? AND status = ? AND updated < ?',
+                               (scope, SENT, time.time() - DROP_AFTER)).fetchall()
+
+    def _failed(self, stale: list) -> (list, list):
+        """
+        Sent txs that will never move the chain nonce past their reservation.
+        :param stale: sent reservations older than DROP_AFTER
+        :return: (nonce, tx_hash) of dropped txs and of mined but reverted ones
+        """
+        batch = RpcBatch(self.w3)
+        lookups = [(batch.request('eth_getTransactionByHash', [row['tx_hash']]),
+                    batch.request('eth_getTransactionReceipt', [row['tx_hash']])) for row in stale]
+        batch.execute()
+        dropped, reverted = [], []
+        for row, (tx, receipt) in zip(stale, lookups):
+            try:
+                tx, receipt = tx.value, receipt.value
+            except exceptions.RpcBatchError:
+                continue
+            if tx is None:
+                dropped.append((row['nonce'], row['tx_hash']))
+            elif receipt is not None and hex_to_int(receipt['status']) == 0:
+                reverted.append((row['nonce'], row['tx_hash']))
+        return dropped, reverted
+
+    def _forget(self, scope: str, failed: list):
+        # only if still the same sent tx, a replacement (tx_tracker) keeps its reservation
+        self.db.executemany('DELETE FROM reservations WHERE scope = ? AND nonce = ? AND status = ? AND tx_hash = ?',
+                            [(scope, nonce, SENT, tx_hash) for nonce, tx_hash in failed])
+
+    def reserve(self, scope: str, chain_next: int, count: int = 1) -> list:
+        """
+        Atomically reserve `count` consecutive nonces, starting at the lowest free
+        one at or above chain_next. Sent reservations older than DROP_AFTER are
+        looked up first (outside the lock) and released if dropped or reverted.
+        :param scope: contract_scope() or account_scope()
+        :param chain_next: next nonce according to the chain (execNonce + 1, pending tx count)
+        :return: reserved nonces
+        """
+        failed = []
+        if self.w3 is not None:
+            stale = self._stale(scope)
+            if stale:
+                dropped, reverted = self._failed(stale)
+                failed = dropped + reverted
+        self._locked()
+        try:
+            self._expire(scope, chain_next)
+            self._forget(scope, failed)
+            taken = {row[0] for row in self.db.execute('SELECT nonce FROM reservations WHERE scope = ?', (scope,))}
+            start = chain_next
+            while any(start + i in taken for i in range(count)):
+                start += 1
+            now = time.time()
+            nonces = list(range(start, start + count))
+            self.db.executemany('INSERT INTO reservations VALUES (?, ?, ?, ?, NULL, ?, ?)',
+                                [(scope, nonce, RESERVED, self.owner, now, now) for nonce in nonces])
+            self.db.execute('COMMIT')
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        return nonces
+
+    def mark_sent(self, scope: str, nonce: int, tx_hash: str):
+        self.db.execute('UPDATE reservations SET status = ?, tx_hash = ?, updated = ? WHERE scope = ? AND nonce = ?',
+                        (SENT, tx_hash, time.time(), scope, nonce))
+
+    def release(self, scope: str, nonces: list):
+        """
+        Give nonces back, ie: the tx was never broadcast.
+        """
+        self.db.executemany('DELETE FROM reservations WHERE scope = ? AND nonce = ? AND status = ?',
+                            [(scope, nonce, RESERVED) for nonce in nonces])
+
+    def reservations(self, scope: str) -> list:
+        return self.db.execute('SELECT * FROM reservations WHERE scope = ? ORDER BY nonce', (scope,)).fetchall()
+
+    def gaps(self, scope: str, chain_next: int) -> list:
+        """
+        Free nonces between the chain and the highest reservation. Every
+        reservation above a gap is stuck until the gap is filled.
+        """
+        taken = {row['nonce'] for row in self.reservations(scope)}
+        if not taken:
+            return []
+        return [nonce for nonce in range(chain_next, max(taken)) if nonce not in taken]
+
+    def reconcile(self, scope: str, chain_next: int) -> dict:
+        """
+        Sync reservations with the chain: forget confirmed nonces, expire unsent
+        ones and release sent txs the node no longer knows about or that reverted.
+        :param chain_next: next nonce according to mined state
+        :return: confirmed/expired counts, dropped and reverted nonces and the current gaps
+        """
+        self._locked()
+        try:
+            confirmed, expired = self._expire(scope, chain_next)
+            self.db.execute('COMMIT')
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        stale = self._stale(scope)
+        dropped, reverted = self._failed(stale) if stale else ([], [])
+        self._forget(scope, dropped + reverted)
+        return {'confirmed': confirmed, 'expired': expired, 'dropped': [nonce for nonce, _ in dropped],
+                'reverted': [nonce for nonce, _ in reverted], 'gaps': self.gaps(scope, chain_next)}
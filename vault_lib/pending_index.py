@@ -0,0 +1,217 @@
+"""
+Local SQLite index of a vault's pending transactions and proposals.
+
+A sync reads txCount/proposalId, then fetches only ids above the stored cursor
+plus the ids that were still open last time, all through aggregated multicall
+reads pinned to one block. Listing the queue afterwards never touches the chain:
+the vault's version is stored with the index, so even the abi comes from it.
+"""
+import os
+import sqlite3
+import time
+
+from web3 import Web3
+from web3.contract import Contract
+
+from vault_lib.multicall import Multicall
+
+DEFAULT_INDEX_FILE = os.environ.get('ETHERVAULT_INDEX', '.cache/pending_index.sqlite')
+ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    network TEXT NOT NULL,
+    vault TEXT NOT NULL,
+    tx_cursor INTEGER NOT NULL DEFAULT 0,
+    proposal_cursor INTEGER NOT NULL DEFAULT 0,
+    block INTEGER NOT NULL DEFAULT 0,
+    synced_at REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (network, vault)
+);
+CREATE TABLE IF NOT EXISTS pending_txs (
+    network TEXT NOT NULL,
+    vault TEXT NOT NULL,
+    txid INTEGER NOT NULL,
+    proposer TEXT,
+    dest TEXT,
+    value TEXT,
+    data BLOB,
+    num_signers INTEGER,
+    open INTEGER NOT NULL,
+    block INTEGER NOT NULL,
+    PRIMARY KEY (network, vault, txid)
+);
+CREATE TABLE IF NOT EXISTS pending_proposals (
+    network TEXT NOT NULL,
+    vault TEXT NOT NULL,
+    proposal_id INTEGER NOT NULL,
+    proposer TEXT,
+    modified_signer TEXT,
+    paused INTEGER,
+    new_threshold INTEGER,
+    num_signers INTEGER,
+    initiated INTEGER,
+    new_limit TEXT,
+    open INTEGER NOT NULL,
+    block INTEGER NOT NULL,
+    PRIMARY KEY (network, vault, proposal_id)
+);
+CREATE TABLE IF NOT EXISTS vault_version (
+    network TEXT NOT NULL,
+    vault TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    legacy INTEGER NOT NULL,
+    PRIMARY KEY (network, vault)
+);
+"""
+
+
+def remember_version(network: str, vault: str, version: int, legacy: bool, index_file: str = DEFAULT_INDEX_FILE):
+    """
+    Keep the vault's version and layout (see VaultState.legacy) next to its indexes, so
+    reading them offline needs no RPC to pick the abi.
+    """
+    directory = os.path.dirname(index_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    db = sqlite3.connect(index_file)
+    db.executescript(SCHEMA)
+    db.execute('INSERT OR REPLACE INTO vault_version VALUES (?, ?, ?, ?)',
+               (network, vault.lower(), version, int(legacy)))
+    db.commit()
+    db.close()
+
+
+def indexed_version(network: str, vault: str, index_file: str = DEFAULT_INDEX_FILE) -> (tuple, None):
+    """
+    :return: (version, legacy) stored by the last online sync, None if the vault was never synced
+    """
+    if not os.path.exists(index_file):
+        return None
+    db = sqlite3.connect(index_file)
+    try:
+        row = db.execute('SELECT version, legacy FROM vault_version WHERE network = ? AND vault = ?',
+                         (network, vault.lower())).fetchone()
+    except sqlite3.OperationalError:
+        # index from before the table existed
+        row = None
+    finally:
+        db.close()
+    return (row[0], bool(row[1])) if row else None
+
+
+def _fields(contract: Contract, fn: str) -> list:
+    return [o['name'] for o in contract.get_function_by_name(fn).abi['outputs']]
+
+
+class PendingIndex:
+    def __init__(self, w3: Web3, contract: Contract, network: str, index_file: str = DEFAULT_INDEX_FILE):
+        """
+        :param w3: connected web3 instance
+        :param contract: the vault, with the abi matching its version
+        :param network: ie "ethereum"
+        :param index_file: sqlite database path
+        """
+        self.w3 = w3
+        self.contract = contract
+        self.network = network
+        self.vault = contract.address.lower()
+        directory = os.path.dirname(index_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(index_file)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def cursor(self) -> sqlite3.Row:
+        row = self.db.execute('SELECT * FROM sync_state WHERE network = ? AND vault = ?',
+                              (self.network, self.vault)).fetchone()
+        if row is None:
+            self.db.execute('INSERT INTO sync_state (network, vault) VALUES (?, ?)', (self.network, self.vault))
+            self.db.commit()
+            return self.cursor()
+        return row
+
+    def _open_ids(self, table: str, column: str) -> set:
+        rows = self.db.execute(f'SELECT {column} FROM {table} WHERE network = ? AND vault = ? AND open = 1',
+                               (self.network, self.vault))
+        return {row[0] for row in rows}
+
+    def sync(self) -> dict:
+        """
+        Incrementally refresh the index.
+        :return: sync statistics
+        """
+        started = time.time()
+        multicall = Multicall(self.w3)
+        block = self.w3.eth.block_number
+        multicall.add(self.contract, 'txCount')
+        multicall.add(self.contract, 'proposalId')
+        tx_count, proposal_id = multicall.execute(block)
+
+        tx_ids, proposal_ids = self.plan(tx_count, proposal_id)
+        for txid in tx_ids:
+            multicall.add(self.contract, 'pendingTxs', txid)
+        for pid in proposal_ids:
+            multicall.add(self.contract, 'pendingProposals', pid)
+        results = multicall.execute(block)
+        self.apply(block, tx_count, proposal_id, tx_ids, proposal_ids, results)
+        return {'block': block, 'txs_read': len(tx_ids), 'proposals_read': len(proposal_ids),
+                'round_trips': multicall.round_trips + 1, 'seconds': round(time.time() - started, 3)}
+
+    def plan(self, tx_count: int, proposal_id: int) -> (list, list):
+        """
+        :return: tx ids and proposal ids a sync up to tx_count / proposal_id has to read
+        """
+        state = self.cursor()
+        tx_ids = sorted(set(range(state['tx_cursor'] + 1, tx_count + 1)) |
+                        self._open_ids('pending_txs', 'txid'))
+        proposal_ids = sorted(set(range(state['proposal_cursor'] + 1, proposal_id + 1)) |
+                              self._open_ids('pending_proposals', 'proposal_id'))
+        return tx_ids, proposal_ids
+
+    def apply(self, block: int, tx_count: int, proposal_id: int, tx_ids: list, proposal_ids: list, results: list):
+        """
+        Store the reads of a planned sync.
+        :param results: pendingTxs values for tx_ids followed by pendingProposals values for proposal_ids,
+            None for a failed read
+        """
+        state = self.cursor()
+        tx_fields = _fields(self.contract, 'pendingTxs')
+        proposal_fields = _fields(self.contract, 'pendingProposals')
+        for txid, values in zip(tx_ids, results[:len(tx_ids)]):
+            if values is None:
+                # failed read, retry from here on the next sync
+                tx_count = min(tx_count, txid - 1) if txid > state['tx_cursor'] else tx_count
+                continue
+            self._store_tx(txid, dict(zip(tx_fields, values)), block)
+        for pid, values in zip(proposal_ids, results[len(tx_ids):]):
+            if values is None:
+                proposal_id = min(proposal_id, pid - 1) if pid > state['proposal_cursor'] else proposal_id
+                continue
+            self._store_proposal(pid, dict(zip(proposal_fields, values)), block)
+        self.db.execute('UPDATE sync_state SET tx_cursor = ?, proposal_cursor = ?, block = ?, synced_at = ? '
+                        'WHERE network = ? AND vault = ?',
+                        (tx_count, proposal_id, block, time.time(), self.network, self.vault))
+        self.db.commit()
+
+    def _store_tx(self, txid: int, tx: dict, block: int):
+        dest = tx.get('dest', ZERO_ADDRESS)
+        self.db.execute('INSERT OR REPLACE INTO pending_txs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        (self.network, self.vault, txid, tx.get('proposer'), dest, str(tx.get('value', 0)),
+                         tx.get('data', b''), tx.get('numSigners', 0), int(int(dest, 16) != 0), block))
+
+    def _store_proposal(self, pid: int, prop: dict, block: int):
+        proposer = prop.get('proposer', ZERO_ADDRESS)
+        self.db.execute('INSERT OR REPLACE INTO pending_proposals VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        (self.network, self.vault, pid, proposer, prop.get('modifiedSigner'),
+                         int(bool(prop.get('paused', 0))), prop.get('newThreshold'), prop.get('numSigners', 0),
+                         prop.get('initiated'), str(prop.get('newLimit', 0)), int(int(proposer, 16) != 0), block))
+
+    def pending_txs(self) -> list:
+        return self.db.execute('SELECT * FROM pending_txs WHERE network = ? AND vault = ? AND open = 1 '
+                               'ORDER BY txid', (self.network, self.vault)).fetchall()
+
+    def pending_proposals(self) -> list:
+        return self.db.execute('SELECT * FROM pending_proposals WHERE network = ? AND vault = ? AND open = 1 '
+                               'ORDER BY proposal_id', (self.network, self.vault)).fetchall()
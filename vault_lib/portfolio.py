@@ -0,0 +1,218 @@
+"""
+Vault portfolio: ether and token balances with USD values and the remaining
+daily allowance, read in one round trip.
+
+One JSON-RPC batch carries the vault's ether balance, the latest block header,
+its two packed state slots, and a single Multicall3 aggregate. The aggregate
+holds every token's balanceOf/decimals/symbol and every known feed's
+latestRoundData/decimals. trackedTokens is a mapping and can not be listed, so
+the tokens come from the chain cache (every trackToken feed seen before), from
+an optional token list file, and ether. Feeds looked up for the first time cost
+one extra aggregate; the cache makes that a one off.
+"""
+import json
+from decimal import Decimal
+
+from eth_utils import to_checksum_address
+from web3 import Web3
+from web3.contract import Contract
+
+from vault_lib import vault_abi
+from vault_lib.multicall import Multicall
+from vault_lib.preflight import get_dollar_value
+from vault_lib.rpc_batch import RpcBatch, hex_to_int
+from vault_lib.vault_state import VaultState, SLOTS, decode_slots
+
+ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
+""" Seconds after which a feed answer is flagged as stale """
+STALE_AFTER = 24 * 3600
+
+
+def read_token_list(filename: str) -> dict:
+    """
+    Tokens to include besides the tracked ones. Either a text file with one
+    `token[,feed]` per line (# starts a comment), or a json list of addresses or
+    of {"address", "feed"} objects. A feed values an untracked token in USD.
+    :return: token -> feed (None when not given)
+    """
+    tokens = {}
+    with open(filename, 'r') as f:
+        if filename.endswith('.json'):
+            for item in json.load(f):
+                item = item if isinstance(item, dict) else {'address': item}
+                feed = item.get('feed')
+                tokens[to_checksum_address(item['address'])] = to_checksum_address(feed) if feed else None
+        else:
+            for line in f:
+                line = line.split('#')[0].strip()
+                if not line:
+                    continue
+                token, _, feed = (part.strip() for part in line.partition(','))
+                tokens[to_checksum_address(token)] = to_checksum_address(feed) if feed else None
+    return tokens
+
+
+class Holding:
+    def __init__(self, token: str, balance: int, decimals: int, symbol: str = None, feed: str = None,
+                 tracked: bool = False, answer: int = None, feed_decimals: int = None, updated_at: int = None):
+        """
+        :param feed: price feed, the vault's trackedTokens feed or one from the token list
+        :param tracked: the vault tracks this token (withdrawals count against the daily limit)
+        """
+        self.token = token
+        self.balance = balance
+        self.decimals = decimals
+        self.symbol = symbol
+        self.feed = feed
+        self.tracked = tracked
+        self.answer = answer
+        self.feed_decimals = feed_decimals
+        self.updated_at = updated_at
+
+    @property
+    def amount(self) -> Decimal:
+        return Decimal(self.balance) / 10 ** self.decimals
+
+    @property
+    def price(self) -> (Decimal, None):
+        if self.answer is None or self.feed_decimals is None:
+            return None
+        return Decimal(self.answer) / 10 ** self.feed_decimals
+
+    @property
+    def usd(self) -> (Decimal, None):
+        return None if self.price is None else self.amount * self.price
+
+    @property
+    def limit_value(self) -> (int, None):
+        """
+        Dollars a withdrawal of the whole balance counts against the daily limit, as the contract computes it.
+        """
+        if not self.tracked or self.answer is None:
+            return None
+        return get_dollar_value(self.balance, self.decimals, self.answer) // 10 ** self.decimals
+
+    def as_dict(self) -> dict:
+        return {'token': self.token, 'symbol': self.symbol, 'balance': str(self.amount), 'feed': self.feed,
+                'tracked': self.tracked, 'price': None if self.price is None else str(self.price),
+                'usd': None if self.usd is None else str(self.usd), 'updated_at': self.updated_at}
+
+
+class Portfolio:
+    def __init__(self, holdings: list, state: VaultState, tracked_feeds: dict, round_trips: int):
+        """
+        :param tracked_feeds: token -> trackedTokens feed for every token looked at, for the caller to cache
+        """
+        self.holdings = holdings
+        self.state = state
+        self.tracked_feeds = tracked_feeds
+        self.round_trips = round_trips
+
+    @property
+    def total_usd(self) -> Decimal:
+        return sum((h.usd for h in self.holdings if h.usd is not None), Decimal(0))
+
+    @property
+    def remaining(self) -> int:
+        """
+        Dollars still withdrawable today without approvals.
+        """
+        return max(self.state['dailyLimit'] - self.state.effective_spent_today, 0)
+
+    def as_dict(self) -> dict:
+        return {'block': self.state.block, 'holdings': [h.as_dict() for h in self.holdings],
+                'total_usd': str(self.total_usd), 'daily_limit': self.state['dailyLimit'],
+                'spent_today': self.state.effective_spent_today, 'remaining': self.remaining}
+
+
+def _feed_calls(multicall: Multicall, w3: Web3, feed: str) -> (int, int):
+    aggregator = w3.eth.contract(feed, abi=vault_abi.aggregator_v3_abi)
+    return multicall.add(aggregator, 'latestRoundData'), multicall.add(aggregator, 'decimals')
+
+
+def fetch_portfolio(w3: Web3, vault: Contract, tokens: dict, tracked_feeds: dict, version: int = 2) -> Portfolio:
+    """
+    :param vault: the vault contract
+    :param tokens: token -> feed from a token list (None: no feed of its own)
+    :param tracked_feeds: token -> trackedTokens feed already known (ie: cached), zero address if untracked
+    :param version: vault version, only EtherVaultL2 (2) tracks tokens
+    """
+    tokens = dict(tokens)
+    for token in tracked_feeds:
+        tokens.setdefault(token, None)
+    tokens.pop(ZERO_ADDRESS, None)
+    tracked_feeds = dict(tracked_feeds)
+    unknown = [t for t in [ZERO_ADDRESS] + list(tokens) if t not in tracked_feeds] if version == 2 else []
+
+    def feed_of(token):
+        feed = tracked_feeds.get(token)
+        return feed if feed and int(feed, 16) else tokens.get(token)
+
+    multicall = Multicall(w3)
+    batch = RpcBatch(w3)
+    eth_balance = batch.request('eth_getBalance', [vault.address, 'latest'], hex_to_int)
+    header = batch.request('eth_getBlockByNumber', ['latest', False])
+    slots = {slot: batch.request('eth_getStorageAt', [vault.address, hex(slot), 'latest'], hex_to_int)
+             for slot in SLOTS}
+    token_calls = {}
+    for token in tokens:
+        erc20 = w3.eth.contract(token, abi=vault_abi.EIP20_ABI)
+        token_calls[token] = (multicall.add(erc20, 'balanceOf', vault.address), multicall.add(erc20, 'decimals'),
+                              multicall.add(erc20, 'symbol'))
+    tracked_calls = {token: multicall.add(vault, 'trackedTokens', token) for token in unknown}
+    feed_calls = {token: _feed_calls(multicall, w3, feed_of(token))
+                  for token in [ZERO_ADDRESS] + list(tokens) if feed_of(token)}
+    results = multicall.execute('latest', batch)
+
+    for token, index in tracked_calls.items():
+        tracked_feeds[token] = results[index] or ZERO_ADDRESS
+    # feeds seen for the first time: one more aggregate
+    new_feeds = [t for t in tracked_calls if t not in feed_calls and feed_of(t)]
+    if new_feeds:
+        extra = {token: _feed_calls(multicall, w3, feed_of(token)) for token in new_feeds}
+        offset = len(results)
+        extra_results = multicall.execute('latest')
+        results += extra_results
+        feed_calls.update({t: (a + offset, b + offset) for t, (a, b) in extra.items()})
+
+    holdings = []
+    for token in [ZERO_ADDRESS] + list(tokens):
+        if token == ZERO_ADDRESS:
+            balance, decimals, symbol = eth_balance.value, 18, 'ETH'
+        else:
+            balance_i, decimals_i, symbol_i = token_calls[token]
+            balance, decimals, symbol = results[balance_i] or 0, results[decimals_i], results[symbol_i]
+            if decimals is None:
+                # not an ERC20 (or the call failed), nothing to value
+                continue
+        feed = feed_of(token)
+        answer = feed_decimals = updated_at = None
+        if token in feed_calls:
+            round_data, feed_decimals = (results[i] for i in feed_calls[token])
+            if round_data is not None:
+                _, answer, _, updated_at, _ = round_data
+        tracked = bool(int(tracked_feeds.get(token, ZERO_ADDRESS), 16))
+        holdings.append(Holding(token, balance, decimals, symbol, feed, tracked, answer, feed_decimals, updated_at))
+
+    state = VaultState(decode_slots({slot: d.value for slot, d in slots.items()}, version),
+                       hex_to_int(header.value['number']), hex_to_int(header.value['timestamp']))
+    return Portfolio(holdings, state, tracked_feeds, multicall.round_trips)
+
+
+def print_report(portfolio: Portfolio):
+    state = portfolio.state
+    print(f'[+] Portfolio at block {state.block}:')
+    print(f'    {"token":<10} {"balance":>24} {"price $":>14} {"value $":>16}  limit')
+    for holding in portfolio.holdings:
+        price = f'{holding.price:,.2f}' if holding.price is not None else '-'
+        usd = f'{holding.usd:,.2f}' if holding.usd is not None else '-'
+        stale = holding.updated_at is not None and state.timestamp - holding.updated_at > STALE_AFTER
+        limit = f'tracked (${holding.limit_value} of limit)' if holding.tracked and holding.limit_value is not None \
+            else 'tracked' if holding.tracked else 'untracked'
+        print(f'    {(holding.symbol or holding.token[:10]):<10} {holding.amount:>24,.6f} {price:>14} {usd:>16}  '
+              f'{limit}{"  (stale price)" if stale else ""}')
+    print(f'[+] Total: ${portfolio.total_usd:,.2f} (tokens without a feed are not counted)')
+    rollover = ' (resets with the next limited withdrawal, new day)' if state.day > state['lastDay'] else ''
+    print(f'[+] Daily limit: ${state["dailyLimit"]}, spent today: ${state.effective_spent_today}{rollover}, '
+          f'remaining: ${portfolio.remaining}')
+    print(f'[+] Read in {portfolio.round_trips} round trip(s).')
@@ -0,0 +1,172 @@
+"""
+Off-chain reproduction of EtherVaultL2.withdraw() so a withdrawal can be
+checked before anything is signed: will it execute right away under the daily
+limit, land in the pending queue, or revert?
+
+The arithmetic mirrors the contract line by line (auth, checkPaused,
+checkBalance, underLimit with the lastDay rollover, getDollarValue), including
+its quirks, so the prediction matches what the chain will do rather than what
+it arguably should do.
+"""
+ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
+UINT128_MAX = 2 ** 128 - 1
+UINT256_MAX = 2 ** 256 - 1
+
+EXECUTE = 'execute'
+QUEUE = 'queue'
+REVERT = 'revert'
+
+""" Revert reasons as the contract reports them """
+AUTH_ERR = '!Auth/Nonce/Mutex'
+PAUSED_ERR = 'System paused'
+INS_FUNDS_ERR = 'Insufficient funds'
+UNTRACKED_ERR = 'Token not tracked'
+OVERFLOW_ERR = 'Arithmetic overflow'
+
+
+class ContractRevert(Exception):
+    pass
+
+
+def _checked(value: int, maximum: int = UINT256_MAX) -> int:
+    if value > maximum:
+        raise ContractRevert(OVERFLOW_ERR)
+    return value
+
+
+def get_dollar_value(amount: int, decimals: int, answer: int) -> int:
+    """
+    EtherVaultL2.getDollarValue(): token amount to dollars, scaled by 10**decimals.
+    Note the contract scales prices for tokens with more than 8 decimals by
+    (decimals - 8)**10, which is only right for 18 decimal tokens.
+    """
+    answer = answer % (UINT256_MAX + 1)  # uint(int256)
+    if decimals == 8:
+        price = answer
+    elif decimals > 8:
+        price = _checked(answer * (decimals - 8) ** 10)
+    else:
+        price = answer // 10 ** (8 - decimals)
+    return _checked(price * amount) // 10 ** decimals
+
+
+class PreflightResult:
+    def __init__(self, outcome: str, reason: str = None, dollar_value: int = None, spent_today: int = 0,
+                 daily_limit: int = 0, txid: int = None, day_rollover: bool = False):
+        """
+        :param outcome: EXECUTE, QUEUE or REVERT
+        :param reason: revert reason when outcome is REVERT
+        :param dollar_value: dollar value of the withdrawal as the limit check computes it
+        :param spent_today: spentToday after the call (after rollover)
+        :param daily_limit: dailyLimit in dollars
+        :param txid: id the withdrawal will get in the pending queue
+        :param day_rollover: the call resets spentToday (new day)
+        """
+        self.outcome = outcome
+        self.reason = reason
+        self.dollar_value = dollar_value
+        self.spent_today = spent_today
+        self.daily_limit = daily_limit
+        self.txid = txid
+        self.day_rollover = day_rollover
+
+    @property
+    def remaining(self) -> int:
+        return max(self.daily_limit - self.spent_today, 0)
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__, remaining=self.remaining)
+
+    def __repr__(self):
+        return f'PreflightResult({self.as_dict()})'
+
+
+def evaluate_withdraw(state, timestamp: int, is_signer: bool, nonce: int, token_address: str, amount: int,
+                      balance: int, feed: str, decimals: int, answer: (int, None)) -> PreflightResult:
+    """
+    Predict EtherVaultL2.withdraw(tokenAddress, destination, amount, _nonce).
+    :param state: VaultState (or dict) of the vault before the call
+    :param timestamp: timestamp of the block the call is expected in
+    :param is_signer: isSigner[msg.sender] != 0
+    :param nonce: the _nonce argument
+    :param token_address: address(0) for ether
+    :param amount: raw token amount
+    :param balance: vault balance of the token
+    :param feed: trackedTokens[token_address]
+    :param decimals: token decimals as trackToken stored them (18 for ether)
+    :param answer: latestRoundData() answer of the feed, None if the token is untracked
+    """
+    spent_today, daily_limit = state['spentToday'], state['dailyLimit']
+    try:
+        if not is_signer or nonce != state['execNonce'] + 1 or state['mutex'] != 0:
+            raise ContractRevert(AUTH_ERR)
+        if state['paused']:
+            raise ContractRevert(PAUSED_ERR)
+        if balance < amount:
+            raise ContractRevert(INS_FUNDS_ERR)
+        day = timestamp // 86400
+        rollover = day > state['lastDay']
+        if rollover:
+            spent_today = 0
+        tracked = int(feed or ZERO_ADDRESS, 16) != 0
+        if not tracked:
+            # untracked tokens can not be priced, only submitRawTx sends them
+            raise ContractRevert(UNTRACKED_ERR)
+        dollar_value = get_dollar_value(amount, decimals, answer) // 10 ** decimals
+        if _checked(spent_today + dollar_value) <= daily_limit:
+            spent_today = _checked(spent_today + (dollar_value & UINT128_MAX), UINT128_MAX)
+            return PreflightResult(EXECUTE, dollar_value=dollar_value, spent_today=spent_today,
+                                   daily_limit=daily_limit, day_rollover=rollover)
+        return PreflightResult(QUEUE, dollar_value=dollar_value, spent_today=spent_today, daily_limit=daily_limit,
+                               txid=state['txCount'] + 1, day_rollover=rollover)
+    except ContractRevert as err:
+        return PreflightResult(REVERT, reason=str(err), spent_today=spent_today, daily_limit=daily_limit)
+
+
+def evaluate_sequence(state, timestamp: int, is_signer: bool, withdrawals: list, tokens: dict,
+                      states: list = None) -> list:
+    """
+    Predict consecutive withdraw() calls by one sender (nonces execNonce + 1 .. n),
+    each one seeing the state the previous ones leave behind.
+    :param withdrawals: (token_address, raw amount) per call
+    :param tokens: token_address -> (balance, feed, decimals, answer)
+    :param states: if a list, the state each call sees is appended to it (the fields tracked here)
+    :return: PreflightResult per call
+    """
+    state = {name: state[name] for name in ('execNonce', 'mutex', 'paused', 'lastDay', 'spentToday',
+                                            'dailyLimit', 'txCount')}
+    balances = {token: values[0] for token, values in tokens.items()}
+    results = []
+    for token_address, amount in withdrawals:
+        _, feed, decimals, answer = tokens[token_address]
+        if states is not None:
+            states.append(dict(state))
+        result = evaluate_withdraw(state, timestamp, is_signer, state['execNonce'] + 1, token_address, amount,
+                                   balances[token_address], feed, decimals, answer)
+        results.append(result)
+        if result.outcome == REVERT:
+            continue
+        state['execNonce'] += 1
+        state['spentToday'] = result.spent_today
+        if result.day_rollover:
+            state['lastDay'] = timestamp // 86400
+        if result.outcome == EXECUTE:
+            balances[token_address] -= amount
+        else:
+            state['txCount'] += 1
+    return results
+
+
+def print_report(result: PreflightResult):
+    if result.outcome == REVERT:
+        print(f'[!] Preflight: will revert: {result.reason}')
+        return
+    if result.outcome == EXECUTE:
+        print(f'[+] Preflight: executes immediately (${result.dollar_value} within the daily limit).')
+    else:
+        print(f'[+] Preflight: over the daily limit (${result.dollar_value}), will be queued as txid {result.txid} '
+              f'pending approval.')
+    if result.day_rollover:
+        print('[+] Preflight: new day, spentToday resets with this call.')
+    print(f'[+] Daily limit: ${result.daily_limit}, spent today: ${result.spent_today}, '
+          f'remaining: ${result.remaining}')
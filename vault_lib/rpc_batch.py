@@ -0,0 +1,211 @@
+"""
+JSON-RPC batching helpers.
+
+Queue up independent reads, send them to the node in one HTTP request
+(a JSON-RPC batch) and hand back the decoded results. Providers that can't
+batch (IPC/websocket, or nodes that reject batches) get the same requests
+fired concurrently instead, which still costs a single round trip of wall time.
+"""
+import itertools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from web3 import Web3
+from web3._utils.abi import get_abi_output_types
+from web3.contract import Contract
+
+from vault_lib import exceptions
+from vault_lib import rpc_profiler
+
+_request_ids = itertools.count(1)
+
+
+class Deferred:
+    def __init__(self, batch: 'RpcBatch', index: int = None, decoder=None, parent: 'Deferred' = None):
+        """
+        Placeholder for the result of a queued request. Resolves once the batch
+        it belongs to has been executed.
+        :param batch: the owning batch
+        :param index: position of the request in the batch
+        :param decoder: callable applied to the raw json-rpc result
+        :param parent: when set, this value is derived from another Deferred
+        """
+        self.batch = batch
+        self.index = index
+        self.decoder = decoder
+        self.parent = parent
+        self._resolved = False
+        self._value = None
+
+    def then(self, fn) -> 'Deferred':
+        """
+        Derive a new value from this one, ie: decimals.then(lambda d: amount * 10 ** d)
+        """
+        return Deferred(self.batch, decoder=fn, parent=self)
+
+    @property
+    def value(self):
+        if not self._resolved:
+            if self.parent is not None:
+                self._value = self.decoder(self.parent.value)
+            else:
+                raw = self.batch.result(self.index)
+                self._value = self.decoder(raw) if self.decoder else raw
+            self._resolved = True
+        return self._value
+
+
+class Constant(Deferred):
+    def __init__(self, value):
+        """
+        An already known value (ie: served from a cache) that can stand in for a Deferred.
+        """
+        super().__init__(None)
+        self._value = value
+        self._resolved = True
+
+
+def resolve(value):
+    """
+    Return the concrete value of `value` if it is a Deferred, else value unchanged.
+    """
+    if isinstance(value, Deferred):
+        return value.value
+    return value
+
+
+def hex_to_int(value: str) -> int:
+    return int(value, 16)
+
+
+class RpcBatch:
+    def __init__(self, w3: Web3, max_workers: int = 8):
+        """
+        Collects json-rpc requests and executes them in as few round trips
+        as possible.
+        :param w3: connected web3 instance
+        :param max_workers: thread pool size for the concurrent fallback
+        """
+        self.w3 = w3
+        self.max_workers = max_workers
+        self.round_trips = 0
+        self._payload_bytes = (0, 0)
+        self._queue = []
+        self._results = {}
+        self._offset = 0
+
+    def request(self, method: str, params: list, decoder=None) -> Deferred:
+        """
+        Queue a raw json-rpc request.
+        :param method: ie "eth_chainId"
+        :param params: list of json serializable params
+        :param decoder: optional callable applied to the result
+        :return: Deferred
+        """
+        index = self._offset + len(self._queue)
+        self._queue.append((method, params))
+        return Deferred(self, index, decoder)
+
+    def call(self, contract: Contract, fn: str, *args, block: str = 'latest') -> Deferred:
+        """
+        Queue an eth_call of a contract view function.
+        """
+        fn_abi = contract.get_function_by_name(fn).abi
+        output_types = get_abi_output_types(fn_abi)
+        data = contract.encodeABI(fn, args=args)
+
+        def decoder(raw):
+            decoded = self.w3.codec.decode_abi(output_types, Web3.toBytes(hexstr=raw))
+            return decoded[0] if len(decoded) == 1 else decoded
+
+        return self.request('eth_call', [{'to': contract.address, 'data': data}, block], decoder)
+
+    def result(self, index: int):
+        if index not in self._results:
+            raise exceptions.RpcBatchError(f'Request #{index} has not been executed yet.')
+        result = self._results[index]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def execute(self) -> int:
+        """
+        Send every queued request. Errors are stored per request and raised
+        when the corresponding result is accessed.
+        :return: number of requests sent
+        """
+        queue, self._queue = self._queue, []
+        if not queue:
+            return 0
+        started = time.perf_counter()
+        self._payload_bytes = (0, 0)
+        responses = self._send_batch(queue)
+        if responses is None:
+            responses = self._send_concurrent(queue)
+        self.round_trips += 1
+        profiler = rpc_profiler.get_profiler(self.w3)
+        if profiler is not None:
+            profiler.record_batch(queue, responses, time.perf_counter() - started, *self._payload_bytes)
+        for i, response in enumerate(responses):
+            self._results[self._offset + i] = response
+        self._offset += len(queue)
+        return len(queue)
+
+    def _send_batch(self, queue: list) -> (list, None):
+        provider = self.w3.provider
+        endpoint = getattr(provider, 'endpoint_uri', None)
+        if not endpoint or not str(endpoint).startswith('http'):
+            return None
+        payload = []
+        for method, params in queue:
+            payload.append({'jsonrpc': '2.0', 'id': next(_request_ids), 'method': method, 'params': params})
+        if hasattr(provider, 'send_payload'):
+            # RpcPool: picks endpoints (hedging, failover, broadcast) itself
+            try:
+                body, request_bytes, response_bytes = provider.send_payload(payload)
+            except exceptions.RpcBatchError:
+                return None
+            self._payload_bytes = (request_bytes, response_bytes)
+            return self._unwrap_batch(queue, payload, body)
+        data = json.dumps(payload)
+        try:
+            resp = requests.post(str(endpoint), data=data,
+                                 headers={'Content-Type': 'application/json'},
+                                 timeout=provider.get_request_kwargs().get('timeout', 10))
+            resp.raise_for_status()
+            body = resp.json()
+            self._payload_bytes = (len(data), len(resp.content))
+        except (requests.RequestException, ValueError):
+            return None
+        return self._unwrap_batch(queue, payload, body)
+
+    def _unwrap_batch(self, queue: list, payload: list, body) -> (list, None):
+        if not isinstance(body, list):
+            # node refused the batch as a whole (ie: batching disabled)
+            return None
+        by_id = {item.get('id'): item for item in body}
+        return [self._unwrap(method, by_id.get(req['id'])) for (method, _), req in zip(queue, payload)]
+
+    def _send_concurrent(self, queue: list) -> list:
+        provider = self.w3.provider
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(queue))) as pool:
+            futures = [pool.submit(provider.make_request, method, params) for method, params in queue]
+            out = []
+            for (method, _), future in zip(queue, futures):
+                try:
+                    out.append(self._unwrap(method, future.result()))
+                except Exception as err:
+                    out.append(exceptions.RpcBatchError(f'{method}: {err}'))
+            return out
+
+    @staticmethod
+    def _unwrap(method: str, response: (dict, None)):
+        if response is None:
+            return exceptions.RpcBatchError(f'{method}: no response')
+        if 'error' in response:
+            error = response['error']
+            message = error.get('message') if isinstance(error, dict) else str(error)
+            return exceptions.RpcBatchError(f'{method}: {message}', error)
+        return response.get('result')
@@ -0,0 +1,269 @@
+"""
+Pool of JSON-RPC endpoints per network, used in place of the single provider
+secure_web3 sets up.
+
+Every endpoint keeps moving averages of its latency and error rate. Reads go to
+the fastest endpoint and are hedged: if no answer comes within a couple of its
+average latencies, the second fastest gets the same request and the first
+answer wins. Writes try endpoints one at a time in score order (failover). Raw
+transactions are sent to every healthy endpoint at once so they reach the
+mempool through several nodes.
+
+Extra endpoints per network are read from configs/rpc_endpoints.json (or
+ETHERVAULT_RPC_ENDPOINTS) and pooled with the wallet's own endpoint. When a
+network has none configured, the provider from secure_web3 is kept as is.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+from web3.providers.base import JSONBaseProvider
+
+from vault_lib import exceptions
+
+DEFAULT_ENDPOINTS_FILE = os.environ.get('ETHERVAULT_RPC_ENDPOINTS', 'configs/rpc_endpoints.json')
+""" Weight of the newest sample in the latency / error moving averages """
+EWMA_ALPHA = 0.3
+""" Latency assumed for an endpoint that has not answered yet, in seconds """
+INITIAL_LATENCY = 0.25
+""" Hedge after HEDGE_FACTOR * the primary's average latency, clamped to [HEDGE_MIN, HEDGE_MAX] seconds """
+HEDGE_FACTOR = 2
+HEDGE_MIN = 0.05
+HEDGE_MAX = 1.0
+""" Consecutive failures after which an endpoint sits out for COOLDOWN seconds """
+MAX_FAILURES = 3
+COOLDOWN = 30
+REQUEST_TIMEOUT = 10
+
+""" Methods that change state on the node: never hedged """
+WRITE_METHODS = ('eth_sendRawTransaction', 'eth_sendTransaction', 'eth_sign', 'eth_signTransaction',
+                 'personal_sendTransaction')
+BROADCAST_METHODS = ('eth_sendRawTransaction',)
+""" JSON-RPC errors that are the endpoint's fault (rate limits, overload), not the request's """
+ENDPOINT_ERRORS = ('rate limit', 'too many requests', 'limit exceeded', 'capacity', 'timeout', 'unavailable',
+                   'header not found')
+
+
+class Endpoint:
+    def __init__(self, url: str):
+        self.url = url
+        self.latency = INITIAL_LATENCY
+        self.error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.down_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def healthy(self) -> bool:
+        return time.time() >= self.down_until
+
+    @property
+    def score(self) -> float:
+        """
+        Expected cost of a request, lower is better: latency inflated by the error rate.
+        """
+        return self.latency * (1 + 4 * self.error_rate)
+
+    def observe(self, seconds: float, ok: bool):
+        with self._lock:
+            self.requests += 1
+            self.error_rate += EWMA_ALPHA * ((not ok) - self.error_rate)
+            if ok:
+                self.latency += EWMA_ALPHA * (seconds - self.latency)
+                self.failures = 0
+            else:
+                self.failures += 1
+                if self.failures >= MAX_FAILURES:
+                    self.down_until = time.time() + COOLDOWN
+
+    def as_dict(self) -> dict:
+        return {'url': self.url, 'latency': round(self.latency, 4), 'error_rate': round(self.error_rate, 4),
+                'requests': self.requests, 'healthy': self.healthy}
+
+
+def endpoint_error(body) -> bool:
+    """
+    True if a JSON-RPC response body says the endpoint, not the request, failed.
+    """
+    items = body if isinstance(body, list) else [body]
+    for item in items:
+        error = item.get('error') if isinstance(item, dict) else None
+        if error is None:
+            continue
+        message = (error.get('message', '') if isinstance(error, dict) else str(error)).lower()
+        code = error.get('code') if isinstance(error, dict) else None
+        if code in (-32005, 429) or any(text in message for text in ENDPOINT_ERRORS):
+            return True
+    return False
+
+
+class RpcPool(JSONBaseProvider):
+    def __init__(self, urls: list, timeout: float = REQUEST_TIMEOUT, max_workers: int = 16):
+        """
+        web3 provider spreading requests over several HTTP endpoints of one network.
+        :param urls: endpoint urls, in order of preference until latencies are known
+        :param timeout: per request timeout in seconds
+        :param max_workers: threads for hedged and broadcast requests
+        """
+        super().__init__()
+        if not urls:
+            raise exceptions.Web3RpcNotConfigured('An rpc pool needs at least one endpoint.')
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.hedged = 0
+        self._ids = itertools.count(1)
+
+    def __str__(self):
+        return f'RPC pool {[e.url for e in self.endpoints]}'
+
+    @property
+    def endpoint_uri(self) -> str:
+        return self.ranked()[0].url
+
+    def ranked(self) -> list:
+        """
+        Healthy endpoints, never used ones first (to learn their latency) then by
+        score, then the ones cooling down (better a slow answer than none).
+        """
+        return sorted(self.endpoints, key=lambda e: (not e.healthy, e.requests > 0, e.score))
+
+    def _post(self, endpoint: Endpoint, data: str):
+        """
+        :return: (decoded body, response bytes), raises on transport errors and endpoint side errors
+        """
+        started = time.perf_counter()
+        try:
+            resp = self.session.post(endpoint.url, data=data, headers={'Content-Type': 'application/json'},
+                                     timeout=self.timeout)
+            resp.raise_for_status()
+            body = resp.json()
+            if endpoint_error(body):
+                raise exceptions.RpcBatchError(f'{endpoint.url}: {body}')
+        except (requests.RequestException, ValueError, exceptions.RpcBatchError):
+            endpoint.observe(time.perf_counter() - started, False)
+            raise
+        endpoint.observe(time.perf_counter() - started, True)
+        return body, len(resp.content)
+
+    def _hedged(self, data: str):
+        ranked = self.ranked()
+        primary, backups = ranked[0], ranked[1:]
+        futures = {self.executor.submit(self._post, primary, data): primary}
+        delay = min(max(primary.latency * HEDGE_FACTOR, HEDGE_MIN), HEDGE_MAX)
+        if backups and not (primary.requests and backups[0].requests):
+            # one of them is still unmeasured, race them right away
+            delay = 0
+        done, _ = wait(futures, timeout=delay)
+        if not done and backups:
+            # primary is slow: race the second fastest
+            self.hedged += 1
+            futures[self.executor.submit(self._post, backups.pop(0), data)] = None
+        last_error = None
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                futures.pop(future)
+                try:
+                    return future.result()
+                except Exception as err:
+                    last_error = err
+            if not futures and backups:
+                # everything in flight failed: fail over to the next one
+                futures[self.executor.submit(self._post, backups.pop(0), data)] = None
+        raise exceptions.RpcBatchError(f'All endpoints failed: {last_error}')
+
+    def _failover(self, data: str):
+        last_error = None
+        for endpoint in self.ranked():
+            try:
+                return self._post(endpoint, data)
+            except Exception as err:
+                last_error = err
+        raise exceptions.RpcBatchError(f'All endpoints failed: {last_error}')
+
+    def _broadcast(self, data: str):
+        """
+        Send to every healthy endpoint, return the first clean answer. If they
+        all answer with an error (ie: "already known"), the first error is returned.
+        """
+        targets = [e for e in self.ranked() if e.healthy] or self.ranked()[:1]
+        futures = [self.executor.submit(self._post, endpoint, data) for endpoint in targets]
+        answers, last_error = [], None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    answer = future.result()
+                except Exception as err:
+                    last_error = err
+                    continue
+                body = answer[0]
+                items = body if isinstance(body, list) else [body]
+                if not any('error' in item for item in items if isinstance(item, dict)):
+                    return answer
+                answers.append(answer)
+        if answers:
+            return answers[0]
+        raise exceptions.RpcBatchError(f'All endpoints failed: {last_error}')
+
+    def send_payload(self, payload: (dict, list)):
+        """
+        Send a single or batched JSON-RPC payload, picking the strategy from its methods.
+        :return: (decoded body, request bytes, response bytes)
+        """
+        data = json.dumps(payload)
+        methods = {item['method'] for item in (payload if isinstance(payload, list) else [payload])}
+        if methods <= set(BROADCAST_METHODS):
+            body, size = self._broadcast(data)
+        elif methods & set(WRITE_METHODS):
+            body, size = self._failover(data)
+        else:
+            body, size = self._hedged(data)
+        return body, len(data), size
+
+    def make_request(self, method: str, params) -> dict:
+        payload = {'jsonrpc': '2.0', 'id': next(self._ids), 'method': method, 'params': params or []}
+        try:
+            body, _, _ = self.send_payload(payload)
+        except exceptions.RpcBatchError as err:
+            raise ConnectionError(str(err))
+        return body
+
+    def scores(self) -> dict:
+        return {e.url: {'latency': e.latency, 'error_rate': e.error_rate} for e in self.endpoints}
+
+    def load_scores(self, scores: dict):
+        """
+        Warm start from scores a previous run saved (see scores()).
+        """
+        for endpoint in self.endpoints:
+            if endpoint.url in (scores or {}):
+                endpoint.latency = scores[endpoint.url]['latency']
+                endpoint.error_rate = scores[endpoint.url]['error_rate']
+
+    def print_status(self):
+        print(f'[+] RPC pool: {len(self.endpoints)} endpoint(s), {self.hedged} hedged request(s)')
+        for endpoint in self.ranked():
+            print(f'    {endpoint.url:<48} {endpoint.latency * 1000:>8.1f} ms  '
+                  f'{endpoint.error_rate * 100:>5.1f}% errors  {endpoint.requests:>5} requests'
+                  f'{"" if endpoint.healthy else "  (cooling down)"}')
+
+
+def load_endpoints(network: str, filename: str = DEFAULT_ENDPOINTS_FILE) -> list:
+    """
+    :return: endpoint urls configured for network, [] if none
+    """
+    try:
+        with open(filename, 'r') as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return list(config.get(network, []))
@@ -0,0 +1,210 @@
+"""
+JSON-RPC instrumentation: call counts, payload sizes and latency histograms per
+method and per CLI command phase.
+
+The profiler is installed as web3 middleware by VaultCli. RpcBatch sends its
+batches straight over HTTP, past the middleware, so it reports to the profiler
+registered for its web3 instance itself. Nothing is measured unless the
+profiler is enabled (`--profile`, `--profile-json`, `--profile-prom`).
+"""
+import bisect
+import contextlib
+import json
+import os
+import time
+
+""" Latency histogram bucket upper bounds in seconds (prometheus style, cumulative) """
+BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+_profilers = {}
+
+
+class MethodStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds: float, request_bytes: int, response_bytes: int, error: bool):
+        self.count += 1
+        self.errors += error
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.request_bytes += request_bytes
+        self.response_bytes += response_bytes
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def cumulative_buckets(self) -> list:
+        out, total = [], 0
+        for bound, count in zip(BUCKETS + (float('inf'),), self.buckets):
+            total += count
+            out.append((bound, total))
+        return out
+
+    def as_dict(self) -> dict:
+        return {'count': self.count, 'errors': self.errors, 'seconds': round(self.seconds, 6),
+                'max_seconds': round(self.max_seconds, 6), 'request_bytes': self.request_bytes,
+                'response_bytes': self.response_bytes,
+                'buckets': {str(bound): count for bound, count in self.cumulative_buckets()}}
+
+
+class PhaseStats:
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.round_trips = 0
+        self.requests = 0
+
+    def as_dict(self) -> dict:
+        return {'calls': self.calls, 'seconds': round(self.seconds, 6), 'round_trips': self.round_trips,
+                'requests': self.requests}
+
+
+class RpcProfiler:
+    def __init__(self, enabled: bool = False):
+        """
+        :param enabled: record anything at all; when False the middleware is a pass through
+        """
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.methods = {}
+        self.phases = {}
+        self._stack = []
+
+    @property
+    def current_phase(self) -> str:
+        return '/'.join(self._stack) or 'none'
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """
+        Attribute everything inside the block to `name`, nested phases read ie: "withdraw/estimate".
+        """
+        self._stack.append(name)
+        key = self.current_phase
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats = self.phases.setdefault(key, PhaseStats())
+            stats.calls += 1
+            stats.seconds += time.perf_counter() - started
+            self._stack.pop()
+
+    def record(self, method: str, seconds: float, request_bytes: int = 0, response_bytes: int = 0,
+               error: bool = False, round_trip: bool = True):
+        """
+        :param round_trip: False for the 2nd+ request of a batch that shared one round trip
+        """
+        if not self.enabled:
+            return
+        key = (method, self.current_phase)
+        self.methods.setdefault(key, MethodStats()).add(seconds, request_bytes, response_bytes, error)
+        phase = self.phases.setdefault(self.current_phase, PhaseStats())
+        phase.requests += 1
+        phase.round_trips += round_trip
+
+    def record_batch(self, requests: list, responses: list, seconds: float, request_bytes: int = 0,
+                     response_bytes: int = 0):
+        """
+        One batched round trip: every request is counted under its own method
+        with the batch latency, payload bytes are split evenly.
+        """
+        share = max(len(requests), 1)
+        for i, ((method, _), response) in enumerate(zip(requests, responses)):
+            self.record(method, seconds, request_bytes // share, response_bytes // share,
+                        isinstance(response, Exception), round_trip=i == 0)
+
+    def as_dict(self) -> dict:
+        return {
+            'methods': [dict(stats.as_dict(), method=method, phase=phase)
+                        for (method, phase), stats in sorted(self.methods.items())],
+            'phases': {name: stats.as_dict() for name, stats in sorted(self.phases.items())},
+        }
+
+    def print_report(self):
+        print('[+] RPC profile:')
+        print(f'    {"phase":<28} {"method":<28} {"calls":>5} {"err":>4} {"total ms":>9} {"max ms":>8} '
+              f'{"req B":>8} {"resp B":>9}')
+        for (method, phase), stats in sorted(self.methods.items(), key=lambda item: (item[0][1], item[0][0])):
+            print(f'    {phase:<28} {method:<28} {stats.count:>5} {stats.errors:>4} '
+                  f'{stats.seconds * 1000:>9.1f} {stats.max_seconds * 1000:>8.1f} '
+                  f'{stats.request_bytes:>8} {stats.response_bytes:>9}')
+        for name, stats in sorted(self.phases.items()):
+            print(f'[+] Phase {name}: {stats.seconds * 1000:.1f} ms, {stats.requests} request(s) in '
+                  f'{stats.round_trips} round trip(s)')
+
+    def to_prometheus(self, prefix: str = 'ethervault') -> str:
+        lines = [f'# HELP {prefix}_rpc_request_duration_seconds JSON-RPC request latency.',
+                 f'# TYPE {prefix}_rpc_request_duration_seconds histogram']
+        for (method, phase), stats in sorted(self.methods.items()):
+            labels = f'method="{method}",phase="{phase}"'
+            for bound, count in stats.cumulative_buckets():
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{prefix}_rpc_request_duration_seconds_bucket{{{labels},le="{le}"}} {count}')
+            lines.append(f'{prefix}_rpc_request_duration_seconds_sum{{{labels}}} {stats.seconds}')
+            lines.append(f'{prefix}_rpc_request_duration_seconds_count{{{labels}}} {stats.count}')
+        for name, help_text, attr in (('rpc_errors_total', 'JSON-RPC requests that returned an error.', 'errors'),
+                                      ('rpc_request_bytes_total', 'JSON-RPC request payload bytes.', 'request_bytes'),
+                                      ('rpc_response_bytes_total', 'JSON-RPC response payload bytes.',
+                                       'response_bytes')):
+            lines += [f'# HELP {prefix}_{name} {help_text}', f'# TYPE {prefix}_{name} counter']
+            for (method, phase), stats in sorted(self.methods.items()):
+                lines.append(f'{prefix}_{name}{{method="{method}",phase="{phase}"}} {getattr(stats, attr)}')
+        for name, help_text, attr in (('phase_duration_seconds', 'Wall time spent per CLI phase.', 'seconds'),
+                                      ('phase_round_trips', 'JSON-RPC round trips per CLI phase.', 'round_trips')):
+            lines += [f'# HELP {prefix}_{name} {help_text}', f'# TYPE {prefix}_{name} gauge']
+            for phase, stats in sorted(self.phases.items()):
+                lines.append(f'{prefix}_{name}{{phase="{phase}"}} {getattr(stats, attr)}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, filename: str, fmt: str = 'json'):
+        """
+        Write the profile atomically (the node exporter's textfile collector may read at any time).
+        :param fmt: "json" or "prometheus"
+        """
+        body = json.dumps(self.as_dict(), indent=1) if fmt == 'json' else self.to_prometheus()
+        tmp = f'{filename}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(body)
+        os.replace(tmp, filename)
+
+    def middleware(self, make_request, w3):
+        def profile_request(method, params):
+            if not self.enabled:
+                return make_request(method, params)
+            started = time.perf_counter()
+            response = make_request(method, params)
+            seconds = time.perf_counter() - started
+            self.record(method, seconds, len(json.dumps(params, default=str)),
+                        len(json.dumps(response, default=str)), 'error' in response)
+            return response
+
+        return profile_request
+
+
+def install(w3, profiler: RpcProfiler) -> RpcProfiler:
+    """
+    Add the profiler as the outermost web3 middleware and register it for RpcBatch.
+    """
+    w3.middleware_onion.add(profiler.middleware, name='rpc_profiler')
+    _profilers[id(w3)] = profiler
+    return profiler
+
+
+def get_profiler(w3) -> (RpcProfiler, None):
+    return _profilers.get(id(w3))
+
+
+def phase(w3, name: str):
+    """
+    profiler.phase(name) of w3's profiler, or a no-op when none is installed.
+    """
+    profiler = get_profiler(w3)
+    return profiler.phase(name) if profiler is not None else contextlib.nullcontext()
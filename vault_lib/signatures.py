@@ -0,0 +1,138 @@
+"""
+Off-chain approvals for executeWithSignatures, collected as signature bundles.
+
+A bundle is a json file holding one transaction (vault, chain id, dest, value,
+data and the contract nonce it is for) and the EIP-712 signatures gathered for
+it so far, keyed by signer. Signers add theirs offline, copies that went around
+separately are merged, and one signer submits: their transaction is their own
+approval, the other signatures are packed in signer address order, as the
+contract checks them. A bundle is bound to its nonce, any other vault call that
+uses the nonce first makes it stale.
+"""
+import json
+
+from eth_abi import encode_abi
+from eth_account import Account
+from eth_account.messages import SignableMessage
+from eth_utils import keccak, to_checksum_address
+
+from vault_lib import exceptions
+
+DOMAIN_TYPEHASH = keccak(text='EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)')
+EXECUTE_TYPEHASH = keccak(text='Execute(address dest,uint128 value,bytes32 dataHash,uint32 nonce)')
+""" Vault version -> EIP-712 domain name and version, as in the contracts """
+DOMAINS = {1: ('EtherVault', '1'), 2: ('EtherVaultL2', '2')}
+""" Fields the signatures are over, bundles can only be merged if they all match """
+PAYLOAD_FIELDS = ('vault', 'chain_id', 'version', 'dest', 'value', 'data', 'nonce')
+
+
+def new_bundle(vault: str, chain_id: int, version: int, dest: str, value: int, data: bytes, nonce: int) -> dict:
+    """
+    :param value: wei
+    :param nonce: the contract nonce (execNonce + 1) the submitter will use
+    """
+    if version not in DOMAINS:
+        raise exceptions.SignatureBundleError(f'Vault version {version} has no executeWithSignatures.')
+    return {'vault': to_checksum_address(vault), 'chain_id': int(chain_id), 'version': int(version),
+            'dest': to_checksum_address(dest), 'value': int(value), 'data': '0x' + bytes(data).hex(),
+            'nonce': int(nonce), 'signatures': {}}
+
+
+def domain_separator(bundle: dict) -> bytes:
+    name, version = DOMAINS[bundle['version']]
+    return keccak(encode_abi(['bytes32', 'bytes32', 'bytes32', 'uint256', 'address'],
+                             [DOMAIN_TYPEHASH, keccak(text=name), keccak(text=version), bundle['chain_id'],
+                              bundle['vault']]))
+
+
+def signable(bundle: dict) -> SignableMessage:
+    """
+    The typed data message, hashed by hand: eth_account's encode_structured_data can't take raw bytes32 values.
+    """
+    data = bytes.fromhex(bundle['data'][2:])
+    struct_hash = keccak(encode_abi(['bytes32', 'address', 'uint128', 'bytes32', 'uint32'],
+                                    [EXECUTE_TYPEHASH, bundle['dest'], bundle['value'], keccak(data), bundle['nonce']]))
+    return SignableMessage(b'\x01', domain_separator(bundle), struct_hash)
+
+
+def digest(bundle: dict) -> bytes:
+    """
+    :return: what the contract's executeDigest() returns for this bundle
+    """
+    message = signable(bundle)
+    return keccak(b'\x19' + message.version + message.header + message.body)
+
+
+def recover(bundle: dict, signature: str) -> str:
+    return Account.recover_message(signable(bundle), signature=bytes.fromhex(signature[2:]))
+
+
+def sign(bundle: dict, account) -> dict:
+    """
+    :param account: a local eth_account account
+    :return: a copy of the bundle with the account's signature added
+    """
+    signed = account.sign_message(signable(bundle))
+    bundle = dict(bundle, signatures=dict(bundle['signatures']))
+    bundle['signatures'][to_checksum_address(account.address)] = '0x' + bytes(signed.signature).hex()
+    return bundle
+
+
+def verify(bundle: dict):
+    """
+    Raise if a signature does not recover to the signer it is filed under.
+    """
+    for signer, signature in bundle['signatures'].items():
+        try:
+            recovered = recover(bundle, signature)
+        except Exception as err:
+            raise exceptions.SignatureBundleError(f'Malformed signature for {signer}: {err}')
+        if recovered != to_checksum_address(signer):
+            raise exceptions.SignatureBundleError(f'Signature filed under {signer} was made by {recovered}.')
+
+
+def merge(bundles: list) -> dict:
+    """
+    Combine the signatures of bundles for the same transaction.
+    """
+    if not bundles:
+        raise exceptions.SignatureBundleError('Nothing to merge.')
+    merged = dict(bundles[0], signatures={})
+    for bundle in bundles:
+        differs = [field for field in PAYLOAD_FIELDS if bundle[field] != merged[field]]
+        if differs:
+            raise exceptions.SignatureBundleError(f'Bundles are for different transactions ({", ".join(differs)}).')
+        merged['signatures'].update(bundle['signatures'])
+    verify(merged)
+    return merged
+
+
+def pack(bundle: dict, submitter: str) -> (bytes, list):
+    """
+    :param submitter: the sending signer, whose own signature is left out (the contract refuses it)
+    :return: concatenated 65 byte signatures in ascending signer order, and those signers
+    """
+    signers = sorted((to_checksum_address(s) for s in bundle['signatures'] if int(s, 16) != int(submitter, 16)),
+                     key=lambda s: int(s, 16))
+    packed = b''.join(bytes.fromhex(bundle['signatures'][s][2:]) for s in signers)
+    return packed, signers
+
+
+def load(filename: str) -> dict:
+    with open(filename, 'r') as f:
+        bundle = json.load(f)
+    missing = [field for field in PAYLOAD_FIELDS + ('signatures',) if field not in bundle]
+    if missing:
+        raise exceptions.SignatureBundleError(f'{filename} is not a signature bundle (no {", ".join(missing)}).')
+    bundle['signatures'] = {to_checksum_address(s): sig for s, sig in bundle['signatures'].items()}
+    return bundle
+
+
+def save(bundle: dict, filename: str):
+    with open(filename, 'w') as f:
+        json.dump(bundle, f, indent=2)
+
+
+def describe(bundle: dict) -> str:
+    return (f'{bundle["value"]} wei to {bundle["dest"]} with {(len(bundle["data"]) - 2) // 2} bytes of data, '
+            f'nonce {bundle["nonce"]}, {len(bundle["signatures"])} signature(s)')
@@ -0,0 +1,174 @@
+"""
+Round trip aware transaction assembly for Ethervault contract interactions.
+
+Every read a contract interaction needs (execNonce, fee history, account nonce,
+chain id, plus whatever the caller queues, ie: token decimals) is independent,
+so they all go out as a single batch. Only the gas estimate has to wait, because
+it needs the contract nonce to simulate the call.
+"""
+from eth_typing import ChecksumAddress
+from eth_utils import to_hex
+from web3 import Web3
+from web3.contract import Contract
+
+from vault_lib import exceptions
+from vault_lib.fee_oracle import FeeOracle, PERCENTILES, get_fee_oracle
+from vault_lib.nonce_manager import NonceManager
+from vault_lib.rpc_profiler import phase
+from vault_lib.rpc_batch import RpcBatch, Deferred, Constant, resolve, hex_to_int
+
+
+class _ContractNonce:
+    """
+    Placeholder argument: replaced by execNonce + 1 once the first batch returns.
+    """
+    def __repr__(self):
+        return 'CONTRACT_NONCE'
+
+
+CONTRACT_NONCE = _ContractNonce()
+
+
+def decode_fee_history(raw: dict) -> dict:
+    return {
+        'oldestBlock': hex_to_int(raw['oldestBlock']),
+        'baseFeePerGas': [hex_to_int(x) for x in raw['baseFeePerGas']],
+        'reward': [[hex_to_int(x) for x in block] for block in raw.get('reward', [])],
+    }
+
+
+class TxPipeline:
+    def __init__(self, w3: Web3, from_account: ChecksumAddress, contract: Contract, priority: str = 'medium',
+                 chain_id: int = None, fee_oracle: FeeOracle = None, nonce_manager: NonceManager = None):
+        """
+        Builds a contract interaction tx in (normally) two round trips.
+        :param w3: connected web3 instance
+        :param from_account: address of the signer
+        :param contract: the vault contract
+        :param priority: gas estimator priority preset
+        :param chain_id: known chain id (ie: from the chain cache), fetched when None
+        :param fee_oracle: defaults to the process wide oracle of w3
+        :param nonce_manager: reserve contract and account nonces across processes
+        """
+        self.w3 = w3
+        self.from_account = from_account
+        self.contract = contract
+        self.priority = priority
+        self.chain_id = chain_id
+        self.fee_oracle = fee_oracle or get_fee_oracle(w3)
+        self.nonce_manager = nonce_manager
+        self.batch = RpcBatch(w3)
+        self.reservations = []
+        self._requirements = []
+
+    @property
+    def round_trips(self) -> int:
+        return self.batch.round_trips
+
+    def call(self, contract: Contract, fn: str, *args) -> Deferred:
+        """
+        Queue an extra read to go out with the first batch.
+        """
+        return self.batch.call(contract, fn, *args)
+
+    def request(self, method: str, params: list, decoder=None) -> Deferred:
+        return self.batch.request(method, params, decoder)
+
+    def require(self, value: Deferred, predicate, message: str, fatal: bool = True):
+        """
+        Check a prefetched value before the gas estimate is requested.
+        :param fatal: raise if the check fails, otherwise just print the message
+        :raises AssertionError: if predicate(value) is falsy and fatal
+        """
+        self._requirements.append((value, predicate, message, fatal))
+
+    def _reserve(self, scope: str, chain_next: int) -> int:
+        nonce, = self.nonce_manager.reserve(scope, chain_next)
+        self.reservations.append((scope, nonce))
+        return nonce
+
+    def release(self):
+        """
+        Hand the reserved nonces back, ie: the tx was not broadcast.
+        """
+        if self.nonce_manager is not None:
+            for scope, nonce in self.reservations:
+                self.nonce_manager.release(scope, [nonce])
+        self.reservations = []
+
+    def mark_sent(self, tx_hash: str):
+        if self.nonce_manager is not None:
+            for scope, nonce in self.reservations:
+                self.nonce_manager.mark_sent(scope, nonce, tx_hash)
+
+    def build(self, function: str, *args, value: int = 0) -> dict:
+        """
+        Resolve all queued reads, then estimate gas and assemble the tx.
+        :param function: contract function name
+        :param args: arguments, may contain Deferred values and CONTRACT_NONCE
+        :param value: wei value to attach
+        :return: dict tx object
+        """
+        exec_nonce = None
+        if any(arg is CONTRACT_NONCE for arg in args):
+            exec_nonce = self.batch.call(self.contract, 'execNonce')
+        fee_history = None
+        if not self.fee_oracle.fresh:
+            # only the blocks since the oracle's last refresh
+            fee_history = self.batch.request('eth_feeHistory', [hex(self.fee_oracle.pending_count()), 'latest',
+                                                                list(PERCENTILES)], decode_fee_history)
+        account_nonce = self.batch.request('eth_getTransactionCount', [self.from_account, 'pending'], hex_to_int)
+        if self.chain_id is None:
+            chain_id = self.batch.request('eth_chainId', [], hex_to_int)
+        else:
+            chain_id = Constant(self.chain_id)
+        with phase(self.w3, 'reads'):
+            self.batch.execute()
+        self.chain_id = chain_id.value
+        if fee_history is not None:
+            self.fee_oracle.ingest(fee_history.value)
+
+        for deferred, predicate, message, fatal in self._requirements:
+            if not predicate(resolve(deferred)):
+                if fatal:
+                    raise AssertionError(message)
+                print(message)
+        chain_nonce = exec_nonce.value + 1 if exec_nonce is not None else None
+        contract_nonce, nonce = chain_nonce, account_nonce.value
+        if self.nonce_manager is not None:
+            nonce = self._reserve(self.nonce_manager.account_scope(self.from_account), nonce)
+            if chain_nonce is not None:
+                contract_nonce = self._reserve(self.nonce_manager.contract_scope(self.contract.address), chain_nonce)
+
+        def encode(contract_nonce_arg):
+            return self.contract.encodeABI(function, args=[contract_nonce_arg if arg is CONTRACT_NONCE
+                                                           else resolve(arg) for arg in args])
+
+        encoded_data = encode(contract_nonce)
+        # estimate against the mined state, where only the chain's next contract nonce passes auth
+        estimate = self.batch.request('eth_estimateGas', [{
+            'from': self.from_account, 'to': self.contract.address, 'data': encode(chain_nonce),
+            'value': to_hex(value)}], hex_to_int)
+        with phase(self.w3, 'estimate'):
+            self.batch.execute()
+        try:
+            gas_est = estimate.value
+        except exceptions.RpcBatchError as err:
+            self.release()
+            raise exceptions.GasEstimationError(f'Contract Logic Error with gas estimation: {err}')
+        if contract_nonce != chain_nonce:
+            print(f'[+] Contract nonce {chain_nonce} is taken by another pending tx, using {contract_nonce}.')
+        fees = self.fee_oracle.suggest(self.priority, refresh=False)
+        print(f'[+] Priority Fee: {fees.max_priority_fee_gwei}, Max: {fees.max_fee_gwei}, Gas: {gas_est}')
+        print(f'[+] Built {function} tx in {self.round_trips} round trip(s).')
+        return {
+            "from": self.from_account,
+            "gas": gas_est,
+            'maxPriorityFeePerGas': fees.max_priority_fee,
+            'maxFeePerGas': fees.max_fee,
+            "to": self.contract.address,
+            "value": to_hex(value),
+            "data": encoded_data,
+            "nonce": nonce,
+            "chainId": self.chain_id
+        }
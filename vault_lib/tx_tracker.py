@@ -0,0 +1,338 @@
+"""
+Receipt tracker for any number of sent transactions, with replace-by-fee.
+
+Instead of one eth_getTransactionReceipt per tx per poll, the tracker reads each
+new block's tx hash list (one batch per poll, whatever the number of txs) and
+only fetches receipts for the txs it finds. The signer's mined nonce is read in
+the same batch. A tracked nonce that was used without any of its hashes showing
+up means the tx was replaced or dropped.
+
+A tx that is still pending `bump_after` blocks after it was (re)sent is signed
+again with the same nonce and both fee caps raised by at least BUMP_PERCENT
+(the minimum most nodes accept for a replacement) or to the fee oracle's
+current suggestion, whichever is higher. Every hash of a nonce is kept, so a
+receipt for any of them counts.
+"""
+import math
+import statistics
+import time
+
+from web3 import Web3
+
+from vault_lib import exceptions
+from vault_lib.fee_oracle import FeeOracle, PERCENTILES
+from vault_lib.nonce_manager import NonceManager
+from vault_lib.rpc_batch import RpcBatch, hex_to_int
+from vault_lib.tx_builder import decode_fee_history
+
+""" Minimum fee increase of a replacement, in percent """
+BUMP_PERCENT = 12.5
+DEFAULT_BUMP_AFTER = 3
+DEFAULT_MAX_BUMPS = 5
+""" Above this many new blocks per poll, look up receipts directly instead of reading the blocks """
+MAX_BLOCKS_PER_POLL = 32
+
+PENDING = 'pending'
+MINED = 'mined'
+REVERTED = 'reverted'
+REPLACED = 'replaced'
+DONE = (MINED, REVERTED, REPLACED)
+
+INT_FIELDS = ('value', 'gas', 'nonce', 'chainId', 'maxFeePerGas', 'maxPriorityFeePerGas', 'gasPrice')
+
+
+def _int(value) -> int:
+    return hex_to_int(value) if isinstance(value, str) else int(value)
+
+
+def unsigned_tx(tx: dict) -> dict:
+    """
+    Signable copy of a built tx, or of an eth_getTransactionByHash result.
+    """
+    out = {key: _int(tx[key]) for key in INT_FIELDS if tx.get(key) is not None}
+    out['to'] = tx['to']
+    out['data'] = tx.get('data', tx.get('input', '0x'))
+    if 'maxFeePerGas' in out:
+        out.pop('gasPrice', None)
+    return out
+
+
+class TrackedTx:
+    def __init__(self, tx_hash: str, tx: dict = None, sender: str = None, reservations: list = (), label: str = ''):
+        """
+        :param tx: the tx as built (for replacements), fetched from the node when None
+        :param reservations: NonceManager (scope, nonce) pairs to point at the replacement
+        """
+        self.hashes = [tx_hash]
+        self.tx = unsigned_tx(tx) if tx else None
+        self.sender = sender or (tx or {}).get('from')
+        self.reservations = list(reservations)
+        self.label = label
+        self.status = PENDING
+        self.sent_at = time.time()
+        self.sent_block = None
+        self.first_block = None
+        self.block = None
+        self.included_at = None
+        self.gas_used = None
+        self.bumps = 0
+        self.error = None
+
+    @property
+    def tx_hash(self) -> str:
+        return self.hashes[-1]
+
+    @property
+    def nonce(self) -> (int, None):
+        return self.tx['nonce'] if self.tx else None
+
+    def as_dict(self) -> dict:
+        return {'tx_hash': self.tx_hash, 'hashes': self.hashes, 'label': self.label, 'status': self.status,
+                'nonce': self.nonce, 'block': self.block, 'bumps': self.bumps, 'gas_used': self.gas_used,
+                'seconds': round(self.included_at - self.sent_at, 1) if self.included_at else None,
+                'blocks': max(self.block - self.first_block, 0) if self.block and self.first_block else None}
+
+
+class TxTracker:
+    def __init__(self, w3: Web3, account=None, fee_oracle: FeeOracle = None, priority: str = 'high',
+                 bump_after: int = DEFAULT_BUMP_AFTER, max_bumps: int = DEFAULT_MAX_BUMPS, max_fee: int = None,
+                 nonce_manager: NonceManager = None):
+        """
+        :param w3: connected web3 instance
+        :param account: signing account (eth_account LocalAccount), without one nothing is replaced
+        :param fee_oracle: shared fee oracle, replacements pay at least its `priority` suggestion
+        :param bump_after: blocks a tx may stay pending before it is replaced, 0 disables replacements
+        :param max_bumps: replacements per tx
+        :param max_fee: cap for maxFeePerGas in wei, no replacement goes above it
+        :param nonce_manager: reservations of replaced txs are pointed at the new hash
+        """
+        self.w3 = w3
+        self.account = account
+        self.fee_oracle = fee_oracle
+        self.priority = priority
+        self.bump_after = bump_after
+        self.max_bumps = max_bumps
+        self.max_fee = max_fee
+        self.nonce_manager = nonce_manager
+        self.txs = []
+        self.head = None
+        self.round_trips = 0
+
+    def add(self, tx_hash: str, tx: dict = None, reservations: list = (), label: str = '') -> TrackedTx:
+        tracked = TrackedTx(str(tx_hash), tx, reservations=reservations, label=label)
+        tracked.sent_block = tracked.first_block = self.head
+        self.txs.append(tracked)
+        return tracked
+
+    @property
+    def pending(self) -> list:
+        return [t for t in self.txs if t.status == PENDING]
+
+    def _execute(self, batch: RpcBatch):
+        batch.execute()
+        self.round_trips += 1
+
+    def _receipts(self, txs: list, batch: RpcBatch = None):
+        """
+        Look up the receipts of every hash of `txs` directly.
+        """
+        batch = batch or RpcBatch(self.w3)
+        lookups = [(t, h, batch.request('eth_getTransactionReceipt', [h])) for t in txs for h in t.hashes]
+        if lookups:
+            self._execute(batch)
+        for tracked, tx_hash, lookup in lookups:
+            try:
+                receipt = lookup.value
+            except exceptions.RpcBatchError:
+                continue
+            if receipt:
+                self._included(tracked, tx_hash, receipt)
+
+    def _included(self, tracked: TrackedTx, tx_hash: str, receipt: dict):
+        tracked.status = MINED if hex_to_int(receipt['status']) == 1 else REVERTED
+        tracked.hashes.remove(tx_hash)
+        tracked.hashes.append(tx_hash)
+        tracked.block = hex_to_int(receipt['blockNumber'])
+        tracked.gas_used = hex_to_int(receipt['gasUsed'])
+        tracked.included_at = time.time()
+
+    def poll(self) -> list:
+        """
+        Catch up with the chain once: new blocks, inclusions, stuck txs.
+        :return: txs that changed status or were replaced in this poll
+        """
+        pending = self.pending
+        if not pending:
+            return []
+        before = {id(t): (t.status, t.tx_hash) for t in pending}
+        batch = RpcBatch(self.w3)
+        head = batch.request('eth_blockNumber', [], hex_to_int)
+        unknown = [t for t in pending if t.tx is None]
+        lookups = [batch.request('eth_getTransactionByHash', [t.tx_hash]) for t in unknown]
+        senders = {t.sender for t in pending if t.sender}
+        mined_nonces = {s: batch.request('eth_getTransactionCount', [s, 'latest'], hex_to_int) for s in senders}
+        fee_history = None
+        if self.fee_oracle is not None and self.bump_after and not self.fee_oracle.fresh:
+            fee_history = batch.request('eth_feeHistory', [hex(self.fee_oracle.pending_count()), 'latest',
+                                                           list(PERCENTILES)], decode_fee_history)
+        self._execute(batch)
+        for tracked, lookup in zip(unknown, lookups):
+            try:
+                found = lookup.value
+            except exceptions.RpcBatchError:
+                found = None
+            if found:
+                tracked.tx = unsigned_tx(found)
+                tracked.sender = found['from']
+        if fee_history is not None:
+            self.fee_oracle.ingest(fee_history.value)
+
+        head = head.value
+        first_poll = self.head is None
+        for tracked in pending:
+            if tracked.sent_block is None:
+                tracked.sent_block = tracked.first_block = head
+        if first_poll or head - self.head > MAX_BLOCKS_PER_POLL:
+            # sent before tracking started or we fell behind: ask for the receipts
+            self._receipts(pending)
+        elif head > self.head:
+            self._scan_blocks(pending, self.head + 1, head)
+        self.head = head
+
+        # a used nonce without any of our hashes in a block: replaced by some other tx
+        maybe_replaced = [t for t in self.pending if t.sender in mined_nonces and t.nonce is not None
+                          and _safe(mined_nonces[t.sender]) is not None and t.nonce < _safe(mined_nonces[t.sender])]
+        if maybe_replaced:
+            self._receipts(maybe_replaced)
+            for tracked in maybe_replaced:
+                if tracked.status == PENDING:
+                    tracked.status = REPLACED
+                    tracked.included_at = time.time()
+
+        self._bump([t for t in self.pending if self.bump_after and head - t.sent_block >= self.bump_after])
+        return [t for t in pending if before[id(t)] != (t.status, t.tx_hash)]
+
+    def _scan_blocks(self, pending: list, start: int, end: int):
+        batch = RpcBatch(self.w3)
+        blocks = [batch.request('eth_getBlockByNumber', [hex(n), False]) for n in range(start, end + 1)]
+        self._execute(batch)
+        by_hash = {h.lower(): t for t in pending for h in t.hashes}
+        found = []
+        for block in blocks:
+            try:
+                hashes = block.value['transactions'] if block.value else []
+            except exceptions.RpcBatchError:
+                # a block we could not read: fall back to receipts for everything
+                self._receipts(pending)
+                return
+            found += [(by_hash[h.lower()], h) for h in hashes if h.lower() in by_hash]
+        if not found:
+            return
+        batch = RpcBatch(self.w3)
+        receipts = [(t, h, batch.request('eth_getTransactionReceipt', [h])) for t, h in found]
+        self._execute(batch)
+        for tracked, tx_hash, receipt in receipts:
+            try:
+                if receipt.value:
+                    self._included(tracked, tx_hash, receipt.value)
+            except exceptions.RpcBatchError:
+                continue
+
+    def bumped_fees(self, tx: dict) -> (dict, None):
+        """
+        :return: fee fields of the replacement, None if it would exceed max_fee
+        """
+        factor = 1 + BUMP_PERCENT / 100
+        if 'maxFeePerGas' in tx:
+            priority_fee = math.ceil(tx['maxPriorityFeePerGas'] * factor)
+            max_fee = math.ceil(tx['maxFeePerGas'] * factor)
+            if self.fee_oracle is not None and self.fee_oracle.cursor is not None:
+                suggestion = self.fee_oracle.suggest(self.priority, refresh=False)
+                priority_fee = max(priority_fee, suggestion.max_priority_fee)
+                max_fee = max(max_fee, suggestion.max_fee)
+            max_fee = max(max_fee, priority_fee)
+            fees = {'maxPriorityFeePerGas': priority_fee, 'maxFeePerGas': max_fee}
+        else:
+            max_fee = math.ceil(tx['gasPrice'] * factor)
+            fees = {'gasPrice': max_fee}
+        if self.max_fee is not None and max_fee > self.max_fee:
+            return None
+        return fees
+
+    def _bump(self, stuck: list):
+        if self.account is None:
+            return
+        replacements = []
+        for tracked in stuck:
+            if tracked.tx is None or tracked.bumps >= self.max_bumps or \
+                    (tracked.sender or '').lower() != self.account.address.lower():
+                continue
+            fees = self.bumped_fees(tracked.tx)
+            if fees is None:
+                tracked.error = 'replacement would exceed the max fee'
+                continue
+            tx = dict(tracked.tx, **fees)
+            replacements.append((tracked, tx, self.account.sign_transaction(tx)))
+        if not replacements:
+            return
+        batch = RpcBatch(self.w3)
+        results = [batch.request('eth_sendRawTransaction', [signed.rawTransaction.hex()])
+                   for _, _, signed in replacements]
+        self._execute(batch)
+        for (tracked, tx, signed), result in zip(replacements, results):
+            # wait another bump_after blocks either way, the node may just be slow to accept it
+            tracked.sent_block = self.head
+            try:
+                result.value
+            except exceptions.RpcBatchError as err:
+                tracked.error = str(err)
+                continue
+            tracked.tx = tx
+            tracked.hashes.append(signed.hash.hex())
+            tracked.bumps += 1
+            tracked.error = None
+            if self.nonce_manager is not None:
+                for scope, nonce in tracked.reservations:
+                    self.nonce_manager.mark_sent(scope, nonce, signed.hash.hex())
+
+    def track(self, timeout: float = 600, interval: float = 4.0, on_change=None) -> bool:
+        """
+        Poll until every tx is mined, reverted or replaced, or timeout.
+        :param on_change: called with each tx whose status or hash changed
+        :return: True if every tx was mined successfully
+        """
+        deadline = time.time() + timeout
+        while self.pending and time.time() < deadline:
+            for tracked in self.poll():
+                if on_change is not None:
+                    on_change(tracked)
+            if self.pending:
+                time.sleep(interval)
+        return all(t.status == MINED for t in self.txs)
+
+    def stats(self) -> dict:
+        """
+        Time to inclusion of the included txs (from the first broadcast, replacements included).
+        """
+        included = [t for t in self.txs if t.status in (MINED, REVERTED)]
+        seconds = [t.included_at - t.sent_at for t in included]
+        # txs already mined when tracking started count as 0 blocks
+        blocks = [max(t.block - t.first_block, 0) for t in included if t.first_block is not None]
+        counts = {}
+        for tracked in self.txs:
+            counts[tracked.status] = counts.get(tracked.status, 0) + 1
+        out = {'counts': counts, 'replacements': sum(t.bumps for t in self.txs), 'round_trips': self.round_trips}
+        if seconds:
+            out.update(seconds_p50=round(statistics.median(seconds), 1),
+                       seconds_p90=round(sorted(seconds)[min(int(len(seconds) * .9), len(seconds) - 1)], 1),
+                       seconds_max=round(max(seconds), 1))
+        if blocks:
+            out.update(blocks_p50=statistics.median(blocks), blocks_max=max(blocks))
+        return out
+
+
+def _safe(deferred):
+    try:
+        return deferred.value
+    except exceptions.RpcBatchError:
+        return None
@@ -1,5 +1,38 @@
 import json
 
-ethervault_1_abi = json.loads("""[		{			"inputs": [				{					"internalType": "address[]",					"name": "_signers",					"type": "address[]"				},				{					"internalType": "uint8",					"name": "_threshold",					"type": "uint8"				},				{					"internalType": "uint128",					"name": "_dailyLimit",					"type": "uint128"				}			],			"stateMutability": "nonpayable",			"type": "constructor"		},		{			"inputs": [				{					"internalType": "bytes2",					"name": "",					"type": "bytes2"				}			],			"name": "FailAndRevert",			"type": "error"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "_proposalId",					"type": "uint16"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "approveProposal",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "approveTx",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "dailyLimit",			"outputs": [				{					"internalType": "uint128",					"name": "",					"type": "uint128"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "_proposalId",					"type": "uint16"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "deleteProposal",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "deleteTx",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "execNonce",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "_signer",					"type": "address"				},				{					"internalType": "uint128",					"name": "_limit",					"type": "uint128"				},				{					"internalType": "uint8",					"name": "_threshold",					"type": "uint8"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "newProposal",			"outputs": [				{					"internalType": "uint16",					"name": "",					"type": "uint16"				}			],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "",					"type": "uint16"				}			],			"name": "pendingProposals",			"outputs": [				{					"internalType": "address",					"name": "proposer",					"type": "address"				},				{					"internalType": "address",					"name": "modifiedSigner",					"type": "address"				},				{					"internalType": "uint8",					"name": "newThreshold",					"type": "uint8"				},				{					"internalType": "uint8",					"name": "numSigners",					"type": "uint8"				},				{					"internalType": "uint32",					"name": "initiated",					"type": "uint32"				},				{					"internalType": "uint128",					"name": "newLimit",					"type": "uint128"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"name": "pendingTxs",			"outputs": [				{					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint8",					"name": "numSigners",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "proposalId",			"outputs": [				{					"internalType": "uint16",					"name": "",					"type": "uint16"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "signerCount",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "spentToday",			"outputs": [				{					"internalType": "uint128",					"name": "",					"type": "uint128"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "recipient",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "submitTx",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "payable",			"type": "function"		},		{			"inputs": [],			"name": "threshold",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "txCount",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "version",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"stateMutability": "payable",			"type": "receive"		}	]""")
-ethervault_2_abi = json.loads("""[		{			"inputs": [				{					"internalType": "address[]",					"name": "_signers",					"type": "address[]"				},				{					"internalType": "uint8",					"name": "_threshold",					"type": "uint8"				},				{					"internalType": "uint128",					"name": "_dailyDollarLimit",					"type": "uint128"				},				{					"internalType": "address",					"name": "ethPriceAggregator",					"type": "address"				}			],			"stateMutability": "nonpayable",			"type": "constructor"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "_proposalId",					"type": "uint16"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "approveProposal",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "approveTx",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "dailyLimit",			"outputs": [				{					"internalType": "uint128",					"name": "",					"type": "uint128"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "_proposalId",					"type": "uint16"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "deleteProposal",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "deleteTx",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"internalType": "uint256",					"name": "amount",					"type": "uint256"				}			],			"name": "encodeTransfer",			"outputs": [				{					"internalType": "bytes",					"name": "",					"type": "bytes"				}			],			"stateMutability": "pure",			"type": "function"		},		{			"inputs": [],			"name": "execNonce",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "tokenAddress",					"type": "address"				},				{					"internalType": "uint256",					"name": "amount",					"type": "uint256"				}			],			"name": "getDollarValue",			"outputs": [				{					"internalType": "uint256",					"name": "",					"type": "uint256"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "_signer",					"type": "address"				},				{					"internalType": "uint128",					"name": "_limit",					"type": "uint128"				},				{					"internalType": "uint8",					"name": "_threshold",					"type": "uint8"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "newProposal",			"outputs": [				{					"internalType": "uint16",					"name": "",					"type": "uint16"				}			],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "paused",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "",					"type": "uint16"				}			],			"name": "pendingProposals",			"outputs": [				{					"internalType": "address",					"name": "proposer",					"type": "address"				},				{					"internalType": "address",					"name": "modifiedSigner",					"type": "address"				},				{					"internalType": "uint8",					"name": "paused",					"type": "uint8"				},				{					"internalType": "uint8",					"name": "newThreshold",					"type": "uint8"				},				{					"internalType": "uint8",					"name": "numSigners",					"type": "uint8"				},				{					"internalType": "uint32",					"name": "initiated",					"type": "uint32"				},				{					"internalType": "uint128",					"name": "newLimit",					"type": "uint128"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"name": "pendingTxs",			"outputs": [				{					"internalType": "address",					"name": "proposer",					"type": "address"				},				{					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint8",					"name": "numSigners",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "proposalId",			"outputs": [				{					"internalType": "uint16",					"name": "",					"type": "uint16"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "signerCount",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "spentToday",			"outputs": [				{					"internalType": "uint128",					"name": "",					"type": "uint128"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "recipient",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "submitRawTx",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "threshold",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "tokenAddress",					"type": "address"				},				{					"internalType": "address",					"name": "feedAddress",					"type": "address"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "trackToken",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "",					"type": "address"				}			],			"name": "trackedTokens",			"outputs": [				{					"internalType": "address",					"name": "",					"type": "address"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "txCount",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "version",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "tokenAddress",					"type": "address"				},				{					"internalType": "address",					"name": "destination",					"type": "address"				},				{					"internalType": "uint128",					"name": "amount",					"type": "uint128"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "withdraw",			"outputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				}			],			"stateMutability": "nonpayable",			"type": "function"		},		{			"stateMutability": "payable",			"type": "receive"		}	]""")
-EIP20_ABI = json.loads('[{"constant":true,"inputs":[],"name":"name","outputs":[{"name":"","type":"string"}],"payable":false,"stateMutability":"view","type":"function"},{"constant":false,"inputs":[{"name":"_spender","type":"address"},{"name":"_value","type":"uint256"}],"name":"approve","outputs":[{"name":"","type":"bool"}],"payable":false,"stateMutability":"nonpayable","type":"function"},{"constant":true,"inputs":[],"name":"totalSupply","outputs":[{"name":"","type":"uint256"}],"payable":false,"stateMutability":"view","type":"function"},{"constant":false,"inputs":[{"name":"_from","type":"address"},{"name":"_to","type":"address"},{"name":"_value","type":"uint256"}],"name":"transferFrom","outputs":[{"name":"","type":"bool"}],"payable":false,"stateMutability":"nonpayable","type":"function"},{"constant":true,"inputs":[],"name":"decimals","outputs":[{"name":"","type":"uint8"}],"payable":false,"stateMutability":"view","type":"function"},{"constant":true,"inputs":[{"name":"_owner","type":"address"}],"name":"balanceOf","outputs":[{"name":"","type":"uint256"}],"payable":false,"stateMutability":"view","type":"function"},{"constant":true,"inputs":[],"name":"symbol","outputs":[{"name":"","type":"string"}],"payable":false,"stateMutability":"view","type":"function"},{"constant":false,"inputs":[{"name":"_to","type":"address"},{"name":"_value","type":"uint256"}],"name":"transfer","outputs":[{"name":"","type":"bool"}],"payable":false,"stateMutability":"nonpayable","type":"function"},{"constant":true,"inputs":[{"name":"_owner","type":"address"},{"name":"_spender","type":"address"}],"name":"allowance","outputs":[{"name":"","type":"uint256"}],"payable":false,"stateMutability":"view","type":"function"},{"anonymous":false,"inputs":[{"indexed":true,"name":"_from","type":"address"},{"indexed":true,"name":"_to","type":"address"},{"indexed":false,"name":"_value","type":"uint256"}],"name":"Transfer","type":"event"},{"anonymous":false,"inputs":[{"indexed":true,"name":"_owner","type":"address"},{"indexed":true,"name":"_spender","type":"address"},{"indexed":false,"name":"_value","type":"uint256"}],"name":"Approval","type":"event"}]')
\ No newline at end of file
+_ethervault_1_abi = """[		{			"inputs": [				{					"internalType": "address[]",					"name": "_signers",					"type": "address[]"				},				{					"internalType": "uint8",					"name": "_threshold",					"type": "uint8"				},				{					"internalType": "uint128",					"name": "_dailyLimit",					"type": "uint128"				}			],			"stateMutability": "nonpayable",			"type": "constructor"		},		{			"inputs": [				{					"internalType": "address",					"name": "",					"type": "address"				}			],			"name": "AlreadyApproved",			"type": "error"		},		{			"inputs": [				{					"internalType": "address",					"name": "",					"type": "address"				}			],			"name": "AlreadySigned",			"type": "error"		},		{			"inputs": [],			"name": "AuthenticationError",			"type": "error"		},		{			"inputs": [],			"name": "CalldataRequired",			"type": "error"		},		{			"inputs": [],			"name": "DataMismatch",			"type": "error"		},		{			"inputs": [				{					"internalType": "address",					"name": "",					"type": "address"				}			],			"name": "DuplicateSigner",			"type": "error"		},		{			"inputs": [],			"name": "ExecutionPaused",			"type": "error"		},		{			"inputs": [],			"name": "InsufficientBalance",			"type": "error"		},		{			"inputs": [],			"name": "InvalidSignature",			"type": "error"		},		{			"inputs": [],			"name": "NonceError",			"type": "error"		},		{			"inputs": [],			"name": "NotEnoughSignatures",			"type": "error"		},		{			"inputs": [],			"name": "RefuseInvalidTransaction",			"type": "error"		},		{			"inputs": [],			"name": "TooManySigners",			"type": "error"		},		{			"inputs": [],			"name": "TransactionNotFound",			"type": "error"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"indexed": true,					"internalType": "address",					"name": "signer",					"type": "address"				}			],			"name": "Approval",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint32",					"name": "txid",					"type": "uint32"				}			],			"name": "Deletion",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "address",					"name": "sender",					"type": "address"				},				{					"indexed": false,					"internalType": "uint256",					"name": "value",					"type": "uint256"				}			],			"name": "Deposit",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"indexed": false,					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"indexed": false,					"internalType": "uint128",					"name": "value",					"type": "uint128"				}			],			"name": "Execution",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint16",					"name": "proposalId",					"type": "uint16"				},				{					"indexed": true,					"internalType": "address",					"name": "signer",					"type": "address"				}			],			"name": "ProposalApproval",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint16",					"name": "proposalId",					"type": "uint16"				}			],			"name": "ProposalDeletion",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint16",					"name": "proposalId",					"type": "uint16"				}			],			"name": "ProposalExecution",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint16",					"name": "proposalId",					"type": "uint16"				},				{					"indexed": true,					"internalType": "address",					"name": "proposer",					"type": "address"				},				{					"indexed": false,					"internalType": "address",					"name": "modifiedSigner",					"type": "address"				},				{					"indexed": false,					"internalType": "uint128",					"name": "newLimit",					"type": "uint128"				},				{					"indexed": false,					"internalType": "uint8",					"name": "newThreshold",					"type": "uint8"				},				{					"indexed": false,					"internalType": "bool",					"name": "paused",					"type": "bool"				}			],			"name": "ProposalSubmission",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint32",					"name": "nonce",					"type": "uint32"				},				{					"indexed": false,					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"indexed": false,					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"indexed": false,					"internalType": "uint8",					"name": "approvals",					"type": "uint8"				}			],			"name": "SignedExecution",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"indexed": false,					"internalType": "uint8",					"name": "reason",					"type": "uint8"				}			],			"name": "Skipped",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"indexed": true,					"internalType": "address",					"name": "proposer",					"type": "address"				},				{					"indexed": false,					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"indexed": false,					"internalType": "uint128",					"name": "value",					"type": "uint128"				}			],			"name": "Submission",			"type": "event"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "_proposalId",					"type": "uint16"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "approveProposal",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "approveTx",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "approveTxWithData",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32[]",					"name": "txids",					"type": "uint32[]"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "approveTxs",			"outputs": [				{					"internalType": "uint8[]",					"name": "results",					"type": "uint8[]"				}			],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "dailyLimit",			"outputs": [				{					"internalType": "uint128",					"name": "",					"type": "uint128"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "_proposalId",					"type": "uint16"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "deleteProposal",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "deleteTx",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "domainSeparator",			"outputs": [				{					"internalType": "bytes32",					"name": "",					"type": "bytes32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "execNonce",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "executeDigest",			"outputs": [				{					"internalType": "bytes32",					"name": "",					"type": "bytes32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				},				{					"internalType": "bytes",					"name": "signatures",					"type": "bytes"				}			],			"name": "executeWithSignatures",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "_signer",					"type": "address"				},				{					"internalType": "uint128",					"name": "_limit",					"type": "uint128"				},				{					"internalType": "uint8",					"name": "_threshold",					"type": "uint8"				},				{					"internalType": "bool",					"name": "_paused",					"type": "bool"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "newProposal",			"outputs": [				{					"internalType": "uint16",					"name": "",					"type": "uint16"				}			],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "paused",			"outputs": [				{					"internalType": "bool",					"name": "",					"type": "bool"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "_proposalId",					"type": "uint16"				}			],			"name": "pendingProposals",			"outputs": [				{					"internalType": "address",					"name": "proposer",					"type": "address"				},				{					"internalType": "address",					"name": "modifiedSigner",					"type": "address"				},				{					"internalType": "uint8",					"name": "newThreshold",					"type": "uint8"				},				{					"internalType": "uint8",					"name": "numSigners",					"type": "uint8"				},				{					"internalType": "uint32",					"name": "initiated",					"type": "uint32"				},				{					"internalType": "uint128",					"name": "newLimit",					"type": "uint128"				},				{					"internalType": "bool",					"name": "paused",					"type": "bool"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				}			],			"name": "pendingTxs",			"outputs": [				{					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint8",					"name": "numSigners",					"type": "uint8"				},				{					"internalType": "bool",					"name": "hashed",					"type": "bool"				},				{					"internalType": "bytes32",					"name": "dataHash",					"type": "bytes32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "proposalId",			"outputs": [				{					"internalType": "uint16",					"name": "",					"type": "uint16"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "signerCount",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "spentToday",			"outputs": [				{					"internalType": "uint128",					"name": "",					"type": "uint128"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "recipient",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "submitTx",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "payable",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "recipient",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes32",					"name": "dataHash",					"type": "bytes32"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "submitTxHash",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "threshold",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "txCount",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "version",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"stateMutability": "payable",			"type": "receive"		}	]"""
+_ethervault_2_abi = """[		{			"inputs": [				{					"internalType": "address[]",					"name": "_signers",					"type": "address[]"				},				{					"internalType": "uint8",					"name": "_threshold",					"type": "uint8"				},				{					"internalType": "uint128",					"name": "_dailyDollarLimit",					"type": "uint128"				},				{					"internalType": "address",					"name": "ethPriceAggregator",					"type": "address"				}			],			"stateMutability": "nonpayable",			"type": "constructor"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"indexed": true,					"internalType": "address",					"name": "signer",					"type": "address"				}			],			"name": "Approval",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint32",					"name": "txid",					"type": "uint32"				}			],			"name": "Deletion",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "address",					"name": "sender",					"type": "address"				},				{					"indexed": false,					"internalType": "uint256",					"name": "value",					"type": "uint256"				}			],			"name": "Deposit",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"indexed": false,					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"indexed": false,					"internalType": "uint128",					"name": "value",					"type": "uint128"				}			],			"name": "Execution",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint16",					"name": "proposalId",					"type": "uint16"				},				{					"indexed": true,					"internalType": "address",					"name": "signer",					"type": "address"				}			],			"name": "ProposalApproval",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint16",					"name": "proposalId",					"type": "uint16"				}			],			"name": "ProposalDeletion",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint16",					"name": "proposalId",					"type": "uint16"				}			],			"name": "ProposalExecution",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint16",					"name": "proposalId",					"type": "uint16"				},				{					"indexed": true,					"internalType": "address",					"name": "proposer",					"type": "address"				},				{					"indexed": false,					"internalType": "address",					"name": "modifiedSigner",					"type": "address"				},				{					"indexed": false,					"internalType": "uint128",					"name": "newLimit",					"type": "uint128"				},				{					"indexed": false,					"internalType": "uint8",					"name": "newThreshold",					"type": "uint8"				},				{					"indexed": false,					"internalType": "bool",					"name": "paused",					"type": "bool"				}			],			"name": "ProposalSubmission",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint32",					"name": "nonce",					"type": "uint32"				},				{					"indexed": false,					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"indexed": false,					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"indexed": false,					"internalType": "uint8",					"name": "approvals",					"type": "uint8"				}			],			"name": "SignedExecution",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"indexed": false,					"internalType": "uint8",					"name": "reason",					"type": "uint8"				}			],			"name": "Skipped",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"indexed": true,					"internalType": "address",					"name": "proposer",					"type": "address"				},				{					"indexed": false,					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"indexed": false,					"internalType": "uint128",					"name": "value",					"type": "uint128"				}			],			"name": "Submission",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "address",					"name": "token",					"type": "address"				},				{					"indexed": true,					"internalType": "address",					"name": "feed",					"type": "address"				}			],			"name": "TokenTracked",			"type": "event"		},		{			"anonymous": false,			"inputs": [				{					"indexed": true,					"internalType": "address",					"name": "token",					"type": "address"				},				{					"indexed": true,					"internalType": "address",					"name": "destination",					"type": "address"				},				{					"indexed": false,					"internalType": "uint128",					"name": "amount",					"type": "uint128"				},				{					"indexed": false,					"internalType": "uint128",					"name": "dollarValue",					"type": "uint128"				}			],			"name": "Withdrawal",			"type": "event"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "_proposalId",					"type": "uint16"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "approveProposal",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "approveTx",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "approveTxWithData",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32[]",					"name": "txids",					"type": "uint32[]"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "approveTxs",			"outputs": [				{					"internalType": "uint8[]",					"name": "results",					"type": "uint8[]"				}			],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "dailyLimit",			"outputs": [				{					"internalType": "uint128",					"name": "",					"type": "uint128"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "_proposalId",					"type": "uint16"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "deleteProposal",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "deleteTx",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "domainSeparator",			"outputs": [				{					"internalType": "bytes32",					"name": "",					"type": "bytes32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"internalType": "uint256",					"name": "amount",					"type": "uint256"				}			],			"name": "encodeTransfer",			"outputs": [				{					"internalType": "bytes",					"name": "",					"type": "bytes"				}			],			"stateMutability": "pure",			"type": "function"		},		{			"inputs": [],			"name": "execNonce",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "executeDigest",			"outputs": [				{					"internalType": "bytes32",					"name": "",					"type": "bytes32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				},				{					"internalType": "bytes",					"name": "signatures",					"type": "bytes"				}			],			"name": "executeWithSignatures",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "tokenAddress",					"type": "address"				},				{					"internalType": "uint256",					"name": "amount",					"type": "uint256"				}			],			"name": "getDollarValue",			"outputs": [				{					"internalType": "uint256",					"name": "",					"type": "uint256"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "_signer",					"type": "address"				},				{					"internalType": "uint128",					"name": "_limit",					"type": "uint128"				},				{					"internalType": "uint8",					"name": "_threshold",					"type": "uint8"				},				{					"internalType": "bool",					"name": "_paused",					"type": "bool"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "newProposal",			"outputs": [				{					"internalType": "uint16",					"name": "",					"type": "uint16"				}			],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "paused",			"outputs": [				{					"internalType": "bool",					"name": "",					"type": "bool"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "_proposalId",					"type": "uint16"				}			],			"name": "pendingProposals",			"outputs": [				{					"internalType": "address",					"name": "proposer",					"type": "address"				},				{					"internalType": "address",					"name": "modifiedSigner",					"type": "address"				},				{					"internalType": "bool",					"name": "paused",					"type": "bool"				},				{					"internalType": "uint8",					"name": "newThreshold",					"type": "uint8"				},				{					"internalType": "uint8",					"name": "numSigners",					"type": "uint8"				},				{					"internalType": "uint32",					"name": "initiated",					"type": "uint32"				},				{					"internalType": "uint128",					"name": "newLimit",					"type": "uint128"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				}			],			"name": "pendingTxs",			"outputs": [				{					"internalType": "address",					"name": "proposer",					"type": "address"				},				{					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint8",					"name": "numSigners",					"type": "uint8"				},				{					"internalType": "bool",					"name": "hashed",					"type": "bool"				},				{					"internalType": "bytes32",					"name": "dataHash",					"type": "bytes32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "proposalId",			"outputs": [				{					"internalType": "uint16",					"name": "",					"type": "uint16"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "signerCount",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "spentToday",			"outputs": [				{					"internalType": "uint128",					"name": "",					"type": "uint128"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "recipient",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "submitRawTx",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "recipient",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes32",					"name": "dataHash",					"type": "bytes32"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "submitTxHash",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "threshold",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "",					"type": "address"				}			],			"name": "tokenInfo",			"outputs": [				{					"internalType": "address",					"name": "feed",					"type": "address"				},				{					"internalType": "uint8",					"name": "decimals",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "tokenAddress",					"type": "address"				},				{					"internalType": "address",					"name": "feedAddress",					"type": "address"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "trackToken",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "tokenAddress",					"type": "address"				}			],			"name": "trackedTokens",			"outputs": [				{					"internalType": "address",					"name": "",					"type": "address"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "txCount",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "version",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "tokenAddress",					"type": "address"				},				{					"internalType": "address",					"name": "destination",					"type": "address"				},				{					"internalType": "uint128",					"name": "amount",					"type": "uint128"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "withdraw",			"outputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				}			],			"stateMutability": "nonpayable",			"type": "function"		},		{			"stateMutability": "payable",			"type": "receive"		}	]"""
+_ethervault_1_legacy_abi = """[		{			"inputs": [				{					"internalType": "address[]",					"name": "_signers",					"type": "address[]"				},				{					"internalType": "uint8",					"name": "_threshold",					"type": "uint8"				},				{					"internalType": "uint128",					"name": "_dailyLimit",					"type": "uint128"				}			],			"stateMutability": "nonpayable",			"type": "constructor"		},		{			"inputs": [				{					"internalType": "address",					"name": "",					"type": "address"				}			],			"name": "AlreadyApproved",			"type": "error"		},		{			"inputs": [				{					"internalType": "address",					"name": "",					"type": "address"				}			],			"name": "AlreadySigned",			"type": "error"		},		{			"inputs": [],			"name": "AuthenticationError",			"type": "error"		},		{			"inputs": [],			"name": "ExecutionPaused",			"type": "error"		},		{			"inputs": [],			"name": "InsufficientBalance",			"type": "error"		},		{			"inputs": [],			"name": "NonceError",			"type": "error"		},		{			"inputs": [],			"name": "RefuseInvalidTransaction",			"type": "error"		},		{			"inputs": [],			"name": "TransactionNotFound",			"type": "error"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "_proposalId",					"type": "uint16"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "approveProposal",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "approveTx",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "dailyLimit",			"outputs": [				{					"internalType": "uint128",					"name": "",					"type": "uint128"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "_proposalId",					"type": "uint16"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "deleteProposal",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "deleteTx",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "execNonce",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "_signer",					"type": "address"				},				{					"internalType": "uint128",					"name": "_limit",					"type": "uint128"				},				{					"internalType": "uint8",					"name": "_threshold",					"type": "uint8"				},				{					"internalType": "bool",					"name": "_paused",					"type": "bool"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "newProposal",			"outputs": [				{					"internalType": "uint16",					"name": "",					"type": "uint16"				}			],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "paused",			"outputs": [				{					"internalType": "bool",					"name": "",					"type": "bool"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "",					"type": "uint16"				}			],			"name": "pendingProposals",			"outputs": [				{					"internalType": "address",					"name": "proposer",					"type": "address"				},				{					"internalType": "address",					"name": "modifiedSigner",					"type": "address"				},				{					"internalType": "uint8",					"name": "newThreshold",					"type": "uint8"				},				{					"internalType": "uint8",					"name": "numSigners",					"type": "uint8"				},				{					"internalType": "uint32",					"name": "initiated",					"type": "uint32"				},				{					"internalType": "uint128",					"name": "newLimit",					"type": "uint128"				},				{					"internalType": "bool",					"name": "paused",					"type": "bool"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"name": "pendingTxs",			"outputs": [				{					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint8",					"name": "numSigners",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "proposalId",			"outputs": [				{					"internalType": "uint16",					"name": "",					"type": "uint16"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "signerCount",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "spentToday",			"outputs": [				{					"internalType": "uint128",					"name": "",					"type": "uint128"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "recipient",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "submitTx",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "payable",			"type": "function"		},		{			"inputs": [],			"name": "threshold",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "txCount",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "version",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"stateMutability": "payable",			"type": "receive"		}	]"""
+_ethervault_2_legacy_abi = """[		{			"inputs": [				{					"internalType": "address[]",					"name": "_signers",					"type": "address[]"				},				{					"internalType": "uint8",					"name": "_threshold",					"type": "uint8"				},				{					"internalType": "uint128",					"name": "_dailyDollarLimit",					"type": "uint128"				},				{					"internalType": "address",					"name": "ethPriceAggregator",					"type": "address"				}			],			"stateMutability": "nonpayable",			"type": "constructor"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "_proposalId",					"type": "uint16"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "approveProposal",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "approveTx",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "dailyLimit",			"outputs": [				{					"internalType": "uint128",					"name": "",					"type": "uint128"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "_proposalId",					"type": "uint16"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "deleteProposal",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "deleteTx",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"internalType": "uint256",					"name": "amount",					"type": "uint256"				}			],			"name": "encodeTransfer",			"outputs": [				{					"internalType": "bytes",					"name": "",					"type": "bytes"				}			],			"stateMutability": "pure",			"type": "function"		},		{			"inputs": [],			"name": "execNonce",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "tokenAddress",					"type": "address"				},				{					"internalType": "uint256",					"name": "amount",					"type": "uint256"				}			],			"name": "getDollarValue",			"outputs": [				{					"internalType": "uint256",					"name": "",					"type": "uint256"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "_signer",					"type": "address"				},				{					"internalType": "uint128",					"name": "_limit",					"type": "uint128"				},				{					"internalType": "uint8",					"name": "_threshold",					"type": "uint8"				},				{					"internalType": "bool",					"name": "_paused",					"type": "bool"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "newProposal",			"outputs": [				{					"internalType": "uint16",					"name": "",					"type": "uint16"				}			],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "paused",			"outputs": [				{					"internalType": "bool",					"name": "",					"type": "bool"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint16",					"name": "",					"type": "uint16"				}			],			"name": "pendingProposals",			"outputs": [				{					"internalType": "address",					"name": "proposer",					"type": "address"				},				{					"internalType": "address",					"name": "modifiedSigner",					"type": "address"				},				{					"internalType": "bool",					"name": "paused",					"type": "bool"				},				{					"internalType": "uint8",					"name": "newThreshold",					"type": "uint8"				},				{					"internalType": "uint8",					"name": "numSigners",					"type": "uint8"				},				{					"internalType": "uint32",					"name": "initiated",					"type": "uint32"				},				{					"internalType": "uint128",					"name": "newLimit",					"type": "uint128"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"name": "pendingTxs",			"outputs": [				{					"internalType": "address",					"name": "proposer",					"type": "address"				},				{					"internalType": "address",					"name": "dest",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint8",					"name": "numSigners",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "proposalId",			"outputs": [				{					"internalType": "uint16",					"name": "",					"type": "uint16"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "signerCount",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "spentToday",			"outputs": [				{					"internalType": "uint128",					"name": "",					"type": "uint128"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "recipient",					"type": "address"				},				{					"internalType": "uint128",					"name": "value",					"type": "uint128"				},				{					"internalType": "bytes",					"name": "data",					"type": "bytes"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "submitRawTx",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [],			"name": "threshold",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "tokenAddress",					"type": "address"				},				{					"internalType": "address",					"name": "feedAddress",					"type": "address"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "trackToken",			"outputs": [],			"stateMutability": "nonpayable",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "",					"type": "address"				}			],			"name": "trackedTokens",			"outputs": [				{					"internalType": "address",					"name": "",					"type": "address"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "txCount",			"outputs": [				{					"internalType": "uint32",					"name": "",					"type": "uint32"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [],			"name": "version",			"outputs": [				{					"internalType": "uint8",					"name": "",					"type": "uint8"				}			],			"stateMutability": "view",			"type": "function"		},		{			"inputs": [				{					"internalType": "address",					"name": "tokenAddress",					"type": "address"				},				{					"internalType": "address",					"name": "destination",					"type": "address"				},				{					"internalType": "uint128",					"name": "amount",					"type": "uint128"				},				{					"internalType": "uint32",					"name": "_nonce",					"type": "uint32"				}			],			"name": "withdraw",			"outputs": [				{					"internalType": "uint32",					"name": "txid",					"type": "uint32"				}			],			"stateMutability": "nonpayable",			"type": "function"		},		{			"stateMutability": "payable",			"type": "receive"		}	]"""
+_EIP20_ABI = '[{"constant":true,"inputs":[],"name":"name","outputs":[{"name":"","type":"string"}],"payable":false,"stateMutability":"view","type":"function"},{"constant":false,"inputs":[{"name":"_spender","type":"address"},{"name":"_value","type":"uint256"}],"name":"approve","outputs":[{"name":"","type":"bool"}],"payable":false,"stateMutability":"nonpayable","type":"function"},{"constant":true,"inputs":[],"name":"totalSupply","outputs":[{"name":"","type":"uint256"}],"payable":false,"stateMutability":"view","type":"function"},{"constant":false,"inputs":[{"name":"_from","type":"address"},{"name":"_to","type":"address"},{"name":"_value","type":"uint256"}],"name":"transferFrom","outputs":[{"name":"","type":"bool"}],"payable":false,"stateMutability":"nonpayable","type":"function"},{"constant":true,"inputs":[],"name":"decimals","outputs":[{"name":"","type":"uint8"}],"payable":false,"stateMutability":"view","type":"function"},{"constant":true,"inputs":[{"name":"_owner","type":"address"}],"name":"balanceOf","outputs":[{"name":"","type":"uint256"}],"payable":false,"stateMutability":"view","type":"function"},{"constant":true,"inputs":[],"name":"symbol","outputs":[{"name":"","type":"string"}],"payable":false,"stateMutability":"view","type":"function"},{"constant":false,"inputs":[{"name":"_to","type":"address"},{"name":"_value","type":"uint256"}],"name":"transfer","outputs":[{"name":"","type":"bool"}],"payable":false,"stateMutability":"nonpayable","type":"function"},{"constant":true,"inputs":[{"name":"_owner","type":"address"},{"name":"_spender","type":"address"}],"name":"allowance","outputs":[{"name":"","type":"uint256"}],"payable":false,"stateMutability":"view","type":"function"},{"anonymous":false,"inputs":[{"indexed":true,"name":"_from","type":"address"},{"indexed":true,"name":"_to","type":"address"},{"indexed":false,"name":"_value","type":"uint256"}],"name":"Transfer","type":"event"},{"anonymous":false,"inputs":[{"indexed":true,"name":"_owner","type":"address"},{"indexed":true,"name":"_spender","type":"address"},{"indexed":false,"name":"_value","type":"uint256"}],"name":"Approval","type":"event"}]'
+_multicall3_abi = '[{"inputs":[{"components":[{"internalType":"address","name":"target","type":"address"},{"internalType":"bool","name":"allowFailure","type":"bool"},{"internalType":"bytes","name":"callData","type":"bytes"}],"internalType":"struct Multicall3.Call3[]","name":"calls","type":"tuple[]"}],"name":"aggregate3","outputs":[{"components":[{"internalType":"bool","name":"success","type":"bool"},{"internalType":"bytes","name":"returnData","type":"bytes"}],"internalType":"struct Multicall3.Result[]","name":"returnData","type":"tuple[]"}],"stateMutability":"payable","type":"function"},{"inputs":[],"name":"getBlockNumber","outputs":[{"internalType":"uint256","name":"blockNumber","type":"uint256"}],"stateMutability":"view","type":"function"},{"inputs":[{"internalType":"address","name":"addr","type":"address"}],"name":"getEthBalance","outputs":[{"internalType":"uint256","name":"balance","type":"uint256"}],"stateMutability":"view","type":"function"}]'
+_aggregator_v3_abi = '[{"inputs":[],"name":"decimals","outputs":[{"internalType":"uint8","name":"","type":"uint8"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"description","outputs":[{"internalType":"string","name":"","type":"string"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"latestRoundData","outputs":[{"internalType":"uint80","name":"roundId","type":"uint80"},{"internalType":"int256","name":"answer","type":"int256"},{"internalType":"uint256","name":"startedAt","type":"uint256"},{"internalType":"uint256","name":"updatedAt","type":"uint256"},{"internalType":"uint80","name":"answeredInRound","type":"uint80"}],"stateMutability":"view","type":"function"}]'
+
+
+""" ABIs are kept as json text and parsed on first access (see __getattr__) """
+_SOURCES = ('ethervault_1_abi', 'ethervault_2_abi', 'ethervault_1_legacy_abi', 'ethervault_2_legacy_abi',
+            'EIP20_ABI', 'multicall3_abi', 'aggregator_v3_abi')
+
+
+def _load(name: str) -> list:
+    if name not in globals():
+        globals()[name] = json.loads(globals()[f'_{name}'])
+    return globals()[name]
+
+
+def __getattr__(name: str) -> list:
+    """
+    PEP 562: `vault_abi.ethervault_2_abi` parses that one ABI on first access,
+    later accesses find the parsed list as a plain module attribute.
+    """
+    if name in _SOURCES:
+        return _load(name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def abi_for_version(version: int, legacy: bool = False) -> list:
+    """
+    :param legacy: vault deployed before signer positions (see VaultState.legacy), its pendingTxs and
+                   pendingProposals return the older, shorter structs and it has no batch approvals
+    """
+    return _load(f'ethervault_{1 if version == 1 else 2}{"_legacy" if legacy else ""}_abi')
@@ -0,0 +1,890 @@
+"""
+VaultCli: the wallet, provider and contract session behind every vault.py command.
+
+Kept out of vault.py so that the CLI can parse arguments, print help and talk
+to a running daemon without importing web3 or secure_web3.
+"""
+import atexit
+import json
+import os.path
+import sys
+import time
+from typing import TYPE_CHECKING
+
+import dotenv
+from eth_typing import ChecksumAddress
+from eth_utils import to_checksum_address, to_wei
+from secure_web3 import sw3_wallet, sw3
+from web3.contract import Contract
+
+from vault_lib import exceptions
+from vault_lib import preflight
+from vault_lib import vault_abi
+from vault_lib.calldata_store import CalldataStore
+from vault_lib.chain_cache import ChainCache, TTL
+from vault_lib.multicall import Multicall
+from vault_lib.fee_oracle import BLOCK_TIMES, get_fee_oracle
+from vault_lib.nonce_manager import NonceManager
+from vault_lib.rpc_batch import RpcBatch, hex_to_int, resolve
+from vault_lib.rpc_pool import RpcPool, load_endpoints
+from vault_lib.rpc_profiler import RpcProfiler, install as install_profiler
+from vault_lib.vault_state import VaultState, SIGNER_MAPPING_SLOT, mapping_slot
+from vault_lib.tx_builder import TxPipeline, CONTRACT_NONCE
+from vault_lib.tx_tracker import TxTracker, MINED, PENDING
+
+if TYPE_CHECKING:
+    from vault_lib.pending_index import PendingIndex
+    from vault_lib.portfolio import Portfolio
+
+
+class VaultCli:
+    def __init__(self, wallet_file: str, network: str = 'ethereum', contract_address: str = None, init: bool = False,
+                 require_unlock: bool = True, profiler: RpcProfiler = None):
+        """
+        Command Line Ethervault controller tool
+        (note: see docs)
+
+        Tool for deploying, depositing, administering the contract.
+        :param wallet_file: json wallet file
+        :param network: ie "ethereum"
+        :param init: import private key and setup wallet
+        :param profiler: rpc profiler to install, a disabled one by default
+        """
+        dotenv.load_dotenv('.env')
+        self.contract_address = contract_address
+        self.wallet_file = wallet_file
+        self.network = network
+        self.contract_nonce = 0
+        self._state = None
+        self._pipeline = None
+        self._nonce_manager = None
+        self.sent = []
+        self.profiler = profiler or RpcProfiler()
+        self.cache = ChainCache(network)
+        atexit.register(self.cache.save)
+        self.sw3 = sw3.SecureWeb3(wallet_file, network, )
+
+        if require_unlock:
+            if not init:
+                self.sw3.load_wallet(self.wallet_file)
+            else:
+                if not self.check_wallet(init):
+                    return
+
+        self.contract_address = contract_address
+        self.sw3.setup_w3()
+        self.setup_rpc_pool()
+        install_profiler(self.w3, self.profiler)
+        self.sw3_wallet = sw3_wallet.EtherShellWallet(self.sw3)
+
+    def setup_rpc_pool(self):
+        """
+        Pool the wallet's endpoint with the extra ones configured for this network.
+        """
+        urls = load_endpoints(self.network)
+        if not urls:
+            return
+        own = getattr(self.w3.provider, 'endpoint_uri', None)
+        if own and str(own).startswith('http'):
+            urls = [str(own)] + urls
+        pool = RpcPool(list(dict.fromkeys(urls)))
+        hit, scores = self.cache.get(None, 'rpc_scores')
+        if hit:
+            pool.load_scores(scores)
+        self.w3.provider = pool
+        # registered after cache.save, so it runs first
+        atexit.register(lambda: self.cache.put(None, 'rpc_scores', pool.scores(), TTL['rpc_scores']))
+
+    def check_wallet(self, init: (bool, str, ChecksumAddress) = False) -> bool:
+        """
+
+        :param init: if specified, store in wallet this contract address
+        :return: bool
+        """
+        if init:
+            return self.configure_wallet()
+        if not os.path.exists(self.wallet_file):
+            print(f'[!] Wallet does not exist: {self.wallet_file}')
+            return False
+        return True
+
+    def configure_wallet(self) -> bool:
+        """
+
+        :return:
+        """
+        print('[+] Configuring .. ')
+        custom_params = []
+        if self.sw3.configure_wallet(custom_params):
+            return True
+        return False
+
+    def check_w3_chain_id(self) -> int:
+        """
+        Return the chain ID
+        :return: int
+        """
+        if self.sw3.w3.isConnected():
+            cid = self.cache.fetch(None, 'chain_id', lambda: self.sw3.w3.eth.chain_id, TTL['chain_id'])
+            return cid
+        return False
+
+    @property
+    def code_hash(self) -> str:
+        """
+        Verified code hash of the vault, scopes every cached contract read.
+        """
+        return self.cache.code_hash(self.w3, self.contract_address)
+
+    @property
+    def w3(self):
+        return self.sw3._w3
+
+    @property
+    def contract(self) -> Contract:
+        if hasattr(self, 'contract_address'):
+            return self.w3.eth.contract(self.contract_address, abi=vault_abi.ethervault_2_abi)
+        raise exceptions.ContractNotConfigured('Please specify your contract address on '
+                                               'this network in your wallet file.')
+
+    def reset(self):
+        """
+        Forget per-command state (the state snapshot, the last built tx) so a
+        long running session starts every command from fresh chain state.
+        """
+        self._state = None
+        self._pipeline = None
+        self.sent = []
+
+    @property
+    def nonce_manager(self) -> NonceManager:
+        if self._nonce_manager is None:
+            self._nonce_manager = NonceManager(self.w3, self.network)
+        return self._nonce_manager
+
+    def tx_pipeline(self) -> TxPipeline:
+        """
+        Start a batched tx build. Queue any extra reads on the pipeline before
+        passing it to build_contract_interaction_tx.
+        """
+        hit, chain_id = self.cache.get(None, 'chain_id')
+        return TxPipeline(self.w3, self.sw3.account.address, self.contract, 'medium', chain_id if hit else None,
+                          get_fee_oracle(self.w3, self.network), self.nonce_manager)
+
+    def build_contract_interaction_tx(self, function: str, *args, pipeline: TxPipeline = None) -> dict:
+        """
+        Builds contract interaction transaction. All independent reads are sent in
+        one batch, the gas estimate follows in a second round trip.
+        :param function: The function to call
+        :param args: The arguments to that function (CONTRACT_NONCE is filled in with execNonce + 1)
+        :param pipeline: optional pipeline with prefetched reads queued
+        :return: dict tx object
+        """
+        if pipeline is None:
+            pipeline = self.tx_pipeline()
+        tx = pipeline.build(function, *args)
+        self.cache.put(None, 'chain_id', pipeline.chain_id, TTL['chain_id'])
+        self._pipeline = pipeline
+        return tx
+
+    def broadcast(self, tx: dict) -> (hex, bool):
+        """
+        Sign and send a built tx, then settle its nonce reservations: kept as sent
+        on success, handed back if the broadcast failed.
+        """
+        pipeline, self._pipeline = self._pipeline, None
+        with self.profiler.phase('broadcast'):
+            txid = self.sw3_wallet.broadcast_raw_tx(tx=tx, private=False)
+        if pipeline is not None:
+            if txid:
+                pipeline.mark_sent(str(txid))
+            else:
+                pipeline.release()
+        if txid:
+            self.sent.append((str(txid), tx, list(pipeline.reservations) if pipeline is not None else []))
+        return txid
+
+    def track_txs(self, txids: list = None, timeout: int = 600, bump_after: int = 3, max_fee_gwei: float = None) -> dict:
+        """
+        Follow txs until they are included, replacing stuck ones with bumped fees.
+        :param txids: tx hashes to follow, the txs sent by this command when None
+        :param bump_after: blocks before a pending tx is replaced, 0 never replaces
+        :param max_fee_gwei: never replace with a maxFeePerGas above this
+        :return: time to inclusion stats
+        """
+        tracker = TxTracker(self.w3, self.sw3.account, get_fee_oracle(self.w3, self.network), 'high', bump_after,
+                            max_fee=to_wei(max_fee_gwei, 'gwei') if max_fee_gwei else None,
+                            nonce_manager=self.nonce_manager)
+        if txids is None:
+            for txid, tx, reservations in self.sent:
+                tracker.add(txid, tx, reservations)
+        else:
+            for txid in txids:
+                tracker.add(txid)
+        print(f'[+] Tracking {len(tracker.txs)} tx(s), replacing after {bump_after or "never"} block(s).')
+
+        def on_change(tracked):
+            if tracked.status == MINED:
+                print(f'[+] {tracked.tx_hash} mined in block {tracked.block}, gas used {tracked.gas_used}.')
+            elif tracked.status == PENDING:
+                print(f'[+] Nonce {tracked.nonce} stuck, replaced with {tracked.tx_hash} (bump {tracked.bumps}).')
+            else:
+                print(f'[!] {tracked.tx_hash} {tracked.status}' +
+                      (f' in block {tracked.block}' if tracked.block else '') + '.')
+
+        ok = tracker.track(timeout, BLOCK_TIMES.get(self.network, 12) / 2, on_change)
+        stats = tracker.stats()
+        for tracked in tracker.pending:
+            print(f'[!] {tracked.tx_hash} still pending after {timeout}s' +
+                  (f': {tracked.error}' if tracked.error else '.'))
+        print(f'[+] {stats["counts"]}, {stats["replacements"]} replacement(s), {stats["round_trips"]} round trip(s).')
+        if 'seconds_p50' in stats:
+            print(f'[+] Time to inclusion: p50 {stats["seconds_p50"]}s, p90 {stats["seconds_p90"]}s, '
+                  f'max {stats["seconds_max"]}s ({stats.get("blocks_p50")} / {stats.get("blocks_max")} blocks).')
+        if not ok:
+            print('[!] Not every tx was mined successfully.')
+        return stats
+
+    def get_contract_nonce(self) -> int:
+        return self.get_property('execNonce') +1
+
+    def get_contract_balance(self) -> int:
+        return self.sw3.w3.eth.get_balance(self.contract_address)
+
+    def get_eth_account_balance(self, address):
+        return self.w3.eth.get_balance(to_checksum_address(address))
+
+    def deposit_ether(self, qty: float) -> (hex, bool):
+        """
+        Deposit in contract
+        :param qty:
+        :return: hex(txid)
+        """
+        # TODO: test this function
+        raw_qty = to_wei(qty, 'ether')
+        txid = self.sw3_wallet.send_eth(raw_qty, self.contract_address, False, False)
+        if txid:
+            print(f'[+] TXID: {txid}')
+
+    def add_tracked_token(self, token_address: (str, ChecksumAddress), price_feed_address: (str, ChecksumAddress)):
+        tx = self.build_contract_interaction_tx('trackToken', to_checksum_address(token_address),
+                                                to_checksum_address(price_feed_address), CONTRACT_NONCE)
+        return self.broadcast(tx)
+
+    def propose_withdrawal_raw(self, destination: ChecksumAddress, quantity: float, data: bytes = bytes('0x'.encode())):
+        raw_qty = int(self.sw3.w3.toWei(quantity, 'ether'))
+        pipeline = self.tx_pipeline()
+        balance = pipeline.request('eth_getBalance', [self.contract_address, 'latest'], lambda x: int(x, 16))
+        pipeline.require(balance, lambda bal: bal >= raw_qty, 'Insufficient contract balance.')
+        #tx = self.build_contract_interaction_tx('submitTx', args={'recipient': to_checksum_address(destination),
+        #                                                          'value': int(raw_qty), 'data': data,
+        #                                                          '_nonce': int(self.get_contract_nonce())})
+        tx = self.build_contract_interaction_tx('submitRawTx', to_checksum_address(destination), int(raw_qty), data,
+                                                CONTRACT_NONCE, pipeline=pipeline)
+        return self.broadcast(tx)
+
+    def propose_withdrawal_hashed(self, destination: ChecksumAddress, quantity: float, data: bytes) -> (hex, bool):
+        """
+        Queue a raw tx that only commits to keccak256(data) (submitTxHash). The calldata
+        goes to the local calldata store, `confirm` supplies it with the last approval.
+        """
+        raw_qty = int(self.sw3.w3.toWei(quantity, 'ether'))
+        pipeline = self.tx_pipeline()
+        balance = pipeline.request('eth_getBalance', [self.contract_address, 'latest'], lambda x: int(x, 16))
+        pipeline.require(balance, lambda bal: bal >= raw_qty, 'Insufficient contract balance.')
+        store = CalldataStore()
+        digest = store.put(data)
+        print(f'[+] {len(data)} bytes of calldata stored as {store.path(digest)}, '
+              f'hand that file to the signer who confirms last.')
+        tx = self.build_contract_interaction_tx('submitTxHash', to_checksum_address(destination), raw_qty, digest,
+                                                CONTRACT_NONCE, pipeline=pipeline)
+        return self.broadcast(tx)
+
+    def propose_token_withdrawal_via_raw(self, destination: ChecksumAddress, token_address: ChecksumAddress, quantity: float):
+        token = self.w3.eth.contract(token_address, abi=vault_abi.EIP20_ABI)
+        pipeline = self.tx_pipeline()
+        decimals = self.cache.deferred(pipeline, token, 'decimals', ttl=TTL['decimals'])
+        #data = token.functions.transfer(to_checksum_address(destination), raw_qty).encodeABI()
+        data = decimals.then(lambda d: token.encodeABI('transfer', (to_checksum_address(destination),
+                                                                    int(quantity * (10 ** d)))))
+        #tx = self.build_contract_interaction_tx('submitTx', args={'recipient': to_checksum_address(token_address),
+        #                                                          'value': 0, 'data': data,
+        #                                                          '_nonce': int(self.get_contract_nonce())})
+        tx = self.build_contract_interaction_tx('submitRawTx', to_checksum_address(token_address), 0, data,
+                                                CONTRACT_NONCE, pipeline=pipeline)
+        return self.broadcast(tx)
+
+    def assert_version(self, _version: int = 2) -> bool:
+        try:
+            assert (self.get_ethervault_version() == _version)
+        except AssertionError:
+            print('[!] Wrong version for function call.')
+            return False
+        return True
+
+    def withdraw_via_withdraw(self, token_address: (ChecksumAddress, None), destination: ChecksumAddress, amount: float):
+        pipeline = self.tx_pipeline()
+        version = self.cache.deferred(pipeline, self.contract, 'version', ttl=TTL['version'], code_hash=self.code_hash)
+        pipeline.require(version, lambda v: v == 2, '[!] Wrong version for function call.', fatal=False)
+        if token_address is None or int(token_address, 16) == 0:
+            raw_qty = int(amount * (10 ** 18))
+            token_address = '0x0000000000000000000000000000000000000000'
+        else:
+            token = self.w3.eth.contract(to_checksum_address(token_address), abi=vault_abi.EIP20_ABI)
+            decimals = self.cache.deferred(pipeline, token, 'decimals', ttl=TTL['decimals'])
+            raw_qty = decimals.then(lambda d: int(amount * (10 ** d)))
+        tx = self.build_contract_interaction_tx('withdraw', to_checksum_address(token_address), to_checksum_address(destination),
+                                                raw_qty, CONTRACT_NONCE, pipeline=pipeline)
+        return self.broadcast(tx)
+
+
+
+
+    def preflight_inputs(self, token_addresses: list, sender: ChecksumAddress = None) -> (VaultState, bool, dict):
+        """
+        Everything the withdraw() preflight reads, for any number of tokens, in one
+        batch at the snapshot block (decimals, feeds and prices come from the cache).
+        :param token_addresses: checksummed addresses, the zero address for ether
+        :return: state, sender is a signer, token -> (balance, feed, decimals, answer)
+        """
+        sender = to_checksum_address(sender or self.sw3.account.address)
+        state = self.state()
+        block = hex(state.block)
+        batch = RpcBatch(self.w3)
+        is_signer = batch.request('eth_getStorageAt', [self.contract_address,
+                                                       hex(mapping_slot(sender, SIGNER_MAPPING_SLOT)), block],
+                                  hex_to_int)
+        inputs = {}
+        for token_address in set(token_addresses):
+            eth = int(token_address, 16) == 0
+            decimals = 18 if eth else self.get_token_decimals(token_address)
+            feed = self.get_tracked_feed(token_address)
+            if eth:
+                balance = batch.request('eth_getBalance', [self.contract_address, block], hex_to_int)
+            else:
+                token = self.w3.eth.contract(token_address, abi=vault_abi.EIP20_ABI)
+                balance = batch.call(token, 'balanceOf', self.contract_address, block=block)
+            answer = None
+            if int(feed, 16):
+                hit, answer = self.cache.get(feed, 'latestRoundData')
+                if not hit:
+                    def store_answer(round_data, feed=feed):
+                        self.cache.put(feed, 'latestRoundData', round_data[1], TTL['latestRoundData'])
+                        return round_data[1]
+
+                    aggregator = self.w3.eth.contract(to_checksum_address(feed), abi=vault_abi.aggregator_v3_abi)
+                    answer = batch.call(aggregator, 'latestRoundData', block=block).then(store_answer)
+            inputs[token_address] = (balance, feed, decimals, answer)
+        batch.execute()
+        inputs = {token: tuple(resolve(value) for value in values) for token, values in inputs.items()}
+        return state, is_signer.value != 0, inputs
+
+    def preflight_withdraw(self, token_address: (ChecksumAddress, None), amount: float,
+                           sender: ChecksumAddress = None) -> preflight.PreflightResult:
+        """
+        Predict the outcome of EtherVaultL2.withdraw() from one state snapshot and
+        cached token/oracle reads, without estimating gas or signing anything.
+        """
+        eth = token_address is None or int(token_address, 16) == 0
+        token_address = preflight.ZERO_ADDRESS if eth else to_checksum_address(token_address)
+        state, is_signer, inputs = self.preflight_inputs([token_address], sender)
+        balance, feed, decimals, answer = inputs[token_address]
+        raw_qty = int(amount * (10 ** decimals))
+        return preflight.evaluate_withdraw(state, state.timestamp, is_signer, state['execNonce'] + 1,
+                                           token_address, raw_qty, balance, feed, decimals, answer)
+
+    def batch_withdraw(self, filename: str, resume_file: str = None, dry_run: bool = False, force: bool = False,
+                       wait: bool = True, timeout: int = 600) -> bool:
+        """
+        Sign and broadcast every withdrawal in a CSV/JSONL file in one pipelined run.
+        :param filename: token,recipient,amount rows
+        :param resume_file: progress file, defaults to <filename>.resume.json
+        :param dry_run: only run the preflight over the whole sequence
+        :param force: sign even if a row is predicted to revert
+        :param wait: poll receipts until everything is mined
+        :return: True if every withdrawal was sent (and mined when waiting)
+        """
+        from vault_lib import bulk
+
+        rows = bulk.read_rows(filename)
+        resume = bulk.ResumeFile(resume_file or f'{filename}.resume.json')
+        hit, chain_id = self.cache.get(None, 'chain_id')
+        runner = bulk.BulkWithdrawal(self.w3, self.contract, self.sw3.account, get_fee_oracle(self.w3, self.network),
+                                     chain_id=chain_id if hit else None, nonce_manager=self.nonce_manager)
+        if resume.entries:
+            if not resume.matches(bulk.fingerprint(rows)):
+                print(f'[!] {resume.filename} belongs to a different input file, refusing to continue.')
+                return False
+            print(f'[+] Resuming from {resume.filename}.')
+            runner.reconcile(resume)
+        else:
+            if self.get_ethervault_version() != 2:
+                print('[!] Batch withdrawals need EtherVaultL2.')
+                return False
+            state, is_signer, inputs = self.preflight_inputs([row['token'] for row in rows])
+            for row in rows:
+                row['raw_amount'] = bulk.to_raw_amount(row['amount'], inputs[row['token']][2])
+            states = []
+            results = preflight.evaluate_sequence(state, state.timestamp, is_signer,
+                                                  [(row['token'], row['raw_amount']) for row in rows], inputs,
+                                                  states)
+            reverts = 0
+            for row, result in zip(rows, results):
+                if result.outcome == preflight.REVERT:
+                    reverts += 1
+                    print(f'[!] Row {row["index"]} ({row["amount"]} of {row["token"]} to {row["recipient"]}) '
+                          f'will revert: {result.reason}')
+            queued = sum(result.outcome == preflight.QUEUE for result in results)
+            print(f'[+] Preflight: {len(rows) - queued - reverts} execute, {queued} queued, {reverts} revert.')
+            if dry_run:
+                return reverts == 0
+            if reverts and not force:
+                print('[!] Aborting, a revert fails every later row too. Use --force to sign anyway.')
+                return False
+            shapes = [(row['token'], result.outcome) for row, result in zip(rows, results)]
+            states = [dict(state.fields, **row_state) for row_state in states]
+            resume.start(bulk.fingerprint(rows), runner.sign(rows, shapes, states))
+            print(f'[+] Signed {len(rows)} withdrawals, progress in {resume.filename}')
+        sent, failed = runner.broadcast(resume)
+        print(f'[+] Broadcast {sent} transaction(s), {failed} failed.')
+        ok = not failed
+        if wait:
+            ok = runner.track(resume, timeout) and ok
+        print(f'[+] {runner.summary(resume)} in {runner.round_trips} round trip(s).')
+        return ok
+
+    def cancel_withdrawal(self, transaction_id: int) -> (hex, bool):
+        nonce = CONTRACT_NONCE
+        #tx = self.build_contract_interaction_tx('deleteTx', {'txid': transaction_id, '_nonce': nonce})
+        tx = self.build_contract_interaction_tx('deleteTx', transaction_id, nonce)
+        return self.broadcast(tx)
+
+    def is_legacy(self) -> bool:
+        """
+        Vault deployed before signer positions, see VaultState.legacy. Fixed by the bytecode.
+        """
+        return self.cache.fetch(self.contract_address, 'legacy', lambda: self.state().legacy,
+                                TTL['legacy'], self.code_hash)
+
+    def versioned_contract(self) -> Contract:
+        return self.w3.eth.contract(self.contract_address,
+                                    abi=vault_abi.abi_for_version(self.get_ethervault_version(), self.is_legacy()))
+
+    def pending_tx(self, transaction_id: int) -> dict:
+        """
+        :return: pendingTxs values by name
+        """
+        contract = self.versioned_contract()
+        fields = [o['name'] for o in contract.get_function_by_name('pendingTxs').abi['outputs']]
+        return dict(zip(fields, contract.functions.pendingTxs(int(transaction_id)).call()))
+
+    def needs_calldata(self, row: dict) -> bool:
+        """
+        :param row: pendingTxs values by name
+        :return: the tx commits to a calldata hash and the next approval executes it
+        """
+        return bool(row.get('hashed')) and row['numSigners'] + 1 >= self.state()['threshold']
+
+    def confirm_withdrawal(self, transaction_id) -> (hex, bool):
+        nonce = CONTRACT_NONCE
+        # legacy vaults have no calldata hashes, nothing to read first
+        row = {} if self.is_legacy() else self.pending_tx(transaction_id)
+        if row.get('hashed'):
+            # a tx from submitTxHash: re-supply its calldata from the local store
+            data = CalldataStore().get(row['dataHash'])
+            if data is not None:
+                tx = self.build_contract_interaction_tx('approveTxWithData', transaction_id, data, nonce)
+                return self.broadcast(tx)
+            if self.needs_calldata(row):
+                print(f'[!] txid {transaction_id} executes with this approval and needs the calldata hashing to '
+                      f'0x{bytes(row["dataHash"]).hex()}, import it first: vault.py calldata -f <file>')
+                return False
+        # tx = self.build_contract_interaction_tx('approveTx', {'txid': transaction_id, '_nonce': nonce})
+        tx = self.build_contract_interaction_tx('approveTx', transaction_id, nonce)
+        return self.broadcast(tx)
+
+    def confirm_withdrawals(self, transaction_ids: list) -> (hex, bool):
+        """
+        Approve several pending txs in one approveTxs call, for one contract nonce.
+        Ids that are not pending, or that would execute and need their calldata
+        re-supplied (approveTxWithData), are dropped first (one aggregated read); the
+        contract skips and logs any other it can not approve.
+        Legacy vaults have no approveTxs, there each id is confirmed on its own.
+        """
+        if self.is_legacy():
+            print('[!] This vault has no approveTxs, confirming one at a time.')
+            sent = [self.confirm_withdrawal(txid) for txid in transaction_ids]
+            for txid, ret in zip(transaction_ids[:-1], sent):
+                print(f'[+] txid {txid}: {ret or "failed to broadcast"}')
+            return sent[-1]
+        contract = self.versioned_contract()
+        fields = [o['name'] for o in contract.get_function_by_name('pendingTxs').abi['outputs']]
+        multicall = Multicall(self.w3)
+        for txid in transaction_ids:
+            multicall.add(contract, 'pendingTxs', txid)
+        rows = {txid: dict(zip(fields, values)) for txid, values in zip(transaction_ids, multicall.execute())
+                if values is not None}
+        pending = [txid for txid in transaction_ids if txid not in rows or int(rows[txid]['dest'], 16)]
+        missing = [txid for txid in transaction_ids if txid not in pending]
+        if missing:
+            print(f'[!] Not pending, skipping: {", ".join(map(str, missing))}')
+        hashed = [txid for txid in pending if txid in rows and self.needs_calldata(rows[txid])]
+        if hashed:
+            print(f'[!] Need their calldata, confirm them one at a time: {", ".join(map(str, hashed))}')
+            pending = [txid for txid in pending if txid not in hashed]
+        if not pending:
+            return False
+        if len(pending) == 1:
+            return self.confirm_withdrawal(pending[0])
+        tx = self.build_contract_interaction_tx('approveTxs', pending, CONTRACT_NONCE)
+        return self.broadcast(tx)
+
+    def check_bundle(self, bundle: dict) -> bool:
+        """
+        The bundle is for this vault, and this chain when connected.
+        """
+        if int(bundle['vault'], 16) != int(self.contract_address, 16):
+            print(f'[!] Bundle is for vault {bundle["vault"]}, not {self.contract_address}.')
+            return False
+        chain_id = self.check_w3_chain_id()
+        if chain_id and chain_id != bundle['chain_id']:
+            print(f'[!] Bundle is for chain {bundle["chain_id"]}, connected to {chain_id}.')
+            return False
+        return True
+
+    def sign_bundle(self, filename: str, recipient: ChecksumAddress = None, quantity: float = 0, data: bytes = b'',
+                    nonce: int = None) -> (dict, None):
+        """
+        Add this wallet's EIP-712 signature to a bundle file for executeWithSignatures,
+        creating the bundle when the file does not exist yet. Nothing is sent.
+        :param nonce: contract nonce the bundle is for (default: execNonce + 1)
+        :return: the signed bundle, None if the existing one is for another vault or chain
+        """
+        from vault_lib import signatures
+        if os.path.exists(filename):
+            bundle = signatures.load(filename)
+            signatures.verify(bundle)
+            if not self.check_bundle(bundle):
+                return None
+        else:
+            if recipient is None:
+                raise exceptions.SignatureBundleError(f'{filename} does not exist, a new bundle needs a recipient.')
+            bundle = signatures.new_bundle(self.contract_address, self.check_w3_chain_id(),
+                                           self.get_ethervault_version(), recipient, to_wei(quantity, 'ether'),
+                                           data, nonce or self.state()['execNonce'] + 1)
+        bundle = signatures.sign(bundle, self.sw3.account)
+        signatures.save(bundle, filename)
+        return bundle
+
+    def submit_bundle(self, filename: str) -> (hex, bool):
+        """
+        Send executeWithSignatures for a bundle. The nonce, the signers and the
+        contract's digest are checked first, in one batch at the snapshot block.
+        """
+        from vault_lib import signatures
+        bundle = signatures.load(filename)
+        signatures.verify(bundle)
+        if not self.check_bundle(bundle):
+            return False
+        sender = to_checksum_address(self.sw3.account.address)
+        packed, signers = signatures.pack(bundle, sender)
+        data = bytes.fromhex(bundle['data'][2:])
+        state = self.state()
+        block = hex(state.block)
+        contract = self.w3.eth.contract(self.contract_address, abi=vault_abi.abi_for_version(bundle['version']))
+        batch = RpcBatch(self.w3)
+        slots = {signer: batch.request('eth_getStorageAt', [self.contract_address,
+                                                            hex(mapping_slot(signer, SIGNER_MAPPING_SLOT)), block],
+                                       hex_to_int)
+                 for signer in [sender] + signers}
+        onchain_digest = batch.call(contract, 'executeDigest', bundle['dest'], bundle['value'], data, bundle['nonce'],
+                                    block=block)
+        batch.execute()
+
+        problems = []
+        if bundle['nonce'] != state['execNonce'] + 1:
+            problems.append(f'the bundle is for nonce {bundle["nonce"]}, the vault is at {state["execNonce"] + 1}')
+        if state['paused']:
+            problems.append('the vault is paused')
+        not_signers = [signer for signer, slot in slots.items() if slot.value == 0]
+        if not_signers:
+            problems.append(f'not signers of this vault: {", ".join(not_signers)}')
+        if len(signers) + 1 < state['threshold']:
+            problems.append(f'{len(signers) + 1} approval(s) with yours, the threshold is {state["threshold"]}')
+        try:
+            if onchain_digest.value != signatures.digest(bundle):
+                problems.append('the vault computes another digest (domain or version mismatch)')
+        except exceptions.RpcBatchError:
+            problems.append('the vault has no executeWithSignatures')
+        for problem in problems:
+            print(f'[!] Not submitting: {problem}.')
+        if problems:
+            return False
+        tx = self.build_contract_interaction_tx('executeWithSignatures', bundle['dest'], bundle['value'], data,
+                                                bundle['nonce'], packed)
+        return self.broadcast(tx)
+
+    def initiate_proposal(self, signer_address: ChecksumAddress, limit: float, threshold: int, paused: bool = False) -> (hex, bool):
+        #tx = self.build_contract_interaction_tx('newProposal', {'_signer': signer_address, '_limit': limit,
+        #                                                        '_threshold': threshold,
+        #                                                        '_nonce': self.get_contract_nonce()})
+        tx = self.build_contract_interaction_tx('newProposal', signer_address, limit, threshold, paused, CONTRACT_NONCE)
+        return self.broadcast(tx)
+
+    def approve_proposal(self, proposal_id) -> (hex, bool):
+        #tx = self.build_contract_interaction_tx('approveProposal', {'_proposalId': proposal_id,
+        #                                                            '_nonce': self.get_contract_nonce()})
+        tx = self.build_contract_interaction_tx('approveProposal', proposal_id, CONTRACT_NONCE)
+        return self.broadcast(tx)
+
+    def revoke_proposal(self, proposal_id) -> (hex, bool):
+        #tx = self.build_contract_interaction_tx('deleteProposal', {'_proposalId': proposal_id,
+        #                                                           '_nonce': self.get_contract_nonce()})
+        tx = self.build_contract_interaction_tx('deleteProposal', proposal_id, CONTRACT_NONCE)
+        return self.broadcast(tx)
+
+    def get_ethervault_version(self):
+        return self.cache.fetch(self.contract_address, 'version', lambda: self.state()['version'],
+                                TTL['version'], self.code_hash)
+
+    def state(self, refresh: bool = False) -> VaultState:
+        """
+        Packed storage snapshot of the vault, read once per command (at one pinned block)
+        unless refresh is set.
+        """
+        if self._state is None or refresh:
+            hit, version = self.cache.get(self.contract_address, 'version', self.code_hash)
+            self._state = VaultState.fetch(self.w3, self.contract_address, version if hit else None)
+        return self._state
+
+    def portfolio(self, token_file: str = None) -> 'Portfolio':
+        """
+        Ether and token holdings with USD values and the remaining daily allowance.
+        :param token_file: extra (untracked) tokens, see portfolio.read_token_list
+        """
+        from vault_lib import portfolio
+        tokens = portfolio.read_token_list(token_file) if token_file else {}
+        code_hash = self.code_hash
+        known = {to_checksum_address(token): feed for token, feed in
+                 self.cache.items(self.contract_address, 'trackedTokens:', code_hash).items()}
+        version = self.get_ethervault_version()
+        contract = self.versioned_contract()
+        result = portfolio.fetch_portfolio(self.w3, contract, tokens, known, version)
+        for token, feed in result.tracked_feeds.items():
+            if token not in known:
+                self.cache.put(self.contract_address, f'trackedTokens:{token.lower()}', feed, TTL['trackedTokens'],
+                               code_hash)
+        return result
+
+    def get_token_decimals(self, token_address: ChecksumAddress) -> int:
+        token = self.w3.eth.contract(to_checksum_address(token_address), abi=vault_abi.EIP20_ABI)
+        return self.cache.fetch(token.address, 'decimals', lambda: token.functions.decimals().call(),
+                                TTL['decimals'])
+
+    def get_tracked_feed(self, token_address: ChecksumAddress) -> str:
+        """
+        Chainlink feed configured for a token in EtherVaultL2, zero address if untracked.
+        """
+        token_address = to_checksum_address(token_address)
+        return self.cache.fetch(self.contract_address, f'trackedTokens:{token_address.lower()}',
+                                lambda: self.get_property('trackedTokens', token_address),
+                                TTL['trackedTokens'], self.code_hash)
+
+    def indexed_contract(self, offline: bool = False) -> (Contract, None):
+        """
+        The vault with the abi for the local indexes. Online the version is looked up and stored
+        in the index database, offline it is read back from there.
+        :return: None offline when this vault was never synced
+        """
+        from vault_lib import pending_index
+        if offline:
+            stored = pending_index.indexed_version(self.network, self.contract_address)
+            if stored is None:
+                print(f'[!] No local index for {self.contract_address} yet, sync it once without -o.')
+                return None
+            version, legacy = stored
+        else:
+            version, legacy = self.get_ethervault_version(), self.is_legacy()
+            pending_index.remember_version(self.network, self.contract_address, version, legacy)
+        return self.w3.eth.contract(self.contract_address, abi=vault_abi.abi_for_version(version, legacy))
+
+    def pending_index(self, offline: bool = False) -> ('PendingIndex', None):
+        from vault_lib.pending_index import PendingIndex
+        contract = self.indexed_contract(offline)
+        return PendingIndex(self.w3, contract, self.network) if contract is not None else None
+
+    def list_pending(self, sync: bool = True):
+        """
+        Print the pending transaction and proposal queue from the local index.
+        :param sync: refresh the index from chain first
+        """
+        index = self.pending_index(offline=not sync)
+        if index is None:
+            return [], []
+        if sync:
+            stats = index.sync()
+            print(f'[+] Synced to block {stats["block"]}: read {stats["txs_read"]} txs, '
+                  f'{stats["proposals_read"]} proposals in {stats["round_trips"]} round trip(s) '
+                  f'({stats["seconds"]}s)')
+        txs, proposals = index.pending_txs(), index.pending_proposals()
+        print(f'[+] Pending transactions: {len(txs)}')
+        for row in txs:
+            print(f'[+] txid {row["txid"]}: dest {row["dest"]} value {row["value"]} '
+                  f'data {len(row["data"] or b"")} bytes, approvals {row["num_signers"]}, proposer {row["proposer"]}')
+        print(f'[+] Pending proposals: {len(proposals)}')
+        for row in proposals:
+            print(f'[+] proposal {row["proposal_id"]}: signer {row["modified_signer"]} '
+                  f'threshold {row["new_threshold"]} limit {row["new_limit"]} paused {bool(row["paused"])}, '
+                  f'approvals {row["num_signers"]}, proposer {row["proposer"]}')
+        return txs, proposals
+
+    def history(self, from_block: int = None, names: list = None, follow: bool = False, interval: float = None,
+                offline: bool = False, as_json: bool = False):
+        """
+        Print the vault's events from the local log index, syncing it first.
+        :param from_block: first block to index on the first sync, and to print from
+        :param names: only these events
+        :param follow: keep printing new events as blocks come in
+        :param offline: answer from the index without syncing it
+        """
+        from vault_lib.log_indexer import LogIndexer, format_event
+        contract = self.indexed_contract(offline and not follow)
+        if contract is None:
+            return
+        indexer = LogIndexer(self.w3, contract, self.network)
+
+        def show(event: dict):
+            if not names or event['event'] in names:
+                print(json.dumps(event) if as_json else format_event(event))
+
+        if not offline and not follow:
+            stats = indexer.sync(from_block)
+            print(f'[+] Indexed blocks {stats["from_block"]}-{stats["to_block"]}: {stats["events"]} events, '
+                  f'{stats["ranges"]} ranges ({stats["splits"]} split) in {stats["round_trips"]} round trip(s) '
+                  f'({stats["seconds"]}s)')
+        for event in indexer.events(names, from_block or 0):
+            show(event)
+        if follow:
+            interval = interval or BLOCK_TIMES.get(self.network, 12)
+            try:
+                indexer.follow(interval, show, from_block)
+            except KeyboardInterrupt:
+                pass
+
+    def watch(self, hooks: list = None, thresholds: list = None, interval: float = None, out_file: str = None):
+        """
+        Follow new blocks and print vault events as json lines until interrupted.
+        :param hooks: "EVENT=command" or "command" (every event), see watcher.parse_hooks
+        :param thresholds: daily limit utilisation ratios to report, ie: [0.8]
+        :param out_file: also append the events to this file
+        """
+        from vault_lib import watcher
+        version = self.get_ethervault_version()
+        contract = self.versioned_contract()
+        vault_watcher = watcher.VaultWatcher(self.w3, contract, self.network, version, tuple(thresholds or (0.8,)))
+        runner = watcher.HookRunner(watcher.parse_hooks(hooks))
+        interval = interval or BLOCK_TIMES.get(self.network, 12) / 2
+        out = open(out_file, 'a') if out_file else None
+        state = vault_watcher.start()
+        print(f'[+] Watching {self.contract_address} from block {state.block}: {len(vault_watcher.txs)} pending txs, '
+              f'{len(vault_watcher.proposals)} pending proposals', file=sys.stderr)
+        try:
+            while True:
+                for event in vault_watcher.poll():
+                    line = json.dumps(event)
+                    print(line, flush=True)
+                    if out is not None:
+                        out.write(line + '\n')
+                        out.flush()
+                    runner.run(event)
+                runner.reap()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print(f'[+] Stopped at block {vault_watcher.state.block} after {vault_watcher.reads} reads.',
+                  file=sys.stderr)
+        finally:
+            if out is not None:
+                out.close()
+
+    def fleet(self, inventory_file: str, operations: list, per_endpoint: int, out_file: str = None,
+              dry_run: bool = False) -> list:
+        """
+        Run operations over every vault of an inventory concurrently and print
+        each vault's result as it completes.
+        :param out_file: also append results to this file, one json line per vault
+        """
+        import asyncio
+        from vault_lib import fleet
+        vaults = fleet.read_inventory(inventory_file)
+        endpoints = {}
+        for network in {vault['network'] for vault in vaults}:
+            if network == self.network:
+                endpoints[network] = str(self.w3.provider.endpoint_uri)
+            elif load_endpoints(network):
+                endpoints[network] = load_endpoints(network)[0]
+        account = self.sw3.account if 'approve' in operations else None
+        out = open(out_file, 'a') if out_file else None
+
+        def on_result(result: dict):
+            print(fleet.format_result(result))
+            if out is not None:
+                out.write(json.dumps(result) + '\n')
+                out.flush()
+
+        started = time.perf_counter()
+        try:
+            results = asyncio.run(fleet.Fleet(vaults, endpoints, account, per_endpoint).run(operations, dry_run,
+                                                                                            on_result))
+        finally:
+            if out is not None:
+                out.close()
+        failed = sum('error' in result for result in results)
+        print(f'[+] {len(results)} vault(s) in {time.perf_counter() - started:.2f}s '
+              f'(sum of vault times {sum(r["seconds"] for r in results):.2f}s), {failed} failed.')
+        return results
+
+    def reconcile_nonces(self) -> dict:
+        """
+        Reconcile this host's nonce reservations for the vault and the wallet
+        account with the chain and print what is still outstanding.
+        :return: scope -> reconcile stats
+        """
+        batch = RpcBatch(self.w3)
+        exec_nonce = batch.call(self.contract, 'execNonce')
+        account_nonce = batch.request('eth_getTransactionCount', [self.sw3.account.address, 'latest'], hex_to_int)
+        batch.execute()
+        report = {}
+        for scope, chain_next in ((self.nonce_manager.contract_scope(self.contract_address), exec_nonce.value + 1),
+                                  (self.nonce_manager.account_scope(self.sw3.account.address), account_nonce.value)):
+            stats = report[scope] = self.nonce_manager.reconcile(scope, chain_next)
+            print(f'[+] {scope}: next on chain {chain_next}, {stats["confirmed"]} confirmed, '
+                  f'{stats["expired"]} expired, {len(stats["dropped"])} dropped {stats["dropped"]}, '
+                  f'{len(stats["reverted"])} reverted {stats["reverted"]}')
+            for row in self.nonce_manager.reservations(scope):
+                print(f'[+]   nonce {row["nonce"]}: {row["status"]} by {row["owner"]} {row["tx_hash"] or ""}')
+            if stats['gaps']:
+                print(f'[!]   gaps {stats["gaps"]}: reservations above them can not be mined yet.')
+        return report
+
+    def get_property(self, name, _id=None):
+        if _id is None and name in VaultState.FIELDS:
+            return self.state()[name]
+        # per id structs differ between versions and legacy vaults
+        contract = self.versioned_contract()
+        method = getattr(contract.functions, name)
+        if _id is None:
+            return method().call()
+        return method(_id).call()
+
+
+def preflight_ok(result: preflight.PreflightResult, args) -> bool:
+    """
+    Print the preflight report and decide whether to go on and sign.
+    """
+    preflight.print_report(result)
+    if args.dry_run:
+        return False
+    if result.outcome == preflight.REVERT and not args.force:
+        print('[!] Aborting, use --force to broadcast anyway.')
+        return False
+    return True
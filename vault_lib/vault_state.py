@@ -0,0 +1,155 @@
+"""
+Snapshot of a vault's packed state variables read straight from storage.
+
+Both contracts pack version, paused, mutex, signerCount, threshold, proposalId,
+execNonce, txCount, lastDay and signerSlots into slot 0, and dailyLimit/spentToday
+into slot 1. Reading those two slots at a pinned block replaces nine or more getter
+calls and gives every property read in a command the same consistent view.
+"""
+from eth_typing import ChecksumAddress
+from web3 import Web3
+
+from vault_lib.rpc_batch import RpcBatch, hex_to_int
+
+""" Storage layout per contract version: name -> (slot, byte offset, size in bytes) """
+LAYOUTS = {
+    1: {
+        'paused': (0, 0, 1),
+        'version': (0, 1, 1),
+        'mutex': (0, 2, 1),
+        'signerCount': (0, 3, 1),
+        'threshold': (0, 4, 1),
+        'proposalId': (0, 5, 2),
+        'execNonce': (0, 7, 4),
+        'txCount': (0, 11, 4),
+        'lastDay': (0, 15, 4),
+        'signerSlots': (0, 19, 1),
+        'dailyLimit': (1, 0, 16),
+        'spentToday': (1, 16, 16),
+    },
+    2: {
+        'version': (0, 0, 1),
+        'paused': (0, 1, 1),
+        'mutex': (0, 2, 1),
+        'signerCount': (0, 3, 1),
+        'threshold': (0, 4, 1),
+        'proposalId': (0, 5, 2),
+        'execNonce': (0, 7, 4),
+        'txCount': (0, 11, 4),
+        'lastDay': (0, 15, 4),
+        'signerSlots': (0, 19, 1),
+        'dailyLimit': (1, 0, 16),
+        'spentToday': (1, 16, 16),
+    },
+}
+BOOL_FIELDS = ('paused',)
+SLOTS = (0, 1)
+""" mapping (address => uint8) isSigner (signer position, 0 if not a signer) is declared right after the packed
+slots in both versions """
+SIGNER_MAPPING_SLOT = 2
+
+
+def mapping_slot(key: str, slot: int) -> int:
+    """
+    Storage slot of mapping[key] for an address keyed mapping declared at `slot`.
+    """
+    return int.from_bytes(Web3.keccak(bytes.fromhex(key[2:].rjust(64, '0')) + slot.to_bytes(32, 'big')), 'big')
+
+
+def detect_version(slot0: int) -> int:
+    """
+    EtherVaultL2 stores version (2) in the lowest byte, Ethervault stores a bool there
+    and its version (1) in the next one.
+    """
+    return 2 if slot0 & 0xff == 2 else 1
+
+
+def decode_slots(slots: dict, version: int = None) -> dict:
+    """
+    :param slots: slot number -> int value
+    :param version: contract version, detected from slot 0 if None
+    :return: field name -> value
+    """
+    if version is None:
+        version = detect_version(slots[0])
+    state = {}
+    for name, (slot, offset, size) in LAYOUTS[version].items():
+        value = (slots[slot] >> (offset * 8)) & ((1 << (size * 8)) - 1)
+        state[name] = bool(value) if name in BOOL_FIELDS else value
+    return state
+
+
+def encode_slots(fields: dict, version: int) -> dict:
+    """
+    Inverse of decode_slots, ie: for a state override of the packed slots.
+    :param fields: field name -> value, every field of the version's layout
+    :return: slot number -> int value
+    """
+    slots = {slot: 0 for slot in SLOTS}
+    for name, (slot, offset, size) in LAYOUTS[version].items():
+        slots[slot] |= (int(fields[name]) & ((1 << (size * 8)) - 1)) << (offset * 8)
+    return slots
+
+
+class VaultState:
+    FIELDS = tuple(LAYOUTS[2])
+
+    def __init__(self, fields: dict, block: int, timestamp: int):
+        """
+        Decoded vault state at one block.
+        :param fields: decoded field values
+        :param block: block number the slots were read at
+        :param timestamp: timestamp of that block
+        """
+        self.fields = fields
+        self.block = block
+        self.timestamp = timestamp
+
+    def __getitem__(self, name: str):
+        return self.fields[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.fields
+
+    @property
+    def day(self) -> int:
+        return self.timestamp // 86400
+
+    @property
+    def effective_spent_today(self) -> int:
+        """
+        spentToday as the contract will see it, it resets on the first limited withdrawal of a new day.
+        """
+        return 0 if self.day > self['lastDay'] else self['spentToday']
+
+    @property
+    def legacy(self) -> bool:
+        """
+        Bytecode from before signer positions: the constructor gives every signer a position,
+        so signerSlots is only ever 0 where that byte is unused.
+        """
+        return self['signerSlots'] == 0
+
+    def as_dict(self) -> dict:
+        return dict(self.fields, block=self.block, timestamp=self.timestamp)
+
+    @classmethod
+    def fetch(cls, w3: Web3, address: ChecksumAddress, version: int = None, block: int = None) -> 'VaultState':
+        """
+        Read the packed slots. With a known block this is a single batch, otherwise
+        the latest block is pinned first so both slots come from the same state.
+        """
+        batch = RpcBatch(w3)
+        if block is None:
+            header = batch.request('eth_getBlockByNumber', ['latest', False])
+            batch.execute()
+            block, timestamp = hex_to_int(header.value['number']), hex_to_int(header.value['timestamp'])
+        else:
+            header = batch.request('eth_getBlockByNumber', [hex(block), False])
+            timestamp = None
+        slots = {slot: batch.request('eth_getStorageAt', [address, hex(slot), hex(block)], hex_to_int)
+                 for slot in SLOTS}
+        batch.execute()
+        if timestamp is None:
+            timestamp = hex_to_int(header.value['timestamp'])
+        return cls(decode_slots({slot: d.value for slot, d in slots.items()}, version), block, timestamp)
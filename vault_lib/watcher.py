@@ -0,0 +1,233 @@
+"""
+Long running vault watcher: follows new blocks and reports what changed.
+
+Each poll is one eth_blockNumber. For a new head, one batch reads the header
+and the two packed state slots at that block, and the decoded state is diffed
+with the previous one. Only when txCount, proposalId or execNonce moved does a
+second batch go out, pinned to the same block: the new and still open pending
+entries (planned by the pending index) in one Multicall3 aggregate, plus an
+eth_getLogs over the blocks since the last head that tells executions from
+deletions. Blocks that pass between polls are diffed as one step, so the cost
+per poll stays the same however long the vault's history is.
+
+Events are dicts with at least "event", "vault" and "block". Hook commands get
+the event as json on stdin and its name in $ETHERVAULT_EVENT.
+"""
+import json
+import os
+import subprocess
+import time
+
+from web3 import Web3
+from web3.contract import Contract
+
+from vault_lib import exceptions
+from vault_lib.log_indexer import event_decoders, decode_log
+from vault_lib.multicall import Multicall
+from vault_lib.pending_index import PendingIndex
+from vault_lib.rpc_batch import RpcBatch
+from vault_lib.vault_state import VaultState
+
+NEW_TX = 'pending_tx'
+TX_APPROVED = 'tx_approved'
+TX_EXECUTED = 'tx_executed'
+TX_DELETED = 'tx_deleted'
+""" An entry left the queue and no log says how (contracts deployed before events) """
+TX_CLOSED = 'tx_closed'
+NEW_PROPOSAL = 'proposal'
+PROPOSAL_APPROVED = 'proposal_approved'
+PROPOSAL_EXECUTED = 'proposal_executed'
+PROPOSAL_DELETED = 'proposal_deleted'
+PROPOSAL_CLOSED = 'proposal_closed'
+PAUSED = 'paused'
+UNPAUSED = 'unpaused'
+LIMIT_USED = 'limit_utilisation'
+EVENTS = (NEW_TX, TX_APPROVED, TX_EXECUTED, TX_DELETED, TX_CLOSED, NEW_PROPOSAL, PROPOSAL_APPROVED,
+          PROPOSAL_EXECUTED, PROPOSAL_DELETED, PROPOSAL_CLOSED, PAUSED, UNPAUSED, LIMIT_USED)
+""" Fields whose change means pending entries have to be looked at """
+QUEUE_FIELDS = ('txCount', 'proposalId', 'execNonce')
+HOOK_TIMEOUT = 60
+
+
+def utilisation(state: VaultState) -> float:
+    if not state['dailyLimit']:
+        return 0.0
+    return state.effective_spent_today / state['dailyLimit']
+
+
+class VaultWatcher:
+    def __init__(self, w3: Web3, contract: Contract, network: str, version: int = 2, thresholds: tuple = (0.8,)):
+        """
+        :param contract: the vault, with the abi matching its version
+        :param version: vault version, for the storage layout
+        :param thresholds: daily limit utilisation ratios to report when crossed upwards, ie: 0.8
+        """
+        self.w3 = w3
+        self.contract = contract
+        self.network = network
+        self.version = version
+        self.thresholds = sorted(thresholds)
+        self.index = PendingIndex(w3, contract, network)
+        self.decoders = event_decoders(contract.abi)
+        self.state = None
+        self.txs = {}
+        self.proposals = {}
+        self.reads = 0
+
+    def _event(self, name: str, block: int, **fields) -> dict:
+        return dict({'event': name, 'vault': self.contract.address, 'network': self.network, 'block': block},
+                    **fields)
+
+    def _snapshot(self):
+        self.txs = {row['txid']: dict(row) for row in self.index.pending_txs()}
+        self.proposals = {row['proposal_id']: dict(row) for row in self.index.pending_proposals()}
+
+    def start(self) -> VaultState:
+        """
+        Bring the pending index up to date and take the starting state, nothing is reported for it.
+        """
+        self.index.sync()
+        self.state = VaultState.fetch(self.w3, self.contract.address, self.version, self.w3.eth.block_number)
+        self._snapshot()
+        return self.state
+
+    def poll(self) -> list:
+        """
+        :return: events since the last poll, [] if there is no new block
+        """
+        head = self.w3.eth.block_number
+        self.reads += 1
+        if head <= self.state.block:
+            return []
+        old, new = self.state, VaultState.fetch(self.w3, self.contract.address, self.version, head)
+        self.reads += 3
+        events = self._diff_state(old, new)
+        if any(old[field] != new[field] for field in QUEUE_FIELDS):
+            events += self._diff_queue(old, new)
+        self.state = new
+        return events
+
+    def _diff_state(self, old: VaultState, new: VaultState) -> list:
+        events = []
+        if old['paused'] != new['paused']:
+            events.append(self._event(PAUSED if new['paused'] else UNPAUSED, new.block))
+        before, after = utilisation(old), utilisation(new)
+        for threshold in self.thresholds:
+            if before < threshold <= after:
+                events.append(self._event(LIMIT_USED, new.block, threshold=threshold, ratio=round(after, 4),
+                                          spent=new.effective_spent_today, limit=new['dailyLimit']))
+        return events
+
+    def _diff_queue(self, old: VaultState, new: VaultState) -> list:
+        tx_ids, proposal_ids = self.index.plan(new['txCount'], new['proposalId'])
+        multicall = Multicall(self.w3)
+        for txid in tx_ids:
+            multicall.add(self.contract, 'pendingTxs', txid)
+        for pid in proposal_ids:
+            multicall.add(self.contract, 'pendingProposals', pid)
+        batch = RpcBatch(self.w3)
+        logs = batch.request('eth_getLogs', [{'address': self.contract.address, 'fromBlock': hex(old.block + 1),
+                                              'toBlock': hex(new.block)}])
+        results = multicall.execute(new.block, batch)
+        self.reads += 2
+        self.index.apply(new.block, new['txCount'], new['proposalId'], tx_ids, proposal_ids, results)
+        try:
+            decoded = [decode_log(self.w3, self.decoders, log) for log in logs.value or []]
+        except exceptions.RpcBatchError:
+            # the node refused the range, entries that left the queue are reported as closed
+            decoded = []
+        decoded = [event for event in decoded if event is not None]
+
+        before_txs, before_proposals = self.txs, self.proposals
+        self._snapshot()
+        events = []
+        for txid, row in self.txs.items():
+            fields = {'txid': txid, 'dest': row['dest'], 'value': row['value'], 'data_bytes': len(row['data'] or b''),
+                      'approvals': row['num_signers'], 'proposer': row['proposer']}
+            if txid not in before_txs:
+                events.append(self._event(NEW_TX, new.block, **fields))
+            elif row['num_signers'] > before_txs[txid]['num_signers']:
+                events.append(self._event(TX_APPROVED, new.block, **fields))
+        for pid, row in self.proposals.items():
+            fields = {'proposal_id': pid, 'signer': row['modified_signer'], 'threshold': row['new_threshold'],
+                      'limit': row['new_limit'], 'paused': bool(row['paused']), 'approvals': row['num_signers'],
+                      'proposer': row['proposer']}
+            if pid not in before_proposals:
+                events.append(self._event(NEW_PROPOSAL, new.block, **fields))
+            elif row['num_signers'] > before_proposals[pid]['num_signers']:
+                events.append(self._event(PROPOSAL_APPROVED, new.block, **fields))
+
+        explained_txs, explained_proposals = set(), set()
+        for log in decoded:
+            args, name = log['args'], log['event']
+            if name == 'Execution':
+                explained_txs.add(args['txid'])
+                events.append(self._event(TX_EXECUTED, log['block'], txid=args['txid'], dest=args['dest'],
+                                          value=str(args['value']), tx_hash=log['tx_hash']))
+            elif name == 'Withdrawal':
+                events.append(self._event(TX_EXECUTED, log['block'], txid=0, token=args['token'],
+                                          dest=args['destination'], value=str(args['amount']),
+                                          usd=args['dollarValue'], tx_hash=log['tx_hash']))
+            elif name == 'SignedExecution':
+                events.append(self._event(TX_EXECUTED, log['block'], txid=0, nonce=args['nonce'], dest=args['dest'],
+                                          value=str(args['value']), approvals=args['approvals'],
+                                          tx_hash=log['tx_hash']))
+            elif name == 'Deletion':
+                explained_txs.add(args['txid'])
+                events.append(self._event(TX_DELETED, log['block'], txid=args['txid'], tx_hash=log['tx_hash']))
+            elif name in ('ProposalExecution', 'ProposalDeletion'):
+                explained_proposals.add(args['proposalId'])
+                events.append(self._event(PROPOSAL_EXECUTED if name == 'ProposalExecution' else PROPOSAL_DELETED,
+                                          log['block'], proposal_id=args['proposalId'], tx_hash=log['tx_hash']))
+        for txid in set(before_txs) - set(self.txs) - explained_txs:
+            events.append(self._event(TX_CLOSED, new.block, txid=txid))
+        for pid in set(before_proposals) - set(self.proposals) - explained_proposals:
+            events.append(self._event(PROPOSAL_CLOSED, new.block, proposal_id=pid))
+        return events
+
+
+def parse_hooks(specs: list) -> dict:
+    """
+    :param specs: "EVENT=command" for one event, or "command" for every event
+    :return: event name (None for all) -> [commands]
+    """
+    hooks = {}
+    for spec in specs or []:
+        name, sep, command = spec.partition('=')
+        if sep and name in EVENTS:
+            hooks.setdefault(name, []).append(command)
+        else:
+            hooks.setdefault(None, []).append(spec)
+    return hooks
+
+
+class HookRunner:
+    def __init__(self, hooks: dict):
+        """
+        Runs hook commands in the background, a slow hook never holds up the watcher.
+        """
+        self.hooks = hooks
+        self.running = []
+
+    def run(self, event: dict):
+        for command in self.hooks.get(event['event'], []) + self.hooks.get(None, []):
+            env = dict(os.environ, ETHERVAULT_EVENT=event['event'])
+            proc = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE, env=env)
+            try:
+                proc.stdin.write(json.dumps(event).encode() + b'\n')
+                proc.stdin.close()
+            except OSError:
+                pass
+            self.running.append((proc, time.time()))
+        self.reap()
+
+    def reap(self):
+        still = []
+        for proc, started in self.running:
+            if proc.poll() is None:
+                if time.time() - started > HOOK_TIMEOUT:
+                    proc.kill()
+                    proc.wait()
+                    continue
+                still.append((proc, started))
+        self.running = still